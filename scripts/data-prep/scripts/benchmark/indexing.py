@@ -0,0 +1,164 @@
+"""
+Indexing throughput and memory of data-prep on a synthetic corpus, the vector store and docstore discard the
+writes and the embedding model is a deterministic fake so only the pipeline itself is measured.
+
+Example:
+    python scripts/benchmark/indexing.py --lines 1000000 --workers 2
+    python scripts/benchmark/indexing.py --lines 1000000 --mode memory
+    python scripts/benchmark/indexing.py --lines 100000 --mode incremental --change-rate 0.01
+
+Mode "stream" runs index_dataset_to_retriever, mode "memory" the previous flow that loads the whole dataset,
+builds every Document and embeds all sub-docs in one call. Peak RSS includes the embedding worker processes.
+Mode "incremental" indexes with a manifest, changes, adds and removes change-rate of the lines and indexes again.
+"""
+import argparse
+import json
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "src"))
+
+from rag.indexing import (  # noqa: E402
+    index_dataset_to_retriever,
+    read_json_dataset,
+    transform_to_document,
+)
+from rag.manifest import IndexManifest  # noqa: E402
+
+
+class FakeEmbeddings(DeterministicFakeEmbedding):
+    """Return float lists like HuggingFaceEmbeddings, the base class returns lists of numpy scalars."""
+    def _get_embedding(self, seed: int):
+        np.random.seed(seed)
+        return np.random.normal(size=self.size).tolist()
+
+
+class NullVectorStore:
+    index_name = "benchmark"
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+        self.count = 0
+        self.deleted = 0
+
+    def add_embeddings(self, text_embeddings, metadatas=None, ids=None, bulk_size=500, **kwargs):
+        self.count += len(list(text_embeddings))
+
+    def delete(self, ids):
+        self.deleted += len(ids)
+
+    def index_exists(self):
+        return self.count > 0
+
+    def delete_index(self):
+        self.count = 0
+
+
+class NullDocStore:
+    def __init__(self):
+        self.count = 0
+        self.deleted = 0
+
+    def mset(self, key_value_pairs):
+        self.count += len(key_value_pairs)
+
+    def mdelete(self, keys):
+        self.deleted += len(keys)
+
+
+def write_corpus(path: str, lines: int, change_rate: float = 0.0):
+    """A change_rate above 0 edits a line of that share of docs, drops as many docs and adds as many new ones."""
+    step = int(1 / change_rate) if change_rate else 0
+    with open(path, "w") as f:
+        for i in range(lines + (lines // step if step else 0)):
+            if step and i % step == 1 and i < lines:
+                continue
+            edited = " (edited)" if step and i % step == 0 else ""
+            f.write(json.dumps({
+                "doc_id": f"doc-{i}",
+                "question": [f"question {i} about deposit account{edited}", f"how to open account {i}"],
+                "answer": [f"answer {i}: please contact the branch with your id card"],
+            }, ensure_ascii=False) + "\n")
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss + resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--mode", choices=["stream", "memory", "incremental"], default="stream")
+    parser.add_argument("--change-rate", type=float, default=0.01)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--bulk-size", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--max-pending", type=int, default=4)
+    args = parser.parse_args()
+
+    embeddings = FakeEmbeddings(size=args.dim)
+    retriever = SimpleNamespace(vectorstore=NullVectorStore(embeddings), docstore=NullDocStore())
+
+    def index(path, manifest=None):
+        return index_dataset_to_retriever(
+            retriever,
+            path,
+            "doc_id",
+            embeddings,
+            bulk_size=args.bulk_size,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            writers=args.writers,
+            max_pending=args.max_pending,
+            manifest=manifest,
+        )
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = str(Path(tmp_dir) / "corpus.jsonl")
+        write_corpus(path, args.lines)
+        start_rss = peak_rss_mb()
+
+        start_time = time.perf_counter()
+        if args.mode == "stream":
+            index(path)
+        elif args.mode == "memory":
+            docs = read_json_dataset(path)
+            parsed_sub_docs, parsed_docs = transform_to_document(docs)
+            vectors = embeddings.embed_documents([d.page_content for d in parsed_sub_docs])
+            retriever.vectorstore.add_embeddings(zip([d.page_content for d in parsed_sub_docs], vectors))
+            retriever.docstore.mset(list(zip([d["doc_id"] for d in docs], parsed_docs)))
+        else:
+            manifest_path = str(Path(tmp_dir) / "corpus.manifest.sqlite")
+            manifest = IndexManifest(manifest_path)
+            full = index(path, manifest)
+            manifest.close()
+            print(f"full run: docs: {full.docs}, sub_docs: {full.sub_docs}, time: {full.seconds:.2f}s")
+
+            write_corpus(path, args.lines, args.change_rate)
+            manifest = IndexManifest(manifest_path)
+            start_time = time.perf_counter()
+            stats = index(path, manifest)
+            manifest.close()
+            print(f"incremental run, change rate {args.change_rate}: docs: {stats.docs}, sub_docs: {stats.sub_docs}, "
+                  f"unchanged_docs: {stats.unchanged_docs}, deleted_docs: {stats.deleted_docs}, "
+                  f"deleted_sub_docs: {stats.deleted_sub_docs}, time: {stats.seconds:.2f}s")
+        seconds = time.perf_counter() - start_time
+
+    print(f"mode: {args.mode}, lines: {args.lines}, workers: {args.workers}, batch_size: {args.batch_size}")
+    print(f"docs: {retriever.docstore.count}, sub_docs: {retriever.vectorstore.count}, time: {seconds:.2f}s")
+    print(f"docs/s: {retriever.docstore.count / seconds:.1f}")
+    print(f"peak RSS: {peak_rss_mb():.1f} MB (before indexing: {start_rss:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,14 @@
 import json
 import os
+import time
 from urllib.parse import quote_plus
 
 from dotenv import load_dotenv
-from langchain_community.embeddings.huggingface import HuggingFaceEmbeddings
+from langchain_core.documents import Document
 
-from rag.indexing import (
-    index_to_retriever,
-    read_json_dataset,
-    transform_to_document,
-)
+from rag.indexing import LazyHuggingFaceEmbeddings, index_dataset_to_retriever
+from rag.local_store import GENERATION_KEY
+from rag.manifest import IndexManifest
 from rag.retriever import init_retriever
 
 if __name__ == "__main__":
@@ -32,6 +31,16 @@ if __name__ == "__main__":
 
     CONFIG_FILE_PATH = os.environ["CONFIG_FILE_PATH"]
     BULK_SIZE = os.environ["BULK_SIZE"]
+    BATCH_SIZE = os.getenv("BATCH_SIZE", "256")
+    WORKERS = os.getenv("WORKERS", str(os.cpu_count() or 1))
+    WRITERS = os.getenv("WRITERS", "2")
+    MAX_PENDING = os.getenv("MAX_PENDING", "4")
+    INCREMENTAL = os.getenv("INCREMENTAL", "True").lower() == "true"
+    # The first incremental run deletes an index built without a manifest only when asked to
+    RESET_INDEX = os.getenv("RESET_INDEX", "False").lower() == "true"
+    VECTOR_STORE_PROVIDER = os.getenv("VECTOR_STORE_PROVIDER", "opensearch")
+    LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", "./data/index")
+    LOCAL_INDEX_NLIST = os.getenv("LOCAL_INDEX_NLIST", "0")
     
     MONGO_URL = f"mongodb://{quote_plus(MONGO_USERNAME)}:{quote_plus(MONGO_PASSWORD)}@{MONGO_HOST}",
 
@@ -39,10 +48,8 @@ if __name__ == "__main__":
     with open(CONFIG_FILE_PATH) as f:
         config_json_list = json.load(f)
 
-    print("load model start...")
-    # load embeddings model
-    embedding_model = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
-    print("load model finish.")
+    # Loaded on the first embed call, with WORKERS > 0 only the worker processes load the model
+    embedding_model = LazyHuggingFaceEmbeddings(EMBEDDING_MODEL)
     print(f"start index data from config file: {CONFIG_FILE_PATH}")
 
     # get from config.json
@@ -58,11 +65,37 @@ if __name__ == "__main__":
                   f"mongo_db: {MONGO_DB_NAME}, mongo_collection: {MONGO_COLLECTION_NAME}, "
                   f"opensearch_index: {OPENSEARCH_INDEX}")
 
-            docs = read_json_dataset(DATASET_PATH)
-            parsed_sub_docs, parsed_docs = transform_to_document(docs)
-            retriever = init_retriever(embedding_model, OPENSEARCH_URL, OPENSEARCH_INDEX, MONGO_URL, MONGO_DB_NAME, MONGO_COLLECTION_NAME)
-            index_to_retriever(retriever, parsed_sub_docs, parsed_docs, [d[DATASET_DOC_ID] for d in docs], int(BULK_SIZE))
+            retriever = init_retriever(embedding_model, OPENSEARCH_URL, OPENSEARCH_INDEX, MONGO_URL, MONGO_DB_NAME, MONGO_COLLECTION_NAME,
+                                       VECTOR_STORE_PROVIDER, LOCAL_INDEX_DIR)
+            manifest = None
+            if INCREMENTAL:
+                MANIFEST_PATH = config_json["config"].get("manifest_path", f"{DATASET_PATH}.{OPENSEARCH_INDEX}.manifest.sqlite")
+                manifest = IndexManifest(MANIFEST_PATH)
+            stats = index_dataset_to_retriever(
+                retriever,
+                DATASET_PATH,
+                DATASET_DOC_ID,
+                EMBEDDING_MODEL,
+                bulk_size=int(BULK_SIZE),
+                batch_size=int(BATCH_SIZE),
+                workers=int(WORKERS),
+                writers=int(WRITERS),
+                max_pending=int(MAX_PENDING),
+                manifest=manifest,
+                reset_index=RESET_INDEX,
+            )
+            if manifest is not None:
+                manifest.close()
+            if VECTOR_STORE_PROVIDER == "local":
+                # Staged writes become searchable, the adapter loads the files on start
+                retriever.vectorstore.build(nlist=int(LOCAL_INDEX_NLIST))
+            # Adapters drop their parent document cache when this value changes
+            retriever.docstore.mset([(GENERATION_KEY, Document(page_content=str(time.time())))])
 
-            print(f"[FINISH] index data from path: {DATASET_PATH}")
+            print(f"[FINISH] index data from path: {DATASET_PATH}, "
+                  f"docs: {stats.docs}, sub_docs: {stats.sub_docs}, "
+                  f"unchanged_docs: {stats.unchanged_docs}, deleted_docs: {stats.deleted_docs}, "
+                  f"deleted_sub_docs: {stats.deleted_sub_docs}, "
+                  f"time: {stats.seconds:.2f}s, docs/s: {stats.docs_per_second:.1f}")
 
     print("data preparation is DONE!!!")
\ No newline at end of file
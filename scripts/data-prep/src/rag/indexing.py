@@ -1,27 +1,50 @@
+import itertools
 import json
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterator, Optional, Union
 
+import numpy as np
+from langchain_community.embeddings.huggingface import HuggingFaceEmbeddings
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from rag.manifest import IndexManifest, sub_doc_id
 
 
 def read_json_dataset(path: str):
-    docs = []
+    return list(iter_json_dataset(path))
+
+def iter_json_dataset(path: str) -> Iterator[dict]:
     with open(path) as f:
         for line in f:
-            docs.append(json.loads(line))
-    return docs
+            if line.strip():
+                yield json.loads(line)
+
+def batched(iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+def transform_document(_doc) -> tuple[list[Document], Document]:
+    parsed_sub_docs = []
+    text = ''
+    for field in _doc:
+        if field != 'doc_id':
+            text += field.upper() + ': ' + ", ".join(_doc[field]) + ' -- '
+            for i, _text in enumerate(_doc[field]):
+                _parsed = Document(page_content=_text, metadata={"line_number": i, "field": field, "doc_id": _doc['doc_id']})
+                parsed_sub_docs.append(_parsed)
+    return parsed_sub_docs, Document(page_content=text, metadata={"doc_id": _doc['doc_id']})
 
 def transform_to_document(docs) -> tuple[list[Document], list[Document]]:
     parsed_sub_docs = []
     parsed_docs = []
     for _doc in docs:
-        text = ''
-        for field in _doc:
-            if field != 'doc_id':
-                text += field.upper() + ': ' + ", ".join(_doc[field]) + ' -- '
-                for i, _text in enumerate(_doc[field]):
-                    _parsed = Document(page_content=_text, metadata={"line_number": i, "field": field, "doc_id": _doc['doc_id']})
-                    parsed_sub_docs.append(_parsed)
-        new_doc = Document(page_content=text, metadata={"doc_id": _doc['doc_id']})
+        sub_docs, new_doc = transform_document(_doc)
+        parsed_sub_docs.extend(sub_docs)
         parsed_docs.append(new_doc)
     return parsed_sub_docs, parsed_docs
 
@@ -33,4 +56,204 @@ def index_to_retriever(
                         bulk_size: int = 500,
                     ):
     retriever.vectorstore.add_documents(parsed_sub_docs, timeout=30, request_timeout=30, bulk_size=bulk_size)
-    retriever.docstore.mset(list(zip(id_keys, parsed_docs)))
\ No newline at end of file
+    retriever.docstore.mset(list(zip(id_keys, parsed_docs)))
+
+
+@dataclass
+class EmbeddedBatch:
+    ids: list[str]
+    texts: list[str]
+    # float32 matrix, a fraction of the size of float lists when sent back from the worker process
+    vectors: np.ndarray
+    metadatas: list[dict]
+    id_keys: list[str]
+    parsed_docs: list[Document]
+    deleted_ids: list[str]
+
+
+@dataclass
+class IndexStats:
+    docs: int = 0
+    sub_docs: int = 0
+    unchanged_docs: int = 0
+    deleted_docs: int = 0
+    deleted_sub_docs: int = 0
+    seconds: float = 0.0
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.docs / self.seconds if self.seconds else 0.0
+
+
+class LazyHuggingFaceEmbeddings(Embeddings):
+    """HuggingFaceEmbeddings loaded on the first embed call, the parent of the embedding workers never loads it."""
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._embeddings: Optional[Embeddings] = None
+
+    @property
+    def embeddings(self) -> Embeddings:
+        if self._embeddings is None:
+            self._embeddings = HuggingFaceEmbeddings(model_name=self.model_name)
+        return self._embeddings
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embeddings.embed_query(text)
+
+
+# Embedding model of the worker process, loaded once by the pool initializer
+_worker_embeddings: Optional[Embeddings] = None
+
+def _init_worker(embedding_model: Union[str, Embeddings]):
+    global _worker_embeddings
+    if isinstance(embedding_model, str):
+        _worker_embeddings = HuggingFaceEmbeddings(model_name=embedding_model)
+    else:
+        _worker_embeddings = embedding_model
+
+def _embed_batch(
+                docs: list[dict],
+                doc_id_key: str,
+                embeddings: Optional[Embeddings] = None,
+                changed_lines: Optional[list[set[tuple[str, int]]]] = None,
+                deleted_ids: Optional[list[str]] = None,
+            ) -> EmbeddedBatch:
+    """Build the documents of a batch and embed their sub-documents, only the changed_lines of each doc if given."""
+    ids, parsed_sub_docs, parsed_docs = [], [], []
+    for i, _doc in enumerate(docs):
+        sub_docs, new_doc = transform_document(_doc)
+        for sub_doc in sub_docs:
+            key = (sub_doc.metadata["field"], sub_doc.metadata["line_number"])
+            if changed_lines is None or key in changed_lines[i]:
+                ids.append(sub_doc_id(_doc[doc_id_key], *key))
+                parsed_sub_docs.append(sub_doc)
+        parsed_docs.append(new_doc)
+    texts = [d.page_content for d in parsed_sub_docs]
+    vectors = (embeddings or _worker_embeddings).embed_documents(texts) if texts else []
+    return EmbeddedBatch(
+        ids=ids,
+        texts=texts,
+        vectors=np.asarray(vectors, dtype=np.float32),
+        metadatas=[d.metadata for d in parsed_sub_docs],
+        id_keys=[d[doc_id_key] for d in docs],
+        parsed_docs=parsed_docs,
+        deleted_ids=deleted_ids or [],
+    )
+
+def _write_vectors(vectorstore, batch: EmbeddedBatch, bulk_size: int):
+    # OpenSearch rejects an add call with more embeddings than bulk_size
+    for start in range(0, len(batch.texts), bulk_size):
+        end = start + bulk_size
+        vectorstore.add_embeddings(
+            list(zip(batch.texts[start:end], batch.vectors[start:end].tolist())),
+            metadatas=batch.metadatas[start:end],
+            ids=batch.ids[start:end],
+            bulk_size=bulk_size,
+        )
+    if batch.deleted_ids:
+        vectorstore.delete(batch.deleted_ids)
+
+def index_dataset_to_retriever(
+                        retriever,
+                        path: str,
+                        doc_id_key: str,
+                        embedding_model: Union[str, Embeddings],
+                        bulk_size: int = 500,
+                        batch_size: int = 256,
+                        workers: int = 1,
+                        writers: int = 2,
+                        max_pending: int = 4,
+                        manifest: Optional[IndexManifest] = None,
+                        reset_index: bool = False,
+                    ) -> IndexStats:
+    """
+    Stream a JSONL dataset into the retriever: read and chunk batch_size lines at a time, embed the batches in
+    worker processes and write them to the vector store and the docstore from writer threads.
+    At most max_pending batches wait at each stage, so memory does not grow with the dataset.
+    workers=0 embeds in this process with the retriever embeddings.
+
+    With a manifest only new and changed lines are embedded, unchanged documents are skipped and documents or
+    lines missing from the dataset are deleted. The manifest is committed once every write succeeded.
+    An existing index without a manifest is deleted and re-indexed only with reset_index, otherwise it is an error.
+    """
+    stats = IndexStats()
+    start_time = time.perf_counter()
+    vectorstore = retriever.vectorstore
+    if manifest is not None:
+        model_name = embedding_model if isinstance(embedding_model, str) else type(embedding_model).__name__
+        if manifest.get_meta("embedding_model") not in (None, model_name):
+            print(f"embedding model changed to {model_name}, re-index every document")
+            manifest.clear()
+        manifest.set_meta("embedding_model", model_name)
+    if manifest is not None and not manifest.is_empty() and not vectorstore.index_exists():
+        print(f"index {vectorstore.index_name} not found, re-index every document")
+        manifest.clear()
+    elif manifest is not None and manifest.is_empty() and vectorstore.index_exists():
+        # Vectors of a run without manifest have random ids and may have another dimension
+        if not reset_index:
+            raise ValueError(
+                f"index {vectorstore.index_name} exists without a manifest, "
+                "set reset_index (RESET_INDEX=True) to delete it and re-index every document"
+            )
+        print(f"no manifest for index {vectorstore.index_name}, delete the index and re-index every document")
+        vectorstore.delete_index()
+    embed_pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(embedding_model,)) if workers > 0 else None
+    write_pool = ThreadPoolExecutor(writers)
+    embedding: deque[Future] = deque()
+    writing: deque[Future] = deque()
+
+    def write(batch: EmbeddedBatch):
+        if stats.sub_docs == 0 and batch.texts:
+            # The first write creates the OpenSearch index, concurrent writes would race to create it
+            _write_vectors(vectorstore, batch, bulk_size)
+        elif batch.texts or batch.deleted_ids:
+            writing.append(write_pool.submit(_write_vectors, vectorstore, batch, bulk_size))
+        if batch.parsed_docs:
+            writing.append(write_pool.submit(retriever.docstore.mset, list(zip(batch.id_keys, batch.parsed_docs))))
+        stats.docs += len(batch.parsed_docs)
+        stats.sub_docs += len(batch.texts)
+        stats.deleted_sub_docs += len(batch.deleted_ids)
+        while len(writing) > 2 * max_pending:
+            writing.popleft().result()
+
+    try:
+        for docs in batched(iter_json_dataset(path), batch_size):
+            changed_lines = deleted_ids = None
+            if manifest is not None:
+                diff = manifest.diff(docs, doc_id_key)
+                stats.unchanged_docs += diff.unchanged
+                if not diff.changed_docs:
+                    continue
+                docs, changed_lines, deleted_ids = diff.changed_docs, diff.changed_lines, diff.deleted_ids
+            if embed_pool is None:
+                write(_embed_batch(docs, doc_id_key, vectorstore.embeddings, changed_lines, deleted_ids))
+                continue
+            embedding.append(embed_pool.submit(_embed_batch, docs, doc_id_key, None, changed_lines, deleted_ids))
+            while len(embedding) >= max_pending:
+                write(embedding.popleft().result())
+        while embedding:
+            write(embedding.popleft().result())
+        if manifest is not None:
+            for doc_ids, vector_ids in manifest.vanished(bulk_size):
+                if vector_ids:
+                    writing.append(write_pool.submit(vectorstore.delete, vector_ids))
+                writing.append(write_pool.submit(retriever.docstore.mdelete, doc_ids))
+                stats.deleted_docs += len(doc_ids)
+                stats.deleted_sub_docs += len(vector_ids)
+                while len(writing) > 2 * max_pending:
+                    writing.popleft().result()
+        while writing:
+            writing.popleft().result()
+        if manifest is not None:
+            manifest.commit()
+    finally:
+        for future in itertools.chain(embedding, writing):
+            future.cancel()
+        if embed_pool is not None:
+            embed_pool.shutdown(cancel_futures=True)
+        write_pool.shutdown(cancel_futures=True)
+    stats.seconds = time.perf_counter() - start_time
+    return stats
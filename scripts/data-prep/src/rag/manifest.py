@@ -0,0 +1,135 @@
+import hashlib
+import json
+import sqlite3
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def sub_doc_id(doc_id: str, field_name: str, line_number: int) -> str:
+    """Vector store id of a sub-document, stable across runs so a changed line overwrites its old vector."""
+    return content_hash(f"{doc_id}\x00{field_name}\x00{line_number}")
+
+
+@dataclass
+class BatchDiff:
+    # Documents with any change, with the (field, line) of their sub-documents to embed
+    changed_docs: list[dict] = field(default_factory=list)
+    changed_lines: list[set[tuple[str, int]]] = field(default_factory=list)
+    # Vector ids of the lines removed from changed documents
+    deleted_ids: list[str] = field(default_factory=list)
+    unchanged: int = 0
+
+
+class IndexManifest:
+    """
+    Content hashes of the indexed documents and their lines, kept in SQLite so a large dataset is diffed
+    without loading the manifest in memory. Updates stay in one transaction until commit, a failed run leaves
+    the manifest of the last successful run and the next run redoes the changes.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS docs (doc_id TEXT PRIMARY KEY, hash TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS lines (
+                doc_id TEXT NOT NULL,
+                field TEXT NOT NULL,
+                line INTEGER NOT NULL,
+                hash TEXT NOT NULL,
+                PRIMARY KEY (doc_id, field, line)
+            );
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TEMP TABLE seen (doc_id TEXT PRIMARY KEY);
+        """)
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        self.connection.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    def is_empty(self) -> bool:
+        return self.connection.execute("SELECT 1 FROM docs LIMIT 1").fetchone() is None
+
+    def clear(self):
+        self.connection.execute("DELETE FROM docs")
+        self.connection.execute("DELETE FROM lines")
+
+    def _select(self, query: str, doc_ids: list[str]) -> list[tuple]:
+        rows = []
+        # SQLite limits the number of query parameters
+        for start in range(0, len(doc_ids), 500):
+            chunk = doc_ids[start:start + 500]
+            rows += self.connection.execute(query.format(", ".join("?" * len(chunk))), chunk).fetchall()
+        return rows
+
+    def diff(self, docs: list[dict], doc_id_key: str) -> BatchDiff:
+        """Compare a batch of dataset lines with the manifest and record their new hashes."""
+        result = BatchDiff()
+        doc_ids = [doc[doc_id_key] for doc in docs]
+        self.connection.executemany("INSERT OR IGNORE INTO seen VALUES (?)", [(doc_id,) for doc_id in doc_ids])
+        doc_hashes = dict(self._select("SELECT doc_id, hash FROM docs WHERE doc_id IN ({})", doc_ids))
+
+        changed = []
+        for doc_id, doc in zip(doc_ids, docs):
+            doc_hash = content_hash(json.dumps(doc, ensure_ascii=False))
+            if doc_hashes.get(doc_id) == doc_hash:
+                result.unchanged += 1
+            else:
+                changed.append((doc_id, doc, doc_hash))
+        if not changed:
+            return result
+
+        previous: dict[str, dict[tuple[str, int], str]] = {}
+        for doc_id, field_name, line, line_hash in self._select(
+            "SELECT doc_id, field, line, hash FROM lines WHERE doc_id IN ({})", [doc_id for doc_id, _, _ in changed]
+        ):
+            previous.setdefault(doc_id, {})[(field_name, line)] = line_hash
+
+        lines = []
+        for doc_id, doc, doc_hash in changed:
+            current = {
+                (field_name, line): content_hash(text)
+                for field_name in doc if field_name != "doc_id"
+                for line, text in enumerate(doc[field_name])
+            }
+            old = previous.get(doc_id, {})
+            result.changed_docs.append(doc)
+            result.changed_lines.append({key for key, line_hash in current.items() if old.get(key) != line_hash})
+            result.deleted_ids.extend(sub_doc_id(doc_id, *key) for key in old.keys() - current.keys())
+            lines += [(doc_id, field_name, line, line_hash) for (field_name, line), line_hash in current.items()]
+
+        changed_ids = [(doc_id,) for doc_id, _, _ in changed]
+        self.connection.executemany("DELETE FROM lines WHERE doc_id = ?", changed_ids)
+        self.connection.executemany("INSERT OR REPLACE INTO docs VALUES (?, ?)", [(doc_id, doc_hash) for doc_id, _, doc_hash in changed])
+        self.connection.executemany("INSERT OR REPLACE INTO lines VALUES (?, ?, ?, ?)", lines)
+        return result
+
+    def vanished(self, batch_size: int = 500) -> Iterator[tuple[list[str], list[str]]]:
+        """Remove the documents not seen in this run, yield their doc ids and vector ids batch by batch."""
+        while True:
+            doc_ids = [
+                row[0] for row in self.connection.execute(
+                    "SELECT doc_id FROM docs WHERE doc_id NOT IN (SELECT doc_id FROM seen) LIMIT ?", (batch_size,)
+                )
+            ]
+            if not doc_ids:
+                return
+            vector_ids = [
+                sub_doc_id(doc_id, field_name, line)
+                for doc_id, field_name, line in self._select("SELECT doc_id, field, line FROM lines WHERE doc_id IN ({})", doc_ids)
+            ]
+            self.connection.executemany("DELETE FROM docs WHERE doc_id = ?", [(doc_id,) for doc_id in doc_ids])
+            self.connection.executemany("DELETE FROM lines WHERE doc_id = ?", [(doc_id,) for doc_id in doc_ids])
+            yield doc_ids, vector_ids
+
+    def commit(self):
+        self.connection.commit()
+
+    def close(self):
+        # Uncommitted updates are discarded
+        self.connection.close()
@@ -1,3 +1,4 @@
+import os
 from typing import Union
 
 from langchain.retrievers.multi_vector import MultiVectorRetriever
@@ -8,6 +9,8 @@ from langchain_community.vectorstores.opensearch_vector_search import (
 )
 from langchain_core.embeddings import Embeddings
 
+from rag.local_store import LocalDocStore, LocalVectorStore
+
 id_key = 'doc_id'
 
 def init_retriever(embedding_model: Union[str, Embeddings], 
@@ -16,6 +19,8 @@ def init_retriever(embedding_model: Union[str, Embeddings],
                    mongo_url: str, 
                    mongo_db_name:str, 
                    mongo_collection_name:str,
+                   vector_store_provider: str = "opensearch",
+                   local_index_dir: str = "",
                 ) -> MultiVectorRetriever:
 
     if issubclass(type(embedding_model), Embeddings):
@@ -26,12 +31,18 @@ def init_retriever(embedding_model: Union[str, Embeddings],
         # TODO Add exception detail
         raise TypeError
         
-    docsearch = OpenSearchVectorSearch(
-        opensearch_url,
-        opensearch_index,
-        embeddings
-    )
-    store = MongoDBStore(mongo_url, db_name=mongo_db_name, collection_name=mongo_collection_name)
+    if vector_store_provider == "local":
+        # Read by the adapter with VECTOR_STORE_PROVIDER=local, one directory per index
+        index_path = os.path.join(local_index_dir, opensearch_index)
+        docsearch = LocalVectorStore(index_path, embeddings)
+        store = LocalDocStore(index_path)
+    else:
+        docsearch = OpenSearchVectorSearch(
+            opensearch_url,
+            opensearch_index,
+            embeddings
+        )
+        store = MongoDBStore(mongo_url, db_name=mongo_db_name, collection_name=mongo_collection_name)
     # The retriever (empty to start)
     retriever = MultiVectorRetriever(
         vectorstore=docsearch,
@@ -0,0 +1,189 @@
+import json
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.embeddings import Embeddings
+from langchain_core.stores import InMemoryStore
+
+from rag.indexing import LazyHuggingFaceEmbeddings, index_dataset_to_retriever
+from rag.manifest import IndexManifest, sub_doc_id
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    manifest = IndexManifest(str(tmp_path / "manifest.sqlite"))
+    yield manifest
+    manifest.close()
+
+
+@pytest.fixture
+def retriever(mocker):
+    retriever = mocker.Mock()
+    retriever.vectorstore.index_name = "fcd"
+    retriever.vectorstore.index_exists.return_value = True
+    return retriever
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    path = tmp_path / "dataset.jsonl"
+    path.write_text("")
+    return str(path)
+
+
+@pytest.mark.indexing
+def test_index_keep_existing_index_without_reset(retriever, manifest, dataset):
+    # The first incremental run has an empty manifest, an index built before it is kept
+    with pytest.raises(ValueError, match="RESET_INDEX"):
+        index_dataset_to_retriever(retriever, dataset, "doc_id", "model", workers=0, manifest=manifest)
+
+    retriever.vectorstore.delete_index.assert_not_called()
+
+
+@pytest.mark.indexing
+def test_index_delete_existing_index_with_reset(retriever, manifest, dataset):
+    index_dataset_to_retriever(retriever, dataset, "doc_id", "model", workers=0, manifest=manifest, reset_index=True)
+
+    retriever.vectorstore.delete_index.assert_called_once()
+
+
+class FakeEmbeddings(Embeddings):
+    """Embed a text by its length, so the vectors are known in advance."""
+    def embed_documents(self, texts):
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class RecordingVectorStore:
+    """In-memory vector store recording every add call and the thread it ran on."""
+    def __init__(self, embeddings, fail_on_call: int = 0, delay: float = 0):
+        self.embeddings = embeddings
+        self.index_name = "fcd"
+        self.fail_on_call = fail_on_call
+        self.delay = delay
+        self.vectors = {}
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def index_exists(self):
+        return bool(self.vectors)
+
+    def add_embeddings(self, text_embeddings, metadatas, ids, bulk_size):
+        with self.lock:
+            self.calls.append((threading.current_thread().name, len(ids)))
+            call = len(self.calls)
+        time.sleep(self.delay)
+        if call == self.fail_on_call:
+            raise ConnectionError("bulk write failed")
+        with self.lock:
+            self.vectors.update({id_: vector for id_, (_, vector) in zip(ids, text_embeddings)})
+
+    def delete(self, ids):
+        with self.lock:
+            for id_ in ids:
+                self.vectors.pop(id_, None)
+
+
+def counting_executor(executor_class):
+    class CountingExecutor(executor_class):
+        """Record the most futures submitted and not done at once."""
+        max_pending = 0
+
+        def submit(self, *args, **kwargs):
+            future = super().submit(*args, **kwargs)
+            self.futures = [f for f in getattr(self, "futures", []) if not f.done()] + [future]
+            CountingExecutor.max_pending = max(CountingExecutor.max_pending, len(self.futures))
+            return future
+    return CountingExecutor
+
+
+def make_retriever(**kwargs):
+    return SimpleNamespace(vectorstore=RecordingVectorStore(FakeEmbeddings(), **kwargs), docstore=InMemoryStore())
+
+
+@pytest.fixture
+def docs_dataset(tmp_path):
+    path = tmp_path / "dataset.jsonl"
+    docs = [{"doc_id": f"doc-{i}", "question": [f"question {i}"], "answer": [f"answer {i}", "x" * i]} for i in range(10)]
+    path.write_text("\n".join(json.dumps(doc) for doc in docs))
+    return str(path)
+
+
+@pytest.mark.indexing
+def test_index_dataset_split_writes_by_bulk_size(docs_dataset):
+    retriever = make_retriever()
+
+    stats = index_dataset_to_retriever(retriever, docs_dataset, "doc_id", FakeEmbeddings(), bulk_size=4, batch_size=3, workers=0)
+
+    assert stats.docs == 10 and stats.sub_docs == 30
+    assert all(size <= 4 for _, size in retriever.vectorstore.calls)
+    assert sum(size for _, size in retriever.vectorstore.calls) == 30
+    assert retriever.vectorstore.vectors[sub_doc_id("doc-3", "answer", 1)] == [3.0, 1.0]
+    assert retriever.docstore.mget(["doc-0", "doc-9"])[1].metadata == {"doc_id": "doc-9"}
+
+
+@pytest.mark.indexing
+def test_index_dataset_write_first_batch_synchronously(docs_dataset):
+    retriever = make_retriever()
+
+    index_dataset_to_retriever(retriever, docs_dataset, "doc_id", FakeEmbeddings(), bulk_size=100, batch_size=3, workers=0)
+
+    # The first write creates the index before the writer threads write concurrently
+    threads = [thread for thread, _ in retriever.vectorstore.calls]
+    assert threads[0] == threading.current_thread().name
+    assert all(thread != threading.current_thread().name for thread in threads[1:])
+
+
+@pytest.mark.indexing
+def test_index_dataset_workers_match_in_process(docs_dataset):
+    in_process, with_workers = make_retriever(), make_retriever()
+
+    index_dataset_to_retriever(in_process, docs_dataset, "doc_id", FakeEmbeddings(), batch_size=3, workers=0)
+    stats = index_dataset_to_retriever(with_workers, docs_dataset, "doc_id", FakeEmbeddings(), batch_size=3, workers=2)
+
+    assert stats.docs == 10
+    assert with_workers.vectorstore.vectors == in_process.vectorstore.vectors
+    assert list(with_workers.docstore.yield_keys()) == list(in_process.docstore.yield_keys())
+
+
+@pytest.mark.indexing
+def test_index_dataset_bound_pending_batches(docs_dataset, mocker):
+    embed_pool = mocker.patch("rag.indexing.ProcessPoolExecutor", counting_executor(ProcessPoolExecutor))
+    write_pool = mocker.patch("rag.indexing.ThreadPoolExecutor", counting_executor(ThreadPoolExecutor))
+    retriever = make_retriever(delay=0.01)
+
+    index_dataset_to_retriever(retriever, docs_dataset, "doc_id", FakeEmbeddings(), batch_size=1, workers=1, max_pending=1)
+
+    assert embed_pool.max_pending == 1
+    # A batch adds a vector and a docstore write on top of the 2 * max_pending kept waiting
+    assert 0 < write_pool.max_pending <= 4
+    assert len(retriever.vectorstore.vectors) == 30
+
+
+@pytest.mark.indexing
+def test_lazy_embeddings_load_on_first_use(mocker):
+    model = mocker.patch("rag.indexing.HuggingFaceEmbeddings")
+    embeddings = LazyHuggingFaceEmbeddings("intfloat/multilingual-e5-small")
+    model.assert_not_called()
+
+    embeddings.embed_query("hello")
+    embeddings.embed_documents(["hello"])
+
+    model.assert_called_once_with(model_name="intfloat/multilingual-e5-small")
+
+
+@pytest.mark.indexing
+def test_index_dataset_raise_writer_error(docs_dataset, manifest):
+    retriever = make_retriever(fail_on_call=3)
+
+    with pytest.raises(ConnectionError, match="bulk write failed"):
+        index_dataset_to_retriever(retriever, docs_dataset, "doc_id", FakeEmbeddings(), batch_size=2, workers=0, manifest=manifest)
+
+    # The manifest is not committed, the next run indexes every document again
+    manifest.close()
+    assert IndexManifest(manifest.path).is_empty()
@@ -0,0 +1,126 @@
+import pytest
+
+from rag.manifest import IndexManifest, sub_doc_id
+
+
+def make_doc(doc_id, **fields):
+    return {"doc_id": doc_id, **fields}
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    manifest = IndexManifest(str(tmp_path / "manifest.sqlite"))
+    yield manifest
+    manifest.close()
+
+
+def run(manifest, path, docs):
+    """Diff the docs as one run of the dataset, then remove the vanished documents and commit."""
+    diff = manifest.diff(docs, "doc_id")
+    vanished = list(manifest.vanished())
+    manifest.commit()
+    manifest.close()
+    return diff, vanished, IndexManifest(path)
+
+
+@pytest.mark.manifest
+def test_manifest_diff_added(manifest):
+    docs = [make_doc("a", question=["what is FCD"], answer=["a deposit", "in a foreign currency"])]
+
+    diff = manifest.diff(docs, "doc_id")
+
+    assert diff.changed_docs == docs
+    assert diff.changed_lines == [{("question", 0), ("answer", 0), ("answer", 1)}]
+    assert diff.deleted_ids == []
+    assert diff.unchanged == 0
+    assert not manifest.is_empty()
+
+
+@pytest.mark.manifest
+def test_manifest_diff_unchanged(manifest, tmp_path):
+    path = str(tmp_path / "manifest.sqlite")
+    docs = [make_doc("a", answer=["a deposit"]), make_doc("b", answer=["a loan"])]
+    _, _, manifest = run(manifest, path, docs)
+
+    diff = manifest.diff(docs, "doc_id")
+
+    assert diff.changed_docs == []
+    assert diff.unchanged == 2
+    manifest.close()
+
+
+@pytest.mark.manifest
+def test_manifest_diff_changed_line(manifest, tmp_path):
+    path = str(tmp_path / "manifest.sqlite")
+    _, _, manifest = run(manifest, path, [make_doc("a", answer=["a deposit", "in a foreign currency"])])
+
+    changed = make_doc("a", answer=["a deposit", "in US dollars"])
+    diff = manifest.diff([changed], "doc_id")
+
+    # Only the changed line is embedded again, its vector id is unchanged so the old vector is overwritten
+    assert diff.changed_docs == [changed]
+    assert diff.changed_lines == [{("answer", 1)}]
+    assert diff.deleted_ids == []
+    manifest.close()
+
+
+@pytest.mark.manifest
+def test_manifest_diff_removed_line(manifest, tmp_path):
+    path = str(tmp_path / "manifest.sqlite")
+    _, _, manifest = run(manifest, path, [make_doc("a", question=["what is FCD"], answer=["a deposit", "in a foreign currency"])])
+
+    diff, _, manifest = run(manifest, path, [make_doc("a", question=["what is FCD"], answer=["a deposit"])])
+
+    assert diff.changed_lines == [set()]
+    assert diff.deleted_ids == [sub_doc_id("a", "answer", 1)]
+    # The removed line is gone from the manifest, the next run sees the document unchanged
+    assert manifest.diff([make_doc("a", question=["what is FCD"], answer=["a deposit"])], "doc_id").unchanged == 1
+    manifest.close()
+
+
+@pytest.mark.manifest
+def test_manifest_vanished(manifest, tmp_path):
+    path = str(tmp_path / "manifest.sqlite")
+    _, _, manifest = run(manifest, path, [
+        make_doc("a", answer=["a deposit"]),
+        make_doc("b", question=["what is a loan"], answer=["money to pay back"]),
+        make_doc("c", answer=["a card"]),
+    ])
+
+    _, vanished, manifest = run(manifest, path, [make_doc("a", answer=["a deposit"])])
+
+    doc_ids = [doc_id for batch_doc_ids, _ in vanished for doc_id in batch_doc_ids]
+    vector_ids = {vector_id for _, batch_vector_ids in vanished for vector_id in batch_vector_ids}
+    assert sorted(doc_ids) == ["b", "c"]
+    assert vector_ids == {sub_doc_id("b", "question", 0), sub_doc_id("b", "answer", 0), sub_doc_id("c", "answer", 0)}
+    # Vanished documents are removed, a document coming back is added again
+    diff = manifest.diff([make_doc("a", answer=["a deposit"]), make_doc("b", answer=["a loan"])], "doc_id")
+    assert diff.unchanged == 1
+    assert diff.changed_lines == [{("answer", 0)}]
+    assert list(manifest.vanished()) == []
+    manifest.close()
+
+
+@pytest.mark.manifest
+def test_manifest_vanished_in_batches(manifest):
+    manifest.diff([make_doc(str(i), answer=["text"]) for i in range(5)], "doc_id")
+    manifest.commit()
+    manifest.close()
+    manifest = IndexManifest(manifest.path)
+
+    batches = list(manifest.vanished(batch_size=2))
+
+    assert [len(doc_ids) for doc_ids, _ in batches] == [2, 2, 1]
+    assert manifest.is_empty()
+    manifest.close()
+
+
+@pytest.mark.manifest
+def test_manifest_uncommitted_run_discarded(manifest, tmp_path):
+    path = str(tmp_path / "manifest.sqlite")
+    manifest.diff([make_doc("a", answer=["a deposit"])], "doc_id")
+    manifest.close()
+
+    manifest = IndexManifest(path)
+    assert manifest.is_empty()
+    manifest.close()
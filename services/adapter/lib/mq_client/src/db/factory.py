@@ -8,9 +8,9 @@ from db.redis import RedisDB
 def create_db(db_provider: DBProvider, db_config: Optional[DBConfig]) -> IDB:
     match db_provider.lower():
         case DBProvider.LOCAL.value:
-            return LocalDB()
+            return LocalDB(ttl=(db_config or DBConfig()).ttl)
         case DBProvider.REDIS.value:
             host = db_config.host
-            return RedisDB(host=host)
+            return RedisDB(host=host, ttl=db_config.ttl)
         case _:
             raise ValueError(f"Unsupported DB provider: {db_provider}")
@@ -1,19 +1,56 @@
-import asyncio
+import json
+import threading
+from typing import Any, Callable, List, Optional
 
-from typing import Dict, Any
+import redis
 
 from db.common import IDB
 
+KEY_PREFIX = "mq_client:response:"
+CHANNEL = "mq_client:response"
+
 
 class RedisDB(IDB):
-    def __init__(self, host: str):
-        self.repo: Dict[str, asyncio.Future] = {}  # Redis Client
+    """
+    Response store shared by every instance of a stateless SDK. The instance that consumes a response
+    stores it with a ttl and publishes its key in the same round trip, so the instance waiting for it
+    is woken up without waiting for the next poll.
+    """
+    def __init__(self, host: str, ttl: float = 60.0, client: Optional[redis.Redis] = None):
+        self.client = client or redis.Redis.from_url(host if "://" in host else f"redis://{host}")
+        self.ttl_ms = int(ttl * 1000)
+        self.pubsub_thread: Optional[threading.Thread] = None
+
+    def get(self, key: str) -> Any:
+        item = self.client.get(KEY_PREFIX + key)
+        return json.loads(item) if item is not None else None
 
-    def get(self, key: str) -> asyncio.Future | None:
-        pass
+    def mget(self, keys: List[str]) -> List[Any]:
+        if not keys:
+            return []
+        items = self.client.mget([KEY_PREFIX + key for key in keys])
+        return [json.loads(item) if item is not None else None for item in items]
 
     def set(self, key: str, item: Any):
-        pass
+        pipeline = self.client.pipeline(transaction=False)
+        pipeline.set(KEY_PREFIX + key, json.dumps(item), px=self.ttl_ms)
+        pipeline.publish(CHANNEL, key)
+        pipeline.execute()
 
     def delete(self, key: str):
-        pass
+        self.client.delete(KEY_PREFIX + key)
+
+    def subscribe(self, callback: Callable[[str], None]) -> bool:
+        def handler(message):
+            data = message["data"]
+            callback(data.decode() if isinstance(data, bytes) else data)
+
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{CHANNEL: handler})
+        self.pubsub_thread = pubsub.run_in_thread(sleep_time=0.01, daemon=True)
+        return True
+
+    def close(self):
+        if self.pubsub_thread is not None:
+            self.pubsub_thread.stop()
+            self.pubsub_thread = None
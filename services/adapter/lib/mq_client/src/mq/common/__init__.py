@@ -1,3 +1,3 @@
-from .setup import MQConfig, MQProvider
+from .setup import MQConfig, MQProvider, DispatchMode, OverloadPolicy, ReplyRouting
 from .provider import IMQConsumer, IMQProducer
 from .dto import QueueDTO
@@ -1 +1 @@
-from .error import Error, ErrorCode
+from .error import Error, ErrorCode, OverloadError, StreamInterruptedError
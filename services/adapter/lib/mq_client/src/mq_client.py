@@ -1,14 +1,45 @@
 import asyncio
+import re
+import socket
+import threading
+import time
 from asyncio import AbstractEventLoop
-from typing import Any, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Optional
 import logging
 
 from db.common import DBConfig, DBProvider
 from db.factory import create_db
-from mq.common import MQConfig, MQProvider, QueueDTO
+from mq.common import DispatchMode, MQConfig, MQProvider, OverloadPolicy, QueueDTO, ReplyRouting
+from mq.common.exception import Error, OverloadError, StreamInterruptedError
 from mq.factory import create_mq
+from util.expiry import ExpiryHeap
 from util.id import generate_id
 
+
+@dataclass
+class TopicStats:
+    in_flight: int = 0
+    waiting: int = 0
+    completed: int = 0
+    rejected: int = 0
+    wait_time_total: float = 0.0
+    wait_time_max: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        started = self.completed + self.in_flight
+        return {
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'wait_time_mean': self.wait_time_total / started if started else 0.0,
+            'wait_time_max': self.wait_time_max,
+        }
+
+
 class MQClient:
     def __init__(
         self,
@@ -20,21 +51,70 @@ class MQClient:
         sdk_group="",
         polling_interval=0.1,
         timeout=30.0,
+        dispatch_mode: str = DispatchMode.EVENT.value,
         service_name="mq_client",
         logger=logging.getLogger("mq.client"),
+        max_concurrency: int = 0,
+        topic_concurrency: Optional[Dict[str, int]] = None,
+        max_pending: int = 0,
+        overload_policy: str = OverloadPolicy.QUEUE.value,
+        reply_routing: str = ReplyRouting.GROUP.value,
+        reply_id: str = "",
+        reply_partition: int = 0,
     ):
         self.event_loop = event_loop
         self.subscription_data: Dict[str, asyncio.Future] = {}
+        # Deadlines of subscription_data entries, an entry left behind by an abandoned request is expired
+        self.subscription_expiry = ExpiryHeap()
+        # Streamed requests receive every chunk through their own queue
+        self.stream_data: Dict[str, asyncio.Queue] = {}
         self.stateful_sdk = db_provider == DBProvider.LOCAL.value
         self.polling_interval = polling_interval
+        # EVENT: a dedicated consumer thread resolves the waiting futures as soon as a response arrives
+        # POLL: the event loop consumes and checks the repository every polling_interval
+        self.is_event_dispatch = dispatch_mode == DispatchMode.EVENT.value
+        self.consumer_thread: Optional[threading.Thread] = None
+        self.consumer_executor: Optional[ThreadPoolExecutor] = None
+        self.is_consumer_running = False
+        # Where responses to this instance are sent, keyed by the destination callers ask for.
+        # GROUP: the consume topics, read by a group of its own (LOCAL) or shared by every instance (REDIS)
+        # TOPIC: "<topic>.<reply_id>", a reply topic per instance
+        # PARTITION: "<topic>:<reply_partition>", a partition of the consume topics per instance
+        self.is_partition_reply = reply_routing == ReplyRouting.PARTITION.value
+        self.reply_partition = reply_partition
+        if reply_routing != ReplyRouting.GROUP.value and not self.stateful_sdk:
+            raise ValueError("reply_routing requires the LOCAL db provider")
+        reply_id = re.sub(r"[^a-zA-Z0-9._-]", "-", reply_id or socket.gethostname())
+        self.reply_destinations: Dict[str, str] = {}
+        for topic in mq_config.consume_topics:
+            match reply_routing:
+                case ReplyRouting.TOPIC.value:
+                    self.reply_destinations[topic] = f"{topic}.{reply_id}"
+                case ReplyRouting.PARTITION.value:
+                    self.reply_destinations[topic] = f"{topic}:{reply_partition}"
+                case _:
+                    self.reply_destinations[topic] = topic
         self.mq_topics = mq_config.consume_topics
+        if reply_routing == ReplyRouting.TOPIC.value:
+            self.mq_topics = list(self.reply_destinations.values())
         self.timeout = timeout
+        # Backpressure: at most max_concurrency requests in flight per topic (topic_concurrency overrides it),
+        # at most max_pending requests in flight or waiting overall, 0 means unlimited.
+        # QUEUE: requests over the topic limit wait for a slot within their timeout, REJECT: they fail fast
+        self.max_concurrency = max_concurrency
+        self.topic_concurrency = topic_concurrency or {}
+        self.max_pending = max_pending
+        self.is_reject_overload = overload_policy == OverloadPolicy.REJECT.value
+        self.topic_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.topic_stats: Dict[str, TopicStats] = {}
+        self.pending_count = 0
         # Factory Create MQ
         self.mq_consumer, self.mq_producer = create_mq(
             mq_provider=mq_provider,
             mq_config=mq_config,
             sdk_group=sdk_group,
             require_unique_id=self.stateful_sdk,
+            auto_create_topics=reply_routing == ReplyRouting.TOPIC.value,
             logger=logger,
         )
         # Factory Create DB
@@ -60,6 +140,21 @@ class MQClient:
         self.is_event_loop_started = True
         if self.is_event_loop_require_created:
             self.event_loop = asyncio.get_event_loop()
+        if self.is_event_dispatch:
+            self.__start_consumer_thread()
+            # Stateless SDK still needs to pick up responses saved by other instances
+            if self.stateful_sdk:
+                return
+        else:
+            # Single worker keeps every blocking consume call on the same thread
+            self.consumer_executor = ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix=f"{self.service_name}-consumer",
+            )
+        if not self.stateful_sdk:
+            # Responses stored by other instances wake the waiting request, polling only covers missed notifications
+            self.repository.subscribe(
+                lambda id: self.event_loop.call_soon_threadsafe(self.__dispatch_stored_response, id))
         self.event_loop.create_task(coro=self.__start_consumer())
 
     def __setup_consumer(self):
@@ -67,7 +162,10 @@ class MQClient:
         # if self.is_event_loop_require_created:
         #     self.event_loop = asyncio.get_event_loop()
         # Setup Consumer
-        self.mq_consumer.subscribe(topics=self.mq_topics)
+        if self.is_partition_reply:
+            self.mq_consumer.assign(topics=self.mq_topics, partition=self.reply_partition)
+        else:
+            self.mq_consumer.subscribe(topics=self.mq_topics)
         self.mq_consumer.register_callback(self.__consume_response)
         # Start Consumer
         # self.event_loop.create_task(coro=self.__start_consumer())
@@ -77,7 +175,9 @@ class MQClient:
             running = True
             while running:
                 try:
-                    self.__poll_mq()  # Consume message from queue
+                    if not self.is_event_dispatch:
+                        # Consume message from queue without blocking the event loop
+                        await self.event_loop.run_in_executor(self.consumer_executor, self.__poll_mq)
                     self.__poll_db()  # Poll message from DB
                     # Delay Iteration
                     await asyncio.sleep(self.polling_interval)
@@ -89,75 +189,276 @@ class MQClient:
                         "service": self.service_name,
                     })
         finally:
-            # Close Consumer
-            self.mq_consumer.close()
+            # Close Consumer (owned by the consumer thread on event dispatch)
+            if not self.is_event_dispatch:
+                self.mq_consumer.close()
+                self.consumer_executor.shutdown(wait=False)
             # Close Event Loop if Created by SDK
             # if self.is_event_loop_require_created:
             #     self.event_loop.stop()
 
+    def __start_consumer_thread(self):
+        self.is_consumer_running = True
+        self.consumer_thread = threading.Thread(
+            target=self.__run_consumer,
+            name=f"{self.service_name}-consumer",
+            daemon=True,
+        )
+        self.consumer_thread.start()
+
+    def __run_consumer(self):
+        try:
+            while self.is_consumer_running:
+                try:
+                    # Blocks up to consume_timeout, callback dispatches each response to the event loop
+                    self.__poll_mq()
+                except Exception as e:
+                    self.logger.error({
+                        "message": "Failed to handle message",
+                        "error": str(e),
+                        "service": self.service_name,
+                    })
+        finally:
+            self.mq_consumer.close()
+
+    def __dispatch_response(self, id: str, message: Any):
+        # Run on the event loop thread, the only thread that touches the futures
+        future = self.subscription_data.pop(id, None)
+        self.subscription_expiry.discard(id)
+        if future is None:
+            if not self.stateful_sdk:
+                self.repository.set(id, message)
+            return
+        # The request may already be cancelled by its timeout
+        if not future.done():
+            future.set_result(message)
+
     def __poll_mq(self):
         # Consume Message from Queue
         self.mq_consumer.consume()
 
+    def __dispatch_stored_response(self, id: str):
+        # Run on the event loop thread, only the instance waiting for the ID reads the response
+        if id not in self.subscription_data:
+            return
+        message = self.repository.get(id)
+        if message is None:
+            return
+        future = self.subscription_data.pop(id)
+        self.subscription_expiry.discard(id)
+        if not future.done():
+            future.set_result(message)
+        self.repository.delete(id)
+
     def __poll_db(self):
         # Iterate Subscription Data
         # NOTE: must iterate with list(self.subscription_data.keys()) to prevent subscription_data size unexpectedly changed
-        for id in list(self.subscription_data.keys()):
+        ids = list(self.subscription_data.keys())
+        # One round trip for every waiting request
+        messages = self.repository.mget(ids) if ids else []
+        for id, message in zip(ids, messages):
             # Check the response is registered in the repository
-            future = self.subscription_data[id]
-            message = self.repository.get(id)
-            if message is None:
+            future = self.subscription_data.get(id)
+            if message is None or future is None:
                 continue
             # If the response is already registered, set the subscription data
-            try:
+            # The request may already be cancelled by its timeout
+            if not future.done():
                 future.set_result(message)
-            except asyncio.exceptions.InvalidStateError as e:
-                self.logger.error({
-                    "message": "Invalid state error",
-                    "error": str(e),
-                    "service": self.service_name,
-                })
 
             # Remove all unused data from the repository and subscription
             self.repository.delete(id)
-            del self.subscription_data[id]
+            self.subscription_data.pop(id, None)
+            self.subscription_expiry.discard(id)
+        self.__expire_subscriptions()
+
+    def __expire_subscriptions(self):
+        # Run on the event loop thread, fail requests still registered past their deadline
+        for id in self.subscription_expiry.pop_expired(time.monotonic()):
+            future = self.subscription_data.pop(id, None)
+            if future is not None and not future.done():
+                future.set_exception(asyncio.TimeoutError())
+            self.repository.delete(id)
+
+    def __dispatch_chunk(self, id: str, message: Any, error: Optional[Error]):
+        chunks = self.stream_data.get(id)
+        if chunks is not None:
+            chunks.put_nowait((message, error))
 
     def __consume_response(self, dto: QueueDTO) -> bool:
+        if dto.id in self.stream_data:
+            # Chunks skip the repository, they are handed to the iterator in arrival order
+            self.event_loop.call_soon_threadsafe(self.__dispatch_chunk, dto.id, dto.message, dto.error)
+            return
         # If SDK is stateful (LocalDB) and SDK doesn't own the given ID, the response won't be save in the repository
         if self.stateful_sdk and dto.id not in self.subscription_data.keys():
             return
-        # Save the response with the given ID
         response = dto.message
+        if not self.stateful_sdk and dto.id not in self.subscription_data:
+            # Another instance waits for it, store from the consumer thread to keep the event loop free
+            self.repository.set(dto.id, response)
+            return
+        if self.is_event_dispatch:
+            # Wake the waiting request directly instead of waiting for the next DB poll
+            self.event_loop.call_soon_threadsafe(self.__dispatch_response, dto.id, response)
+            return
+        # Save the response with the given ID
         self.repository.set(dto.id, response)
 
     """
     Message Queue - Publisher Side:
+    - Acquire a Slot for the Topic
     - Publish Message with Topic & Payload
     - Wait for the Response 
     """
 
+    def __get_semaphore(self, topic: str) -> Optional[asyncio.Semaphore]:
+        limit = self.topic_concurrency.get(topic, self.max_concurrency)
+        if not limit:
+            return None
+        if topic not in self.topic_semaphores:
+            self.topic_semaphores[topic] = asyncio.Semaphore(limit)
+        return self.topic_semaphores[topic]
+
+    def __reject(self, topic: str, stats: TopicStats, reason: str):
+        stats.rejected += 1
+        self.logger.warning({
+            "message": "Reject request",
+            "reason": reason,
+            "topic": topic,
+            "pending": self.pending_count,
+            "stats": stats.to_dict(),
+            "service": self.service_name,
+        })
+        raise OverloadError(f"{reason} for topic {topic}")
+
+    @asynccontextmanager
+    async def __acquire(self, topic: str, timeout: Optional[float] = None):
+        stats = self.topic_stats.setdefault(topic, TopicStats())
+        if self.max_pending and self.pending_count >= self.max_pending:
+            self.__reject(topic, stats, "pending request limit reached")
+        semaphore = self.__get_semaphore(topic)
+        if semaphore is not None and self.is_reject_overload and semaphore.locked():
+            self.__reject(topic, stats, "concurrency limit reached")
+
+        self.pending_count += 1
+        try:
+            # Waiting counts toward the request timeout, a request that expires here is never published
+            stats.waiting += 1
+            start_time = time.perf_counter()
+            try:
+                if semaphore is not None:
+                    await asyncio.wait_for(semaphore.acquire(), timeout=timeout)
+            finally:
+                stats.waiting -= 1
+            wait_time = time.perf_counter() - start_time
+            stats.wait_time_total += wait_time
+            stats.wait_time_max = max(stats.wait_time_max, wait_time)
+
+            stats.in_flight += 1
+            try:
+                yield
+            finally:
+                stats.in_flight -= 1
+                stats.completed += 1
+                if semaphore is not None:
+                    semaphore.release()
+        finally:
+            self.pending_count -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the pending request count and per topic in-flight, waiting, rejected and wait time metrics."""
+        return {
+            'pending': self.pending_count,
+            'topics': {topic: stats.to_dict() for topic, stats in self.topic_stats.items()},
+        }
+
     async def __send_request(self, topic: str, payload: Any, destination: Optional[str] = '') -> Any:
-        # Generate Unique ID for Each Request
-        message_id = generate_id()
-        future = asyncio.Future()
-        self.subscription_data[message_id] = future
-        # Send the Request to MQ
-        payload = QueueDTO(
-            id=message_id,
-            source=self.service_name,
-            message=payload,
-            destination=destination,
-        )
-        self.mq_producer.publish_message(topic=topic, payload=payload)
-        # Wait Response
-        result = await self.subscription_data[message_id]
-        return result
+        async with self.__acquire(topic):
+            # Generate Unique ID for Each Request
+            message_id = generate_id()
+            future = asyncio.Future()
+            self.subscription_data[message_id] = future
+            self.subscription_expiry.add(message_id, time.monotonic() + self.timeout)
+            try:
+                # Send the Request to MQ
+                payload = QueueDTO(
+                    id=message_id,
+                    source=self.service_name,
+                    message=payload,
+                    destination=self.reply_destinations.get(destination, destination),
+                )
+                self.mq_producer.publish_message(topic=topic, payload=payload)
+                # Wait Response
+                result = await future
+                return result
+            finally:
+                # On timeout the ID is unregistered, a late response is then dropped by the consumer
+                self.subscription_data.pop(message_id, None)
+                self.subscription_expiry.discard(message_id)
 
     async def send_request(self, topic: str, payload: Any, destination: Optional[str] = '') -> Any:
         if not self.is_event_loop_started:
             self.__setup_event_loop()
+        self.__expire_subscriptions()
         # Send the Request and Wait for the Response with Timeout
         task = self.event_loop.create_task(
             self.__send_request(topic=topic, payload=payload, destination=destination))
         response = await asyncio.wait_for(task, timeout=self.timeout)
         return response
+
+    @property
+    def can_stream(self) -> bool:
+        """Streaming needs every chunk consumed by the instance that sent the request, the LOCAL repository."""
+        return self.stateful_sdk
+
+    async def stream_request(self, topic: str, payload: Any, destination: Optional[str] = '') -> AsyncIterator[Any]:
+        """
+        Send a request and yield the response chunks in sequence order until the chunk marked done.
+        Chunks carry "seq" and "done" in the message, a response without them is treated as a single final chunk.
+        A chunk with an error, such as the final chunk of an interrupted generation, raises StreamInterruptedError
+        so a cut-off stream is not mistaken for a complete one.
+        The timeout applies to the wait for each chunk. Streaming needs the LOCAL repository, since every chunk
+        must be consumed by the instance that sent the request.
+        """
+        if not self.stateful_sdk:
+            raise ValueError("stream_request requires the LOCAL db provider")
+        if not self.is_event_loop_started:
+            self.__setup_event_loop()
+
+        message_id = generate_id()
+        chunks: asyncio.Queue = asyncio.Queue()
+        # The stream holds its topic slot until the final chunk, the wait for the slot has its own timeout
+        async with self.__acquire(topic, timeout=self.timeout):
+            # Register only after a slot is granted, a waiting stream is not published yet
+            self.stream_data[message_id] = chunks
+            try:
+                self.mq_producer.publish_message(topic=topic, payload=QueueDTO(
+                    id=message_id,
+                    source=self.service_name,
+                    message=payload,
+                    destination=self.reply_destinations.get(destination, destination),
+                ))
+                # Chunks may arrive out of order across partitions, hold them until the gap is filled
+                pending: Dict[int, Any] = {}
+                next_seq = 0
+                while True:
+                    message, error = await asyncio.wait_for(chunks.get(), timeout=self.timeout)
+                    pending[message.get("seq", next_seq)] = (message, error)
+                    while next_seq in pending:
+                        message, error = pending.pop(next_seq)
+                        next_seq += 1
+                        if error is not None:
+                            raise StreamInterruptedError(error)
+                        yield message
+                        if message.get("done", True):
+                            return
+            finally:
+                self.stream_data.pop(message_id, None)
+
+    def close(self):
+        # Stop the consumer thread, the consumer is closed once the current consume returns
+        self.is_consumer_running = False
+        self.repository.close()
+        # Deliver requests still waiting in the producer queue
+        self.mq_producer.flush()
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+
+import fakeredis
+import pytest
+
+import mq_client as mq_client_module
+from db.redis import RedisDB
+from mq_client import DBConfig, DBProvider, DispatchMode, QueueDTO
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def db(server):
+    db = RedisDB(host="localhost:6379", ttl=60, client=fakeredis.FakeRedis(server=server))
+    yield db
+    db.close()
+
+
+@pytest.mark.redis
+def test_redis_db_set_get_delete(db):
+    db.set("1", {"results": "สวัสดีค่ะ"})
+
+    assert db.get("1") == {"results": "สวัสดีค่ะ"}
+    assert 0 < db.client.pttl("mq_client:response:1") <= 60000
+
+    db.delete("1")
+    assert db.get("1") is None
+
+
+@pytest.mark.redis
+def test_redis_db_mget_in_one_round_trip(db, mocker):
+    db.set("1", {"results": "a"})
+    db.set("3", {"results": "c"})
+    mget = mocker.spy(db.client, "mget")
+
+    assert db.mget(["1", "2", "3"]) == [{"results": "a"}, None, {"results": "c"}]
+    assert db.mget([]) == []
+    mget.assert_called_once()
+
+
+@pytest.mark.redis
+def test_redis_db_notify_subscribers(server, db):
+    other = RedisDB(host="localhost:6379", client=fakeredis.FakeRedis(server=server))
+    received = threading.Event()
+    keys = []
+    db.subscribe(lambda key: (keys.append(key), received.set()))
+    try:
+        other.set("1", {"results": "a"})
+        assert received.wait(timeout=2)
+    finally:
+        other.close()
+
+    assert keys == ["1"]
+
+
+def create_replica(mocker, create_client, server, dispatch_mode):
+    mocker.patch.object(mq_client_module, "create_db", return_value=RedisDB(
+        host="localhost:6379", client=fakeredis.FakeRedis(server=server)))
+    client, _, producer, _, consume_response, _ = create_client(
+        consume=lambda: None,
+        db_provider=DBProvider.REDIS.value,
+        db_config=DBConfig(host="localhost:6379"),
+        timeout=2.0,
+        # Long poll so only the pub/sub wakeup can resolve the request in time
+        polling_interval=10.0,
+        dispatch_mode=dispatch_mode,
+    )
+    return client, consume_response, producer
+
+
+@pytest.mark.asyncio
+@pytest.mark.redis
+@pytest.mark.parametrize("dispatch_mode", [DispatchMode.EVENT.value, DispatchMode.POLL.value])
+async def test_stateless_replicas_share_responses(mocker, create_client, server, dispatch_mode):
+    sender, _, producer = create_replica(mocker, create_client, server, dispatch_mode)
+    receiver, receiver_consume, _ = create_replica(mocker, create_client, server, dispatch_mode)
+    loop = asyncio.get_running_loop()
+    # The shared consumer group hands the response to the other replica
+    producer.publish_message.side_effect = lambda topic, payload: loop.call_later(
+        0.05, receiver_consume, QueueDTO(id=payload.id, message={"results": "ok"}))
+
+    try:
+        response = await sender.send_request("request", {"text": "hello"})
+    finally:
+        for client in (sender, receiver):
+            client.is_consumer_running = False
+            client.repository.close()
+        for task in asyncio.all_tasks() - {asyncio.current_task()}:
+            task.cancel()
+
+    assert response == {"results": "ok"}
+    assert sender.subscription_data == {}
+    assert sender.repository.client.keys("mq_client:response:*") == []
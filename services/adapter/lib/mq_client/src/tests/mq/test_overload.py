@@ -0,0 +1,150 @@
+import asyncio
+
+import pytest
+
+from mq_client import OverloadError, OverloadPolicy
+from mq.common import QueueDTO
+
+
+def respond(mocked, message_id):
+    # Requests stay in flight until the test answers them
+    mocked.consume_response(QueueDTO(id=message_id, message={"text": message_id}))
+
+
+async def wait_until(condition, timeout=1.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition() and asyncio.get_running_loop().time() < deadline:
+        await asyncio.sleep(0.001)
+    assert condition()
+
+
+def assert_released(client, topic="llm-request"):
+    stats = client.stats()
+    assert stats["pending"] == 0
+    assert stats["topics"][topic]["in_flight"] == 0
+    assert stats["topics"][topic]["waiting"] == 0
+    semaphore = client.topic_semaphores.get(topic)
+    assert semaphore is None or not semaphore.locked()
+
+
+@pytest.mark.asyncio
+@pytest.mark.overload
+async def test_overload_reject_when_max_pending_reached(create_client):
+    mocked = create_client(max_pending=1)
+    client, published = mocked.client, mocked.published
+    try:
+        first = asyncio.create_task(client.send_request("llm-request", {"text": "1"}, "llm-response"))
+        await wait_until(lambda: len(published) == 1)
+
+        with pytest.raises(OverloadError):
+            await client.send_request("llm-request", {"text": "2"}, "llm-response")
+        assert client.stats()["topics"]["llm-request"]["rejected"] == 1
+
+        respond(mocked, published[0])
+        assert await first == {"text": published[0]}
+    finally:
+        client.close()
+
+    assert len(published) == 1
+    assert_released(client)
+
+
+@pytest.mark.asyncio
+@pytest.mark.overload
+async def test_overload_reject_when_concurrency_reached(create_client):
+    mocked = create_client(max_concurrency=1, topic_concurrency={"vector-request": 2}, overload_policy=OverloadPolicy.REJECT.value)
+    client, published = mocked.client, mocked.published
+    try:
+        first = asyncio.create_task(client.send_request("llm-request", {"text": "1"}, "llm-response"))
+        await wait_until(lambda: len(published) == 1)
+
+        with pytest.raises(OverloadError):
+            await client.send_request("llm-request", {"text": "2"}, "llm-response")
+        # The topic override allows more requests in flight on its own topic
+        other = asyncio.create_task(client.send_request("vector-request", {"text": "3"}, "llm-response"))
+        await wait_until(lambda: len(published) == 2)
+
+        for message_id in published:
+            respond(mocked, message_id)
+        await asyncio.gather(first, other)
+    finally:
+        client.close()
+
+    assert client.stats()["topics"]["llm-request"]["rejected"] == 1
+    assert_released(client)
+    assert_released(client, "vector-request")
+
+
+@pytest.mark.asyncio
+@pytest.mark.overload
+async def test_overload_queue_until_slot_free(create_client):
+    mocked = create_client(max_concurrency=1)
+    client, published = mocked.client, mocked.published
+    try:
+        first = asyncio.create_task(client.send_request("llm-request", {"text": "1"}, "llm-response"))
+        await wait_until(lambda: len(published) == 1)
+        second = asyncio.create_task(client.send_request("llm-request", {"text": "2"}, "llm-response"))
+        await wait_until(lambda: client.stats()["topics"]["llm-request"]["waiting"] == 1)
+        # The waiting request is not published before it gets the slot
+        assert len(published) == 1
+
+        respond(mocked, published[0])
+        await first
+        await wait_until(lambda: len(published) == 2)
+        respond(mocked, published[1])
+        assert await second == {"text": published[1]}
+    finally:
+        client.close()
+
+    assert client.stats()["topics"]["llm-request"]["completed"] == 2
+    assert_released(client)
+
+
+@pytest.mark.asyncio
+@pytest.mark.overload
+async def test_overload_queue_timeout_release_slot(create_client):
+    mocked = create_client(max_concurrency=1, timeout=0.05)
+    client, published = mocked.client, mocked.published
+    try:
+        first = asyncio.create_task(client.send_request("llm-request", {"text": "1"}, "llm-response"))
+        await wait_until(lambda: len(published) == 1)
+        # Times out while waiting for the slot, it is never published
+        with pytest.raises(asyncio.TimeoutError):
+            await client.send_request("llm-request", {"text": "2"}, "llm-response")
+        # The first request times out while in flight
+        with pytest.raises(asyncio.TimeoutError):
+            await first
+        assert len(published) == 1
+        assert_released(client)
+
+        third = asyncio.create_task(client.send_request("llm-request", {"text": "3"}, "llm-response"))
+        await wait_until(lambda: len(published) == 2)
+        respond(mocked, published[1])
+        assert await third == {"text": published[1]}
+    finally:
+        client.close()
+
+    assert_released(client)
+
+
+@pytest.mark.asyncio
+@pytest.mark.overload
+async def test_overload_release_slot_on_publish_error(create_client):
+    mocked = create_client(max_concurrency=1, max_pending=1)
+    client, producer, published = mocked.client, mocked.producer, mocked.published
+    publish = producer.publish_message.side_effect
+    producer.publish_message.side_effect = Exception("broker down")
+    try:
+        with pytest.raises(Exception, match="broker down"):
+            await client.send_request("llm-request", {"text": "1"}, "llm-response")
+        assert_released(client)
+
+        producer.publish_message.side_effect = publish
+        request = asyncio.create_task(client.send_request("llm-request", {"text": "2"}, "llm-response"))
+        await wait_until(lambda: len(published) == 1)
+        respond(mocked, published[0])
+        assert await request == {"text": published[0]}
+    finally:
+        client.close()
+
+    assert_released(client)
@@ -0,0 +1,61 @@
+import asyncio
+import gc
+import tracemalloc
+
+import pytest
+
+from mq_client import DBConfig, DispatchMode, QueueDTO
+
+
+@pytest.fixture
+def client(create_client):
+    # A plain function, a Mock would keep every call and grow with the request count
+    client, _, producer, _, consume_response, _ = create_client(
+        consume=lambda: None,
+        db_config=DBConfig(ttl=0.05),
+        timeout=0.01,
+        polling_interval=0.005,
+        dispatch_mode=DispatchMode.POLL.value,
+    )
+
+    def publish_message(topic, payload):
+        # Every response arrives after the request timed out
+        message = QueueDTO(id=payload.id, message={"results": "late"})
+        asyncio.get_running_loop().call_later(0.02, consume_response, message)
+    producer.publish_message = publish_message
+    return client
+
+
+async def run_timeouts(client, total: int, concurrency: int = 100):
+    for _ in range(0, total, concurrency):
+        results = await asyncio.gather(
+            *(client.send_request("request", {"text": "hello"}) for _ in range(concurrency)),
+            return_exceptions=True,
+        )
+        assert all(isinstance(result, asyncio.TimeoutError) for result in results)
+    # Let late responses arrive and stored responses pass their ttl
+    await asyncio.sleep(0.1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.soak
+async def test_soak_timeouts_keep_memory_steady(client):
+    tracemalloc.start()
+    try:
+        await run_timeouts(client, 1000)
+        gc.collect()
+        baseline, _ = tracemalloc.get_traced_memory()
+
+        await run_timeouts(client, 5000)
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        for task in asyncio.all_tasks() - {asyncio.current_task()}:
+            task.cancel()
+
+    assert client.subscription_data == {}
+    assert len(client.subscription_expiry) == 0
+    assert client.repository.get("unknown") is None and client.repository.repo == {}
+    # Five times the requests must not grow memory with the request count
+    assert current - baseline < 256 * 1024
@@ -0,0 +1,53 @@
+import pytest
+
+from db.dict import LocalDB
+from util.expiry import ExpiryHeap
+
+
+@pytest.mark.expiry
+def test_expiry_heap_pop_expired_in_deadline_order():
+    expiry = ExpiryHeap()
+    expiry.add("b", 2.0)
+    expiry.add("a", 1.0)
+    expiry.add("c", 3.0)
+
+    assert expiry.pop_expired(0.5) == []
+    assert expiry.pop_expired(2.0) == ["a", "b"]
+    assert len(expiry) == 1
+
+
+@pytest.mark.expiry
+def test_expiry_heap_skip_discarded_and_renewed_keys():
+    expiry = ExpiryHeap()
+    expiry.add("a", 1.0)
+    expiry.add("b", 1.0)
+    expiry.discard("a")
+    expiry.add("b", 5.0)
+
+    assert expiry.pop_expired(2.0) == []
+    assert expiry.pop_expired(5.0) == ["b"]
+
+
+@pytest.mark.expiry
+def test_expiry_heap_compact_stale_entries():
+    expiry = ExpiryHeap()
+    for i in range(1000):
+        expiry.add(str(i), float(i))
+        expiry.discard(str(i))
+
+    assert len(expiry) == 0
+    assert len(expiry.heap) <= 64 + 1
+
+
+@pytest.mark.expiry
+def test_local_db_expire_uncollected_response(mocker):
+    now = mocker.patch("db.dict.db.time.monotonic", return_value=100.0)
+    db = LocalDB(ttl=10)
+    db.set("late", {"results": "ok"})
+
+    now.return_value = 105.0
+    assert db.get("late") == {"results": "ok"}
+
+    now.return_value = 111.0
+    assert db.get("late") is None
+    assert db.repo == {} and len(db.expiry) == 0
@@ -0,0 +1,35 @@
+import heapq
+from typing import Dict, List, Tuple
+
+
+class ExpiryHeap:
+    """
+    Deadlines of keys in a min-heap, so expired keys are found without scanning every key.
+    Removed or re-added keys leave stale heap entries, they are skipped on pop and compacted
+    once they outnumber the live keys.
+    """
+    def __init__(self):
+        self.heap: List[Tuple[float, str]] = []
+        self.deadlines: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self.deadlines)
+
+    def add(self, key: str, deadline: float):
+        self.deadlines[key] = deadline
+        heapq.heappush(self.heap, (deadline, key))
+        if len(self.heap) > 2 * len(self.deadlines) + 64:
+            self.heap = [(deadline, key) for key, deadline in self.deadlines.items()]
+            heapq.heapify(self.heap)
+
+    def discard(self, key: str):
+        self.deadlines.pop(key, None)
+
+    def pop_expired(self, now: float) -> List[str]:
+        expired = []
+        while self.heap and self.heap[0][0] <= now:
+            deadline, key = heapq.heappop(self.heap)
+            if self.deadlines.get(key) == deadline:
+                del self.deadlines[key]
+                expired.append(key)
+        return expired
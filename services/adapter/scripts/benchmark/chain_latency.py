@@ -0,0 +1,86 @@
+"""
+Load test for the adapter chain endpoint, reports latency percentiles under concurrent requests.
+
+Example:
+    python scripts/benchmark/chain_latency.py --adapter web_account --concurrency 16 --requests 200
+
+Run it once per MQ_CLIENT_DISPATCH_MODE (poll, event) against the same stack to compare.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+import httpx
+
+
+def percentile(values: List[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(percent / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def send_request(client: httpx.AsyncClient, url: str, question: str) -> float:
+    payload = {
+        "input": {
+            "messages": [{"type": "human", "content": question}],
+            "next": "",
+        },
+    }
+    start_time = time.perf_counter()
+    response = await client.post(url, json=payload)
+    response.raise_for_status()
+    return time.perf_counter() - start_time
+
+
+async def run(host: str, adapter: str, question: str, concurrency: int, total_requests: int, timeout: float):
+    url = f"{host}/api/v1/chain/{adapter}/invoke"
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        async def worker():
+            nonlocal errors
+            async with semaphore:
+                try:
+                    latencies.append(await send_request(client, url, question))
+                except (httpx.HTTPError, asyncio.TimeoutError):
+                    errors += 1
+
+        start_time = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(total_requests)))
+        elapsed = time.perf_counter() - start_time
+
+    print(f"url: {url}")
+    print(f"requests: {total_requests}, concurrency: {concurrency}, errors: {errors}")
+    if not latencies:
+        return
+    print(f"throughput: {len(latencies) / elapsed:.2f} req/s")
+    print(f"mean: {statistics.mean(latencies) * 1000:.1f} ms")
+    for percent in (50, 90, 99):
+        print(f"p{percent}: {percentile(latencies, percent) * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adapter chain latency benchmark")
+    parser.add_argument("--host", default="http://localhost:8900")
+    parser.add_argument("--adapter", default="web_account")
+    parser.add_argument("--question", default="FCD คืออะไร")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    asyncio.run(run(
+        host=args.host,
+        adapter=args.adapter,
+        question=args.question,
+        concurrency=args.concurrency,
+        total_requests=args.requests,
+        timeout=args.timeout,
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Per-stage latency of the RAG chain for each fast path, with the prompts of an adapter config and a simulated LLM
+and retriever so no service is needed. Every LLM call sleeps --llm-ms, the round-trip through the MQ and the LLM
+service, and every retrieval sleeps --retrieval-ms, the query embedding round-trip and the search.
+A --single-turn share of the conversations has one message, --rewrite-changes of the multi-turn rewrites differ
+from the raw question, --english-questions of the questions are asked in English and --thai-answers of the
+answers to Thai questions are already in Thai. The classifier only sends Thai questions with a non-Thai answer
+through response control.
+
+Example:
+    python scripts/benchmark/rag_chain.py --requests 20 --llm-ms 1500 --retrieval-ms 60
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables import RunnableLambda
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "src"))
+
+from rag.latency import STAGES, StageLatencyTracker  # noqa: E402
+from rag.rag_chain import init_rag_chain  # noqa: E402
+
+CONFIGS = {
+    "three round-trips": {},
+    "skip single-turn rewrite": {"skip_single_turn_rewrite": True},
+    "+ speculative retrieval": {"skip_single_turn_rewrite": True, "speculative_retrieval": True},
+    "+ classifier response control": {"skip_single_turn_rewrite": True, "speculative_retrieval": True, "response_control": "classifier"},
+    "+ merged response control": {"skip_single_turn_rewrite": True, "speculative_retrieval": True, "response_control": "merged"},
+}
+
+
+class DelayedRetriever(BaseRetriever):
+    delay_seconds: float
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        time.sleep(self.delay_seconds)
+        return [Document(page_content=f"FCD: {query} -- URL: https://www.kasikornbank.com")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--adapter-config", default="data/config.json")
+    parser.add_argument("--adapter", default="web_account")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--llm-ms", type=float, default=1500)
+    parser.add_argument("--retrieval-ms", type=float, default=60)
+    parser.add_argument("--single-turn", type=float, default=0.6)
+    parser.add_argument("--rewrite-changes", type=float, default=0.5)
+    parser.add_argument("--english-questions", type=float, default=0.3)
+    parser.add_argument("--thai-answers", type=float, default=0.0)
+    args = parser.parse_args()
+
+    with open(args.adapter_config) as f:
+        config = next(member for member in json.load(f) if member["adapter"] == args.adapter)["config"]["prompt"]
+    prompt_path = lambda key: os.path.join(config["dir"], config[key]) if config.get(key) else ""  # noqa: E731
+
+    rng = random.Random(0)
+    conversations = []
+    for _ in range(args.requests):
+        english = rng.random() < args.english_questions
+        question = "Can I open an FCD account online?" if english else "บัญชี FCD เปิดออนไลน์ได้ไหม"
+        single_turn = rng.random() < args.single_turn
+        messages = [HumanMessage(content=question)] if single_turn else [
+            HumanMessage(content="FCD คืออะไร"), AIMessage(content="FCD คือบัญชีเงินฝากสกุลเงินต่างประเทศ"), HumanMessage(content=question),
+        ]
+        rewritten = question if single_turn or rng.random() >= args.rewrite_changes else "Can I open an FCD account online?"
+        answer = "สามารถเปิดบัญชี FCD ออนไลน์ได้" if not english and rng.random() < args.thai_answers else "You can open an FCD account online."
+        conversations.append(({"messages": messages, "next": ""}, rewritten, answer))
+
+    print(f"requests: {args.requests}, llm: {args.llm_ms} ms, retrieval: {args.retrieval_ms} ms, single-turn: {args.single_turn}, "
+          f"rewrite changes: {args.rewrite_changes}, english questions: {args.english_questions}, thai answers: {args.thai_answers}")
+    print(f"{'':32}{'mean':>10}" + "".join(f"{stage:>18}" for stage in STAGES) + f"{'llm calls':>12}")
+    for name, kwargs in CONFIGS.items():
+        if kwargs.get("response_control") == "merged" and not prompt_path("merged_prompt"):
+            continue
+        tracker = StageLatencyTracker(args.adapter)
+        calls, current = [0], {}
+
+        def llm(prompt):
+            calls[0] += 1
+            time.sleep(args.llm_ms / 1000)
+            text = prompt.to_string()
+            return current["rewritten"] if "standalone question" in text else current["answer"]
+
+        chain = init_rag_chain(
+            retriever=DelayedRetriever(delay_seconds=args.retrieval_ms / 1000),
+            llm=RunnableLambda(llm),
+            qg_prompt_path=prompt_path("query_generate_prompt"),
+            qa_prompt_path=prompt_path("qa_prompt"),
+            rc_prompt_path=prompt_path("response_control_prompt"),
+            merged_prompt_path=prompt_path("merged_prompt"),
+            latency_tracker=tracker,
+            **kwargs,
+        )
+        for inputs, rewritten, answer in conversations:
+            current.update(rewritten=rewritten, answer=answer)
+            chain.invoke(inputs)
+        stats = tracker.stats()
+        stages = "".join(
+            f"{stats['stages'][stage]['mean_ms']:>9.0f} ms x{stats['stages'][stage]['runs'] / args.requests:.2f}" for stage in STAGES
+        )
+        print(f"{name:32}{stats['mean_ms']:>7.0f} ms{stages}{calls[0] / args.requests:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Search latency of the local vector index on synthetic clustered embeddings, exact top-k against the IVF index,
+with the IVF recall of the exact top-k. The query embedding is precomputed, only the in-process search and the
+sub-document lookup are timed.
+
+Example:
+    python scripts/benchmark/retrieval.py --vectors 100000 --nlist 256 --nprobe 8 16
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "src"))
+
+from rag.local_store import LocalVectorStore  # noqa: E402
+
+
+def percentile(values: List[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(percent / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run(store: LocalVectorStore, queries: np.ndarray, k: int, exact: List[set]) -> List[set]:
+    latencies, results = [], []
+    for query in queries:
+        start_time = time.perf_counter()
+        rows, scores = store.search_rows(query, k)
+        store._documents(rows, scores)
+        latencies.append(time.perf_counter() - start_time)
+        results.append(set(rows.tolist()))
+    recall = statistics.mean(len(found & expected) / k for found, expected in zip(results, exact)) if exact else 1.0
+    name = "exact" if store.centroids is None or store.nprobe <= 0 else f"ivf nprobe={store.nprobe}"
+    print(f"{name}: p50 {percentile(latencies, 50) * 1000:.3f} ms, p99 {percentile(latencies, 99) * 1000:.3f} ms, recall@{k} {recall:.3f}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--nlist", type=int, default=256)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[8, 16])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(1000, args.dim)).astype(np.float32)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = LocalVectorStore(tmp_dir, embeddings=None)
+        for start in range(0, args.vectors, 10_000):
+            count = min(10_000, args.vectors - start)
+            vectors = centers[rng.integers(len(centers), size=count)] + rng.normal(size=(count, args.dim)).astype(np.float32)
+            store.add_embeddings(
+                [(f"sub-doc {start + i}", vector) for i, vector in enumerate(vectors.tolist())],
+                metadatas=[{"doc_id": f"doc-{(start + i) // 3}"} for i in range(count)],
+                ids=[str(start + i) for i in range(count)],
+            )
+        start_time = time.perf_counter()
+        store.build()
+        print(f"vectors: {len(store)}, dim: {args.dim}, build: {time.perf_counter() - start_time:.2f}s")
+
+        queries = centers[rng.integers(len(centers), size=args.queries)] + rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+        exact = run(store, queries, args.k, [])
+
+        start_time = time.perf_counter()
+        store.build(nlist=args.nlist)
+        print(f"ivf nlist: {args.nlist}, build: {time.perf_counter() - start_time:.2f}s")
+        for nprobe in args.nprobe:
+            store.nprobe = nprobe
+            run(store, queries, args.k, exact)
+
+
+if __name__ == "__main__":
+    main()
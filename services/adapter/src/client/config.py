@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Dict, Literal, Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -25,7 +25,24 @@ class Configs(BaseSettings):
     mq_client_llm_consume_topic: Optional[str] = "llm-response"
     mq_client_vector_topic: Optional[str] = "vector-request"
     mq_client_vector_consume_topic: Optional[str] = "vector-response"
+    mq_client_vector_encoding: Optional[Literal["json", "float32", "float16"]] = "float32"
     mq_client_consume_timeout: Optional[float] = 0.1
+    mq_client_dispatch_mode: Optional[Literal["event", "poll"]] = "event"
+    mq_client_max_concurrency: Optional[int] = 0
+    mq_client_topic_concurrency: Optional[Dict[str, int]] = {}
+    mq_client_max_pending: Optional[int] = 0
+    mq_client_overload_policy: Optional[Literal["queue", "reject"]] = "queue"
+    mq_client_db_provider: Optional[Literal["local", "redis"]] = "local"
+    mq_client_db_host: Optional[str] = ""
+    mq_client_db_ttl: Optional[float] = 60.0
+    mq_client_reply_routing: Optional[Literal["group", "topic", "partition"]] = "group"
+    mq_client_reply_id: Optional[str] = ""
+    mq_client_reply_partition: Optional[int] = 0
+
+    llm_cache_max_size: Optional[int] = 1024
+    llm_cache_ttl_seconds: Optional[float] = 3600
+    llm_cache_semantic: Optional[bool] = False
+    llm_cache_similarity_threshold: Optional[float] = 0.95
 
     adapter_config_path: str
 
@@ -33,4 +50,17 @@ class Configs(BaseSettings):
     mongo_password: str
     mongo_host: str
     
-    opensearch_host: str
\ No newline at end of file
+    opensearch_host: str
+
+    vector_store_provider: Optional[Literal["opensearch", "local"]] = "opensearch"
+    local_index_dir: Optional[str] = "data/index"
+    local_index_nprobe: Optional[int] = 8
+
+    docstore_cache_max_size: Optional[int] = 4096
+    docstore_cache_ttl_seconds: Optional[float] = 600
+    docstore_cache_generation_check_seconds: Optional[float] = 30
+    docstore_cache_stats_log_seconds: Optional[float] = 60
+
+    rag_skip_single_turn_rewrite: Optional[bool] = True
+    rag_speculative_retrieval: Optional[bool] = False
+    rag_response_control: Optional[Literal["always", "merged", "classifier"]] = "always"
\ No newline at end of file
@@ -1,21 +1,21 @@
 import importlib
 import json
 import os
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from urllib.parse import quote_plus
 
 from langchain.chains.base import Chain
 from langchain_core.embeddings import Embeddings
 from langchain_core.language_models import BaseLanguageModel
-from mq_client import DBProvider, MQClient, MQConfig, MQProvider
+from mq_client import DBConfig, MQClient, MQConfig, MQProvider
 
 from client.config import Configs
 from common.constant.domain import APP_ADAPTER as ADAPTER
 from common.constant.domain import INFRA_MQ_CLIENT as MQ_CLIENT
 from common.log import Logger
 from embeddings import MQEmbeddings
-from language_models import MQLanguageModel
-from rag import init_rag_chain, init_retriever
+from language_models import MQLanguageModel, ResponseCache
+from rag import StageLatencyTracker, init_rag_chain, init_retriever
 
 logger = Logger.get_logger(ADAPTER)
 
@@ -24,6 +24,17 @@ def init_mq_client(
     consume_topics: List[str],
     sdk_group: str,
     consume_timeout: float,
+    dispatch_mode: str,
+    max_concurrency: int = 0,
+    topic_concurrency: Optional[Dict[str, int]] = None,
+    max_pending: int = 0,
+    overload_policy: str = "queue",
+    db_provider: str = "local",
+    db_host: str = "",
+    db_ttl: float = 60.0,
+    reply_routing: str = "group",
+    reply_id: str = "",
+    reply_partition: int = 0,
 ) -> MQClient:
     mq_client = MQClient(
         mq_provider=MQProvider.KAFKA.value,
@@ -32,26 +43,51 @@ def init_mq_client(
             consume_topics=consume_topics,
             consume_timeout=consume_timeout
         ),
-        db_provider=DBProvider.LOCAL.value,
-        db_config=None,
+        db_provider=db_provider,
+        db_config=DBConfig(host=db_host, ttl=db_ttl),
         sdk_group=sdk_group,
+        dispatch_mode=dispatch_mode,
         logger=Logger.get_logger(MQ_CLIENT),
+        max_concurrency=max_concurrency,
+        topic_concurrency=topic_concurrency,
+        max_pending=max_pending,
+        overload_policy=overload_policy,
+        reply_routing=reply_routing,
+        reply_id=reply_id,
+        reply_partition=reply_partition,
     )
 
     return mq_client
 
-def init_mq_language_model(mq_client, topic: str, consume_topic: str) -> MQLanguageModel:
+def init_response_cache(
+    max_size: int,
+    ttl_seconds: float,
+    embeddings: Optional[Embeddings] = None,
+    similarity_threshold: float = 0.95,
+) -> Optional[ResponseCache]:
+    if max_size <= 0:
+        return None
+    return ResponseCache(
+        max_size=max_size,
+        ttl_seconds=ttl_seconds,
+        embeddings=embeddings,
+        similarity_threshold=similarity_threshold,
+    )
+
+def init_mq_language_model(mq_client, topic: str, consume_topic: str, cache: Optional[ResponseCache] = None) -> MQLanguageModel:
     return MQLanguageModel(
         mq=mq_client,
         topic=topic,
         consume_topic=consume_topic,
+        cache=cache,
     )
 
-def init_mq_embeddings(mq_client, topic: str, consume_topic: str) -> MQEmbeddings:
+def init_mq_embeddings(mq_client, topic: str, consume_topic: str, encoding: str = "float32") -> MQEmbeddings:
     return MQEmbeddings(
         mq=mq_client,
         topic=topic,
         consume_topic=consume_topic,
+        encoding=encoding,
     )
 
 def init_adapter(
@@ -62,6 +98,16 @@ def init_adapter(
         mongo_url: str,
         llm: BaseLanguageModel,
         embeddings: str | Embeddings,
+        vector_store_provider: str = "opensearch",
+        local_index_dir: str = "",
+        local_index_nprobe: int = 8,
+        docstore_cache_max_size: int = 0,
+        docstore_cache_ttl_seconds: float = 600,
+        docstore_cache_generation_check_seconds: float = 30,
+        docstore_cache_stats_log_seconds: float = 60,
+        skip_single_turn_rewrite: bool = False,
+        speculative_retrieval: bool = False,
+        response_control: str = "always",
     ) -> Chain:
     match adapter_type:
         case "rag":
@@ -69,6 +115,7 @@ def init_adapter(
             query_generate_prompt = os.path.join(prompt_dir, adapter_config["prompt"]["query_generate_prompt"])
             qa_prompt = os.path.join(prompt_dir, adapter_config["prompt"]["qa_prompt"])
             response_control_prompt = os.path.join(prompt_dir, adapter_config["prompt"]["response_control_prompt"])
+            merged_prompt = adapter_config["prompt"].get("merged_prompt")
                 
             retriever = init_retriever(
                 embedding_model=embeddings,
@@ -77,6 +124,13 @@ def init_adapter(
                 mongo_url=mongo_url,
                 mongo_db_name=adapter_config["mongo_db_name"],
                 mongo_collection_name=adapter_config["mongo_collection_name"],
+                vector_store_provider=vector_store_provider,
+                local_index_dir=local_index_dir,
+                local_index_nprobe=local_index_nprobe,
+                docstore_cache_max_size=docstore_cache_max_size,
+                docstore_cache_ttl_seconds=docstore_cache_ttl_seconds,
+                docstore_cache_generation_check_seconds=docstore_cache_generation_check_seconds,
+                docstore_cache_stats_log_seconds=docstore_cache_stats_log_seconds,
             )
             chain = init_rag_chain(
                 retriever=retriever, 
@@ -84,15 +138,24 @@ def init_adapter(
                 qg_prompt_path=query_generate_prompt,
                 qa_prompt_path=qa_prompt,
                 rc_prompt_path=response_control_prompt,
+                skip_single_turn_rewrite=skip_single_turn_rewrite,
+                speculative_retrieval=speculative_retrieval,
+                response_control=response_control,
+                merged_prompt_path=os.path.join(prompt_dir, merged_prompt) if merged_prompt else "",
+                latency_tracker=StageLatencyTracker(adapter_name),
             )
             
             logger.info({
                 "message": "init adapter",
                 "adapter_name": adapter_name,
                 "adapter_type": adapter_type,
+                "vector_store_provider": vector_store_provider,
                 "opensearch_index": adapter_config["opensearch_index"],
                 "mongo_db": adapter_config["mongo_db_name"],
                 "mongo_collection": adapter_config["mongo_collection_name"],
+                "skip_single_turn_rewrite": skip_single_turn_rewrite,
+                "speculative_retrieval": speculative_retrieval,
+                "response_control": response_control,
             })
 
             return chain
@@ -107,27 +170,46 @@ def init_adapter(
         case _:
             raise ValueError("Adapter type must be either 'rag' or 'custom'.")
 
-def get_adapters(configs: Configs) -> Dict[str, Chain]:
-    with open(configs.adapter_config_path) as f:
-            members = json.load(f)
-    
-    mq_client = init_mq_client(
+def get_mq_client(configs: Configs) -> MQClient:
+    return init_mq_client(
         host=configs.mq_client_host,
         consume_topics=[configs.mq_client_llm_consume_topic, configs.mq_client_vector_consume_topic],
         sdk_group=configs.mq_client_consumer_group_id,
         consume_timeout=configs.mq_client_consume_timeout,
+        dispatch_mode=configs.mq_client_dispatch_mode,
+        max_concurrency=configs.mq_client_max_concurrency,
+        topic_concurrency=configs.mq_client_topic_concurrency,
+        max_pending=configs.mq_client_max_pending,
+        overload_policy=configs.mq_client_overload_policy,
+        db_provider=configs.mq_client_db_provider,
+        db_host=configs.mq_client_db_host,
+        db_ttl=configs.mq_client_db_ttl,
+        reply_routing=configs.mq_client_reply_routing,
+        reply_id=configs.mq_client_reply_id,
+        reply_partition=configs.mq_client_reply_partition,
     )
 
-    llm = init_mq_language_model(
-        mq_client=mq_client,
-        topic=configs.mq_client_llm_topic,
-        consume_topic=configs.mq_client_llm_consume_topic,
-    )
+def get_adapters(configs: Configs, mq_client: MQClient) -> Dict[str, Chain]:
+    with open(configs.adapter_config_path) as f:
+            members = json.load(f)
 
     embeddings = init_mq_embeddings(
         mq_client=mq_client,
         topic=configs.mq_client_vector_topic,
         consume_topic=configs.mq_client_vector_consume_topic,
+        encoding=configs.mq_client_vector_encoding,
+    )
+
+    llm = init_mq_language_model(
+        mq_client=mq_client,
+        topic=configs.mq_client_llm_topic,
+        consume_topic=configs.mq_client_llm_consume_topic,
+        cache=init_response_cache(
+            max_size=configs.llm_cache_max_size,
+            ttl_seconds=configs.llm_cache_ttl_seconds,
+            embeddings=embeddings if configs.llm_cache_semantic else None,
+            similarity_threshold=configs.llm_cache_similarity_threshold,
+        ),
     )
 
     adapters = {}
@@ -140,5 +222,15 @@ def get_adapters(configs: Configs) -> Dict[str, Chain]:
             mongo_url=f"mongodb://{quote_plus(configs.mongo_username)}:{quote_plus(configs.mongo_password)}@{configs.mongo_host}",
             llm=llm,
             embeddings=embeddings,
+            vector_store_provider=configs.vector_store_provider,
+            local_index_dir=configs.local_index_dir,
+            local_index_nprobe=configs.local_index_nprobe,
+            docstore_cache_max_size=configs.docstore_cache_max_size,
+            docstore_cache_ttl_seconds=configs.docstore_cache_ttl_seconds,
+            docstore_cache_generation_check_seconds=configs.docstore_cache_generation_check_seconds,
+            docstore_cache_stats_log_seconds=configs.docstore_cache_stats_log_seconds,
+            skip_single_turn_rewrite=configs.rag_skip_single_turn_rewrite,
+            speculative_retrieval=configs.rag_speculative_retrieval,
+            response_control=configs.rag_response_control,
         )
     return adapters
\ No newline at end of file
@@ -4,7 +4,7 @@ from langserve import add_routes
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 
 from client.config import Configs
-from client.constructor import get_adapters
+from client.constructor import get_adapters, get_mq_client
 from common import AgentState
 from common.log import CorrelationIdMiddleware, get_logging_config
 from common.telemetry import configure_tracing
@@ -30,7 +30,8 @@ class AppServer:
         self.port = configs.app_port
         self.logging_config = get_logging_config(configs.log_level, configs.log_timezone)
 
-        self.adapters = get_adapters(configs)
+        self.mq_client = get_mq_client(configs)
+        self.adapters = get_adapters(configs, self.mq_client)
 
     def start(self):
         for adapter, chain in self.adapters.items(): 
@@ -39,7 +40,9 @@ class AppServer:
                 chain.with_types(input_type=AgentState, output_type=str),
                 path=f"/api/v1/chain/{adapter}"
             )
-        
+        # Deliver the requests still in the producer queue before exit
+        app.add_event_handler("shutdown", self.mq_client.close)
+
         uvicorn.run(
             app,
             host=self.host,
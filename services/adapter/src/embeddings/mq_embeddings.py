@@ -1,7 +1,9 @@
 import asyncio
+import base64
 import time
-from typing import List
+from typing import Any, Dict, List, Literal
 
+import numpy as np
 from langchain_core.embeddings import Embeddings
 from mq_client import MQClient
 
@@ -16,21 +18,33 @@ class MQEmbeddings(Embeddings):
         mq: MQClient,
         topic: str = "vector-request",
         consume_topic: str = "vector-response",
-        service: str = "mq_embeddings"
+        service: str = "mq_embeddings",
+        encoding: Literal["json", "float32", "float16"] = "float32",
     ):
         self.topic = topic
         self.consume_topic = consume_topic
         self.mq = mq
         self.logger = Logger.get_logger(DOMAIN)
         self.service = service
+        self.encoding = encoding
         
         self.logger.info({
             "message": "init mq_embeddings service",
             "service": self.service,
             "topic": self.topic,
             "consume_topic": self.consume_topic,
+            "encoding": self.encoding,
         })
 
+    def _decode_results(self, response: Dict[str, Any]) -> List[List[float]]:
+        """Decode vector response, binary payloads are viewed in place and only listed for LangChain."""
+        encoding = response.get("encoding") or "json"
+        if encoding == "json":
+            return response["results"]
+        buffer = base64.b64decode(response["data"])
+        vectors = np.frombuffer(buffer, dtype=np.dtype(encoding).newbyteorder("<")).reshape(response["shape"])
+        return vectors.astype(np.float32, copy=False).tolist()
+
     @trace
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """Embed search docs."""
@@ -39,12 +53,13 @@ class MQEmbeddings(Embeddings):
             "service": self.service,
         })
         payload = {
-            "texts": texts
+            "texts": texts,
+            "encoding": self.encoding,
         }
 
         start_time = time.perf_counter()
         result = asyncio.run_coroutine_threadsafe(self.mq.send_request(self.topic, payload, self.consume_topic), self.mq.event_loop).result()
-        result = result["results"]
+        result = self._decode_results(result)
         
         self.logger.info({
             "message": "[sync] embed_documents got result",
@@ -67,12 +82,13 @@ class MQEmbeddings(Embeddings):
             "service": self.service,
         })
         payload = {
-            "texts": texts
+            "texts": texts,
+            "encoding": self.encoding,
         }
 
         start_time = time.perf_counter()
         result = await self.mq.send_request(self.topic, payload, self.consume_topic)
-        result = result["results"]
+        result = self._decode_results(result)
 
         self.logger.info({
             "message": "[async] aembed_documents got result",
@@ -1 +1,2 @@
-from language_models.mq_llm import MQLanguageModel
\ No newline at end of file
+from language_models.mq_llm import MQLanguageModel
+from language_models.response_cache import ResponseCache
\ No newline at end of file
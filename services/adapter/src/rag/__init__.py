@@ -1,2 +1,5 @@
+from .docstore_cache import CachedDocStore
+from .latency import StageLatencyTracker
+from .local_store import LocalDocStore, LocalVectorStore
 from .rag_chain import init_rag_chain
 from .retriever import init_retriever
@@ -0,0 +1,175 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.stores import BaseStore
+
+from common.constant.domain import APP_ADAPTER as ADAPTER
+from common.log import Logger
+
+from .local_store import GENERATION_KEY
+
+logger = Logger.get_logger(ADAPTER)
+
+
+class CachedDocStore(BaseStore[str, Document]):
+    """
+    LRU/TTL cache of parent documents in front of a docstore. A lookup deduplicates the keys and fetches every
+    miss with one mget. The whole cache is dropped when the GENERATION_KEY document of the docstore changes,
+    which is checked at most every generation_check_seconds. stats() is logged every stats_log_seconds.
+    """
+    def __init__(
+        self,
+        store: BaseStore[str, Document],
+        max_size: int = 4096,
+        ttl_seconds: float = 600,
+        generation_check_seconds: float = 30,
+        stats_log_seconds: float = 60,
+        name: str = "",
+    ):
+        self.store = store
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.generation_check_seconds = generation_check_seconds
+        self.stats_log_seconds = stats_log_seconds
+        self.name = name
+
+        # key -> (document, expires at)
+        self.entries: OrderedDict[str, Tuple[Document, float]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.generation: Optional[str] = None
+        self.generation_checked_at = float("-inf")
+
+        self.queries = 0
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self.fetch_seconds = 0.0
+        self.cached_seconds = 0.0
+        self.stats_logged_at = time.monotonic()
+
+    def _lookup(self, keys: List[str]) -> Tuple[Dict[str, Document], List[str]]:
+        now = time.monotonic()
+        found, misses = {}, []
+        with self.lock:
+            for key in keys:
+                entry = self.entries.get(key)
+                if entry is not None and entry[1] >= now:
+                    self.entries.move_to_end(key)
+                    found[key] = entry[0]
+                else:
+                    self.entries.pop(key, None)
+                    misses.append(key)
+        return found, misses
+
+    def _store(self, keys: List[str], docs: List[Optional[Document]]):
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self.lock:
+            for key, doc in zip(keys, docs):
+                # Missing documents are not cached, they may be indexed by the next data-prep run
+                if doc is not None:
+                    self.entries[key] = (doc, expires_at)
+                    self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def _check_generation(self, generation: Optional[Document]):
+        value = generation.page_content if generation is not None else None
+        with self.lock:
+            self.generation_checked_at = time.monotonic()
+            if value != self.generation:
+                self.entries.clear()
+                self.generation = value
+
+    def _generation_due(self) -> bool:
+        return time.monotonic() - self.generation_checked_at >= self.generation_check_seconds
+
+    def _record(self, keys: List[str], misses: List[str], start_time: float, fetch_seconds: Optional[float]):
+        with self.lock:
+            self.queries += 1
+            self.hits += len(keys) - len(misses)
+            self.misses += len(misses)
+            if fetch_seconds is not None:
+                self.fetches += 1
+                self.fetch_seconds += fetch_seconds
+            else:
+                self.cached_seconds += time.perf_counter() - start_time
+            now = time.monotonic()
+            log_due = 0 < self.stats_log_seconds <= now - self.stats_logged_at
+            if log_due:
+                self.stats_logged_at = now
+        if log_due:
+            logger.info({"message": "docstore cache stats", "docstore_name": self.name, **self.stats()})
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[Document]]:
+        start_time = time.perf_counter()
+        if self._generation_due():
+            self._check_generation(self.store.mget([GENERATION_KEY])[0])
+        unique = list(dict.fromkeys(keys))
+        found, misses = self._lookup(unique)
+        fetch_seconds = None
+        if misses:
+            fetch_time = time.perf_counter()
+            docs = self.store.mget(misses)
+            fetch_seconds = time.perf_counter() - fetch_time
+            self._store(misses, docs)
+            found.update((key, doc) for key, doc in zip(misses, docs) if doc is not None)
+        self._record(unique, misses, start_time, fetch_seconds)
+        return [found.get(key) for key in keys]
+
+    async def amget(self, keys: Sequence[str]) -> List[Optional[Document]]:
+        start_time = time.perf_counter()
+        if self._generation_due():
+            self._check_generation((await self.store.amget([GENERATION_KEY]))[0])
+        unique = list(dict.fromkeys(keys))
+        found, misses = self._lookup(unique)
+        fetch_seconds = None
+        if misses:
+            fetch_time = time.perf_counter()
+            docs = await self.store.amget(misses)
+            fetch_seconds = time.perf_counter() - fetch_time
+            self._store(misses, docs)
+            found.update((key, doc) for key, doc in zip(misses, docs) if doc is not None)
+        self._record(unique, misses, start_time, fetch_seconds)
+        return [found.get(key) for key in keys]
+
+    def mset(self, key_value_pairs: Sequence[Tuple[str, Document]]) -> None:
+        self.store.mset(key_value_pairs)
+        self.invalidate([key for key, _ in key_value_pairs])
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        self.store.mdelete(keys)
+        self.invalidate(keys)
+
+    def yield_keys(self, prefix: Optional[str] = None) -> Iterator[str]:
+        return self.store.yield_keys(prefix=prefix)
+
+    def invalidate(self, keys: Optional[Sequence[str]] = None):
+        """Drop the given keys, or every entry when keys is None."""
+        with self.lock:
+            if keys is None:
+                self.entries.clear()
+            for key in keys or []:
+                self.entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate and the docstore time saved, a query served from the cache saves the mean fetch time."""
+        with self.lock:
+            return self._stats()
+
+    def _stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        fetch_ms = self.fetch_seconds / self.fetches * 1000 if self.fetches else 0.0
+        cached_queries = self.queries - self.fetches
+        saved_ms = cached_queries * fetch_ms - self.cached_seconds * 1000
+        return {
+            "queries": self.queries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self.entries),
+            "fetch_ms": round(fetch_ms, 3),
+            "saved_ms_per_query": round(saved_ms / self.queries, 3) if self.queries else 0.0,
+        }
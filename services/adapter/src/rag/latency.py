@@ -0,0 +1,117 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from common.constant.domain import APP_ADAPTER as ADAPTER
+from common.log import Logger
+
+logger = Logger.get_logger(ADAPTER)
+
+# Run names of the RAG chain and of its stages, see init_rag_chain
+CHAIN_NAME = "rag_chain"
+STAGES = ["rewrite", "retrieve", "answer", "response_control"]
+
+
+class StageLatencyTracker(BaseCallbackHandler):
+    """
+    Callback handler timing the stages of the RAG chain. Stage runs are attributed to the chain run they belong
+    to, the breakdown of a request is logged when its chain run ends and aggregated for stats().
+    A streamed stage ends with its last chunk.
+    """
+    # Timing only, no need for a thread per callback in async runs
+    run_inline = True
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.lock = threading.Lock()
+        # run id -> parent run id, of the runs inside a chain run
+        self.parents: Dict[UUID, Optional[UUID]] = {}
+        self.started: Dict[UUID, float] = {}
+        self.stage_names: Dict[UUID, str] = {}
+        # chain run id -> stage -> seconds
+        self.breakdowns: Dict[UUID, Dict[str, float]] = {}
+
+        self.requests = 0
+        self.total_seconds = 0.0
+        self.stage_runs = {stage: 0 for stage in STAGES}
+        self.stage_seconds = {stage: 0.0 for stage in STAGES}
+
+    def _chain_run(self, run_id: UUID) -> Optional[UUID]:
+        while run_id is not None and run_id not in self.breakdowns:
+            run_id = self.parents.get(run_id)
+        return run_id
+
+    def on_chain_start(
+        self,
+        serialized: Dict[str, Any],
+        inputs: Dict[str, Any],
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ) -> None:
+        name = kwargs.get("name")
+        with self.lock:
+            if name == CHAIN_NAME:
+                self.breakdowns[run_id] = {}
+            elif self._chain_run(parent_run_id) is None:
+                return
+            self.parents[run_id] = parent_run_id
+            if name == CHAIN_NAME or name in STAGES:
+                self.started[run_id] = time.perf_counter()
+                self.stage_names[run_id] = name
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, failed=False)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, failed=True)
+
+    def _end(self, run_id: UUID, failed: bool):
+        with self.lock:
+            name = self.stage_names.pop(run_id, None)
+            start_time = self.started.pop(run_id, None)
+            if name is None:
+                self.parents.pop(run_id, None)
+                return
+            seconds = time.perf_counter() - start_time
+            if name != CHAIN_NAME:
+                chain_run = self._chain_run(run_id)
+                self.parents.pop(run_id, None)
+                if chain_run is not None:
+                    breakdown = self.breakdowns[chain_run]
+                    breakdown[name] = breakdown.get(name, 0.0) + seconds
+                return
+            self.parents.pop(run_id, None)
+            breakdown = self.breakdowns.pop(run_id)
+            if failed:
+                return
+            self.requests += 1
+            self.total_seconds += seconds
+            for stage, stage_seconds in breakdown.items():
+                self.stage_runs[stage] += 1
+                self.stage_seconds[stage] += stage_seconds
+        logger.info({
+            "message": "rag chain latency",
+            "adapter_name": self.name,
+            "total_ms": round(seconds * 1000, 1),
+            **{f"{stage}_ms": round(stage_seconds * 1000, 1) for stage, stage_seconds in breakdown.items()},
+        })
+
+    def stats(self) -> Dict[str, Any]:
+        """Mean latency of the requests and of each stage over the requests that ran it."""
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "mean_ms": round(self.total_seconds / self.requests * 1000, 1) if self.requests else 0.0,
+                "stages": {
+                    stage: {
+                        "runs": self.stage_runs[stage],
+                        "mean_ms": round(self.stage_seconds[stage] / self.stage_runs[stage] * 1000, 1) if self.stage_runs[stage] else 0.0,
+                    }
+                    for stage in STAGES
+                },
+            }
@@ -0,0 +1,389 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.stores import BaseStore
+from langchain_core.vectorstores import VectorStore
+
+# Every build writes its own files, named by the build id stored in the catalog
+VECTORS_FILE = "vectors.{}.npy"
+IVF_FILE = "ivf.{}.npz"
+STAGED_FILE = "staged.f32"
+CATALOG_FILE = "index.sqlite"
+# Searches retried when the index is rebuilt between the matrix product and the catalog read
+MAX_BUILD_RETRIES = 3
+# Docstore key data-prep rewrites after every run, a new value means the parent documents may have changed
+GENERATION_KEY = "__index_generation__"
+
+
+def _normalize(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+
+class _Catalog:
+    """SQLite file next to the vectors holding the sub-document rows, the parent documents and staged changes."""
+    def __init__(self, path: str):
+        # Autocommit, every write is durable on its own and readers never hold a transaction open
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.lock = threading.RLock()
+        self.connection.executescript("""
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS sub_docs (row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, text TEXT NOT NULL, metadata TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS staged (id TEXT PRIMARY KEY, row INTEGER, text TEXT, metadata TEXT);
+            CREATE TABLE IF NOT EXISTS docs (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        """)
+
+    def execute(self, query: str, parameters: Sequence = ()) -> List[tuple]:
+        with self.lock:
+            return self.connection.execute(query, parameters).fetchall()
+
+    def executemany(self, query: str, parameters: Iterable[Sequence]):
+        with self.lock:
+            self.connection.execute("BEGIN")
+            self.connection.executemany(query, parameters)
+            self.connection.execute("COMMIT")
+
+    @contextmanager
+    def snapshot(self):
+        # The reads in the block see one version of the file, even while another process commits a build
+        with self.lock:
+            self.connection.execute("BEGIN")
+            try:
+                yield
+            finally:
+                self.connection.execute("COMMIT")
+
+    def build_id(self) -> Optional[str]:
+        build_id = self.execute("SELECT value FROM meta WHERE key = 'build'")
+        return build_id[0][0] if build_id else None
+
+    def select_in(self, query: str, values: Sequence) -> List[tuple]:
+        rows = []
+        # SQLite limits the number of query parameters
+        for start in range(0, len(values), 500):
+            chunk = list(values[start:start + 500])
+            rows += self.execute(query.format(", ".join("?" * len(chunk))), chunk)
+        return rows
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector index in a directory: a memory-mapped float32 matrix of normalized embeddings searched
+    exactly with one matrix product, an optional IVF index (centroids and inverted lists) searched over the
+    nprobe closest lists, and an SQLite catalog of the sub-document texts and metadata.
+
+    Writes are staged and only searchable after build(), which writes the matrix and the IVF lists of a new
+    build id. A store opened by another process (the adapter while data-prep builds) checks the build id of
+    every catalog read and loads the new files when the catalog moved to another build.
+    """
+    def __init__(self, path: str, embeddings: Embeddings, nprobe: int = 8):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.index_name = path
+        self._embeddings = embeddings
+        self.nprobe = nprobe
+        self.catalog = _Catalog(os.path.join(path, CATALOG_FILE))
+        self.build_id: Optional[str] = None
+        self.matrix: Optional[np.ndarray] = None
+        self.centroids: Optional[np.ndarray] = None
+        self.order: Optional[np.ndarray] = None
+        self.offsets: Optional[np.ndarray] = None
+        self.load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embeddings
+
+    def load(self):
+        """Load the files of the build the catalog points to."""
+        while True:
+            build_id = self.catalog.build_id()
+            try:
+                self._load_build(build_id)
+                return
+            except FileNotFoundError:
+                # The files of an outdated build are removed once the next build is committed
+                if self.catalog.build_id() == build_id:
+                    raise
+
+    def _load_build(self, build_id: Optional[str]):
+        matrix = centroids = order = offsets = None
+        if build_id is not None:
+            matrix = np.load(os.path.join(self.path, VECTORS_FILE.format(build_id)), mmap_mode="r")
+            ivf_path = os.path.join(self.path, IVF_FILE.format(build_id))
+            if os.path.exists(ivf_path):
+                with np.load(ivf_path) as ivf:
+                    centroids, order, offsets = ivf["centroids"], ivf["order"], ivf["offsets"]
+        self.matrix, self.centroids, self.order, self.offsets = matrix, centroids, order, offsets
+        self.build_id = build_id
+
+    def __len__(self) -> int:
+        return 0 if self.matrix is None else self.matrix.shape[0]
+
+    # Search
+
+    def _candidates(self, vector: np.ndarray) -> Optional[np.ndarray]:
+        """Rows of the nprobe closest IVF lists, None searches every row."""
+        if self.centroids is None or self.nprobe <= 0 or self.nprobe >= len(self.centroids):
+            return None
+        lists = np.argpartition(-(self.centroids @ vector), self.nprobe - 1)[:self.nprobe]
+        rows = np.concatenate([self.order[self.offsets[i]:self.offsets[i + 1]] for i in lists])
+        # Sorted rows read the memory map sequentially
+        return np.sort(rows)
+
+    def search_rows(self, vector: List[float], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the rows and cosine similarities of the top k sub-documents, best first."""
+        if self.matrix is None or len(self.matrix) == 0 or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        vector = _normalize(vector)
+        rows = self._candidates(vector)
+        scores = (self.matrix if rows is None else self.matrix[rows]) @ vector
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return (top if rows is None else rows[top]), scores[top]
+
+    def _documents(self, rows: np.ndarray, scores: np.ndarray) -> Optional[List[Tuple[Document, float]]]:
+        """Documents of the rows, None when the catalog belongs to another build than the loaded matrix."""
+        with self.catalog.snapshot():
+            if self.catalog.build_id() != self.build_id:
+                return None
+            found = {
+                row: (text, metadata)
+                for row, text, metadata in self.catalog.select_in("SELECT row, text, metadata FROM sub_docs WHERE row IN ({})", rows.tolist())
+            }
+        return [
+            (Document(page_content=found[row][0], metadata=json.loads(found[row][1])), float(score))
+            for row, score in zip(rows.tolist(), scores.tolist()) if row in found
+        ]
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        for _ in range(MAX_BUILD_RETRIES):
+            documents = self._documents(*self.search_rows(embedding, k))
+            if documents is not None:
+                return documents
+            # Rebuilt since the matrix was loaded, its rows no longer match the catalog
+            self.load()
+        raise RuntimeError(f"Index {self.path} was rebuilt during {MAX_BUILD_RETRIES} searches in a row")
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self._embeddings.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return self.similarity_search_by_vector(self._embeddings.embed_query(query), k)
+
+    async def asimilarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        # Only the query embedding leaves the process, the search itself is sub-millisecond on small corpora
+        return self.similarity_search_by_vector(await self._embeddings.aembed_query(query), k)
+
+    def _select_relevance_score_fn(self):
+        return lambda score: (score + 1) / 2
+
+    # Write
+
+    def add_embeddings(
+        self,
+        text_embeddings: Iterable[Tuple[str, List[float]]],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        text_embeddings = list(text_embeddings)
+        if not text_embeddings:
+            return []
+        texts = [text for text, _ in text_embeddings]
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        vectors = _normalize([vector for _, vector in text_embeddings])
+        dim = self.catalog.execute("SELECT value FROM meta WHERE key = 'dim'")
+        if dim and int(dim[0][0]) != vectors.shape[1]:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match the index dimension {dim[0][0]}")
+        self.catalog.execute("INSERT OR IGNORE INTO meta VALUES ('dim', ?)", (str(vectors.shape[1]),))
+        with self.catalog.lock:
+            # Staged vectors are appended to a raw file, the row is their position in it
+            with open(os.path.join(self.path, STAGED_FILE), "ab") as f:
+                start = f.tell() // (vectors.shape[1] * 4)
+                f.write(vectors.tobytes())
+        self.catalog.executemany(
+            "INSERT OR REPLACE INTO staged VALUES (?, ?, ?, ?)",
+            [(id_, start + i, text, json.dumps(metadata, ensure_ascii=False)) for i, (id_, text, metadata) in enumerate(zip(ids, texts, metadatas))],
+        )
+        return ids
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        return self.add_embeddings(zip(texts, self._embeddings.embed_documents(texts)), metadatas, ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        self.catalog.executemany("INSERT OR REPLACE INTO staged VALUES (?, NULL, NULL, NULL)", [(id_,) for id_ in ids])
+        return True
+
+    def index_exists(self) -> bool:
+        return self.matrix is not None or bool(self.catalog.execute("SELECT 1 FROM staged LIMIT 1"))
+
+    def delete_index(self):
+        build_id = self.catalog.build_id()
+        self.catalog.execute("DELETE FROM sub_docs")
+        self.catalog.execute("DELETE FROM staged")
+        self.catalog.execute("DELETE FROM meta")
+        self._remove_files(build_id, STAGED_FILE)
+        self.load()
+
+    def _remove_files(self, build_id: Optional[str], *names: str):
+        if build_id is not None:
+            names += (VECTORS_FILE.format(build_id), IVF_FILE.format(build_id))
+        for name in names:
+            if os.path.exists(os.path.join(self.path, name)):
+                os.remove(os.path.join(self.path, name))
+
+    def build(self, nlist: int = 0, chunk_size: int = 65536):
+        """
+        Merge the staged writes into the matrix of a new build and rebuild the IVF lists when nlist > 0. Rows
+        are streamed in chunks, the previous build stays memory-mapped and searchable until the catalog points
+        to the new one, then its files are removed.
+        """
+        if self.catalog.build_id() != self.build_id:
+            self.load()
+        staged = self.catalog.execute("SELECT COUNT(*) FROM staged")[0][0]
+        if staged == 0 and (0 if self.centroids is None else len(self.centroids)) == min(max(nlist, 0), len(self)):
+            return
+        kept = self.catalog.execute("SELECT COUNT(*) FROM sub_docs WHERE id NOT IN (SELECT id FROM staged)")[0][0]
+        added = self.catalog.execute("SELECT COUNT(*) FROM staged WHERE row IS NOT NULL")[0][0]
+        dim = self.catalog.execute("SELECT value FROM meta WHERE key = 'dim'")
+        dim = int(dim[0][0]) if dim else 0
+        staged_path = os.path.join(self.path, STAGED_FILE)
+        staged_matrix = np.memmap(staged_path, dtype=np.float32, mode="r").reshape(-1, dim) if added else None
+
+        total = kept + added
+        build_id = uuid.uuid4().hex
+        matrix = np.lib.format.open_memmap(os.path.join(self.path, VECTORS_FILE.format(build_id)), mode="w+", dtype=np.float32, shape=(total, dim))
+        self.catalog.execute("DROP TABLE IF EXISTS sub_docs_new")
+        self.catalog.execute("CREATE TABLE sub_docs_new (row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, text TEXT NOT NULL, metadata TEXT NOT NULL)")
+
+        row = 0
+        sources = [
+            ("SELECT row, id, text, metadata FROM sub_docs WHERE id NOT IN (SELECT id FROM staged) AND row > ? ORDER BY row LIMIT ?", self.matrix),
+            ("SELECT row, id, text, metadata FROM staged WHERE row IS NOT NULL AND row > ? ORDER BY row LIMIT ?", staged_matrix),
+        ]
+        for query, source in sources:
+            last = -1
+            while rows := self.catalog.execute(query, (last, chunk_size)):
+                matrix[row:row + len(rows)] = source[[r[0] for r in rows]]
+                self.catalog.executemany(
+                    "INSERT INTO sub_docs_new VALUES (?, ?, ?, ?)",
+                    [(row + i, id_, text, metadata) for i, (_, id_, text, metadata) in enumerate(rows)],
+                )
+                row += len(rows)
+                last = rows[-1][0]
+        matrix.flush()
+
+        if nlist > 0 and total > 0:
+            centroids, order, offsets = build_ivf(matrix, nlist, chunk_size)
+            np.savez(os.path.join(self.path, IVF_FILE.format(build_id)), centroids=centroids, order=order, offsets=offsets)
+        del matrix
+
+        previous_build_id = self.build_id
+        with self.catalog.lock:
+            self._swap_sub_docs(build_id)
+            # Readers still on the previous build keep their memory map of the removed file
+            self._remove_files(previous_build_id, STAGED_FILE)
+        self.load()
+
+    def _swap_sub_docs(self, build_id: str):
+        # The caller holds the catalog lock, the rows and the build id they belong to change together
+        connection = self.catalog.connection
+        connection.execute("BEGIN")
+        connection.execute("DROP TABLE sub_docs")
+        connection.execute("ALTER TABLE sub_docs_new RENAME TO sub_docs")
+        connection.execute("DELETE FROM staged")
+        connection.execute("INSERT OR REPLACE INTO meta VALUES ('build', ?)", (build_id,))
+        connection.execute("COMMIT")
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        path: str = "",
+        nlist: int = 0,
+        **kwargs: Any,
+    ) -> "LocalVectorStore":
+        store = cls(path, embedding, **kwargs)
+        store.add_texts(texts, metadatas, ids)
+        store.build(nlist)
+        return store
+
+
+def build_ivf(matrix: np.ndarray, nlist: int, chunk_size: int = 65536, iterations: int = 10, seed: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Spherical k-means on a sample of the rows, return the centroids, the rows grouped by list and the list offsets."""
+    rng = np.random.default_rng(seed)
+    nlist = min(nlist, len(matrix))
+    sample = np.asarray(matrix[np.sort(rng.choice(len(matrix), min(len(matrix), nlist * 256), replace=False))])
+    # k-means++ seeding, a new centroid is drawn in proportion to its cosine distance from the chosen ones
+    centroids = sample[[rng.integers(len(sample))]]
+    distances = np.maximum(1 - sample @ centroids[0], 0)
+    while len(centroids) < nlist:
+        probabilities = distances / distances.sum() if distances.sum() > 0 else None
+        centroids = np.vstack([centroids, sample[rng.choice(len(sample), p=probabilities)]])
+        distances = np.minimum(distances, np.maximum(1 - sample @ centroids[-1], 0))
+    for _ in range(iterations):
+        labels = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        empty = np.bincount(labels, minlength=nlist) == 0
+        # An empty list restarts from a random sample row
+        sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+        centroids = _normalize(sums)
+
+    labels = np.concatenate([
+        np.argmax(np.asarray(matrix[start:start + chunk_size]) @ centroids.T, axis=1)
+        for start in range(0, len(matrix), chunk_size)
+    ])
+    order = np.argsort(labels, kind="stable").astype(np.int64)
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(labels, minlength=nlist))]).astype(np.int64)
+    return centroids, order, offsets
+
+
+class LocalDocStore(BaseStore[str, Document]):
+    """Parent documents in the SQLite catalog of a LocalVectorStore directory."""
+    def __init__(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        self.catalog = _Catalog(os.path.join(path, CATALOG_FILE))
+
+    def mget(self, keys: Sequence[str]) -> List[Optional[Document]]:
+        found = dict(self.catalog.select_in("SELECT key, value FROM docs WHERE key IN ({})", keys))
+        return [Document(**json.loads(found[key])) if key in found else None for key in keys]
+
+    def mset(self, key_value_pairs: Sequence[Tuple[str, Document]]) -> None:
+        self.catalog.executemany(
+            "INSERT OR REPLACE INTO docs VALUES (?, ?)",
+            [(key, json.dumps({"page_content": doc.page_content, "metadata": doc.metadata}, ensure_ascii=False)) for key, doc in key_value_pairs],
+        )
+
+    def mdelete(self, keys: Sequence[str]) -> None:
+        self.catalog.executemany("DELETE FROM docs WHERE key = ?", [(key,) for key in keys])
+
+    def yield_keys(self, prefix: Optional[str] = None) -> Iterator[str]:
+        for (key,) in self.catalog.execute("SELECT key FROM docs ORDER BY key"):
+            if prefix is None or key.startswith(prefix):
+                yield key
@@ -1,22 +1,76 @@
-from langchain.chains import create_retrieval_chain
+from operator import itemgetter
+from typing import Callable, Optional, Sequence
+
 from langchain_core.language_models import BaseLanguageModel
+from langchain_core.messages import BaseMessage, convert_to_messages
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.retrievers import BaseRetriever
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.runnables import Runnable, RunnableBranch, RunnableLambda, RunnablePassthrough
+
+from .latency import CHAIN_NAME, StageLatencyTracker
+
+RESPONSE_CONTROL_MODES = ["always", "merged", "classifier"]
+
+# Words the response control prompt rewrites even in a Thai answer
+RESPONSE_CONTROL_WORDS = ["ต้อง"]
 
 
 def read_prompt(path: str) -> str:
     with open(path) as f:
         return "\n".join(f.readlines())
-        
+
+def is_single_turn(inputs: dict) -> bool:
+    return len(inputs["messages"]) <= 1
+
+def last_question(inputs: dict) -> str:
+    messages: Sequence[BaseMessage] = convert_to_messages(inputs["messages"])
+    return messages[-1].content if messages else ""
+
+def is_same_question(inputs: dict) -> bool:
+    return " ".join(inputs["query"].split()) == " ".join(last_question(inputs).split())
+
+def is_thai(text: str) -> bool:
+    letters = [c for c in text if c.isalpha()]
+    return sum("\u0e00" <= c <= "\u0e7f" for c in letters) >= len(letters) / 2
+
+def needs_response_control(question: str, answer: str) -> bool:
+    """
+    Flag the answers to a Thai question that are not mostly Thai or contain a word the response control prompt
+    rewrites. A question in another language is answered in its language without response control.
+    """
+    if not is_thai(question):
+        return False
+    return not is_thai(answer) or any(word in answer for word in RESPONSE_CONTROL_WORDS)
+
 def init_rag_chain(
-        retriever: BaseRetriever, 
-        llm: BaseLanguageModel, 
-        qg_prompt_path:str, 
-        qa_prompt_path:str, 
-        rc_prompt_path:str
-    ):
+        retriever: BaseRetriever,
+        llm: BaseLanguageModel,
+        qg_prompt_path: str,
+        qa_prompt_path: str,
+        rc_prompt_path: str,
+        skip_single_turn_rewrite: bool = False,
+        speculative_retrieval: bool = False,
+        response_control: str = "always",
+        merged_prompt_path: str = "",
+        response_control_classifier: Callable[[str, str], bool] = needs_response_control,
+        latency_tracker: Optional[StageLatencyTracker] = None,
+    ) -> Runnable:
+    """
+    Chain of the stages rewrite (standalone question), retrieve, answer and response_control, each an LLM
+    round-trip except retrieve. The fast paths:
+    - skip_single_turn_rewrite: a conversation of one message is its own standalone question.
+    - speculative_retrieval: retrieve the raw question while it is rewritten, the result is kept when the
+      rewrite returns the same question.
+    - response_control: "always" runs it after the answer, "merged" answers with the merged prompt in one
+      round-trip, "classifier" runs it only for the answers flagged by response_control_classifier, called
+      with the last question and the answer.
+    """
+    if response_control not in RESPONSE_CONTROL_MODES:
+        raise ValueError(f"response_control must be one of {RESPONSE_CONTROL_MODES}.")
+    if response_control == "merged" and not merged_prompt_path:
+        raise ValueError("response_control 'merged' needs a merged prompt.")
+
     contextualize_q_system_prompt = read_prompt(qg_prompt_path)
     contextualize_q_prompt = ChatPromptTemplate.from_messages(
         [
@@ -24,8 +78,26 @@ def init_rag_chain(
             MessagesPlaceholder("messages")
         ]
     )
-    history_aware_retriever = contextualize_q_prompt | llm | StrOutputParser() | retriever
-    qa_system_prompt = read_prompt(qa_prompt_path)
+    rewrite = (contextualize_q_prompt | llm | StrOutputParser()).with_config(run_name="rewrite")
+    if skip_single_turn_rewrite:
+        rewrite = RunnableBranch((is_single_turn, RunnableLambda(last_question)), rewrite)
+
+    if speculative_retrieval:
+        retrieval = RunnablePassthrough.assign(
+            query=rewrite,
+            speculative_context=(RunnableLambda(last_question) | retriever).with_config(run_name="retrieve"),
+        ) | RunnablePassthrough.assign(
+            context=RunnableBranch(
+                (is_same_question, itemgetter("speculative_context")),
+                (itemgetter("query") | retriever).with_config(run_name="retrieve"),
+            )
+        )
+    else:
+        retrieval = RunnablePassthrough.assign(query=rewrite) | RunnablePassthrough.assign(
+            context=(itemgetter("query") | retriever).with_config(run_name="retrieve")
+        )
+
+    qa_system_prompt = read_prompt(merged_prompt_path if response_control == "merged" else qa_prompt_path)
     qa_prompt = ChatPromptTemplate.from_messages(
         [
             ("system", qa_system_prompt),
@@ -40,7 +112,7 @@ def init_rag_chain(
             doc.page_content for doc in inputs["context"][:3]
         )
         return result[:30000]
-    
+
     question_answer_chain = (
         RunnablePassthrough.assign(**{"context": format_docs}).with_config(
             run_name="format_inputs"
@@ -48,9 +120,21 @@ def init_rag_chain(
         | qa_prompt
         | llm
         | StrOutputParser()
-    ).with_config(run_name="stuff_documents_chain")
-    rag_chain = create_retrieval_chain(history_aware_retriever, question_answer_chain)
+    ).with_config(run_name="answer")
+
     rc_prompt = ChatPromptTemplate.from_template(read_prompt(rc_prompt_path))
-    output_parser = StrOutputParser()
-    final_chain = rag_chain | rc_prompt | llm | output_parser
-    return final_chain
\ No newline at end of file
+    response_control_chain = (rc_prompt | llm | StrOutputParser()).with_config(run_name="response_control")
+    match response_control:
+        case "always":
+            final_chain = retrieval | RunnablePassthrough.assign(answer=question_answer_chain) | response_control_chain
+        case "merged":
+            final_chain = retrieval | question_answer_chain
+        case "classifier":
+            final_chain = retrieval | RunnablePassthrough.assign(answer=question_answer_chain) | RunnableBranch(
+                (lambda inputs: response_control_classifier(last_question(inputs), inputs["answer"]), response_control_chain),
+                itemgetter("answer"),
+            )
+    final_chain = final_chain.with_config(run_name=CHAIN_NAME)
+    if latency_tracker is not None:
+        final_chain = final_chain.with_config(callbacks=[latency_tracker])
+    return final_chain
@@ -1,3 +1,5 @@
+import os
+
 from langchain.retrievers.multi_vector import MultiVectorRetriever
 from langchain_community.embeddings.huggingface import HuggingFaceEmbeddings
 from langchain_community.storage.mongodb import MongoDBStore
@@ -6,6 +8,9 @@ from langchain_community.vectorstores.opensearch_vector_search import (
 )
 from langchain_core.embeddings import Embeddings
 
+from .docstore_cache import CachedDocStore
+from .local_store import LocalDocStore, LocalVectorStore
+
 id_key = 'doc_id'
 
 def init_retriever(
@@ -15,6 +20,13 @@ def init_retriever(
     mongo_url: str, 
     mongo_db_name:str, 
     mongo_collection_name:str,
+    vector_store_provider: str = "opensearch",
+    local_index_dir: str = "",
+    local_index_nprobe: int = 8,
+    docstore_cache_max_size: int = 0,
+    docstore_cache_ttl_seconds: float = 600,
+    docstore_cache_generation_check_seconds: float = 30,
+    docstore_cache_stats_log_seconds: float = 60,
 ) -> MultiVectorRetriever:
 
     if issubclass(type(embedding_model), Embeddings):
@@ -25,12 +37,27 @@ def init_retriever(
         # TODO Add exception detail
         raise TypeError
         
-    docsearch = OpenSearchVectorSearch(
-        opensearch_url,
-        opensearch_index,
-        embeddings
-    )
-    store = MongoDBStore(mongo_url, db_name=mongo_db_name, collection_name=mongo_collection_name)
+    if vector_store_provider == "local":
+        # Files emitted by data-prep with VECTOR_STORE_PROVIDER=local, one directory per index
+        index_path = os.path.join(local_index_dir, opensearch_index)
+        docsearch = LocalVectorStore(index_path, embeddings, nprobe=local_index_nprobe)
+        store = LocalDocStore(index_path)
+    else:
+        docsearch = OpenSearchVectorSearch(
+            opensearch_url,
+            opensearch_index,
+            embeddings
+        )
+        store = MongoDBStore(mongo_url, db_name=mongo_db_name, collection_name=mongo_collection_name)
+    if docstore_cache_max_size > 0:
+        store = CachedDocStore(
+            store,
+            max_size=docstore_cache_max_size,
+            ttl_seconds=docstore_cache_ttl_seconds,
+            generation_check_seconds=docstore_cache_generation_check_seconds,
+            stats_log_seconds=docstore_cache_stats_log_seconds,
+            name=opensearch_index,
+        )
     # The retriever (empty to start)
     retriever = MultiVectorRetriever(
         vectorstore=docsearch,
@@ -37,13 +37,39 @@ def test_configs_defaults():
     assert config.mq_client_consumer_group_id == "adapter-group-service"
     assert config.mq_client_llm_topic == "llm-request"
     assert config.mq_client_llm_consume_topic == "llm-response"
+    assert config.mq_client_dispatch_mode == "event"
+    assert config.mq_client_max_concurrency == 0
+    assert config.mq_client_topic_concurrency == {}
+    assert config.mq_client_max_pending == 0
+    assert config.mq_client_overload_policy == "queue"
+    assert config.mq_client_db_provider == "local"
+    assert config.mq_client_db_host == ""
+    assert config.mq_client_db_ttl == 60.0
+    assert config.mq_client_reply_routing == "group"
+    assert config.mq_client_reply_id == ""
+    assert config.mq_client_reply_partition == 0
     assert config.mq_client_vector_topic == "vector-request"
     assert config.mq_client_vector_consume_topic == "vector-response"
+    assert config.mq_client_vector_encoding == "float32"
+    assert config.llm_cache_max_size == 1024
+    assert config.llm_cache_ttl_seconds == 3600
+    assert config.llm_cache_semantic is False
+    assert config.llm_cache_similarity_threshold == 0.95
     assert config.adapter_config_path == "/path/to/config"
     assert config.mongo_username == "user"
     assert config.mongo_password == "password"
     assert config.mongo_host == "localhost:27017"
     assert config.opensearch_host == "http://localhost:9202"
+    assert config.vector_store_provider == "opensearch"
+    assert config.local_index_dir == "data/index"
+    assert config.local_index_nprobe == 8
+    assert config.docstore_cache_max_size == 4096
+    assert config.docstore_cache_ttl_seconds == 600
+    assert config.docstore_cache_generation_check_seconds == 30
+    assert config.docstore_cache_stats_log_seconds == 60
+    assert config.rag_skip_single_turn_rewrite is True
+    assert config.rag_speculative_retrieval is False
+    assert config.rag_response_control == "always"
 
 
 @pytest.mark.configs
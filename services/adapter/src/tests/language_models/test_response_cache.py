@@ -0,0 +1,95 @@
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from language_models.response_cache import ResponseCache
+
+PARAMS = {"topic": "llm-request", "model_name": "MQChatModel"}
+PROMPT = "You are a helpful assistant.\nHuman: เปิดบัญชีออนไลน์ได้ไหม"
+
+
+@pytest.fixture
+def mock_embeddings(mocker):
+    embeddings = mocker.Mock(spec=Embeddings)
+    vectors = {
+        "เปิดบัญชีออนไลน์ได้ไหม": [1.0, 0.0, 0.0],
+        "เปิดบัญชีออนไลน์ได้หรือไม่": [0.99, 0.1, 0.0],
+        "โอนเงินต่างประเทศ": [0.0, 1.0, 0.0],
+    }
+    embeddings.embed_query.side_effect = lambda text: vectors[text]
+
+    async def aembed_query(text):
+        return vectors[text]
+    embeddings.aembed_query.side_effect = aembed_query
+    return embeddings
+
+
+@pytest.mark.response_cache
+def test_exact_match_normalize_prompt():
+    cache = ResponseCache()
+    cache.set(PROMPT, PARAMS, "ได้ค่ะ")
+
+    assert cache.lookup("  You are a helpful   assistant.\n\nHuman:  เปิดบัญชีออนไลน์ได้ไหม ", PARAMS) == ("ได้ค่ะ", None)
+    assert cache.lookup(PROMPT, {**PARAMS, "topic": "llm-request-2"}) == (None, None)
+    assert cache.stats() == {"hits": 1, "semantic_hits": 0, "misses": 1, "hit_rate": 0.5, "size": 1}
+
+
+@pytest.mark.response_cache
+def test_evict_least_recently_used():
+    cache = ResponseCache(max_size=2)
+    cache.set("a", PARAMS, "1")
+    cache.set("b", PARAMS, "2")
+    cache.lookup("a", PARAMS)
+    cache.set("c", PARAMS, "3")
+
+    assert cache.lookup("b", PARAMS)[0] is None
+    assert cache.lookup("a", PARAMS)[0] == "1"
+    assert cache.lookup("c", PARAMS)[0] == "3"
+
+
+@pytest.mark.response_cache
+def test_expire_after_ttl(mocker):
+    now = mocker.patch("language_models.response_cache.time.monotonic", return_value=100.0)
+    cache = ResponseCache(ttl_seconds=10)
+    cache.set(PROMPT, PARAMS, "ได้ค่ะ")
+
+    now.return_value = 109.0
+    assert cache.lookup(PROMPT, PARAMS)[0] == "ได้ค่ะ"
+    now.return_value = 111.0
+    assert cache.lookup(PROMPT, PARAMS)[0] is None
+    assert cache.stats()["size"] == 0
+
+
+@pytest.mark.response_cache
+def test_semantic_match_similar_question(mock_embeddings):
+    cache = ResponseCache(embeddings=mock_embeddings, similarity_threshold=0.95)
+    cache.set(PROMPT, PARAMS, "ได้ค่ะ")
+
+    assert cache.lookup("You are a helpful assistant.\nHuman: เปิดบัญชีออนไลน์ได้หรือไม่", PARAMS)[0] == "ได้ค่ะ"
+    assert cache.lookup("You are a helpful assistant.\nHuman: โอนเงินต่างประเทศ", PARAMS)[0] is None
+    assert cache.stats()["semantic_hits"] == 1
+
+
+@pytest.mark.response_cache
+def test_semantic_match_requires_same_context(mock_embeddings):
+    cache = ResponseCache(embeddings=mock_embeddings)
+    cache.set(PROMPT, PARAMS, "ได้ค่ะ")
+
+    # Same question after a different conversation history is not reused
+    assert cache.lookup("Other history.\nHuman: เปิดบัญชีออนไลน์ได้หรือไม่", PARAMS)[0] is None
+    # Only questions whose context has entries are embedded
+    assert mock_embeddings.embed_query.call_count == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.response_cache
+async def test_async_semantic_match_reuse_vector(mock_embeddings):
+    cache = ResponseCache(embeddings=mock_embeddings)
+    await cache.aset(PROMPT, PARAMS, "ได้ค่ะ")
+
+    prompt = "You are a helpful assistant.\nHuman: โอนเงินต่างประเทศ"
+    response, vector = await cache.alookup(prompt, PARAMS)
+    assert response is None
+    await cache.aset(prompt, PARAMS, "ทำได้ผ่านแอปค่ะ", vector)
+
+    assert mock_embeddings.aembed_query.call_count == 2
+    assert (await cache.alookup(prompt, PARAMS))[0] == "ทำได้ผ่านแอปค่ะ"
@@ -0,0 +1,171 @@
+import pytest
+from langchain.retrievers.multi_vector import MultiVectorRetriever
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.stores import InMemoryBaseStore
+
+from rag.docstore_cache import CachedDocStore
+from rag.local_store import GENERATION_KEY, LocalVectorStore
+
+
+class FcdEmbeddings(Embeddings):
+    def embed_query(self, text):
+        return [float("fcd" in text.lower()) + 0.01, 0.1]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+class CountingStore(InMemoryBaseStore[Document]):
+    """In-memory docstore recording the keys of every mget call."""
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def mget(self, keys):
+        self.calls.append(list(keys))
+        return super().mget(keys)
+
+    async def amget(self, keys):
+        return self.mget(keys)
+
+
+@pytest.fixture
+def store():
+    store = CountingStore()
+    store.mset([(key, Document(page_content=key)) for key in ["account-1", "account-2", "loan-1"]])
+    return store
+
+
+def fetched(store):
+    # Keys fetched for the lookups, without the generation checks
+    return [keys for keys in store.calls if keys != [GENERATION_KEY]]
+
+
+@pytest.mark.docstore_cache
+def test_fetch_unique_misses_in_one_call(store):
+    cache = CachedDocStore(store)
+
+    docs = cache.mget(["account-1", "account-2", "account-1"])
+    assert [doc.page_content for doc in docs] == ["account-1", "account-2", "account-1"]
+    docs = cache.mget(["account-2", "loan-1", "missing"])
+    assert [doc.page_content if doc else None for doc in docs] == ["account-2", "loan-1", None]
+
+    assert fetched(store) == [["account-1", "account-2"], ["loan-1", "missing"]]
+    # Missing documents are fetched again
+    cache.mget(["missing"])
+    assert fetched(store)[-1] == ["missing"]
+
+
+@pytest.mark.docstore_cache
+def test_evict_least_recently_used(store):
+    cache = CachedDocStore(store, max_size=2)
+    cache.mget(["account-1", "account-2"])
+    cache.mget(["account-1"])
+    cache.mget(["loan-1"])
+    store.calls.clear()
+
+    cache.mget(["account-1", "loan-1"])
+    assert fetched(store) == []
+    cache.mget(["account-2"])
+    assert fetched(store) == [["account-2"]]
+
+
+@pytest.mark.docstore_cache
+def test_expire_after_ttl(store, mocker):
+    now = mocker.patch("rag.docstore_cache.time.monotonic", return_value=100.0)
+    cache = CachedDocStore(store, ttl_seconds=10, generation_check_seconds=1000)
+    cache.mget(["account-1"])
+
+    now.return_value = 109.0
+    cache.mget(["account-1"])
+    assert fetched(store) == [["account-1"]]
+    now.return_value = 111.0
+    cache.mget(["account-1"])
+    assert fetched(store) == [["account-1"], ["account-1"]]
+
+
+@pytest.mark.docstore_cache
+def test_clear_on_new_generation(store, mocker):
+    now = mocker.patch("rag.docstore_cache.time.monotonic", return_value=100.0)
+    cache = CachedDocStore(store, generation_check_seconds=30)
+    cache.mget(["account-1"])
+
+    # Data-prep re-indexed the docstore
+    store.mset([("account-1", Document(page_content="new")), (GENERATION_KEY, Document(page_content="2"))])
+    assert cache.mget(["account-1"])[0].page_content == "account-1"
+    now.return_value = 131.0
+    assert cache.mget(["account-1"])[0].page_content == "new"
+    assert store.calls.count([GENERATION_KEY]) == 2
+
+
+@pytest.mark.docstore_cache
+def test_write_through_invalidate(store):
+    cache = CachedDocStore(store)
+    cache.mget(["account-1", "loan-1"])
+
+    cache.mset([("account-1", Document(page_content="new"))])
+    cache.mdelete(["loan-1"])
+
+    assert [doc.page_content if doc else None for doc in cache.mget(["account-1", "loan-1"])] == ["new", None]
+
+
+@pytest.mark.asyncio
+@pytest.mark.docstore_cache
+async def test_async_fetch_unique_misses(store):
+    cache = CachedDocStore(store)
+
+    await cache.amget(["account-1", "account-1"])
+    docs = await cache.amget(["account-1", "loan-1"])
+
+    assert [doc.page_content for doc in docs] == ["account-1", "loan-1"]
+    assert fetched(store) == [["account-1"], ["loan-1"]]
+
+
+@pytest.mark.docstore_cache
+def test_stats(store):
+    cache = CachedDocStore(store)
+    cache.mget(["account-1", "account-2"])
+    cache.mget(["account-1", "account-2"])
+
+    stats = cache.stats()
+    assert {key: stats[key] for key in ["queries", "hits", "misses", "hit_rate", "size"]} == {
+        "queries": 2, "hits": 2, "misses": 2, "hit_rate": 0.5, "size": 2,
+    }
+    assert stats["fetch_ms"] >= 0
+
+
+@pytest.mark.docstore_cache
+def test_log_stats_every_interval(store, mocker):
+    now = mocker.patch("rag.docstore_cache.time.monotonic", return_value=100.0)
+    log = mocker.patch("rag.docstore_cache.logger.info")
+    cache = CachedDocStore(store, stats_log_seconds=60, name="faq")
+    cache.mget(["account-1"])
+    log.assert_not_called()
+
+    now.return_value = 160.0
+    cache.mget(["account-1"])
+    cache.mget(["account-1"])
+
+    log.assert_called_once()
+    logged = log.call_args.args[0]
+    assert logged["docstore_name"] == "faq"
+    assert logged["queries"] == 2
+    assert "saved_ms_per_query" in logged
+
+
+@pytest.mark.docstore_cache
+def test_retriever_parent_documents(store, tmp_path):
+    vectorstore = LocalVectorStore(str(tmp_path), FcdEmbeddings())
+    vectorstore.add_texts(
+        ["FCD is a foreign currency deposit", "Open an FCD account online", "Apply for a loan"],
+        [{"doc_id": "account-1"}, {"doc_id": "account-1"}, {"doc_id": "loan-1"}],
+    )
+    vectorstore.build()
+    retriever = MultiVectorRetriever(vectorstore=vectorstore, docstore=CachedDocStore(store), id_key="doc_id")
+
+    docs = retriever.invoke("fcd")
+
+    assert [doc.page_content for doc in docs] == ["account-1", "loan-1"]
+    # Sub-documents of the same parent are fetched once
+    assert fetched(store) == [["account-1", "loan-1"]]
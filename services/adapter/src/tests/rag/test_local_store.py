@@ -0,0 +1,151 @@
+import numpy as np
+import pytest
+from langchain.retrievers.multi_vector import MultiVectorRetriever
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from rag.local_store import LocalDocStore, LocalVectorStore
+
+
+class KeywordEmbeddings(Embeddings):
+    """Embed a text by the keywords it contains, so similarities are known in advance."""
+    KEYWORDS = ["fcd", "saving", "loan", "card"]
+
+    def embed_query(self, text):
+        return [float(keyword in text.lower()) + 0.01 for keyword in self.KEYWORDS]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+class OneHotEmbeddings(Embeddings):
+    """Embed "t<i>" as the i-th unit vector."""
+    def embed_query(self, text):
+        return [float(i == int(text[1:])) + 0.01 for i in range(8)]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+SUB_DOCS = [
+    ("FCD is a foreign currency deposit", {"doc_id": "account-1"}),
+    ("Open an FCD account online", {"doc_id": "account-1"}),
+    ("K-eSaving pays a higher interest", {"doc_id": "account-2"}),
+    ("Apply for a loan with your card", {"doc_id": "loan-1"}),
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LocalVectorStore(str(tmp_path), KeywordEmbeddings())
+    store.add_texts([text for text, _ in SUB_DOCS], [metadata for _, metadata in SUB_DOCS], ids=[f"sub-{i}" for i in range(len(SUB_DOCS))])
+    store.build()
+    return store
+
+
+@pytest.mark.local_store
+def test_local_store_exact_top_k(store):
+    docs = store.similarity_search("what is fcd", k=2)
+
+    assert sorted(doc.page_content for doc in docs) == ["FCD is a foreign currency deposit", "Open an FCD account online"]
+    assert all(doc.metadata == {"doc_id": "account-1"} for doc in docs)
+    assert len(store.similarity_search("loan", k=10)) == len(SUB_DOCS)
+
+
+@pytest.mark.local_store
+def test_local_store_stage_writes_until_build(store, tmp_path):
+    store.add_texts(["Card fee is waived"], [{"doc_id": "card-1"}], ids=["sub-4"])
+    store.delete(["sub-3"])
+
+    # Staged writes are not searchable yet
+    assert [doc.metadata["doc_id"] for doc in store.similarity_search("card", k=1)] == ["loan-1"]
+
+    store.build()
+    assert len(store) == len(SUB_DOCS)
+    assert [doc.metadata["doc_id"] for doc in store.similarity_search("card", k=1)] == ["card-1"]
+    # A new instance loads the files written by build
+    reloaded = LocalVectorStore(str(tmp_path), KeywordEmbeddings())
+    assert [doc.metadata["doc_id"] for doc in reloaded.similarity_search("card", k=1)] == ["card-1"]
+
+
+@pytest.mark.local_store
+def test_local_store_overwrite_by_id(store):
+    store.add_texts(["K-eSaving has no fee"], [{"doc_id": "account-2"}], ids=["sub-2"])
+    store.build()
+
+    docs = store.similarity_search("saving", k=1)
+    assert len(store) == len(SUB_DOCS)
+    assert docs[0].page_content == "K-eSaving has no fee"
+
+
+@pytest.mark.local_store
+def test_local_store_ivf_match_exact_search(tmp_path):
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(8, 16))
+    vectors = np.concatenate([center + 0.05 * rng.normal(size=(50, 16)) for center in centers])
+    store = LocalVectorStore(str(tmp_path), KeywordEmbeddings(), nprobe=2)
+    store.add_embeddings([(f"text-{i}", vector.tolist()) for i, vector in enumerate(vectors)], ids=[str(i) for i in range(len(vectors))])
+    store.build(nlist=8)
+
+    assert len(store.centroids) == 8
+    assert store.offsets[-1] == len(vectors)
+    for query in centers:
+        exact = np.argsort(-(store.matrix @ (query / np.linalg.norm(query))))[:5]
+        rows, _ = store.search_rows(query.tolist(), k=5)
+        assert set(rows.tolist()) == set(exact.tolist())
+
+
+@pytest.mark.local_store
+def test_local_store_live_reader_survive_rebuild(tmp_path):
+    embeddings = OneHotEmbeddings()
+    writer = LocalVectorStore(str(tmp_path), embeddings)
+    writer.add_texts([f"t{i}" for i in range(8)], ids=[f"sub-{i}" for i in range(8)])
+    writer.build()
+    # A second process, like the adapter serving while data-prep rebuilds
+    reader = LocalVectorStore(str(tmp_path), embeddings)
+    assert [doc.page_content for doc in reader.similarity_search("t3", k=1)] == ["t3"]
+
+    writer.delete(["sub-0", "sub-1", "sub-2"])
+    writer.build()
+
+    # The rows were renumbered, the reader loads the new build instead of reading the old matrix rows
+    assert [doc.page_content for doc in reader.similarity_search("t3", k=1)] == ["t3"]
+    assert reader.build_id == writer.build_id
+    assert len(reader) == 5
+    # The files of the previous build are removed
+    assert len(list(tmp_path.glob("vectors.*.npy"))) == 1
+
+    writer.delete_index()
+    assert reader.similarity_search("t3", k=1) == []
+
+
+@pytest.mark.local_store
+def test_local_store_reject_other_dimension(store):
+    with pytest.raises(ValueError, match="dimension"):
+        store.add_embeddings([("text", [1.0, 0.0])])
+
+
+@pytest.mark.local_store
+def test_local_docstore(tmp_path):
+    docstore = LocalDocStore(str(tmp_path))
+    docstore.mset([("account-1", Document(page_content="FCD: ...", metadata={"doc_id": "account-1"}))])
+
+    assert docstore.mget(["account-1", "missing"]) == [Document(page_content="FCD: ...", metadata={"doc_id": "account-1"}), None]
+    assert list(docstore.yield_keys(prefix="account")) == ["account-1"]
+    docstore.mdelete(["account-1"])
+    assert docstore.mget(["account-1"]) == [None]
+
+
+@pytest.mark.asyncio
+@pytest.mark.local_store
+async def test_multi_vector_retriever_with_local_store(store, tmp_path):
+    docstore = LocalDocStore(str(tmp_path))
+    docstore.mset([
+        ("account-1", Document(page_content="FCD parent", metadata={"doc_id": "account-1"})),
+        ("account-2", Document(page_content="Saving parent", metadata={"doc_id": "account-2"})),
+        ("loan-1", Document(page_content="Loan parent", metadata={"doc_id": "loan-1"})),
+    ])
+    retriever = MultiVectorRetriever(vectorstore=store, docstore=docstore, id_key="doc_id", search_kwargs={"k": 2})
+
+    assert [doc.page_content for doc in await retriever.ainvoke("fcd")] == ["FCD parent"]
+    assert [doc.page_content for doc in retriever.invoke("saving")][0] == "Saving parent"
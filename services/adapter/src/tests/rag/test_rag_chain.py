@@ -0,0 +1,198 @@
+from typing import List
+
+import pytest
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables import RunnableLambda
+
+from rag.latency import StageLatencyTracker
+from rag.rag_chain import init_rag_chain, needs_response_control
+
+PROMPTS = {
+    "qg_prompt.txt": "Rewrite the question",
+    "qa_prompt.txt": "Answer with the documents\n{context}",
+    "merged_prompt.txt": "Answer in Thai with the documents\n{context}",
+    "rc_prompt.txt": "Translate to Thai\nText: {answer}",
+}
+
+
+class RecordingRetriever(BaseRetriever):
+    queries: List[str] = []
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        self.queries.append(query)
+        return [Document(page_content=f"document of {query}")]
+
+
+class FakeLLM:
+    """Answer by the prompt it receives, recording the kind of every call."""
+    def __init__(self, rewritten: str = "What is FCD?", answer: str = "FCD is a deposit"):
+        self.rewritten = rewritten
+        self.answer = answer
+        self.calls = []
+
+    def __call__(self, prompt) -> str:
+        text = prompt.to_string()
+        for kind, keyword, response in [
+            ("rewrite", "Rewrite", self.rewritten),
+            ("merged", "Answer in Thai", "FCD คือบัญชีเงินฝาก"),
+            ("answer", "Answer", self.answer),
+            ("translate", "Translate", "FCD คือบัญชีเงินฝาก"),
+        ]:
+            if keyword in text:
+                self.calls.append(kind)
+                return response
+        raise ValueError(text)
+
+
+@pytest.fixture
+def prompt_paths(tmp_path):
+    paths = {}
+    for name, prompt in PROMPTS.items():
+        (tmp_path / name).write_text(prompt)
+        paths[name] = str(tmp_path / name)
+    return paths
+
+
+def make_chain(prompt_paths, llm, retriever, **kwargs):
+    return init_rag_chain(
+        retriever=retriever,
+        llm=RunnableLambda(llm),
+        qg_prompt_path=prompt_paths["qg_prompt.txt"],
+        qa_prompt_path=prompt_paths["qa_prompt.txt"],
+        rc_prompt_path=prompt_paths["rc_prompt.txt"],
+        merged_prompt_path=prompt_paths["merged_prompt.txt"],
+        **kwargs,
+    )
+
+
+SINGLE_TURN = {"messages": [HumanMessage(content="What is FCD?")], "next": ""}
+MULTI_TURN = {
+    "messages": [HumanMessage(content="Tell me about FCD"), AIMessage(content="FCD is a deposit"), HumanMessage(content="Is it online?")],
+    "next": "",
+}
+
+
+@pytest.mark.rag_chain
+def test_three_round_trips_by_default(prompt_paths):
+    llm, retriever = FakeLLM(), RecordingRetriever(queries=[])
+    chain = make_chain(prompt_paths, llm, retriever)
+
+    assert chain.invoke(SINGLE_TURN) == "FCD คือบัญชีเงินฝาก"
+    assert llm.calls == ["rewrite", "answer", "translate"]
+    assert retriever.queries == ["What is FCD?"]
+
+
+@pytest.mark.rag_chain
+def test_skip_single_turn_rewrite(prompt_paths):
+    llm, retriever = FakeLLM(), RecordingRetriever(queries=[])
+    chain = make_chain(prompt_paths, llm, retriever, skip_single_turn_rewrite=True)
+
+    chain.invoke(SINGLE_TURN)
+    assert llm.calls == ["answer", "translate"]
+    chain.invoke(MULTI_TURN)
+    assert llm.calls[2:] == ["rewrite", "answer", "translate"]
+    assert retriever.queries == ["What is FCD?", "What is FCD?"]
+
+
+@pytest.mark.rag_chain
+def test_speculative_retrieval(prompt_paths):
+    llm, retriever = FakeLLM(rewritten=" What is   FCD? "), RecordingRetriever(queries=[])
+    chain = make_chain(prompt_paths, llm, retriever, speculative_retrieval=True)
+
+    # The rewrite returns the question as is, the speculative documents are used
+    chain.invoke(SINGLE_TURN)
+    assert retriever.queries == ["What is FCD?"]
+    # The rewrite changed the question, retrieve again
+    chain.invoke(MULTI_TURN)
+    assert retriever.queries[1:] == ["Is it online?", " What is   FCD? "]
+
+
+@pytest.mark.rag_chain
+def test_merged_response_control(prompt_paths):
+    llm = FakeLLM()
+    chain = make_chain(prompt_paths, llm, RecordingRetriever(queries=[]), response_control="merged")
+
+    assert chain.invoke(SINGLE_TURN) == "FCD คือบัญชีเงินฝาก"
+    assert llm.calls == ["rewrite", "merged"]
+
+
+THAI_SINGLE_TURN = {"messages": [HumanMessage(content="FCD คืออะไร")], "next": ""}
+
+
+@pytest.mark.rag_chain
+def test_classifier_response_control(prompt_paths):
+    llm = FakeLLM(answer="FCD คือบัญชีเงินฝากสกุลเงินต่างประเทศ")
+    chain = make_chain(prompt_paths, llm, RecordingRetriever(queries=[]), response_control="classifier")
+
+    # A Thai answer to a Thai question is kept
+    assert chain.invoke(THAI_SINGLE_TURN) == "FCD คือบัญชีเงินฝากสกุลเงินต่างประเทศ"
+    assert llm.calls == ["rewrite", "answer"]
+    # An English answer to a Thai question is translated
+    llm.answer = "FCD is a deposit"
+    assert chain.invoke(THAI_SINGLE_TURN) == "FCD คือบัญชีเงินฝาก"
+    assert llm.calls[2:] == ["rewrite", "answer", "translate"]
+
+
+@pytest.mark.rag_chain
+def test_classifier_response_control_english_question(prompt_paths):
+    llm = FakeLLM(answer="FCD is a deposit")
+    chain = make_chain(prompt_paths, llm, RecordingRetriever(queries=[]), response_control="classifier")
+
+    # An English question keeps the English answer without the second call
+    assert chain.invoke(SINGLE_TURN) == "FCD is a deposit"
+    assert llm.calls == ["rewrite", "answer"]
+
+
+@pytest.mark.rag_chain
+def test_needs_response_control():
+    assert needs_response_control("FCD คืออะไร", "FCD is a foreign currency deposit")
+    assert needs_response_control("ยืนยันตัวตนอย่างไร", "ลูกค้าต้องยืนยันตัวตน")
+    assert not needs_response_control("FCD คืออะไร", "ลูกค้าสามารถเปิดบัญชี FCD ได้")
+    assert not needs_response_control("What is FCD?", "FCD is a foreign currency deposit")
+
+
+@pytest.mark.rag_chain
+def test_invalid_response_control(prompt_paths):
+    with pytest.raises(ValueError):
+        make_chain(prompt_paths, FakeLLM(), RecordingRetriever(queries=[]), response_control="never")
+    with pytest.raises(ValueError):
+        init_rag_chain(
+            RecordingRetriever(queries=[]), RunnableLambda(FakeLLM()), prompt_paths["qg_prompt.txt"],
+            prompt_paths["qa_prompt.txt"], prompt_paths["rc_prompt.txt"], response_control="merged",
+        )
+
+
+@pytest.mark.rag_chain
+def test_latency_breakdown(prompt_paths):
+    tracker = StageLatencyTracker("web_account")
+    chain = make_chain(prompt_paths, FakeLLM(), RecordingRetriever(queries=[]), skip_single_turn_rewrite=True, latency_tracker=tracker)
+
+    chain.invoke(SINGLE_TURN)
+    chain.invoke(MULTI_TURN)
+
+    stats = tracker.stats()
+    assert stats["requests"] == 2
+    assert {stage: value["runs"] for stage, value in stats["stages"].items()} == {
+        "rewrite": 1, "retrieve": 2, "answer": 2, "response_control": 2,
+    }
+    assert tracker.breakdowns == {} and tracker.parents == {}
+
+
+@pytest.mark.asyncio
+@pytest.mark.rag_chain
+async def test_async_stream_latency_breakdown(prompt_paths):
+    tracker = StageLatencyTracker()
+    llm = FakeLLM()
+    chain = make_chain(prompt_paths, llm, RecordingRetriever(queries=[]), speculative_retrieval=True, latency_tracker=tracker)
+
+    chunks = [chunk async for chunk in chain.astream(MULTI_TURN)]
+
+    assert "".join(chunks) == "FCD คือบัญชีเงินฝาก"
+    assert llm.calls == ["rewrite", "answer", "translate"]
+    stats = tracker.stats()
+    assert stats["requests"] == 1
+    assert stats["stages"]["retrieve"]["runs"] == 1
+    assert stats["stages"]["response_control"]["runs"] == 1
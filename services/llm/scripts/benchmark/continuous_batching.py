@@ -0,0 +1,150 @@
+"""
+Benchmark for ContinuousBatchingEngine, compares static batches (one model.generate per batch, every request waits
+for the longest one) with iteration-level continuous batching at several concurrency levels.
+
+Example:
+    python scripts/benchmark/continuous_batching.py --model meta-llama/Llama-2-7b-chat-hf --concurrency 1 4 8
+    python scripts/benchmark/continuous_batching.py --random --concurrency 1 4 8 16
+
+Each client sends requests in a closed loop, output lengths vary per request so short answers in a static batch
+sit idle until the longest is done. Static batching only returns at the end of generate, so its time to first
+token is the full batch latency.
+"""
+import argparse
+import random
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import torch
+from transformers import AutoModelForCausalLM, LlamaConfig, LlamaForCausalLM
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "src"))
+
+from internal.infra.ml import ContinuousBatchingEngine  # noqa: E402
+
+Request = Tuple[List[int], int]
+
+
+def load_model(args):
+    if args.random:
+        torch.manual_seed(0)
+        # Shape of a small chat model, weights are random so EOS is not expected before max_new_tokens
+        config = LlamaConfig(
+            vocab_size=32000,
+            hidden_size=256,
+            intermediate_size=688,
+            num_hidden_layers=4,
+            num_attention_heads=4,
+            max_position_embeddings=2048,
+        )
+        return LlamaForCausalLM(config).eval()
+    return AutoModelForCausalLM.from_pretrained(args.model, torch_dtype=torch.float32).eval()
+
+
+def make_requests(args, vocab_size: int) -> List[Request]:
+    rng = random.Random(0)
+    return [
+        (
+            [rng.randrange(3, vocab_size) for _ in range(rng.randint(args.min_prompt, args.max_prompt))],
+            rng.randint(args.min_new_tokens, args.max_new_tokens),
+        )
+        for _ in range(args.requests)
+    ]
+
+
+def run_static(model, requests: List[Request], concurrency: int, eos_token_id: int):
+    ttfts, latencies, generated = [], [], 0
+    start_time = time.perf_counter()
+    for i in range(0, len(requests), concurrency):
+        batch = requests[i:i+concurrency]
+        batch_start = time.perf_counter()
+        max_length = max(len(prompt_ids) for prompt_ids, _ in batch)
+        # Left-pad so every prompt ends where generation starts
+        input_ids = torch.tensor([[eos_token_id] * (max_length - len(p)) + p for p, _ in batch])
+        attention_mask = torch.tensor([[0] * (max_length - len(p)) + [1] * len(p) for p, _ in batch])
+        with torch.no_grad():
+            model.generate(
+                input_ids,
+                attention_mask=attention_mask,
+                max_new_tokens=max(max_new_tokens for _, max_new_tokens in batch),
+                min_new_tokens=max(max_new_tokens for _, max_new_tokens in batch),
+                do_sample=False,
+                pad_token_id=eos_token_id,
+            )
+        latency = time.perf_counter() - batch_start
+        ttfts.extend([latency] * len(batch))
+        latencies.extend([latency] * len(batch))
+        # Only the tokens each request asked for are useful, the rest is padding work
+        generated += sum(max_new_tokens for _, max_new_tokens in batch)
+    return generated, time.perf_counter() - start_time, ttfts, latencies
+
+
+def run_continuous(model, requests: List[Request], concurrency: int, eos_token_id: int):
+    engine = ContinuousBatchingEngine(
+        model=model,
+        eos_token_ids=[eos_token_id],
+        max_batch_size=concurrency,
+        max_new_tokens=max(max_new_tokens for _, max_new_tokens in requests),
+    )
+    pending = list(requests)
+    lock = threading.Lock()
+    latencies = []
+
+    def client():
+        while True:
+            with lock:
+                if not pending:
+                    return
+                prompt_ids, max_new_tokens = pending.pop(0)
+            submitted_at = time.perf_counter()
+            engine.submit(prompt_ids, max_new_tokens=max_new_tokens).result()
+            latencies.append(time.perf_counter() - submitted_at)
+
+    engine.start()
+    start_time = time.perf_counter()
+    clients = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed = time.perf_counter() - start_time
+    engine.stop()
+
+    stats = engine.stats()
+    return stats["generated_tokens"], elapsed, [stats["ttft_mean"]], latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="", help="HUGGINGFACE_MODEL_PATH")
+    parser.add_argument("--random", action="store_true", help="use a randomly initialized small llama instead of --model")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8], help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=32, help="requests per run")
+    parser.add_argument("--min-prompt", type=int, default=16, help="shortest prompt in tokens")
+    parser.add_argument("--max-prompt", type=int, default=128, help="longest prompt in tokens")
+    parser.add_argument("--min-new-tokens", type=int, default=8, help="shortest answer in tokens")
+    parser.add_argument("--max-new-tokens", type=int, default=64, help="longest answer in tokens")
+    args = parser.parse_args()
+
+    model = load_model(args)
+    eos_token_id = model.generation_config.eos_token_id or 0
+    eos_token_id = eos_token_id[0] if isinstance(eos_token_id, list) else eos_token_id
+    requests = make_requests(args, model.config.vocab_size)
+
+    print(f"requests={len(requests)} prompt={args.min_prompt}-{args.max_prompt} new_tokens={args.min_new_tokens}-{args.max_new_tokens}")
+    print(f"{'strategy':<12}{'concurrency':>12}{'tokens':>10}{'seconds':>10}{'tokens/s':>10}{'ttft ms':>10}{'p50 ms':>10}")
+    for concurrency in args.concurrency:
+        for name, run in (("static", run_static), ("continuous", run_continuous)):
+            generated, elapsed, ttfts, latencies = run(model, requests, concurrency, eos_token_id)
+            print(
+                f"{name:<12}{concurrency:>12}{generated:>10}{elapsed:>10.2f}{generated / elapsed:>10.1f}"
+                f"{statistics.mean(ttfts) * 1000:>10.0f}{statistics.median(latencies) * 1000:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark for HuggingFace batch building, compares one right-padded batch of every prompt (previous behaviour)
+with left-padded, length-grouped batches under HUGGINGFACE_MODEL_TOKEN_BUDGET.
+
+Example:
+    python scripts/benchmark/padding.py --requests 16 --token-budget 4096
+
+Prompt lengths mix short chat prompts with a few long RAG prompts, the model is a randomly initialized small
+llama on CPU, so only padding and timing are meaningful, not the generated text.
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import torch
+from transformers import LlamaConfig, LlamaForCausalLM
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "src"))
+
+from common.log import Logger  # noqa: E402
+from common.constant.domain import INFRA_HUGGINGFACE as DOMAIN  # noqa: E402
+from internal.infra.ml import HuggingFace  # noqa: E402
+
+
+def build_huggingface(token_budget: int, max_new_tokens: int) -> HuggingFace:
+    # Skip from_pretrained, the batch builder only needs the model, the pad token and the budget
+    torch.manual_seed(0)
+    huggingface = HuggingFace.__new__(HuggingFace)
+    huggingface.logger = Logger.get_logger(DOMAIN)
+    huggingface.model = LlamaForCausalLM(LlamaConfig(
+        vocab_size=32000,
+        hidden_size=256,
+        intermediate_size=688,
+        num_hidden_layers=4,
+        num_attention_heads=4,
+        max_position_embeddings=8192,
+    )).eval()
+    huggingface.device = torch.device("cpu")
+    huggingface.pad_token_id = 0
+    huggingface.model_token_budget = token_budget
+    huggingface.model_max_new_tokens = max_new_tokens
+    return huggingface
+
+
+def make_prompts(args) -> List[torch.Tensor]:
+    rng = random.Random(0)
+    lengths = [
+        rng.randint(args.long_min, args.long_max) if rng.random() < args.long_ratio else rng.randint(16, 128)
+        for _ in range(args.requests)
+    ]
+    return [torch.randint(3, 32000, (1, length)) for length in lengths]
+
+
+def right_pad(prompts: List[torch.Tensor]):
+    max_length = max(prompt.size(1) for prompt in prompts)
+    model_input = torch.cat([torch.nn.functional.pad(p, (0, max_length - p.size(1)), value=0) for p in prompts])
+    attention_mask = torch.cat([
+        torch.nn.functional.pad(torch.ones_like(p), (0, max_length - p.size(1)), value=0) for p in prompts
+    ])
+    return model_input, attention_mask
+
+
+def generate(huggingface: HuggingFace, batches) -> float:
+    start_time = time.perf_counter()
+    with torch.no_grad():
+        for model_input, attention_mask in batches:
+            huggingface.model.generate(
+                model_input,
+                attention_mask=attention_mask,
+                max_new_tokens=huggingface.model_max_new_tokens,
+                do_sample=False,
+                pad_token_id=huggingface.pad_token_id,
+            )
+    return time.perf_counter() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=16, help="prompts in one consumed batch")
+    parser.add_argument("--long-ratio", type=float, default=0.2, help="share of long RAG prompts")
+    parser.add_argument("--long-min", type=int, default=1024, help="shortest RAG prompt in tokens")
+    parser.add_argument("--long-max", type=int, default=2048, help="longest RAG prompt in tokens")
+    parser.add_argument("--token-budget", type=int, default=4096, help="HUGGINGFACE_MODEL_TOKEN_BUDGET")
+    parser.add_argument("--max-new-tokens", type=int, default=8, help="HUGGINGFACE_MODEL_MAX_NEW_TOKENS")
+    args = parser.parse_args()
+
+    huggingface = build_huggingface(args.token_budget, args.max_new_tokens)
+    prompts = make_prompts(args)
+    real_tokens = sum(prompt.size(1) for prompt in prompts)
+
+    grouped = [[prompts[idx] for idx in batch] for batch in huggingface._HuggingFace__make_batches(prompts)]
+    strategies = {
+        "right-pad": [right_pad(prompts)],
+        "budget": [huggingface._HuggingFace__pad_batch_inputs(batch_inputs=batch) for batch in grouped],
+    }
+
+    print(f"requests={len(prompts)} prompt tokens={real_tokens} token_budget={args.token_budget}")
+    print(f"{'strategy':<12}{'batches':>10}{'padded tokens':>16}{'padding %':>12}{'seconds':>10}")
+    for name, batches in strategies.items():
+        padded = sum(model_input.numel() for model_input, _ in batches)
+        elapsed = generate(huggingface, batches)
+        print(f"{name:<12}{len(batches):>10}{padded:>16}{(padded - real_tokens) / padded * 100:>11.1f}%{elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -23,10 +23,17 @@ class Configs(BaseSettings):
     mq_consumer_consume_timeout: Optional[float] = 1
     mq_consumer_topic: Optional[str] = "llm-request"
     mq_producer_topic: Optional[str] = "llm-response"
+    mq_producer_linger_ms: Optional[int] = 5
+    mq_producer_batch_size: Optional[int] = 10000
+    mq_producer_max_in_flight: Optional[int] = 1000
     mq_error_topic: Optional[str] = "error-queue"
+    mq_pipeline_queue_size: Optional[int] = 4
+    mq_pipeline_commit_interval: Optional[float] = 1.0
+    mq_pipeline_infer_workers: Optional[int] = 1
 
     llm_module: Literal["huggingface", "gemini"]
     llm_batch_required: Optional[bool] = False
+    llm_stream_workers: Optional[int] = 4
 
     # HuggingFace Configuration
     huggingface_api_key: Optional[str] = None
@@ -36,6 +43,9 @@ class Configs(BaseSettings):
     huggingface_model_torch_dtype: Optional[Literal["float16",
                                                     "float32", "float64"]] = "float16"
     huggingface_model_torch_device: Optional[int] = 0
+    huggingface_model_continuous_batching: Optional[bool] = False
+    huggingface_model_max_batch_size: Optional[int] = 8
+    huggingface_model_token_budget: Optional[int] = 16384
 
     # Gemini Configuration
     gemini_api_key: Optional[str] = None
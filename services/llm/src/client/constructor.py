@@ -18,7 +18,9 @@ from client.config import Configs
 @dataclass
 class DependencyService:
     producer_service: IProducerService
+    error_producer_service: IProducerService
     consumer_service: IConsumerService
+    llm_model: ILLMModel
     llm_service: ILLMService
     llm_app_service: ILLMApplicationService
 
@@ -31,6 +33,9 @@ def init_producer_service(
         mq_bootstrap_server=configs.mq_bootstrap_server,
         mq_log_level=configs.log_level_mq,
         mq_system_consumed_topic=configs.mq_consumer_topic,
+        mq_linger_ms=configs.mq_producer_linger_ms,
+        mq_batch_size=configs.mq_producer_batch_size,
+        mq_max_in_flight=configs.mq_producer_max_in_flight,
     )
 
 
@@ -42,6 +47,9 @@ def init_error_producer_service(
         mq_bootstrap_server=configs.mq_bootstrap_server,
         mq_log_level=configs.log_level_mq,
         mq_system_consumed_topic=configs.mq_consumer_topic,
+        mq_linger_ms=configs.mq_producer_linger_ms,
+        mq_batch_size=configs.mq_producer_batch_size,
+        mq_max_in_flight=configs.mq_producer_max_in_flight,
     )
 
 
@@ -75,6 +83,7 @@ def init_llm_app_service(
     mq_request_data_mapper: IDataMapper[LLMRequest, ConsumedMessageDTO],
     mq_response_data_mapper: IDataMapper[LLMResponse, PublishedMessageDTO],
     service_name: str,
+    stream_workers: int = 4,
 ) -> ILLMApplicationService:
     return LLMApplicationService(
         llm_service=llm_service,
@@ -83,6 +92,7 @@ def init_llm_app_service(
         mq_request_data_mapper=mq_request_data_mapper,
         mq_response_data_mapper=mq_response_data_mapper,
         service_name=service_name,
+        stream_workers=stream_workers,
     )
 
 
@@ -101,6 +111,9 @@ def init_llm_model(
 ) -> ILLMModel:
     match configs.llm_module:
         case "huggingface":
+            # A single inference thread blocks on each batch, so the engine never admits a new one while decoding
+            if configs.huggingface_model_continuous_batching and configs.mq_pipeline_infer_workers <= 1:
+                raise ValueError("Continuous Batching Requires MQ_PIPELINE_INFER_WORKERS Greater Than 1")
             return HuggingFace(
                 huggingface_api_key=configs.huggingface_api_key,
                 model_path=configs.huggingface_model_path,
@@ -109,6 +122,9 @@ def init_llm_model(
                 model_torch_dtype=configs.huggingface_model_torch_dtype,
                 model_torch_device=configs.huggingface_model_torch_device,
                 model_batch_required=configs.llm_batch_required,
+                model_continuous_batching=configs.huggingface_model_continuous_batching,
+                model_max_batch_size=configs.huggingface_model_max_batch_size,
+                model_token_budget=configs.huggingface_model_token_budget,
             )
         case "gemini":
             return Gemini(
@@ -148,6 +164,7 @@ def init_services(configs: Configs) -> DependencyService:
         mq_request_data_mapper=mq_request_data_mapper,
         mq_response_data_mapper=mq_response_data_mapper,
         service_name=configs.service_name,
+        stream_workers=configs.llm_stream_workers,
     )
     consumer_service = init_consumer_service(
         configs=configs,
@@ -156,7 +173,9 @@ def init_services(configs: Configs) -> DependencyService:
 
     return DependencyService(
         producer_service=producer_service,
+        error_producer_service=error_producer_service,
         consumer_service=consumer_service,
+        llm_model=llm_model,
         llm_service=llm_service,
         llm_app_service=llm_app_service,
     )
@@ -4,6 +4,7 @@ from common.telemetry import configure_tracing
 
 from .config import Configs
 from .constructor import init_services
+from .pipeline import MQPipeline
 
 
 class AppServer:
@@ -17,30 +18,36 @@ class AppServer:
         services = init_services(configs=configs)
         self.logger = Logger.get_logger(DOMAIN)
         self.consumer_service = services.consumer_service
+        self.llm_model = services.llm_model
+        self.producer_services = [services.producer_service, services.error_producer_service]
         self.consumer_topics = [configs.mq_consumer_topic]
-        self.consumer_commit_count = configs.mq_consumer_min_commit_count
+        self.pipeline = MQPipeline(
+            consumer_service=services.consumer_service,
+            app_service=services.llm_app_service,
+            producer_services=self.producer_services,
+            commit_count=configs.mq_consumer_min_commit_count,
+            commit_interval=configs.mq_pipeline_commit_interval,
+            queue_size=configs.mq_pipeline_queue_size,
+            infer_workers=configs.mq_pipeline_infer_workers,
+            domain=DOMAIN,
+        )
 
     def start_mq(self):
         try:
-            success_message_count = 0
             self.consumer_service.subscribe(topics=self.consumer_topics)
 
             self.logger.info("Server Configuring Done. Server is Ready")
 
-            while True:
-                messages = self.consumer_service.consume()
-                if not messages:
-                    continue
-
-                is_success = self.consumer_service.process(messages)
-                if is_success:
-                    success_message_count += 1
-
-                    if success_message_count % self.consumer_commit_count == 0:
-                        self.consumer_service.commit(asynchronous=True)
+            self.pipeline.start()
 
         finally:
+            self.pipeline.stop()
+            # Stop the model's background threads once no inference is left
+            self.llm_model.close()
             self.consumer_service.close()
+            # Deliver messages still waiting in the producer queues
+            for producer_service in self.producer_services:
+                producer_service.flush()
 
     def start(self):
         self.start_mq()
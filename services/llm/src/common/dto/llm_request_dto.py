@@ -4,3 +4,4 @@ from pydantic import BaseModel
 
 class LLMRequestDTO(BaseModel):
     text: str
+    stream: bool = False
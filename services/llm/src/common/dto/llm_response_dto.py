@@ -1,5 +1,9 @@
+from typing import Optional
 from pydantic import BaseModel
 
 
 class LLMResponseDTO(BaseModel):
     results: str | None
+    # Streamed responses are split into chunks numbered from 0, the last one has done=True
+    seq: Optional[int] = None
+    done: bool = True
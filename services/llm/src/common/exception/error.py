@@ -4,6 +4,7 @@ from pydantic import BaseModel, model_serializer
 
 class ErrorCode(str, Enum):
     MAXIMUM_RETRIES_REACH = 'MAXIMUM_RETRIES_REACH'
+    STREAM_INTERRUPTED = 'STREAM_INTERRUPTED'
 
 
 class Error(BaseModel):
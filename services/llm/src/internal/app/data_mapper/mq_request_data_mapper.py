@@ -11,11 +11,12 @@ class MQRequestDataMapper(IDataMapper[LLMRequest, ConsumedMessageDTO[LLMRequestD
             id=dal_entity.id,
             prompt=prompt,
             destination=dal_entity.destination,
+            stream=llm_payload.stream,
         )
 
     def to_dal_entity(self, domain_entity: LLMRequest) -> ConsumedMessageDTO[LLMRequestDTO]:
         text = domain_entity.prompt
-        entity = LLMRequestDTO(text=text)
+        entity = LLMRequestDTO(text=text, stream=domain_entity.stream)
         return ConsumedMessageDTO[LLMRequestDTO](
             id=domain_entity.id,
             message=entity,
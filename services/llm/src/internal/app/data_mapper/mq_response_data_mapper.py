@@ -9,12 +9,18 @@ class MQResponseDataMapper(IDataMapper[LLMResponse, PublishedMessageDTO[LLMRespo
         return LLMResponse(
             id=dal_entity.id,
             results=dto.results,
+            seq=dto.seq,
+            done=dto.done,
             destination=dal_entity.destination,
             error=dal_entity.error,
         )
 
     def to_dal_entity(self, domain_entity: LLMResponse) -> PublishedMessageDTO[LLMResponseDTO]:
-        dto = LLMResponseDTO(results=domain_entity.results)
+        dto = LLMResponseDTO(
+            results=domain_entity.results,
+            seq=domain_entity.seq,
+            done=domain_entity.done,
+        )
         return PublishedMessageDTO[LLMResponseDTO](
             id=domain_entity.id,
             message=dto,
@@ -15,10 +15,18 @@ class IConsumerService(ABC):
     def subscribe(self, topics: List[str]):
         raise NotImplementedError
 
+    @abstractmethod
+    def decode(self, messages: List[Any]) -> List[Any] | None:
+        raise NotImplementedError
+
     @abstractmethod
     def commit(self, asynchronous=True):
         raise NotImplementedError
 
+    @abstractmethod
+    def commit_messages(self, messages: List[Any], asynchronous=True):
+        raise NotImplementedError
+
     @abstractmethod
     def close(self):
         raise NotImplementedError
@@ -1,9 +1,12 @@
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 from common.constant.domain import APP_LLM as DOMAIN
 from common.log import Logger
 from common.data_mapper import IDataMapper
 from common.dto import ConsumedMessageDTO, PublishedMessageDTO, LLMRequestDTO, LLMResponseDTO
+from common.exception import Error, ErrorCode
 from internal.app.external_service import IProducerService
 from internal.domain.entity import LLMRequest, LLMResponse
 from internal.domain.service import ILLMService
@@ -21,6 +24,7 @@ class LLMApplicationService(ILLMApplicationService):
         mq_request_data_mapper: IDataMapper[LLMRequest, ConsumedMessageDTO[LLMRequestDTO]],
         mq_response_data_mapper: IDataMapper[LLMResponse, PublishedMessageDTO[LLMResponseDTO]],
         service_name: str = "llm_app_service",
+        stream_workers: int = 4,
     ):
         self.logger = Logger.get_logger(DOMAIN)
         self.llm_service = llm_service
@@ -30,20 +34,68 @@ class LLMApplicationService(ILLMApplicationService):
         self.mq_response_data_mapper = mq_response_data_mapper
 
         self.service_name = service_name
+        # Streamed requests generate on their own threads, next to the batch of the other requests
+        self.stream_executor = ThreadPoolExecutor(max_workers=stream_workers, thread_name_prefix="llm-stream")
 
     @trace
     def handle_queue(self, payload: List[ConsumedMessageDTO[LLMRequest]]):
         self.logger.info(f"handle_queue (payload:{payload})")
+        self.publish_queue(self.process_queue(payload))
 
+    @trace
+    def process_queue(self, payload: List[ConsumedMessageDTO[LLMRequest]]) -> List[PublishedMessageDTO[LLMResponseDTO]]:
         llm_requests = list(
             map(self.mq_request_data_mapper.to_domain_entity, payload))
-        results = self.llm_service.process_messages(llm_requests)
+        # Streams start before the batch, so a continuous batching model generates them together
+        streams = [
+            self.stream_executor.submit(self.__stream_queue, request)
+            for request in llm_requests if request.stream
+        ]
+        llm_requests = [request for request in llm_requests if not request.stream]
+
+        try:
+            results = self.llm_service.process_messages(llm_requests) if llm_requests else []
+        finally:
+            # A failed batch still waits for its streams, so they never outlive the batch
+            stream_results = [stream.result() for stream in streams]
+        results.extend(stream_results)
+
+        return list(map(self.__to_mq_message, results))
 
-        for result in results:
-            mq_message = self.mq_response_data_mapper.to_dal_entity(result)
-            mq_message.source = self.service_name
+    def __to_mq_message(self, result: LLMResponse) -> PublishedMessageDTO[LLMResponseDTO]:
+        mq_message = self.mq_response_data_mapper.to_dal_entity(result)
+        mq_message.source = self.service_name
+        return mq_message
 
-            if result.error is not None:
+    def __stream_queue(self, request: LLMRequest) -> LLMResponse:
+        """
+        Publish chunks as soon as they are generated and return the final chunk for the publish stage,
+        so the offset of the request is committed only once the whole stream is delivered.
+        """
+        seq, detail = 0, "stream ended without a final chunk"
+        try:
+            for result in self.llm_service.stream_message(request):
+                if result.done:
+                    return result
+                self.publish_queue([self.__to_mq_message(result)])
+                seq += 1
+        except Exception as e:
+            self.logger.error(f"Failed to Stream Message: {e}, {traceback.format_exc()}")
+            detail = str(e)
+        # The client waits for a chunk marked done, end the stream with the error instead
+        return LLMResponse(
+            id=request.id,
+            results="",
+            destination=request.destination,
+            seq=seq,
+            done=True,
+            error=Error(code=ErrorCode.STREAM_INTERRUPTED, detail=detail),
+        )
+
+    @trace
+    def publish_queue(self, mq_messages: List[PublishedMessageDTO[LLMResponseDTO]]):
+        for mq_message in mq_messages:
+            if mq_message.error is not None:
                 error_mq_message = PublishedMessageDTO[LLMResponseDTO](
                     id=mq_message.id,
                     source=mq_message.source,
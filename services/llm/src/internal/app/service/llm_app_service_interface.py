@@ -1,10 +1,18 @@
 from abc import ABC, abstractmethod
 from typing import List
 
-from common.dto import ConsumedMessageDTO
+from common.dto import ConsumedMessageDTO, PublishedMessageDTO
 
 
 class ILLMApplicationService(ABC):
     @abstractmethod
     def handle_queue(self, payloads: List[ConsumedMessageDTO]):
         raise NotImplementedError
+
+    @abstractmethod
+    def process_queue(self, payloads: List[ConsumedMessageDTO]) -> List[PublishedMessageDTO]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def publish_queue(self, mq_messages: List[PublishedMessageDTO]):
+        raise NotImplementedError
\ No newline at end of file
@@ -6,3 +6,4 @@ class LLMRequest(BaseModel):
     id: str
     prompt: str
     destination: Optional[str] = None
+    stream: bool = False
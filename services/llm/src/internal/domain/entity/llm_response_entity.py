@@ -9,3 +9,5 @@ class LLMResponse(BaseModel):
     results: Optional[str] = None
     destination: Optional[str] = None
     error: Optional[Error] = None
+    seq: Optional[int] = None
+    done: bool = True
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Iterator, List
 
 from internal.domain.entity import LLMRequest, LLMResponse
 
@@ -12,3 +12,10 @@ class ILLMModel(ABC):
     @abstractmethod
     def generate_batch_responses(self, messages: List[LLMRequest]) -> List[LLMResponse]:
         raise NotImplementedError
+
+    @abstractmethod
+    def generate_stream(self, message: LLMRequest) -> Iterator[str]:
+        raise NotImplementedError
+
+    def close(self):
+        """Release the resources held by the model, models without any keep the default."""
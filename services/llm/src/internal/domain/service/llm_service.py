@@ -1,7 +1,8 @@
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
 from common.constant.domain import DOMAIN_LLM as DOMAIN
 from common.decorator import trace
+from common.exception import Error, ErrorCode
 from common.log import Logger
 from internal.domain.entity import LLMRequest, LLMResponse
 from internal.domain.ml import ILLMModel
@@ -28,3 +29,31 @@ class LLMService(ILLMService):
                 responses.append(response)
 
         return responses
+
+    def stream_message(self, payload: LLMRequest) -> Iterator[LLMResponse]:
+        """Yield one response per generated chunk, the last one is an empty chunk marked done."""
+        self.logger.info(f"stream_message (payload:{payload})")
+        seq, error = 0, None
+        try:
+            for text in self.llm_model.generate_stream(payload):
+                yield LLMResponse(
+                    id=payload.id,
+                    results=text,
+                    destination=payload.destination,
+                    seq=seq,
+                    done=False,
+                )
+                seq += 1
+        except Exception as e:
+            # Chunks already sent cannot be taken back, so the stream ends with the error instead of a retry
+            self.logger.error(f"Stream Generation Failed: {e}")
+            error = Error(code=ErrorCode.STREAM_INTERRUPTED, detail=str(e))
+
+        yield LLMResponse(
+            id=payload.id,
+            results="",
+            destination=payload.destination,
+            seq=seq,
+            done=True,
+            error=error,
+        )
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Iterator, List
 
 from internal.domain.entity import LLMRequest, LLMResponse
 
@@ -8,3 +8,7 @@ class ILLMService(ABC):
     @abstractmethod
     def process_messages(self, payloads: List[LLMRequest]) -> List[LLMResponse]:
         raise NotImplementedError
+
+    @abstractmethod
+    def stream_message(self, payload: LLMRequest) -> Iterator[LLMResponse]:
+        raise NotImplementedError
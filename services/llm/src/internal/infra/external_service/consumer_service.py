@@ -2,7 +2,7 @@ import traceback
 import pydantic_core
 
 from typing import List, Any, Optional
-from confluent_kafka import Consumer, KafkaError
+from confluent_kafka import Consumer, KafkaError, TopicPartition
 
 from common.constant.domain import KAFKA_CONSUMER, INFRA_CONSUMER as DOMAIN
 from common.log import Logger, LogLevel
@@ -47,15 +47,28 @@ class ConsumerService(IConsumerService):
     def commit(self, asynchronous=True):
         self.consumer.commit(asynchronous=asynchronous)
 
+    def commit_messages(self, messages: List[Any], asynchronous=True):
+        # Commit the next offset of each partition, only up to the given messages
+        offsets = {}
+        for message in messages:
+            if message.error():
+                continue
+            key = (message.topic(), message.partition())
+            offsets[key] = max(offsets.get(key, -1), message.offset() + 1)
+        if not offsets:
+            return
+        self.consumer.commit(
+            offsets=[TopicPartition(topic, partition, offset) for (topic, partition), offset in offsets.items()],
+            asynchronous=asynchronous,
+        )
+
     def consume(self) -> List[Any] | None:
         return self.consumer.consume(
             self.mq_max_batch_size,
             self.mq_consume_timeout,
         )
 
-    @Logger.register_correlation_id_mq
-    @trace
-    def process(self, messages: List[Any]) -> bool:
+    def decode(self, messages: List[Any]) -> Optional[List[ConsumedMessageDTO]]:
         try:
             payloads: List[ConsumedMessageDTO] = []
             for message in messages:
@@ -66,17 +79,27 @@ class ConsumerService(IConsumerService):
                     elif message.error():
                         error = message.error()
                         self.logger.error(f"Consumer Error: {error}")
-                    return False
+                    return None
 
                 decoded = message.value().decode('utf-8')
                 consumed = ConsumedMessageDTO.model_validate_json(decoded)
                 payloads.append(consumed)
 
-            self.llm_app_service.handle_queue(payloads)
-
         except pydantic_core.ValidationError as e:
             self.logger.error(f"Error Decoding JSON: {e}")
-            return False
+            return None
+
+        return payloads
+
+    @Logger.register_correlation_id_mq
+    @trace
+    def process(self, messages: List[Any]) -> bool:
+        try:
+            payloads = self.decode(messages)
+            if payloads is None:
+                return False
+
+            self.llm_app_service.handle_queue(payloads)
 
         except Exception as e:
             trace = traceback.format_exc()
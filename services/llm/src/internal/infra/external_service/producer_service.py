@@ -1,6 +1,6 @@
 import json
 
-from typing import Optional
+from typing import Optional, Tuple
 from confluent_kafka import Producer
 
 from common.constant.domain import KAFKA_PRODUCER, INFRA_PRODUCER as DOMAIN
@@ -17,21 +17,34 @@ class ProducerService(IProducerService):
         mq_bootstrap_server: str,
         mq_log_level: LogLevel,
         mq_system_consumed_topic: Optional[str] = None,
+        mq_linger_ms: int = 5,
+        mq_batch_size: int = 10000,
+        mq_max_in_flight: int = 1000,
     ):
         self.logger = Logger.get_logger(DOMAIN)
         self.kafka_logger = Logger.get_logger(KAFKA_PRODUCER, mq_log_level)
 
         self.mq_topic = mq_topic
         self.mq_system_consumed_topic = mq_system_consumed_topic
+        self.mq_max_in_flight = mq_max_in_flight
+        self.in_flight_count = 0
+        # Deliveries failed since the last flush
+        self.failed_count = 0
         self.producer = Producer(
-            {'bootstrap.servers': mq_bootstrap_server},
+            {
+                'bootstrap.servers': mq_bootstrap_server,
+                'linger.ms': mq_linger_ms,
+                'batch.num.messages': mq_batch_size,
+            },
             logger=self.kafka_logger,
         )
 
     def __delivery_report(self, err, msg):
         self.logger.info("Delivery Report")
+        self.in_flight_count = max(self.in_flight_count - 1, 0)
 
         if err is not None:
+            self.failed_count += 1
             self.logger.error(f"Message Delivery Failed: {err}")
             return
 
@@ -47,20 +60,60 @@ class ProducerService(IProducerService):
             message = f"No destination topic given. Using the default one ({self.mq_topic})."
             self.logger.info(message)
             payload.destination = self.mq_topic
-        elif self.mq_system_consumed_topic and payload.destination == self.mq_system_consumed_topic:
+        elif self.mq_system_consumed_topic and self.__parse_destination(payload.destination)[0] == self.mq_system_consumed_topic:
             message = f"The destination topic cannot be the same as the system-consumed topic ({self.mq_system_consumed_topic}). " \
                 f"Overwriting the given destination with the default destination ({self.mq_topic})."
             self.logger.warning(message)
             payload.destination = self.mq_topic
 
-        self.producer.poll(0)
         send_data = json.dumps(
             payload.model_dump(),
-            ensure_ascii=True, indent=4
-        )
-        self.producer.produce(
-            payload.destination,
-            send_data.encode('utf-8'),
-            callback=self.__delivery_report,
-        )
-        self.producer.flush()
+            ensure_ascii=False, separators=(',', ':'),
+        ).encode('utf-8')
+
+        if self.in_flight_count >= self.mq_max_in_flight:
+            self.logger.warning(f"In-Flight Messages Reached {self.mq_max_in_flight}. Flushing Producer.")
+            self.producer.flush()
+
+        topic, partition = self.__parse_destination(payload.destination)
+        try:
+            self.__produce(topic, send_data, partition)
+        except BufferError:
+            self.logger.warning("Producer Queue is Full. Flushing Producer.")
+            self.producer.flush()
+            self.__produce(topic, send_data, partition)
+
+        # Serve delivery reports of the previous messages without waiting
+        self.producer.poll(0)
+
+    @staticmethod
+    def __parse_destination(destination: str) -> Tuple[str, Optional[int]]:
+        # A reply to one client instance is addressed as "<topic>:<partition>", ':' is not valid in a topic name
+        topic, separator, partition = destination.partition(":")
+        if separator and partition.isdigit():
+            return topic, int(partition)
+        return destination, None
+
+    def __produce(self, topic: str, data: bytes, partition: Optional[int] = None):
+        if partition is None:
+            self.producer.produce(
+                topic,
+                data,
+                callback=self.__delivery_report,
+            )
+        else:
+            self.producer.produce(
+                topic,
+                data,
+                partition=partition,
+                callback=self.__delivery_report,
+            )
+        self.in_flight_count += 1
+
+    def flush(self, timeout: float = -1) -> int:
+        # Waits for delivery, returns the number of messages not delivered since the last flush
+        remaining = self.producer.flush(timeout)
+        if remaining:
+            self.logger.warning(f"{remaining} Message(s) Still in Producer Queue After Flush")
+        failed_count, self.failed_count = self.failed_count, 0
+        return remaining + failed_count
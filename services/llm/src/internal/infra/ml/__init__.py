@@ -1,2 +1,3 @@
 from .gemini import Gemini
 from .huggingface import HuggingFace
+from .continuous_batching import ContinuousBatchingEngine
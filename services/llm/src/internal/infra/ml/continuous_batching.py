@@ -0,0 +1,249 @@
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import torch
+
+from common.constant.domain import INFRA_HUGGINGFACE as DOMAIN
+from common.log import Logger
+
+# Legacy transformers cache layout: one (key, value) pair per layer, each [batch, heads, sequence, head_dim]
+KVCache = Tuple[Tuple[torch.Tensor, torch.Tensor], ...]
+
+
+@dataclass
+class _Sequence:
+    prompt_ids: List[int]
+    future: Future
+    submitted_at: float
+    max_new_tokens: int
+    on_token: Optional[Callable[[int], None]] = None
+    generated_ids: List[int] = field(default_factory=list)
+    past_key_values: Optional[KVCache] = None
+    first_token_at: Optional[float] = None
+
+    @property
+    def cache_length(self) -> int:
+        return self.past_key_values[0][0].size(2)
+
+
+class ContinuousBatchingEngine:
+    """
+    Iteration-level scheduler for a causal LM. Waiting requests are prefilled between decode steps
+    as soon as a slot is free, every active sequence then advances by one token in a single batched
+    forward pass, and sequences are retired the moment they emit EOS or reach max_new_tokens.
+    Each sequence keeps its own KV cache, caches are left-padded and masked only for the decode step.
+    """
+    def __init__(
+        self,
+        model: Any,
+        eos_token_ids: List[int],
+        max_batch_size: int = 8,
+        max_new_tokens: int = 2048,
+        do_sample: bool = False,
+        temperature: float = 1.0,
+        top_p: float = 1.0,
+        idle_timeout: float = 0.01,
+    ):
+        self.logger = Logger.get_logger(DOMAIN)
+        self.model = model
+        self.eos_token_ids = set(eos_token_ids)
+        self.max_batch_size = max_batch_size
+        self.max_new_tokens = max_new_tokens
+        self.do_sample = do_sample
+        self.temperature = temperature
+        self.top_p = top_p
+        self.idle_timeout = idle_timeout
+
+        self.waiting: queue.Queue[_Sequence] = queue.Queue()
+        self.active: List[_Sequence] = []
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+        self.completed_count = 0
+        self.generated_token_count = 0
+        self.ttft_total = 0.0
+
+    def submit(
+        self,
+        prompt_ids: List[int],
+        max_new_tokens: Optional[int] = None,
+        on_token: Optional[Callable[[int], None]] = None,
+    ) -> Future:
+        """
+        Queue a prompt, the future resolves to the generated token ids without the prompt.
+        on_token is called from the engine thread with every token as soon as it is generated.
+        """
+        sequence = _Sequence(
+            prompt_ids=list(prompt_ids),
+            future=Future(),
+            submitted_at=time.perf_counter(),
+            max_new_tokens=min(max_new_tokens or self.max_new_tokens, self.max_new_tokens),
+            on_token=on_token,
+        )
+        self.waiting.put(sequence)
+        return sequence.future
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name="continuous-batching", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self._fail(self.active + self._drain_waiting(), Exception("Continuous Batching Engine Stopped"))
+        self.active = []
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "completed": self.completed_count,
+            "generated_tokens": self.generated_token_count,
+            "ttft_mean": self.ttft_total / self.completed_count if self.completed_count else 0.0,
+        }
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            if not self.active and self.waiting.empty():
+                time.sleep(self.idle_timeout)
+                continue
+            self.step()
+
+    def step(self):
+        """One scheduler iteration: admit waiting sequences into free slots, then decode one token for all."""
+        try:
+            with torch.no_grad():
+                self._admit()
+                if self.active:
+                    self._decode()
+        except Exception as e:
+            self.logger.error(f"Continuous Batching Decode Failed: {e}, {traceback.format_exc()}")
+            self._fail(self.active, e)
+            self.active = []
+
+    def _drain_waiting(self) -> List[_Sequence]:
+        sequences = []
+        while True:
+            try:
+                sequences.append(self.waiting.get_nowait())
+            except queue.Empty:
+                return sequences
+
+    def _fail(self, sequences: List[_Sequence], error: Exception):
+        for sequence in sequences:
+            if not sequence.future.done():
+                sequence.future.set_exception(error)
+
+    def _admit(self):
+        while len(self.active) < self.max_batch_size:
+            try:
+                sequence = self.waiting.get_nowait()
+            except queue.Empty:
+                return
+            if not sequence.future.set_running_or_notify_cancel():
+                continue
+            try:
+                self._prefill(sequence)
+            except Exception as e:
+                # A failed prompt only fails its own request, the running batch is untouched
+                self.logger.error(f"Continuous Batching Prefill Failed: {e}, {traceback.format_exc()}")
+                self._fail([sequence], e)
+                continue
+            if not self._retire(sequence):
+                self.active.append(sequence)
+
+    def _prefill(self, sequence: _Sequence):
+        # Prefill on its own, so a long prompt never pads the running batch
+        input_ids = torch.tensor([sequence.prompt_ids], device=self.model.device)
+        output = self.model(input_ids=input_ids, use_cache=True)
+        sequence.past_key_values = self._to_legacy_cache(output.past_key_values)
+        self._append_token(sequence, self._next_tokens(output.logits[:, -1, :])[0])
+
+    def _decode(self):
+        max_length = max(sequence.cache_length for sequence in self.active)
+        batch_size = len(self.active)
+        device = self.model.device
+
+        input_ids = torch.tensor([[sequence.generated_ids[-1]] for sequence in self.active], device=device)
+        position_ids = torch.tensor([[sequence.cache_length] for sequence in self.active], device=device)
+        attention_mask = torch.zeros((batch_size, max_length + 1), dtype=torch.long, device=device)
+        for i, sequence in enumerate(self.active):
+            attention_mask[i, max_length - sequence.cache_length:] = 1
+
+        output = self.model(
+            input_ids=input_ids,
+            position_ids=position_ids,
+            attention_mask=attention_mask,
+            past_key_values=self._pad_caches(max_length),
+            use_cache=True,
+        )
+        next_tokens = self._next_tokens(output.logits[:, -1, :])
+        past_key_values = self._to_legacy_cache(output.past_key_values)
+
+        still_active = []
+        for i, sequence in enumerate(self.active):
+            # Drop the left padding so the cache only holds this sequence's tokens
+            start = max_length - sequence.cache_length
+            sequence.past_key_values = tuple(
+                (key[i:i+1, :, start:], value[i:i+1, :, start:]) for key, value in past_key_values
+            )
+            self._append_token(sequence, next_tokens[i])
+            if not self._retire(sequence):
+                still_active.append(sequence)
+        self.active = still_active
+
+    def _pad_caches(self, max_length: int) -> KVCache:
+        layers = []
+        for layer in range(len(self.active[0].past_key_values)):
+            keys, values = [], []
+            for sequence in self.active:
+                key, value = sequence.past_key_values[layer]
+                padding = (0, 0, max_length - key.size(2), 0)
+                keys.append(torch.nn.functional.pad(key, padding))
+                values.append(torch.nn.functional.pad(value, padding))
+            layers.append((torch.cat(keys, dim=0), torch.cat(values, dim=0)))
+        return tuple(layers)
+
+    @staticmethod
+    def _to_legacy_cache(past_key_values: Any) -> KVCache:
+        if hasattr(past_key_values, "to_legacy_cache"):
+            return past_key_values.to_legacy_cache()
+        return past_key_values
+
+    def _next_tokens(self, logits: torch.Tensor) -> List[int]:
+        if not self.do_sample:
+            return logits.argmax(dim=-1).tolist()
+
+        probs = torch.softmax(logits.float() / max(self.temperature, 1e-5), dim=-1)
+        if self.top_p < 1.0:
+            sorted_probs, sorted_indices = torch.sort(probs, descending=True, dim=-1)
+            # Keep the smallest prefix whose mass reaches top_p, the first token is always kept
+            remove = sorted_probs.cumsum(dim=-1) - sorted_probs > self.top_p
+            sorted_probs[remove] = 0.0
+            probs = torch.zeros_like(probs).scatter(-1, sorted_indices, sorted_probs)
+        return torch.multinomial(probs, num_samples=1).squeeze(-1).tolist()
+
+    def _append_token(self, sequence: _Sequence, token_id: int):
+        if sequence.first_token_at is None:
+            sequence.first_token_at = time.perf_counter()
+        sequence.generated_ids.append(token_id)
+        self.generated_token_count += 1
+        if sequence.on_token is not None:
+            sequence.on_token(token_id)
+
+    def _retire(self, sequence: _Sequence) -> bool:
+        if sequence.generated_ids[-1] not in self.eos_token_ids and len(sequence.generated_ids) < sequence.max_new_tokens:
+            return False
+        sequence.past_key_values = None
+        self.completed_count += 1
+        self.ttft_total += sequence.first_token_at - sequence.submitted_at
+        sequence.future.set_result(sequence.generated_ids)
+        return True
@@ -1,5 +1,5 @@
 import asyncio
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
 import google.generativeai as genai
 import nest_asyncio
@@ -115,6 +115,12 @@ class Gemini(ILLMModel):
             destination=message.destination,
         )
 
+    def generate_stream(self, message: LLMRequest) -> Iterator[str]:
+        self.logger.info(f"generate_stream (payload:{message})")
+        response = self.model.generate_content(contents=message.prompt, stream=True)
+        for chunk in response:
+            yield chunk.text
+
     @trace
     def generate_batch_responses(self, messages: List[LLMRequest]) -> List[LLMResponse]:
         self.logger.info(f"generate_batch_responses (payload:{messages})")
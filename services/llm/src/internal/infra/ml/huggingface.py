@@ -1,16 +1,20 @@
+import queue
+import threading
 import torch
 
-from typing import Optional, Tuple, List
-from transformers import AutoModelForCausalLM, AutoTokenizer
+from typing import Iterator, Optional, Tuple, List
+from transformers import AutoModelForCausalLM, AutoTokenizer, TextIteratorStreamer
 from transformers.utils.logging import add_handler, disable_default_handler
 from huggingface_hub import login
 
 from common.constant.domain import INFRA_HUGGINGFACE as DOMAIN
 from common.log import Logger
 from common.decorator import retry
+from common.decorator.retry import GenericResponse
 from common.util.torch import select_torch_dtype, select_torch_device
 from internal.domain.ml import ILLMModel
 from internal.domain.entity import LLMRequest, LLMResponse
+from internal.infra.ml.continuous_batching import ContinuousBatchingEngine
 
 from common.decorator import trace
 
@@ -27,6 +31,9 @@ class HuggingFace(ILLMModel):
         model_batch_required: bool,
         model_torch_device: int,
         huggingface_api_key: Optional[str],
+        model_continuous_batching: bool = False,
+        model_max_batch_size: int = 8,
+        model_token_budget: int = 16384,
     ):
         self.logger = Logger.get_logger(DOMAIN)
 
@@ -40,6 +47,8 @@ class HuggingFace(ILLMModel):
         self.model_max_new_tokens = model_max_new_tokens
         self.model_do_sample = model_do_sample
         self.model_batch_required = model_batch_required
+        # Maximum padded prompt tokens (batch size x longest prompt) per generate call
+        self.model_token_budget = model_token_budget
 
         try:
             if not model_path:
@@ -52,17 +61,50 @@ class HuggingFace(ILLMModel):
                 torch_dtype=self.torch_dtype,
             )
             self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+            # Llama style tokenizers ship without a pad token
+            self.pad_token_id = self.tokenizer.pad_token_id \
+                if self.tokenizer.pad_token_id is not None else self.tokenizer.eos_token_id
         except Exception as e:
             self.logger.error(f"Error Loading Model {model_path}: {e}")
             raise
 
+        self.engine = None
+        if model_continuous_batching:
+            self.engine = self.__init_engine(model_max_batch_size)
+            self.engine.start()
+
+    def __init_engine(self, max_batch_size: int) -> ContinuousBatchingEngine:
+        generation_config = self.model.generation_config
+        eos_token_ids = generation_config.eos_token_id
+        if eos_token_ids is None:
+            eos_token_ids = self.tokenizer.eos_token_id
+        return ContinuousBatchingEngine(
+            model=self.model,
+            eos_token_ids=eos_token_ids if isinstance(eos_token_ids, list) else [eos_token_ids],
+            max_batch_size=max_batch_size,
+            max_new_tokens=self.model_max_new_tokens,
+            do_sample=self.model_do_sample,
+            temperature=generation_config.temperature,
+            top_p=generation_config.top_p,
+        )
+
+    @retry(max_retries=1, delay=1, logger=Logger.get_logger(DOMAIN))
+    def __call_engine(self, prompts: List[str]) -> List[str]:
+        self.logger.info(f"__call_engine (payload:{prompts})")
+        # Submit everything first, the engine admits each prompt as soon as a slot is free
+        futures = [self.engine.submit(self.tokenizer.encode(prompt)) for prompt in prompts]
+        return [
+            self.tokenizer.decode(future.result(), skip_special_tokens=True)
+            for future in futures
+        ]
+
     @retry(max_retries=1, delay=1, logger=Logger.get_logger(DOMAIN))
     def __call_model(self, model_input: torch.Tensor, attention_mask: torch.Tensor) -> List[str]:
         self.logger.info(f"__call_model (payload:{model_input})")
         generated_ids = self.model.generate(
             model_input,
             attention_mask=attention_mask,
-            pad_token_id=self.tokenizer.pad_token_id,
+            pad_token_id=self.pad_token_id,
             max_new_tokens=self.model_max_new_tokens,
             do_sample=self.model_do_sample,
         )
@@ -72,21 +114,59 @@ class HuggingFace(ILLMModel):
         )
         return model_responses
 
+    def __build_responses(self, messages: List[LLMRequest], model_output: GenericResponse[List[str]]) -> List[LLMResponse]:
+        if model_output.error:
+            return [
+                LLMResponse(
+                    id=message.id,
+                    error=model_output.error,
+                    destination=message.destination,
+                )
+                for message in messages
+            ]
+
+        return [
+            LLMResponse(
+                id=message.id,
+                results=response.split(END_PROMPT_TAG)[-1].strip(),
+                destination=message.destination,
+            )
+            for message, response in zip(messages, model_output.results)
+        ]
+
+    def __make_batches(self, batch_inputs: List[torch.Tensor]) -> List[List[int]]:
+        """Group prompt indices longest first so each batch pads to a similar length within the token budget."""
+        lengths = [input_tensor.size(1) for input_tensor in batch_inputs]
+        order = sorted(range(len(batch_inputs)), key=lambda idx: lengths[idx], reverse=True)
+
+        batches, batch = [], []
+        for idx in order:
+            # The first prompt of a batch is the longest, so it sets the padded length
+            padded_tokens = (len(batch) + 1) * (lengths[batch[0]] if batch else lengths[idx])
+            if batch and padded_tokens > self.model_token_budget:
+                batches.append(batch)
+                batch = []
+            batch.append(idx)
+        if batch:
+            batches.append(batch)
+        return batches
+
     @trace
     def __pad_batch_inputs(self, batch_inputs: List[torch.Tensor]) -> Tuple[torch.Tensor, torch.Tensor]:
         self.logger.info(f"__pad_batch_inputs (payload:{batch_inputs})")
         padded_inputs, attention_masks = [], []
         max_length = max(input_tensor.size(1) for input_tensor in batch_inputs)
         for input_tensor in batch_inputs:
+            # Decoder-only models continue from the last position, so padding goes on the left
             padding_length = max_length - input_tensor.size(1)
             padded_input = torch.nn.functional.pad(
                 input_tensor,
-                (0, padding_length),
-                value=self.tokenizer.pad_token_id,
+                (padding_length, 0),
+                value=self.pad_token_id,
             )
             attention_mask = torch.nn.functional.pad(
                 torch.ones_like(input_tensor),
-                (0, padding_length),
+                (padding_length, 0),
                 value=0,
             )
             padded_inputs.append(padded_input)
@@ -97,6 +177,9 @@ class HuggingFace(ILLMModel):
     @trace
     def generate_response(self, message: LLMRequest) -> LLMResponse:
         self.logger.info(f"generate_response (payload:{message})")
+        if self.engine is not None:
+            return self.generate_batch_responses([message])[0]
+
         prompt = f"{START_PROMPT_TAG} {message.prompt} {END_PROMPT_TAG}"
         encoded = self.tokenizer.encode(text=prompt, return_tensors="pt")
         model_input = encoded.to(self.device)
@@ -122,35 +205,76 @@ class HuggingFace(ILLMModel):
     @trace
     def generate_batch_responses(self, messages: List[LLMRequest]) -> List[LLMResponse]:
         self.logger.info(f"generate_batch_responses (payload:{messages})")
-        ids, batch_inputs, destinations = [], [], []
-        for message in messages:
-            prompt = f"{START_PROMPT_TAG} {message.prompt} {END_PROMPT_TAG}"
-            encoded = self.tokenizer.encode(prompt, return_tensors="pt")
-            batch_inputs.append(encoded)
-            ids.append(message.id)
-            destinations.append(message.destination)
-
-        model_input, attention_mask = self.__pad_batch_inputs(
-            batch_inputs=batch_inputs)
-        model_output = self.__call_model(
-            model_input=model_input,
-            attention_mask=attention_mask,
-        )
-        if model_output.error:
-            return [
-                LLMResponse(
-                    id=message.id,
-                    error=model_output.error,
-                    destination=message.destination,
-                )
-                for message in messages
-            ]
+        prompts = [f"{START_PROMPT_TAG} {message.prompt} {END_PROMPT_TAG}" for message in messages]
+        if self.engine is not None:
+            return self.__build_responses(messages, self.__call_engine(prompts=prompts))
 
-        return [
-            LLMResponse(
-                id=ids[idx],
-                results=response.split(END_PROMPT_TAG)[-1].strip(),
-                destination=destinations[idx],
+        batch_inputs = [self.tokenizer.encode(prompt, return_tensors="pt") for prompt in prompts]
+        responses: List[Optional[LLMResponse]] = [None] * len(messages)
+        for batch in self.__make_batches(batch_inputs):
+            model_input, attention_mask = self.__pad_batch_inputs(
+                batch_inputs=[batch_inputs[idx] for idx in batch])
+            model_output = self.__call_model(
+                model_input=model_input,
+                attention_mask=attention_mask,
             )
-            for idx, response in enumerate(model_output.results)
-        ]
+            # A failed sub-batch only fails its own messages
+            batch_responses = self.__build_responses([messages[idx] for idx in batch], model_output)
+            for idx, response in zip(batch, batch_responses):
+                responses[idx] = response
+        return responses
+
+    def __stream_engine(self, prompt: str) -> Iterator[str]:
+        tokens = queue.Queue()
+        future = self.engine.submit(self.tokenizer.encode(prompt), on_token=tokens.put)
+        future.add_done_callback(lambda _: tokens.put(None))
+
+        generated_ids, text = [], ""
+        while (token_id := tokens.get()) is not None:
+            generated_ids.append(token_id)
+            # Decode the whole answer so multi-token characters are only emitted once complete
+            decoded = self.tokenizer.decode(generated_ids, skip_special_tokens=True)
+            if len(decoded) > len(text) and not decoded.endswith("\ufffd"):
+                yield decoded[len(text):]
+                text = decoded
+        future.result()
+
+    def __stream_generate(self, prompt: str) -> Iterator[str]:
+        model_input = self.tokenizer.encode(text=prompt, return_tensors="pt").to(self.device)
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        errors = []
+
+        def generate():
+            try:
+                self.model.generate(
+                    model_input,
+                    attention_mask=torch.ones_like(model_input),
+                    pad_token_id=self.pad_token_id,
+                    max_new_tokens=self.model_max_new_tokens,
+                    do_sample=self.model_do_sample,
+                    streamer=streamer,
+                )
+            except Exception as e:
+                errors.append(e)
+                # Unblock the consumer of the streamer
+                streamer.end()
+
+        thread = threading.Thread(target=generate, daemon=True)
+        thread.start()
+        for text in streamer:
+            if text:
+                yield text
+        thread.join()
+        if errors:
+            raise errors[0]
+
+    def generate_stream(self, message: LLMRequest) -> Iterator[str]:
+        self.logger.info(f"generate_stream (payload:{message})")
+        prompt = f"{START_PROMPT_TAG} {message.prompt} {END_PROMPT_TAG}"
+        if self.engine is not None:
+            return self.__stream_engine(prompt)
+        return self.__stream_generate(prompt)
+
+    def close(self):
+        if self.engine is not None:
+            self.engine.stop()
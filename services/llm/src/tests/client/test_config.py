@@ -16,15 +16,25 @@ def clear_system_env(monkeypatch):
         "MQ_CONSUMER_CONSUME_TIMEOUT",
         "MQ_CONSUMER_TOPIC",
         "MQ_PRODUCER_TOPIC",
+        "MQ_PRODUCER_LINGER_MS",
+        "MQ_PRODUCER_BATCH_SIZE",
+        "MQ_PRODUCER_MAX_IN_FLIGHT",
         "MQ_ERROR_TOPIC",
+        "MQ_PIPELINE_QUEUE_SIZE",
+        "MQ_PIPELINE_COMMIT_INTERVAL",
+        "MQ_PIPELINE_INFER_WORKERS",
         "LLM_MODULE",
         "LLM_BATCH_REQUIRED",
+        "LLM_STREAM_WORKERS",
         "HUGGINGFACE_API_KEY",
         "HUGGINGFACE_MODEL_PATH",
         "HUGGINGFACE_MODEL_DO_SAMPLE",
         "HUGGINGFACE_MODEL_MAX_NEW_TOKENS",
         "HUGGINGFACE_MODEL_TORCH_DTYPE",
         "HUGGINGFACE_MODEL_TORCH_DEVICE",
+        "HUGGINGFACE_MODEL_CONTINUOUS_BATCHING",
+        "HUGGINGFACE_MODEL_MAX_BATCH_SIZE",
+        "HUGGINGFACE_MODEL_TOKEN_BUDGET",
         "GEMINI_API_KEY",
         "GEMINI_MODEL_NAME",
         "GEMINI_MAX_OUTPUT_TOKEN",
@@ -50,7 +60,17 @@ def test_configs_defaults():
     assert config.mq_consumer_consume_timeout == 1
     assert config.mq_consumer_topic == "llm-request"
     assert config.mq_producer_topic == "llm-response"
+    assert config.mq_producer_linger_ms == 5
+    assert config.mq_producer_batch_size == 10000
+    assert config.mq_producer_max_in_flight == 1000
     assert config.mq_error_topic == "error-queue"
+    assert config.mq_pipeline_queue_size == 4
+    assert config.mq_pipeline_commit_interval == 1.0
+    assert config.mq_pipeline_infer_workers == 1
+    assert config.llm_stream_workers == 4
+    assert config.huggingface_model_continuous_batching is False
+    assert config.huggingface_model_max_batch_size == 8
+    assert config.huggingface_model_token_budget == 16384
     assert config.huggingface_api_key == None
     assert config.gemini_api_key == None
 
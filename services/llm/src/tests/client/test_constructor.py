@@ -0,0 +1,35 @@
+import pytest
+
+from client import constructor
+from client.config import Configs
+from client.constructor import init_llm_model
+
+
+@pytest.mark.constructor
+@pytest.mark.parametrize("infer_workers", [0, 1])
+def test_init_llm_model_reject_continuous_batching_with_single_infer_worker(mocker, infer_workers):
+    huggingface = mocker.patch.object(constructor, "HuggingFace")
+    configs = Configs(
+        mq_bootstrap_server="localhost:9092",
+        llm_module="huggingface",
+        huggingface_model_continuous_batching=True,
+        mq_pipeline_infer_workers=infer_workers,
+    )
+
+    with pytest.raises(ValueError, match="MQ_PIPELINE_INFER_WORKERS"):
+        init_llm_model(configs)
+    huggingface.assert_not_called()
+
+
+@pytest.mark.constructor
+def test_init_llm_model_continuous_batching_with_infer_workers(mocker):
+    huggingface = mocker.patch.object(constructor, "HuggingFace")
+    configs = Configs(
+        mq_bootstrap_server="localhost:9092",
+        llm_module="huggingface",
+        huggingface_model_continuous_batching=True,
+        mq_pipeline_infer_workers=2,
+    )
+
+    assert init_llm_model(configs) is huggingface.return_value
+    assert huggingface.call_args.kwargs["model_continuous_batching"] is True
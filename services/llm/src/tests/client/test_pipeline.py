@@ -0,0 +1,233 @@
+import threading
+import time
+
+import pytest
+
+from client.pipeline import MQPipeline
+
+
+def wait_until(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def run_pipeline(pipeline: MQPipeline) -> threading.Thread:
+    thread = threading.Thread(target=pipeline.start, daemon=True)
+    thread.start()
+    return thread
+
+
+@pytest.fixture(autouse=True)
+def delivered(mock_producer_service):
+    # Every published message is delivered on flush
+    mock_producer_service.flush.return_value = 0
+
+
+@pytest.fixture
+def pipeline(mock_consumer_service, mock_llm_app_service, mock_producer_service):
+    return MQPipeline(
+        consumer_service=mock_consumer_service,
+        app_service=mock_llm_app_service,
+        producer_services=[mock_producer_service],
+        commit_interval=0,
+        queue_size=2,
+        stage_timeout=0.01,
+    )
+
+
+@pytest.mark.pipeline
+def test_pipeline_process_and_commit_published_messages(pipeline, mock_consumer_service, mock_llm_app_service, mock_producer_service):
+    messages, payloads, mq_messages = ["message"], ["payload"], ["mq_message"]
+    mock_consumer_service.consume.side_effect = lambda: messages if mock_consumer_service.consume.call_count == 1 else []
+    mock_consumer_service.decode.return_value = payloads
+    mock_llm_app_service.process_queue.return_value = mq_messages
+
+    thread = run_pipeline(pipeline)
+    assert wait_until(lambda: mock_consumer_service.commit_messages.called)
+    pipeline.stop()
+    thread.join(timeout=2)
+
+    mock_consumer_service.decode.assert_called_once_with(messages)
+    mock_llm_app_service.process_queue.assert_called_once_with(payloads)
+    mock_llm_app_service.publish_queue.assert_called_once_with(mq_messages)
+    mock_producer_service.flush.assert_called_once()
+    mock_consumer_service.commit_messages.assert_called_once_with(messages, asynchronous=True)
+
+
+@pytest.mark.pipeline
+def test_pipeline_commit_invalid_messages_without_inference(pipeline, mock_consumer_service, mock_llm_app_service):
+    messages = ["invalid"]
+    mock_consumer_service.consume.side_effect = lambda: messages if mock_consumer_service.consume.call_count == 1 else []
+    mock_consumer_service.decode.return_value = None
+
+    thread = run_pipeline(pipeline)
+    assert wait_until(lambda: mock_consumer_service.commit_messages.called)
+    pipeline.stop()
+    thread.join(timeout=2)
+
+    mock_llm_app_service.process_queue.assert_not_called()
+    mock_llm_app_service.publish_queue.assert_called_once_with([])
+
+
+@pytest.mark.pipeline
+def test_pipeline_keep_running_when_inference_failed(pipeline, mock_consumer_service, mock_llm_app_service):
+    mock_consumer_service.consume.side_effect = lambda: ["message"] if mock_consumer_service.consume.call_count <= 2 else []
+    mock_consumer_service.decode.return_value = ["payload"]
+    mock_llm_app_service.process_queue.side_effect = [Exception("model failed"), ["mq_message"]]
+
+    thread = run_pipeline(pipeline)
+    assert wait_until(lambda: mock_consumer_service.commit_messages.call_count == 2)
+    pipeline.stop()
+    thread.join(timeout=2)
+
+    assert mock_llm_app_service.publish_queue.call_args_list[1].args == (["mq_message"],)
+
+
+@pytest.mark.pipeline
+def test_pipeline_commit_every_commit_count(mock_consumer_service, mock_llm_app_service, mock_producer_service):
+    pipeline = MQPipeline(
+        consumer_service=mock_consumer_service,
+        app_service=mock_llm_app_service,
+        producer_services=[mock_producer_service],
+        commit_count=2,
+        commit_interval=0,
+        stage_timeout=0.01,
+    )
+    mock_consumer_service.consume.side_effect = lambda: [mock_consumer_service.consume.call_count] if mock_consumer_service.consume.call_count <= 3 else []
+    mock_consumer_service.decode.return_value = ["payload"]
+    mock_llm_app_service.process_queue.return_value = ["mq_message"]
+
+    thread = run_pipeline(pipeline)
+    assert wait_until(lambda: mock_llm_app_service.publish_queue.call_count == 3)
+    mock_consumer_service.commit_messages.assert_called_once_with([1, 2], asynchronous=True)
+
+    pipeline.stop()
+    thread.join(timeout=2)
+
+    # The remaining published batch is committed on stop
+    mock_consumer_service.commit_messages.assert_called_with([3], asynchronous=False)
+
+
+@pytest.mark.pipeline
+def test_pipeline_commit_every_commit_interval(mock_consumer_service, mock_llm_app_service, mock_producer_service):
+    pipeline = MQPipeline(
+        consumer_service=mock_consumer_service,
+        app_service=mock_llm_app_service,
+        producer_services=[mock_producer_service],
+        commit_interval=0.3,
+        stage_timeout=0.01,
+    )
+    mock_consumer_service.consume.side_effect = lambda: [mock_consumer_service.consume.call_count] if mock_consumer_service.consume.call_count <= 3 else []
+    mock_consumer_service.decode.return_value = ["payload"]
+    mock_llm_app_service.process_queue.return_value = ["mq_message"]
+
+    thread = run_pipeline(pipeline)
+    assert wait_until(lambda: mock_llm_app_service.publish_queue.call_count == 3)
+    # The producers are not flushed for each published batch
+    mock_producer_service.flush.assert_not_called()
+    # Once the interval has passed, the waiting batches are committed together without a new batch
+    assert wait_until(lambda: mock_consumer_service.commit_messages.called)
+    pipeline.stop()
+    thread.join(timeout=2)
+
+    mock_producer_service.flush.assert_called_once()
+    mock_consumer_service.commit_messages.assert_called_once_with([1, 2, 3], asynchronous=True)
+
+
+@pytest.mark.pipeline
+def test_pipeline_retry_failed_publish(pipeline, mock_consumer_service, mock_llm_app_service):
+    pipeline.publish_retry_delay = 0
+    mock_consumer_service.consume.side_effect = lambda: [mock_consumer_service.consume.call_count] if mock_consumer_service.consume.call_count <= 2 else []
+    mock_consumer_service.decode.return_value = ["payload"]
+    mock_llm_app_service.process_queue.return_value = ["mq_message"]
+    mock_llm_app_service.publish_queue.side_effect = [Exception("broker down"), None, None]
+
+    thread = run_pipeline(pipeline)
+    assert wait_until(lambda: mock_llm_app_service.publish_queue.call_count == 3)
+    pipeline.stop()
+    thread.join(timeout=2)
+
+    # The failed batch is published again before the next one
+    assert [message for call in mock_consumer_service.commit_messages.call_args_list for message in call.args[0]] == [1, 2]
+
+
+@pytest.mark.pipeline
+def test_pipeline_halt_without_commit_when_publish_failed(pipeline, mock_consumer_service, mock_llm_app_service):
+    pipeline.publish_retries = 1
+    pipeline.publish_retry_delay = 0
+    mock_consumer_service.consume.side_effect = lambda: [mock_consumer_service.consume.call_count] if mock_consumer_service.consume.call_count <= 2 else []
+    mock_consumer_service.decode.return_value = ["payload"]
+    mock_llm_app_service.process_queue.return_value = ["mq_message"]
+    mock_llm_app_service.publish_queue.side_effect = Exception("broker down")
+
+    thread = run_pipeline(pipeline)
+    thread.join(timeout=2)
+    assert not thread.is_alive()
+    pipeline.stop()
+
+    assert pipeline.halted
+    assert mock_llm_app_service.publish_queue.call_count == 2
+    mock_consumer_service.commit_messages.assert_not_called()
+
+
+@pytest.mark.pipeline
+def test_pipeline_halt_without_commit_when_delivery_failed(pipeline, mock_consumer_service, mock_llm_app_service, mock_producer_service):
+    mock_consumer_service.consume.side_effect = lambda: ["message"] if mock_consumer_service.consume.call_count == 1 else []
+    mock_consumer_service.decode.return_value = ["payload"]
+    mock_llm_app_service.process_queue.return_value = ["mq_message"]
+    mock_producer_service.flush.return_value = 1
+
+    thread = run_pipeline(pipeline)
+    thread.join(timeout=2)
+    assert not thread.is_alive()
+    pipeline.stop()
+
+    assert pipeline.halted
+    mock_producer_service.flush.assert_called_once()
+    mock_consumer_service.commit_messages.assert_not_called()
+
+
+@pytest.mark.pipeline
+def test_pipeline_stop_when_stage_failed(pipeline, mock_consumer_service):
+    mock_consumer_service.consume.side_effect = Exception("broker down")
+
+    thread = run_pipeline(pipeline)
+    thread.join(timeout=2)
+
+    assert not thread.is_alive()
+    assert pipeline.stop_event.is_set()
+
+
+@pytest.mark.pipeline
+def test_pipeline_publish_in_fetch_order_with_infer_workers(mock_consumer_service, mock_llm_app_service, mock_producer_service):
+    pipeline = MQPipeline(
+        consumer_service=mock_consumer_service,
+        app_service=mock_llm_app_service,
+        producer_services=[mock_producer_service],
+        commit_interval=0,
+        stage_timeout=0.01,
+        infer_workers=2,
+    )
+    mock_consumer_service.consume.side_effect = lambda: [mock_consumer_service.consume.call_count] if mock_consumer_service.consume.call_count <= 2 else []
+    mock_consumer_service.decode.side_effect = lambda messages: messages
+    second_done = threading.Event()
+
+    def process_queue(payloads):
+        # The first batch finishes after the second one
+        if payloads == [1]:
+            second_done.wait(timeout=2)
+        else:
+            second_done.set()
+        return [f"mq_message_{payloads[0]}"]
+
+    mock_llm_app_service.process_queue.side_effect = process_queue
+
+    thread = run_pipeline(pipeline)
+    assert wait_until(lambda: mock_llm_app_service.publish_queue.call_count == 2)
+    pipeline.stop()
+    thread.join(timeout=2)
+
+    assert [call.args for call in mock_llm_app_service.publish_queue.call_args_list] == [(["mq_message_1"],), (["mq_message_2"],)]
+    assert [message for call in mock_consumer_service.commit_messages.call_args_list for message in call.args[0]] == [1, 2]
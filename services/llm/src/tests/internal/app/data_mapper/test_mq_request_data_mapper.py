@@ -27,3 +27,13 @@ def test_datamapper_mapping_to_dal_entity():
 
     assert dto.id == id
     assert dto.message.text == prompt
+
+
+@pytest.mark.llm_request_datamapper
+def test_datamapper_mapping_stream_request():
+    mapper = MQRequestDataMapper()
+    dto = ConsumedMessageDTO(id="message-id", message={"text": "test", "stream": True})
+    entity = mapper.to_domain_entity(dto)
+
+    assert entity.stream is True
+    assert mapper.to_dal_entity(entity).message.stream is True
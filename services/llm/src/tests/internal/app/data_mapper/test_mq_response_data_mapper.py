@@ -27,3 +27,13 @@ def test_datamapper_mapping_to_dal_entity():
     assert dto.id == id
     assert dto.message.results == results
     assert dto.error is None
+
+
+@pytest.mark.llm_response_datamapper
+def test_datamapper_mapping_stream_chunk():
+    mapper = MQResponseDataMapper()
+    entity = LLMResponse(id="message-id", results="chunk", seq=3, done=False)
+    dto = mapper.to_dal_entity(entity)
+
+    assert dto.model_dump()["message"] == {"results": "chunk", "seq": 3, "done": False}
+    assert mapper.to_domain_entity(dto) == entity
@@ -1,3 +1,5 @@
+import threading
+
 import pytest
 
 from common.dto import ConsumedMessageDTO
@@ -77,3 +79,95 @@ def test_llm_application_service(
     error_response_dto.source = "test_service"
     assert mock_producer_service.publish_message.call_count == len(payloads)
     assert mock_error_producer_service.publish_message.call_count == 1
+
+
+@pytest.mark.llm_app_service
+def test_llm_application_service_stream_request(
+    mock_llm_service,
+    mock_producer_service,
+    mock_error_producer_service,
+):
+    app_service = LLMApplicationService(
+        llm_service=mock_llm_service,
+        producer_service=mock_producer_service,
+        error_producer_service=mock_error_producer_service,
+        mq_request_data_mapper=MQRequestDataMapper(),
+        mq_response_data_mapper=MQResponseDataMapper(),
+        service_name="test_service",
+    )
+    payloads = [
+        ConsumedMessageDTO(id="stream", message={"text": "hello", "stream": True}),
+        ConsumedMessageDTO(id="batch", message={"text": "hello"}),
+    ]
+    mock_llm_service.process_messages.return_value = [LLMResponse(id="batch", results="my name is google genai")]
+    mock_llm_service.stream_message.return_value = iter([
+        LLMResponse(id="stream", results="my name ", seq=0, done=False),
+        LLMResponse(id="stream", results="is google genai", seq=1, done=False),
+        LLMResponse(id="stream", results="", seq=2, done=True),
+    ])
+
+    mq_messages = app_service.process_queue(payloads)
+
+    # Chunks are published while generating, the final chunk goes through the publish stage with the batch
+    published = [call.kwargs["payload"] for call in mock_producer_service.publish_message.call_args_list]
+    assert [(message.id, message.message.seq, message.source) for message in published] == [
+        ("stream", 0, "test_service"),
+        ("stream", 1, "test_service"),
+    ]
+    assert [(message.id, message.message.done) for message in mq_messages] == [("batch", True), ("stream", True)]
+    assert mock_llm_service.process_messages.call_args.args[0][0].id == "batch"
+
+
+@pytest.fixture
+def stream_app_service(mock_llm_service, mock_producer_service, mock_error_producer_service):
+    return LLMApplicationService(
+        llm_service=mock_llm_service,
+        producer_service=mock_producer_service,
+        error_producer_service=mock_error_producer_service,
+        mq_request_data_mapper=MQRequestDataMapper(),
+        mq_response_data_mapper=MQResponseDataMapper(),
+        service_name="test_service",
+    )
+
+
+@pytest.mark.llm_app_service
+def test_llm_application_service_stream_next_to_batch(stream_app_service, mock_llm_service):
+    payloads = [
+        ConsumedMessageDTO(id="batch", message={"text": "hello"}),
+        ConsumedMessageDTO(id="stream", message={"text": "hello", "stream": True}),
+    ]
+    first_chunk = threading.Event()
+
+    def stream_message(request):
+        yield LLMResponse(id="stream", results="my name", seq=0, done=False)
+        first_chunk.set()
+        yield LLMResponse(id="stream", results="", seq=1, done=True)
+
+    def process_messages(requests):
+        # The stream generates while the batch is still running
+        assert first_chunk.wait(timeout=2)
+        return [LLMResponse(id="batch", results="my name is google genai")]
+
+    mock_llm_service.stream_message.side_effect = stream_message
+    mock_llm_service.process_messages.side_effect = process_messages
+
+    mq_messages = stream_app_service.process_queue(payloads)
+
+    assert [(message.id, message.message.done) for message in mq_messages] == [("batch", True), ("stream", True)]
+
+
+@pytest.mark.llm_app_service
+def test_llm_application_service_stream_without_done(stream_app_service, mock_llm_service, mock_error_producer_service):
+    payloads = [ConsumedMessageDTO(id="stream", message={"text": "hello", "stream": True})]
+    mock_llm_service.stream_message.return_value = iter([
+        LLMResponse(id="stream", results="my name ", seq=0, done=False),
+    ])
+
+    mq_messages = stream_app_service.process_queue(payloads)
+
+    # The stream still ends with a final chunk, carrying the error
+    assert len(mq_messages) == 1
+    assert mq_messages[0].message.done and mq_messages[0].message.seq == 1
+    assert mq_messages[0].error.code == ErrorCode.STREAM_INTERRUPTED
+    stream_app_service.publish_queue(mq_messages)
+    mock_error_producer_service.publish_message.assert_called_once()
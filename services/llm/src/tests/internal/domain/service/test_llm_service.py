@@ -1,5 +1,6 @@
 import pytest
 
+from common.exception import Error, ErrorCode
 from internal.domain.entity import LLMRequest, LLMResponse
 from internal.domain.service import LLMService
 
@@ -42,3 +43,38 @@ def test_llm_service_batch_process(mock_genai_model_inference):
     assert responses[0].id == "test"
     assert responses[0].results == "my name is google genai"
     assert responses[0].error is None
+
+
+@pytest.mark.llm_service
+def test_llm_service_stream_message(mock_genai_model_inference):
+    llm_service = LLMService(llm_model=mock_genai_model_inference)
+    request = LLMRequest(id="test", prompt="test", destination="llm-response", stream=True)
+    mock_genai_model_inference.generate_stream.return_value = iter(["my name ", "is google genai"])
+
+    responses = list(llm_service.stream_message(request))
+
+    assert [(response.seq, response.results, response.done) for response in responses] == [
+        (0, "my name ", False),
+        (1, "is google genai", False),
+        (2, "", True),
+    ]
+    assert all(response.id == "test" and response.destination == "llm-response" for response in responses)
+    assert responses[-1].error is None
+
+
+@pytest.mark.llm_service
+def test_llm_service_stream_message_with_error(mock_genai_model_inference):
+    llm_service = LLMService(llm_model=mock_genai_model_inference)
+    request = LLMRequest(id="test", prompt="test", stream=True)
+
+    def generate_stream(_):
+        yield "my name "
+        raise Exception("connection reset")
+
+    mock_genai_model_inference.generate_stream.side_effect = generate_stream
+
+    responses = list(llm_service.stream_message(request))
+
+    assert [response.seq for response in responses] == [0, 1]
+    assert responses[-1].done
+    assert responses[-1].error == Error(code=ErrorCode.STREAM_INTERRUPTED, detail="connection reset")
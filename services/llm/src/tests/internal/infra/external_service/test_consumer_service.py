@@ -145,3 +145,35 @@ def test_consumer_service_commit_to_be_called(consumer_service, mock_consumer):
     for asynchronous in [True, False]:
         consumer_service.commit(asynchronous=asynchronous)
         mock_consumer.commit.assert_called_with(asynchronous=asynchronous)
+
+
+@pytest.mark.consumer_service
+def test_consumer_service_commit_messages(consumer_service, mock_consumer, mocker):
+    messages = []
+    for partition, offset in [(0, 5), (0, 7), (1, 3)]:
+        message = mocker.Mock()
+        message.error.return_value = None
+        message.topic.return_value = "llm-request"
+        message.partition.return_value = partition
+        message.offset.return_value = offset
+        messages.append(message)
+
+    consumer_service.commit_messages(messages, asynchronous=False)
+
+    offsets = mock_consumer.commit.call_args.kwargs["offsets"]
+    assert {(o.topic, o.partition, o.offset) for o in offsets} == {("llm-request", 0, 8), ("llm-request", 1, 4)}
+    assert mock_consumer.commit.call_args.kwargs["asynchronous"] is False
+
+
+@pytest.mark.consumer_service
+def test_consumer_service_commit_messages_empty(consumer_service, mock_consumer):
+    consumer_service.commit_messages([])
+    mock_consumer.commit.assert_not_called()
+
+
+@pytest.mark.consumer_service
+def test_consumer_service_decode_invalid_payload(consumer_service, mock_kafka_message):
+    mock_kafka_message.error.return_value = None
+    mock_kafka_message.value.return_value = json.dumps("Invalid Payload").encode('utf-8')
+
+    assert consumer_service.decode([mock_kafka_message]) is None
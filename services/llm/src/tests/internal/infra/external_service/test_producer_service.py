@@ -1,6 +1,8 @@
 import pytest
 import unittest
 
+from confluent_kafka import KafkaError
+
 from common.dto import PublishedMessageDTO
 from internal.infra.external_service import ProducerService
 
@@ -31,15 +33,146 @@ def test_producer_service(mock_producer, mock_kafka_message):
 
     producer.publish_message(message_dto)
 
-    mock_producer.poll.assert_called_once()
+    mock_producer.poll.assert_called_once_with(0)
     mock_producer.produce.assert_called_once()
-    mock_producer.flush.assert_called_once()
+    mock_producer.flush.assert_not_called()
+    assert producer.in_flight_count == 1
 
     mock_kafka_message.topic.return_value = "test-topic"
     mock_kafka_message.partition.return_value = 0
     producer._ProducerService__delivery_report(None, mock_kafka_message)
     producer._ProducerService__delivery_report(
         Exception('test call delivery report'), mock_kafka_message)
+    assert producer.in_flight_count == 0
+
+
+@pytest.mark.producer_service
+def test_producer_service_compact_payload(mock_producer):
+    producer = ProducerService(
+        mq_topic=mq_topic,
+        mq_bootstrap_server=mq_bootstrap_server,
+        mq_log_level=mq_log_level,
+        mq_system_consumed_topic=mq_system_consumed_topic,
+    )
+    producer.producer = mock_producer
+
+    message_dto = PublishedMessageDTO(
+        id="message-id",
+        message={"texts": ["สวัสดี"]},
+        destination="destination-test",
+    )
+
+    producer.publish_message(message_dto)
+
+    send_data = mock_producer.produce.call_args.args[1]
+    assert send_data == '{"id":"message-id","source":"","message":{"texts":["สวัสดี"]},"destination":"destination-test","error":null}'.encode('utf-8')
+
+
+@pytest.mark.producer_service
+def test_producer_service_route_reply_to_partition(mock_producer):
+    producer = ProducerService(
+        mq_topic=mq_topic,
+        mq_bootstrap_server=mq_bootstrap_server,
+        mq_log_level=mq_log_level,
+        mq_system_consumed_topic=mq_system_consumed_topic,
+    )
+    producer.producer = mock_producer
+
+    producer.publish_message(PublishedMessageDTO(id="message-id", message={}, destination="destination-test:3"))
+    assert mock_producer.produce.call_args.args[0] == "destination-test"
+    assert mock_producer.produce.call_args.kwargs["partition"] == 3
+
+    # The system-consumed topic is rejected whatever the partition
+    producer.publish_message(PublishedMessageDTO(id="message-id", message={}, destination=f"{mq_system_consumed_topic}:1"))
+    assert mock_producer.produce.call_args.args[0] == mq_topic
+    assert "partition" not in mock_producer.produce.call_args.kwargs
+
+
+@pytest.mark.producer_service
+def test_producer_service_flush_when_in_flight_exceed(mock_producer):
+    producer = ProducerService(
+        mq_topic=mq_topic,
+        mq_bootstrap_server=mq_bootstrap_server,
+        mq_log_level=mq_log_level,
+        mq_system_consumed_topic=mq_system_consumed_topic,
+        mq_max_in_flight=2,
+    )
+    producer.producer = mock_producer
+
+    message_dto = PublishedMessageDTO(
+        id="message-id",
+        message={"texts": ["message"]},
+        destination="destination-test",
+    )
+
+    producer.publish_message(message_dto)
+    producer.publish_message(message_dto)
+    mock_producer.flush.assert_not_called()
+
+    producer.publish_message(message_dto)
+    mock_producer.flush.assert_called_once()
+    assert mock_producer.produce.call_count == 3
+
+
+@pytest.mark.producer_service
+def test_producer_service_flush_when_queue_full(mock_producer):
+    producer = ProducerService(
+        mq_topic=mq_topic,
+        mq_bootstrap_server=mq_bootstrap_server,
+        mq_log_level=mq_log_level,
+        mq_system_consumed_topic=mq_system_consumed_topic,
+    )
+    producer.producer = mock_producer
+    mock_producer.produce.side_effect = [BufferError("Local: Queue full"), None]
+
+    message_dto = PublishedMessageDTO(
+        id="message-id",
+        message={"texts": ["message"]},
+        destination="destination-test",
+    )
+
+    producer.publish_message(message_dto)
+
+    mock_producer.flush.assert_called_once()
+    assert mock_producer.produce.call_count == 2
+    assert producer.in_flight_count == 1
+
+
+@pytest.mark.producer_service
+def test_producer_service_flush(mock_producer):
+    producer = ProducerService(
+        mq_topic=mq_topic,
+        mq_bootstrap_server=mq_bootstrap_server,
+        mq_log_level=mq_log_level,
+        mq_system_consumed_topic=mq_system_consumed_topic,
+    )
+    producer.producer = mock_producer
+
+    mock_producer.flush.return_value = 0
+    assert producer.flush(timeout=5) == 0
+    mock_producer.flush.assert_called_once_with(5)
+
+    mock_producer.flush.return_value = 3
+    assert producer.flush() == 3
+
+
+@pytest.mark.producer_service
+def test_producer_service_flush_count_failed_delivery(mock_producer, mock_kafka_message):
+    producer = ProducerService(
+        mq_topic=mq_topic,
+        mq_bootstrap_server=mq_bootstrap_server,
+        mq_log_level=mq_log_level,
+        mq_system_consumed_topic=mq_system_consumed_topic,
+    )
+    producer.producer = mock_producer
+    mock_producer.flush.return_value = 0
+
+    producer._ProducerService__delivery_report(KafkaError(KafkaError._MSG_TIMED_OUT), mock_kafka_message)
+    producer._ProducerService__delivery_report(None, mock_kafka_message)
+
+    assert producer.flush() == 1
+    # Counted once, until the next failure
+    assert producer.flush() == 0
 
 
 @pytest.mark.producer_service
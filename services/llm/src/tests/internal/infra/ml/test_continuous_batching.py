@@ -0,0 +1,167 @@
+import pytest
+import torch
+from transformers import LlamaConfig, LlamaForCausalLM
+
+from internal.infra.ml import ContinuousBatchingEngine
+
+PROMPTS = [[1, 2, 3], [4, 5, 6, 7, 8, 9, 10], [11], [12, 13, 14, 15]]
+
+
+@pytest.fixture(scope="module")
+def tiny_model():
+    torch.manual_seed(0)
+    config = LlamaConfig(
+        vocab_size=64,
+        hidden_size=32,
+        intermediate_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        max_position_embeddings=128,
+    )
+    return LlamaForCausalLM(config).eval()
+
+
+def greedy_generate(model, prompt_ids, max_new_tokens, eos_token_id=0):
+    output = model.generate(
+        torch.tensor([prompt_ids]),
+        max_new_tokens=max_new_tokens,
+        do_sample=False,
+        eos_token_id=eos_token_id,
+        pad_token_id=eos_token_id,
+    )
+    return output[0, len(prompt_ids):].tolist()
+
+
+def run_until_done(engine, futures, max_steps=100):
+    for _ in range(max_steps):
+        if all(future.done() for future in futures):
+            return
+        engine.step()
+
+
+@pytest.mark.continuous_batching
+def test_continuous_batching_matches_sequential_generate(tiny_model):
+    engine = ContinuousBatchingEngine(model=tiny_model, eos_token_ids=[0], max_batch_size=2, max_new_tokens=8)
+
+    futures = [engine.submit(prompt) for prompt in PROMPTS]
+    run_until_done(engine, futures)
+
+    for prompt, future in zip(PROMPTS, futures):
+        assert future.result() == greedy_generate(tiny_model, prompt, max_new_tokens=8)
+    assert engine.stats()["completed"] == len(PROMPTS)
+    assert engine.stats()["generated_tokens"] == 8 * len(PROMPTS)
+
+
+@pytest.mark.continuous_batching
+def test_continuous_batching_admit_between_decode_steps(tiny_model):
+    engine = ContinuousBatchingEngine(model=tiny_model, eos_token_ids=[0], max_batch_size=4, max_new_tokens=6)
+
+    first = engine.submit(PROMPTS[0])
+    engine.step()
+    engine.step()
+    second = engine.submit(PROMPTS[1])
+    engine.step()
+
+    # The late request joins the running batch instead of waiting for the first to finish
+    assert len(engine.active) == 2
+    assert not first.done()
+
+    run_until_done(engine, [first, second])
+    assert first.result() == greedy_generate(tiny_model, PROMPTS[0], max_new_tokens=6)
+    assert second.result() == greedy_generate(tiny_model, PROMPTS[1], max_new_tokens=6)
+
+
+@pytest.mark.continuous_batching
+def test_continuous_batching_retire_finished_sequences(tiny_model):
+    engine = ContinuousBatchingEngine(model=tiny_model, eos_token_ids=[0], max_batch_size=1, max_new_tokens=3)
+
+    first, second = engine.submit(PROMPTS[0]), engine.submit(PROMPTS[2])
+    engine.step()
+    assert len(engine.active) == 1 and engine.waiting.qsize() == 1
+
+    # Prefill and the first decode step produced two tokens, the next step reaches max_new_tokens
+    engine.step()
+    # The first sequence frees its slot right away, the waiting one is admitted on the next step
+    assert first.done() and len(first.result()) == 3
+    assert engine.active == []
+
+    engine.step()
+    assert engine.active[0].future is second
+
+
+@pytest.mark.continuous_batching
+def test_continuous_batching_max_new_tokens_per_request(tiny_model):
+    engine = ContinuousBatchingEngine(model=tiny_model, eos_token_ids=[0], max_batch_size=2, max_new_tokens=6)
+
+    short, long, capped = engine.submit(PROMPTS[0], max_new_tokens=2), engine.submit(PROMPTS[1]), engine.submit(PROMPTS[2], max_new_tokens=10)
+    run_until_done(engine, [short, long, capped])
+
+    assert [len(future.result()) for future in (short, long, capped)] == [2, 6, 6]
+
+
+@pytest.mark.continuous_batching
+def test_continuous_batching_stop_on_eos(tiny_model):
+    expected = greedy_generate(tiny_model, PROMPTS[1], max_new_tokens=6)
+    engine = ContinuousBatchingEngine(model=tiny_model, eos_token_ids=[expected[1]], max_batch_size=2, max_new_tokens=6)
+
+    future = engine.submit(PROMPTS[1])
+    run_until_done(engine, [future])
+
+    assert future.result() == expected[:expected.index(expected[1]) + 1]
+
+
+@pytest.mark.continuous_batching
+def test_continuous_batching_fail_sequence_on_prefill_error(mocker):
+    model = mocker.Mock(device=torch.device("cpu"))
+    model.side_effect = Exception("Out Of Memory")
+    engine = ContinuousBatchingEngine(model=model, eos_token_ids=[0])
+
+    future = engine.submit([1, 2, 3])
+    engine.step()
+
+    with pytest.raises(Exception, match="Out Of Memory"):
+        future.result(timeout=1)
+    assert engine.active == []
+
+
+@pytest.mark.continuous_batching
+def test_continuous_batching_fail_active_sequences_on_decode_error(tiny_model, mocker):
+    engine = ContinuousBatchingEngine(model=tiny_model, eos_token_ids=[0], max_batch_size=2, max_new_tokens=8)
+    futures = [engine.submit(prompt) for prompt in PROMPTS[:2]]
+    engine.step()
+
+    mocker.patch.object(engine, "_pad_caches", side_effect=Exception("Out Of Memory"))
+    engine.step()
+
+    for future in futures:
+        with pytest.raises(Exception, match="Out Of Memory"):
+            future.result(timeout=1)
+    assert engine.active == []
+
+
+@pytest.mark.continuous_batching
+def test_continuous_batching_background_thread(tiny_model):
+    engine = ContinuousBatchingEngine(model=tiny_model, eos_token_ids=[0], max_batch_size=2, max_new_tokens=4)
+    engine.start()
+    try:
+        futures = [engine.submit(prompt) for prompt in PROMPTS]
+        results = [future.result(timeout=10) for future in futures]
+    finally:
+        engine.stop()
+
+    assert results == [greedy_generate(tiny_model, prompt, max_new_tokens=4) for prompt in PROMPTS]
+    assert engine.stats()["ttft_mean"] > 0
+
+
+@pytest.mark.continuous_batching
+def test_continuous_batching_on_token_callback(tiny_model):
+    engine = ContinuousBatchingEngine(model=tiny_model, eos_token_ids=[0], max_batch_size=2, max_new_tokens=5)
+    tokens = []
+
+    future = engine.submit(PROMPTS[0], on_token=tokens.append)
+    engine.step()
+    # Prefill and the first decode step each deliver a token before the request completes
+    assert len(tokens) == 2
+
+    run_until_done(engine, [future])
+    assert tokens == future.result()
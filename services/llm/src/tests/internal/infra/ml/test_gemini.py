@@ -73,6 +73,21 @@ def test_gemini_gen_ai_with_stream(mock_genai_model):
     assert response.error == None
 
 
+@pytest.mark.gemini
+def test_gemini_generate_stream(mock_genai_model):
+    model = create_gemini_module(model_stream_required=False)
+    model.model = mock_genai_model
+    message = LLMRequest(id="1", prompt="Hello, what is your name?")
+
+    mock_genai_model.generate_content.return_value = iter([
+        MockGeminiResponse(text="good morning sir, "),
+        MockGeminiResponse(text="my name is google genai"),
+    ])
+
+    assert list(model.generate_stream(message)) == ["good morning sir, ", "my name is google genai"]
+    mock_genai_model.generate_content.assert_called_once_with(contents=message.prompt, stream=True)
+
+
 @patch('nest_asyncio.apply')
 @pytest.mark.gemini
 def test_gemini_gen_ai_batch_required(mock_apply, mock_genai_model):
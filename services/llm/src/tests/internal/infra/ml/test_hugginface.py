@@ -1,4 +1,6 @@
 import pytest
+import torch
+from concurrent.futures import Future
 
 from common.exception import Error, ErrorCode
 from unittest.mock import patch
@@ -15,6 +17,9 @@ def create_huggingface_module(
         model_batch_required=False,
         model_torch_device=0,
         huggingface_api_key=None,
+        model_continuous_batching=False,
+        model_max_batch_size=8,
+        model_token_budget=16384,
 ) -> HuggingFace:
     return HuggingFace(
         model_path=model_path,
@@ -24,6 +29,9 @@ def create_huggingface_module(
         model_batch_required=model_batch_required,
         model_torch_device=model_torch_device,
         huggingface_api_key=huggingface_api_key,
+        model_continuous_batching=model_continuous_batching,
+        model_max_batch_size=model_max_batch_size,
+        model_token_budget=model_token_budget,
     )
 
 
@@ -148,3 +156,156 @@ def test_huggingface_init_exception(mock_huggingface_model, mock_tokenizer):
         create_huggingface_module(model_path=None)
 
     assert str(excinfo.value) == "HUGGINGFACE_MODEL_PATH must be defined"
+
+
+@patch('transformers.AutoModelForCausalLM.from_pretrained')
+@patch('transformers.AutoTokenizer.from_pretrained')
+@patch('internal.infra.ml.huggingface.ContinuousBatchingEngine')
+@pytest.mark.huggingface
+def test_huggingface_continuous_batching_generate_batch_responses(mock_engine_class, mock_tokenizer, mock_huggingface_model):
+    model = create_huggingface_module(model_continuous_batching=True, model_max_batch_size=4)
+    mock_engine = mock_engine_class.return_value
+    messages = [LLMRequest(id="test-1", prompt="prompt-1"), LLMRequest(id="test-2", prompt="prompt-2")]
+
+    futures = [Future(), Future()]
+    futures[0].set_result([1, 2])
+    futures[1].set_result([3])
+    mock_engine.submit.side_effect = futures
+    model.tokenizer.encode.side_effect = lambda prompt: [len(prompt)]
+    model.tokenizer.decode.side_effect = lambda token_ids, skip_special_tokens: f"answer {token_ids}"
+
+    response = model.generate_batch_responses(messages)
+
+    assert response == [
+        LLMResponse(id="test-1", results="answer [1, 2]", destination=messages[0].destination),
+        LLMResponse(id="test-2", results="answer [3]", destination=messages[1].destination),
+    ]
+    assert mock_engine_class.call_args.kwargs["max_batch_size"] == 4
+    mock_engine.start.assert_called_once()
+    model.model.generate.assert_not_called()
+
+    model.close()
+    mock_engine.stop.assert_called_once()
+
+
+@patch('transformers.AutoModelForCausalLM.from_pretrained')
+@patch('transformers.AutoTokenizer.from_pretrained')
+@patch('internal.infra.ml.huggingface.ContinuousBatchingEngine')
+@pytest.mark.huggingface
+def test_huggingface_continuous_batching_generate_response_with_error(mock_engine_class, mock_tokenizer, mock_huggingface_model):
+    model = create_huggingface_module(model_continuous_batching=True)
+    message = LLMRequest(id="test", prompt="prompt-test")
+
+    future = Future()
+    future.set_exception(Exception("Test Exception"))
+    mock_engine_class.return_value.submit.return_value = future
+
+    response = model.generate_response(message)
+
+    assert response == LLMResponse(
+        id=message.id,
+        error=Error(code=ErrorCode.MAXIMUM_RETRIES_REACH, detail="Test Exception"),
+        destination=message.destination,
+    )
+
+
+@patch('transformers.AutoModelForCausalLM.from_pretrained')
+@patch('transformers.AutoTokenizer.from_pretrained')
+@pytest.mark.huggingface
+def test_huggingface_pad_batch_inputs_left_padding(mock_tokenizer, mock_huggingface_model):
+    model = create_huggingface_module(model_torch_device=-1)
+    model.pad_token_id = 0
+
+    model_input, attention_mask = model._HuggingFace__pad_batch_inputs(
+        batch_inputs=[torch.tensor([[5, 6, 7]]), torch.tensor([[8]])])
+
+    assert model_input.tolist() == [[5, 6, 7], [0, 0, 8]]
+    assert attention_mask.tolist() == [[1, 1, 1], [0, 0, 1]]
+
+
+def mock_word_tokenizer(model: HuggingFace):
+    # One token per word, generate echoes the input and the answer is the number of prompt tokens
+    model.pad_token_id = 0
+    model.tokenizer.encode.side_effect = \
+        lambda prompt, return_tensors: torch.ones((1, len(prompt.split())), dtype=torch.long)
+    model.model.generate.side_effect = lambda model_input, **kwargs: model_input
+    model.tokenizer.batch_decode.side_effect = lambda generated_ids, skip_special_tokens: \
+        [f"[/INST] {int(row.count_nonzero())}" for row in generated_ids]
+
+
+@patch('transformers.AutoModelForCausalLM.from_pretrained')
+@patch('transformers.AutoTokenizer.from_pretrained')
+@pytest.mark.huggingface
+def test_huggingface_generate_batch_responses_within_token_budget(mock_tokenizer, mock_huggingface_model):
+    model = create_huggingface_module(model_torch_device=-1, model_token_budget=12)
+    mock_word_tokenizer(model)
+    # Prompt lengths include the two instruction tags: 3, 8, 4, 5, 3
+    messages = [LLMRequest(id=str(idx), prompt=" ".join(["word"] * words)) for idx, words in enumerate([1, 6, 2, 3, 1])]
+
+    responses = model.generate_batch_responses(messages)
+
+    assert [response.id for response in responses] == ["0", "1", "2", "3", "4"]
+    assert [response.results for response in responses] == ["3", "8", "4", "5", "3"]
+    padded_shapes = [tuple(call.args[0].shape) for call in model.model.generate.call_args_list]
+    assert padded_shapes == [(1, 8), (2, 5), (2, 3)]
+    assert all(rows * length <= 12 for rows, length in padded_shapes)
+
+
+@patch('transformers.AutoModelForCausalLM.from_pretrained')
+@patch('transformers.AutoTokenizer.from_pretrained')
+@pytest.mark.huggingface
+def test_huggingface_generate_batch_responses_with_sub_batch_error(mock_tokenizer, mock_huggingface_model):
+    model = create_huggingface_module(model_torch_device=-1, model_token_budget=8)
+    mock_word_tokenizer(model)
+    messages = [LLMRequest(id="short", prompt="word"), LLMRequest(id="long", prompt="word " * 6)]
+
+    def generate(model_input, **kwargs):
+        if model_input.size(1) > 4:
+            raise Exception("Out Of Memory")
+        return model_input
+
+    model.model.generate.side_effect = generate
+    responses = model.generate_batch_responses(messages)
+
+    assert responses[0] == LLMResponse(id="short", results="3", destination=messages[0].destination)
+    assert responses[1].id == "long"
+    assert responses[1].error == Error(code=ErrorCode.MAXIMUM_RETRIES_REACH, detail="Out Of Memory")
+
+
+@patch('transformers.AutoModelForCausalLM.from_pretrained')
+@patch('transformers.AutoTokenizer.from_pretrained')
+@patch('internal.infra.ml.huggingface.ContinuousBatchingEngine')
+@pytest.mark.huggingface
+def test_huggingface_continuous_batching_generate_stream(mock_engine_class, mock_tokenizer, mock_huggingface_model):
+    model = create_huggingface_module(model_continuous_batching=True)
+
+    def submit(prompt_ids, on_token):
+        for token_id in [1, 2, 3]:
+            on_token(token_id)
+        future = Future()
+        future.set_result([1, 2, 3])
+        return future
+
+    mock_engine_class.return_value.submit.side_effect = submit
+    # Token 2 alone decodes to a partial character, it is only emitted together with token 3
+    model.tokenizer.decode.side_effect = \
+        lambda token_ids, skip_special_tokens: {1: "Hi", 2: "Hi �", 3: "Hi 👋"}[token_ids[-1]]
+
+    chunks = list(model.generate_stream(LLMRequest(id="test", prompt="prompt-test")))
+
+    assert chunks == ["Hi", " 👋"]
+
+
+@patch('transformers.AutoModelForCausalLM.from_pretrained')
+@patch('transformers.AutoTokenizer.from_pretrained')
+@patch('internal.infra.ml.huggingface.TextIteratorStreamer')
+@pytest.mark.huggingface
+def test_huggingface_generate_stream(mock_streamer_class, mock_tokenizer, mock_huggingface_model):
+    model = create_huggingface_module(model_torch_device=-1)
+    model.tokenizer.encode.return_value = torch.tensor([[1, 2, 3]])
+    mock_streamer_class.return_value.__iter__ = lambda _: iter(["Hello", "", ", I don't have name."])
+
+    chunks = list(model.generate_stream(LLMRequest(id="test", prompt="prompt-test")))
+
+    assert chunks == ["Hello", ", I don't have name."]
+    assert model.model.generate.call_args.kwargs["streamer"] is mock_streamer_class.return_value
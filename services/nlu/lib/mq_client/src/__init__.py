@@ -1,3 +1,4 @@
 from .mq_client import MQClient
-from .mq.common import MQConfig, MQProvider
+from .mq.common import MQConfig, MQProvider, DispatchMode, OverloadPolicy, ReplyRouting
+from .mq.common.exception import OverloadError, StreamInterruptedError
 from .db.common import DBConfig, DBProvider
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Callable, List
 
 
 class IDB(ABC):
@@ -14,3 +14,13 @@ class IDB(ABC):
     @abstractmethod
     def delete(key: str):
         raise NotImplementedError
+
+    def mget(self, keys: List[str]) -> List[Any]:
+        return [self.get(key) for key in keys]
+
+    def subscribe(self, callback: Callable[[str], None]) -> bool:
+        """Call callback with the key of every item set by any instance, False when the store can't notify."""
+        return False
+
+    def close(self):
+        pass
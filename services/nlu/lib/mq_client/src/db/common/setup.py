@@ -5,6 +5,8 @@ from pydantic import BaseModel
 
 class DBConfig(BaseModel):
     host: Optional[str] = ""
+    # Seconds a stored response is kept when no request collects it
+    ttl: Optional[float] = 60.0
 
 
 class DBProvider(Enum):
@@ -1,18 +1,36 @@
+import threading
+import time
 from typing import Dict, Any
 
 from db.common import IDB
+from util.expiry import ExpiryHeap
 
 
 class LocalDB(IDB):
-    def __init__(self):
+    def __init__(self, ttl: float = 60.0):
         self.repo: Dict[str, Any] = {}
+        # Responses nobody collects (the request already timed out) are dropped after ttl seconds
+        self.ttl = ttl
+        self.expiry = ExpiryHeap()
+        # Set from the consumer thread, get and delete from the event loop
+        self.lock = threading.Lock()
+
+    def __expire(self):
+        for key in self.expiry.pop_expired(time.monotonic()):
+            self.repo.pop(key, None)
 
     def get(self, key: str) -> Any:
-        return self.repo.get(key)
+        with self.lock:
+            self.__expire()
+            return self.repo.get(key)
 
     def set(self, key: str, item: Any):
-        self.repo[key] = item
+        with self.lock:
+            self.__expire()
+            self.repo[key] = item
+            self.expiry.add(key, time.monotonic() + self.ttl)
 
     def delete(self, key: str):
-        if key in self.repo:
-            del self.repo[key]
+        with self.lock:
+            self.repo.pop(key, None)
+            self.expiry.discard(key)
@@ -5,6 +5,7 @@ from pydantic import BaseModel, model_serializer
 class ErrorCode(str, Enum):
     MAXIMUM_RETRIES_REACH = 'MAXIMUM_RETRIES_REACH'
     REQUEST_SIZE_EXCEED = 'REQUEST_SIZE_EXCEED'
+    STREAM_INTERRUPTED = 'STREAM_INTERRUPTED'
 
 
 class Error(BaseModel):
@@ -17,3 +18,14 @@ class Error(BaseModel):
             "code": str(self.code.value),
             "detail": self.detail,
         }
+
+
+class OverloadError(Exception):
+    """Raised by MQClient when a request is rejected instead of being published to an overloaded topic."""
+
+
+class StreamInterruptedError(Exception):
+    """Raised by MQClient.stream_request when the stream ends with an error instead of a complete response."""
+    def __init__(self, error: Error):
+        super().__init__(f"{error.code.value}: {error.detail}")
+        self.error = error
@@ -9,6 +9,10 @@ class IMQConsumer(ABC):
     def subscribe(self, topics: List[str]):
         raise NotImplementedError
 
+    @abstractmethod
+    def assign(self, topics: List[str], partition: int):
+        raise NotImplementedError
+
     @abstractmethod
     def commit(self, asynchronous=True):
         raise NotImplementedError
@@ -30,3 +34,7 @@ class IMQProducer(ABC):
     @abstractmethod
     def publish_message(self, topic: str, payload: QueueDTO):
         raise NotImplementedError
+
+    @abstractmethod
+    def flush(self, timeout: float = -1) -> int:
+        raise NotImplementedError
@@ -7,7 +7,25 @@ class MQConfig(BaseModel):
     host: str
     consume_topics: List[str]
     consume_timeout: float
+    producer_linger_ms: float = 1
+    producer_max_in_flight: int = 1000
 
 
 class MQProvider(Enum):
     KAFKA = "kafka"
+
+
+class DispatchMode(Enum):
+    POLL = "poll"
+    EVENT = "event"
+
+
+class OverloadPolicy(Enum):
+    QUEUE = "queue"
+    REJECT = "reject"
+
+
+class ReplyRouting(Enum):
+    GROUP = "group"
+    TOPIC = "topic"
+    PARTITION = "partition"
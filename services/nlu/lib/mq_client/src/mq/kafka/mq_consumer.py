@@ -3,12 +3,12 @@ import logging
 import traceback
 
 from typing import Callable, List
-from confluent_kafka import Consumer, KafkaError
+from confluent_kafka import OFFSET_END, Consumer, KafkaError, TopicPartition
 
 from mq.common import IMQConsumer, QueueDTO
 
 class KafkaConsumer(IMQConsumer):
-    def __init__(self, group_id: str, bootstrap_server: str, max_batch_size=10, consume_timeout=1, logger=logging.Logger):
+    def __init__(self, group_id: str, bootstrap_server: str, max_batch_size=10, consume_timeout=1, auto_create_topics=False, logger=logging.Logger):
         self.callback: Callable[[QueueDTO], bool] = None
         self.max_batch_size = max_batch_size
         self.consume_timeout = consume_timeout
@@ -17,6 +17,8 @@ class KafkaConsumer(IMQConsumer):
                 "group.id": group_id,
                 "bootstrap.servers": bootstrap_server,
                 "auto.offset.reset": "earliest",
+                # Per-instance reply topics don't exist until the instance subscribes
+                "allow.auto.create.topics": auto_create_topics,
             },
             logger=logger,
         )
@@ -24,6 +26,10 @@ class KafkaConsumer(IMQConsumer):
     def subscribe(self, topics: List[str]):
         self.consumer.subscribe(topics)
 
+    def assign(self, topics: List[str], partition: int):
+        # Read one partition without joining a group rebalance, replies sent before this instance started aren't ours
+        self.consumer.assign([TopicPartition(topic, partition, OFFSET_END) for topic in topics])
+
     def commit(self, asynchronous=True):
         self.consumer.commit(asynchronous=asynchronous)
 
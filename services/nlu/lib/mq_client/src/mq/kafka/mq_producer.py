@@ -6,15 +6,45 @@ from mq.common import IMQProducer, QueueDTO
 
 
 class KafkaProducer(IMQProducer):
-    def __init__(self, bootstrap_server: str, logger=logging.Logger):
+    def __init__(self, bootstrap_server: str, linger_ms=1, max_in_flight=1000, logger=logging.Logger):
+        self.logger = logger
+        self.max_in_flight = max_in_flight
+        self.in_flight_count = 0
         self.producer = Producer(
-            {'bootstrap.servers': bootstrap_server},
+            {
+                'bootstrap.servers': bootstrap_server,
+                'linger.ms': linger_ms,
+            },
             logger=logger,
         )
 
+    def __delivery_report(self, err, msg):
+        self.in_flight_count = max(self.in_flight_count - 1, 0)
+        if err is not None:
+            self.logger.error({
+                "message": "Message delivery failed",
+                "error": str(err),
+            })
+
+    def __produce(self, topic: str, data: bytes):
+        self.producer.produce(topic, data, callback=self.__delivery_report)
+        self.in_flight_count += 1
+
     def publish_message(self, topic: str, payload: QueueDTO):
+        send_data = json.dumps(payload.to_dict(), ensure_ascii=False, separators=(',', ':'))
+
+        # Only wait for the broker when too many messages are still unacknowledged
+        if self.in_flight_count >= self.max_in_flight:
+            self.producer.flush()
+
+        try:
+            self.__produce(topic, send_data.encode('utf-8'))
+        except BufferError:
+            self.producer.flush()
+            self.__produce(topic, send_data.encode('utf-8'))
+
+        # Serve delivery reports of the previous messages without waiting
         self.producer.poll(0)
-        send_data = json.dumps(payload.to_dict(), ensure_ascii=True, indent=4)
 
-        self.producer.produce(topic, send_data.encode('utf-8'))
-        self.producer.flush()
+    def flush(self, timeout: float = -1) -> int:
+        return self.producer.flush(timeout)
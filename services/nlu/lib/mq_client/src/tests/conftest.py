@@ -0,0 +1,50 @@
+from typing import Any, Callable, List, NamedTuple, Optional
+
+import pytest
+
+import mq_client as mq_client_module
+from mq_client import DBProvider, DispatchMode, MQClient, MQConfig
+
+
+class MockedMQClient(NamedTuple):
+    client: MQClient
+    consumer: Any
+    producer: Any
+    create_mq: Any
+    # The callback the client registered on the consumer, call it with a QueueDTO to deliver a response
+    consume_response: Callable
+    # Ids of the published requests
+    published: List[str]
+
+
+@pytest.fixture
+def create_client(mocker):
+    """
+    Build an MQClient on a mocked consumer and producer, keyword arguments override the MQClient arguments.
+    consume replaces the consumer's consume before the consumer thread starts.
+    """
+    clients = []
+
+    def create(consume: Optional[Callable] = None, **kwargs) -> MockedMQClient:
+        consumer, producer = mocker.Mock(), mocker.Mock()
+        if consume is not None:
+            consumer.consume = consume
+        published = []
+        producer.publish_message.side_effect = lambda topic, payload: published.append(payload.id)
+        create_mq = mocker.patch.object(mq_client_module, "create_mq", return_value=(consumer, producer))
+        client = MQClient(**{
+            "mq_provider": "kafka",
+            "mq_config": MQConfig(host="localhost:9092", consume_topics=["llm-response"], consume_timeout=0.01),
+            "db_provider": DBProvider.LOCAL.value,
+            "db_config": None,
+            "timeout": 1.0,
+            "dispatch_mode": DispatchMode.EVENT.value,
+            **kwargs,
+        })
+        clients.append(client)
+        consume_response = consumer.register_callback.call_args.args[0]
+        return MockedMQClient(client, consumer, producer, create_mq, consume_response, published)
+    yield create
+    # Stop the consumer threads the test left running
+    for client in clients:
+        client.is_consumer_running = False
@@ -0,0 +1,67 @@
+import asyncio
+import queue
+import threading
+import time
+
+import pytest
+
+import mq_client as mq_client_module
+from mq_client import DBProvider, DispatchMode
+from mq.common import QueueDTO
+
+
+@pytest.mark.asyncio
+@pytest.mark.dispatch
+async def test_event_dispatch_wake_request_from_consumer_thread(create_client):
+    # A polling tick would take longer than the whole test
+    client, consumer, producer, _, consume_response, _ = create_client(
+        dispatch_mode=DispatchMode.EVENT.value, polling_interval=10.0)
+    responses = queue.Queue()
+    consume_threads = set()
+
+    def consume():
+        # Blocks like a Kafka consume, the callback runs on the consumer thread
+        consume_threads.add(threading.current_thread().name)
+        try:
+            consume_response(responses.get(timeout=0.01))
+        except queue.Empty:
+            pass
+    consumer.consume.side_effect = consume
+    producer.publish_message.side_effect = lambda topic, payload: responses.put(
+        QueueDTO(id=payload.id, message={"text": "hi"}))
+
+    try:
+        start_time = time.perf_counter()
+        response = await client.send_request("llm-request", {"text": "hello"}, "llm-response")
+        elapsed = time.perf_counter() - start_time
+    finally:
+        client.close()
+
+    assert response == {"text": "hi"}
+    assert elapsed < 0.5
+    assert consume_threads == {"mq_client-consumer"}
+    assert threading.current_thread().name not in consume_threads
+
+
+@pytest.mark.asyncio
+@pytest.mark.dispatch
+@pytest.mark.parametrize("db_provider", [DBProvider.LOCAL.value, DBProvider.REDIS.value])
+async def test_poll_dispatch_consume_on_single_thread(mocker, create_client, db_provider):
+    repository = mocker.Mock()
+    repository.mget.side_effect = lambda ids: [None] * len(ids)
+    mocker.patch.object(mq_client_module, "create_db", return_value=repository)
+    client, consumer, *_ = create_client(
+        db_provider=db_provider, dispatch_mode=DispatchMode.POLL.value, polling_interval=0.001)
+    consume_threads = set()
+    consumer.consume.side_effect = lambda: consume_threads.add(threading.current_thread().name)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(client.send_request("llm-request", {"text": "hello"}, "llm-response"), 0.05)
+    # Stopping the consumer task closes the consumer and its executor
+    for task in asyncio.all_tasks() - {asyncio.current_task()}:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    assert len(consume_threads) == 1
+    assert consume_threads.pop().startswith("mq_client-consumer")
+    consumer.close.assert_called_once()
@@ -0,0 +1,60 @@
+import asyncio
+import logging
+
+import pytest
+
+from mq.kafka import KafkaConsumer
+from mq_client import DBProvider, DispatchMode, ReplyRouting
+
+
+async def published_destination(client, producer) -> str:
+    with pytest.raises(asyncio.TimeoutError):
+        await client.send_request("llm-request", {"text": "hello"}, "llm-response")
+    for task in asyncio.all_tasks() - {asyncio.current_task()}:
+        task.cancel()
+    return producer.publish_message.call_args.kwargs["payload"].destination
+
+
+@pytest.mark.asyncio
+@pytest.mark.reply_routing
+async def test_reply_routing_group(create_client):
+    client, consumer, producer, *_ = create_client(timeout=0.05, dispatch_mode=DispatchMode.POLL.value)
+
+    consumer.subscribe.assert_called_once_with(topics=["llm-response"])
+    assert await published_destination(client, producer) == "llm-response"
+
+
+@pytest.mark.asyncio
+@pytest.mark.reply_routing
+async def test_reply_routing_topic_per_instance(create_client):
+    client, consumer, producer, create_mq, *_ = create_client(timeout=0.05, dispatch_mode=DispatchMode.POLL.value, reply_routing=ReplyRouting.TOPIC.value, reply_id="adapter/1")
+
+    consumer.subscribe.assert_called_once_with(topics=["llm-response.adapter-1"])
+    assert create_mq.call_args.kwargs["auto_create_topics"] is True
+    assert await published_destination(client, producer) == "llm-response.adapter-1"
+
+
+@pytest.mark.asyncio
+@pytest.mark.reply_routing
+async def test_reply_routing_partition_per_instance(create_client):
+    client, consumer, producer, *_ = create_client(timeout=0.05, dispatch_mode=DispatchMode.POLL.value, reply_routing=ReplyRouting.PARTITION.value, reply_partition=2)
+
+    consumer.assign.assert_called_once_with(topics=["llm-response"], partition=2)
+    consumer.subscribe.assert_not_called()
+    assert await published_destination(client, producer) == "llm-response:2"
+
+
+@pytest.mark.reply_routing
+def test_reply_routing_requires_local_db(create_client):
+    with pytest.raises(ValueError):
+        create_client(db_provider=DBProvider.REDIS.value, reply_routing=ReplyRouting.TOPIC.value)
+
+
+@pytest.mark.reply_routing
+def test_kafka_consumer_assign_partition_from_end():
+    consumer = KafkaConsumer(group_id="test", bootstrap_server="localhost:9092", logger=logging.getLogger("test"))
+    consumer.assign(["llm-response", "vector-response"], partition=3)
+
+    assignment = consumer.consumer.assignment()
+    consumer.close()
+    assert [(tp.topic, tp.partition) for tp in assignment] == [("llm-response", 3), ("vector-response", 3)]
@@ -0,0 +1,67 @@
+import pytest
+
+from mq_client import StreamInterruptedError
+from mq.common import QueueDTO
+from mq.common.exception import Error, ErrorCode
+
+
+def create_stream_client(create_client, chunks):
+    client, consumer, _, _, consume_response, published = create_client()
+
+    def consume():
+        # Deliver every chunk of the published request, out of order
+        while published:
+            message_id = published.pop()
+            for message, error in reversed(chunks):
+                consume_response(QueueDTO(id=message_id, message=message, error=error))
+    consumer.consume.side_effect = consume
+    return client
+
+
+@pytest.mark.asyncio
+@pytest.mark.stream
+async def test_stream_request_yield_chunks_in_order(create_client):
+    client = create_stream_client(create_client, [
+        ({"results": "Hel", "seq": 0, "done": False}, None),
+        ({"results": "lo", "seq": 1, "done": False}, None),
+        ({"results": "", "seq": 2, "done": True}, None),
+    ])
+    try:
+        messages = [message async for message in client.stream_request("llm-request", {"text": "hi"}, "llm-response")]
+    finally:
+        client.close()
+
+    assert [message["results"] for message in messages] == ["Hel", "lo", ""]
+    assert messages[-1]["done"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.stream
+async def test_stream_request_raise_on_interrupted_stream(create_client):
+    error = Error(code=ErrorCode.STREAM_INTERRUPTED, detail="connection reset")
+    client = create_stream_client(create_client, [
+        ({"results": "Hel", "seq": 0, "done": False}, None),
+        ({"results": "", "seq": 1, "done": True}, error),
+    ])
+    messages = []
+    try:
+        with pytest.raises(StreamInterruptedError) as exc_info:
+            async for message in client.stream_request("llm-request", {"text": "hi"}, "llm-response"):
+                messages.append(message)
+    finally:
+        client.close()
+
+    # The chunks before the error are delivered, the final chunk is not
+    assert [message["results"] for message in messages] == ["Hel"]
+    assert exc_info.value.error == error
+    assert client.stream_data == {}
+
+
+@pytest.mark.stream
+def test_stream_interrupted_chunk_parse():
+    dto = QueueDTO.model_validate_json(
+        '{"id": "1", "message": {"results": "", "seq": 1, "done": true},'
+        ' "error": {"code": "STREAM_INTERRUPTED", "detail": "connection reset"}}'
+    )
+
+    assert dto.error.code == ErrorCode.STREAM_INTERRUPTED
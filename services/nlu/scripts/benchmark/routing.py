@@ -0,0 +1,124 @@
+"""
+Offline evaluation of the embedding router against the LLM supervisor, reports routing accuracy, the share of
+messages the fast path handles and the routing latency for a sweep of thresholds.
+
+Example:
+    python scripts/benchmark/routing.py --dataset data/router_eval.jsonl --thresholds 0.4 0.5 0.6 0.7
+    python scripts/benchmark/routing.py --dataset data/router_eval.jsonl --skip-supervisor
+
+The dataset is JSONL with one {"text": ..., "label": <adapter name>} per line. The LLM and vector services must
+be running, every message is embedded and sent to the supervisor once, thresholds are then replayed offline.
+Latency of a threshold is the embedding time plus the supervisor time of the messages it falls back on.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+from langchain_core.messages import HumanMessage
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "src"))
+
+from client.constructor import init_mq_client, init_mq_embeddings, init_mq_language_model  # noqa: E402
+from router import EmbeddingRouter, create_supervisor  # noqa: E402
+
+
+def percentile(values: List[float], percent: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(percent / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def collect(args, members, rows):
+    mq_client = init_mq_client(
+        host=args.mq_host,
+        consume_topics=[args.llm_consume_topic, args.vector_consume_topic],
+        sdk_group=args.consumer_group_id,
+        consume_timeout=0.1,
+        dispatch_mode="event",
+    )
+    embeddings = init_mq_embeddings(mq_client, args.vector_topic, args.vector_consume_topic)
+    # No response cache, every message pays the full supervisor round-trip
+    supervisor = create_supervisor(
+        members,
+        init_mq_language_model(mq_client, args.llm_topic, args.llm_consume_topic),
+        args.default_adapter,
+    )
+    router = EmbeddingRouter(members=members, embeddings=embeddings)
+    router.matrix = router._normalize(await embeddings.aembed_documents(router.utterances))
+
+    for row in rows:
+        start_time = time.perf_counter()
+        row["vector"] = await embeddings.aembed_query(row["text"])
+        row["embed_time"] = time.perf_counter() - start_time
+        if args.skip_supervisor:
+            continue
+        start_time = time.perf_counter()
+        row["supervisor"] = (await supervisor.ainvoke({"messages": [HumanMessage(content=row["text"])]}))["next"]
+        row["supervisor_time"] = time.perf_counter() - start_time
+    return router
+
+
+def report(name: str, rows, predictions: List[str], latencies: List[float], fast: List[bool]):
+    correct = sum(prediction == row["label"] for prediction, row in zip(predictions, rows))
+    fast_correct = sum(
+        prediction == row["label"] for prediction, row, is_fast in zip(predictions, rows, fast) if is_fast
+    )
+    print(
+        f"{name:<16}{correct / len(rows) * 100:>10.1f}%{sum(fast) / len(rows) * 100:>10.1f}%"
+        f"{(fast_correct / sum(fast) * 100) if sum(fast) else 0.0:>11.1f}%"
+        f"{statistics.mean(latencies) * 1000:>10.0f}{percentile(latencies, 50) * 1000:>10.0f}"
+        f"{percentile(latencies, 95) * 1000:>10.0f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", default="data/router_eval.jsonl", help="labeled JSONL messages")
+    parser.add_argument("--config", default="data/config.json", help="ADAPTER_CONFIG_PATH")
+    parser.add_argument("--default-adapter", default="General Handler", help="DEFAULT_ADAPTER_NAME")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.4, 0.5, 0.6, 0.7, 0.8], help="ROUTER_EMBEDDING_THRESHOLD values")
+    parser.add_argument("--margin", type=float, default=0.05, help="ROUTER_EMBEDDING_MARGIN")
+    parser.add_argument("--skip-supervisor", action="store_true", help="only evaluate the fast path, fallbacks count as wrong")
+    parser.add_argument("--mq-host", default="localhost:9092", help="MQ_CLIENT_HOST")
+    parser.add_argument("--consumer-group-id", default="nlu-router-evaluation", help="MQ_CLIENT_CONSUMER_GROUP_ID")
+    parser.add_argument("--llm-topic", default="llm-request", help="MQ_CLIENT_LLM_TOPIC")
+    parser.add_argument("--llm-consume-topic", default="llm-supervisor-response", help="MQ_CLIENT_LLM_CONSUME_TOPIC")
+    parser.add_argument("--vector-topic", default="vector-request", help="MQ_CLIENT_VECTOR_TOPIC")
+    parser.add_argument("--vector-consume-topic", default="vector-supervisor-response", help="MQ_CLIENT_VECTOR_CONSUME_TOPIC")
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        members = json.load(f)
+    with open(args.dataset) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+
+    router = asyncio.run(collect(args, members, rows))
+
+    print(f"messages={len(rows)} adapters={len(router.names)} utterances={len(router.utterances)} margin={args.margin}")
+    print(f"{'strategy':<16}{'accuracy':>11}{'fast path':>11}{'fast acc':>12}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    if not args.skip_supervisor:
+        report(
+            "supervisor",
+            rows,
+            [row["supervisor"] for row in rows],
+            [row["supervisor_time"] for row in rows],
+            [False] * len(rows),
+        )
+    for threshold in args.thresholds:
+        router.threshold, router.margin = threshold, args.margin
+        predictions, latencies, fast = [], [], []
+        for row in rows:
+            name, _ = router.select(row["vector"])
+            fast.append(name is not None)
+            predictions.append(name if name is not None else row.get("supervisor"))
+            latencies.append(row["embed_time"] + (0.0 if name is not None else row.get("supervisor_time", 0.0)))
+        report(f"embedding@{threshold:g}", rows, predictions, latencies, fast)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Dict, Literal, Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -23,7 +23,30 @@ class Configs(BaseSettings):
     mq_client_consumer_group_id: Optional[str] = "nlu-group-service"
     mq_client_llm_topic: Optional[str] = "llm-request"
     mq_client_llm_consume_topic: Optional[str] = "llm-response"
+    mq_client_vector_topic: Optional[str] = "vector-request"
+    mq_client_vector_consume_topic: Optional[str] = "vector-response"
+    mq_client_vector_encoding: Optional[Literal["json", "float32", "float16"]] = "float32"
     mq_client_consume_timeout: Optional[float] = 0.1
+    mq_client_dispatch_mode: Optional[Literal["event", "poll"]] = "event"
+    mq_client_max_concurrency: Optional[int] = 0
+    mq_client_topic_concurrency: Optional[Dict[str, int]] = {}
+    mq_client_max_pending: Optional[int] = 0
+    mq_client_overload_policy: Optional[Literal["queue", "reject"]] = "queue"
+    mq_client_db_provider: Optional[Literal["local", "redis"]] = "local"
+    mq_client_db_host: Optional[str] = ""
+    mq_client_db_ttl: Optional[float] = 60.0
+    mq_client_reply_routing: Optional[Literal["group", "topic", "partition"]] = "group"
+    mq_client_reply_id: Optional[str] = ""
+    mq_client_reply_partition: Optional[int] = 0
+
+    llm_cache_max_size: Optional[int] = 1024
+    llm_cache_ttl_seconds: Optional[float] = 3600
+
+    router_embedding_enabled: Optional[bool] = False
+    router_embedding_threshold: Optional[float] = 0.6
+    router_embedding_margin: Optional[float] = 0.05
+    router_fanout_top_k: Optional[int] = 0
+    router_fanout_deadline: Optional[float] = 20
     
     adapter_config_path: str
     default_adapter_name: str
\ No newline at end of file
@@ -1,15 +1,16 @@
 import json
-from typing import List
+from typing import Dict, List, Optional
 
 from langgraph.graph.graph import CompiledGraph
 from langserve import RemoteRunnable
-from mq_client import DBProvider, MQClient, MQConfig, MQProvider
+from mq_client import DBConfig, MQClient, MQConfig, MQProvider
 
 from client.config import Configs
 from common.constant.domain import INFRA_MQ_CLIENT as MQ_CLIENT
 from common.log import Logger
-from language_models import MQLanguageModel
-from router import create_routing_graph, create_supervisor
+from embeddings import MQEmbeddings
+from language_models import MQLanguageModel, ResponseCache
+from router import EmbeddingRouter, create_fast_supervisor, create_routing_graph, create_supervisor
 
 
 def init_mq_client(
@@ -17,6 +18,17 @@ def init_mq_client(
     consume_topics: List[str],
     sdk_group: str,
     consume_timeout: float,
+    dispatch_mode: str,
+    max_concurrency: int = 0,
+    topic_concurrency: Optional[Dict[str, int]] = None,
+    max_pending: int = 0,
+    overload_policy: str = "queue",
+    db_provider: str = "local",
+    db_host: str = "",
+    db_ttl: float = 60.0,
+    reply_routing: str = "group",
+    reply_id: str = "",
+    reply_partition: int = 0,
 ) -> MQClient:
     mq_client = MQClient(
         mq_provider=MQProvider.KAFKA.value,
@@ -25,43 +37,99 @@ def init_mq_client(
             consume_topics=consume_topics,
             consume_timeout=consume_timeout
         ),
-        db_provider=DBProvider.LOCAL.value,
-        db_config=None,
+        db_provider=db_provider,
+        db_config=DBConfig(host=db_host, ttl=db_ttl),
         sdk_group=sdk_group,
+        dispatch_mode=dispatch_mode,
         logger=Logger.get_logger(MQ_CLIENT),
+        max_concurrency=max_concurrency,
+        topic_concurrency=topic_concurrency,
+        max_pending=max_pending,
+        overload_policy=overload_policy,
+        reply_routing=reply_routing,
+        reply_id=reply_id,
+        reply_partition=reply_partition,
     )
 
     return mq_client
 
 
-def init_mq_language_model(mq_client, topic: str, consume_topic: str) -> MQLanguageModel:
+def init_response_cache(max_size: int, ttl_seconds: float) -> Optional[ResponseCache]:
+    if max_size <= 0:
+        return None
+    return ResponseCache(max_size=max_size, ttl_seconds=ttl_seconds)
+
+
+def init_mq_language_model(mq_client, topic: str, consume_topic: str, cache: Optional[ResponseCache] = None) -> MQLanguageModel:
     return MQLanguageModel(
         mq=mq_client,
         topic=topic,
         consume_topic=consume_topic,
+        cache=cache,
     )
 
-def get_graph(configs: Configs) -> CompiledGraph:
-    with open(configs.adapter_config_path) as f:
-        members = json.load(f)
-    
-    mq_client = init_mq_client(
+def init_mq_embeddings(mq_client, topic: str, consume_topic: str, encoding: str = "float32") -> MQEmbeddings:
+    return MQEmbeddings(
+        mq=mq_client,
+        topic=topic,
+        consume_topic=consume_topic,
+        encoding=encoding,
+    )
+
+def get_mq_client(configs: Configs) -> MQClient:
+    return init_mq_client(
         host=configs.mq_client_host,
-        consume_topics=[configs.mq_client_llm_consume_topic],
+        consume_topics=[configs.mq_client_llm_consume_topic] + (
+            [configs.mq_client_vector_consume_topic] if configs.router_embedding_enabled else []
+        ),
         sdk_group=configs.mq_client_consumer_group_id,
         consume_timeout=configs.mq_client_consume_timeout,
+        dispatch_mode=configs.mq_client_dispatch_mode,
+        max_concurrency=configs.mq_client_max_concurrency,
+        topic_concurrency=configs.mq_client_topic_concurrency,
+        max_pending=configs.mq_client_max_pending,
+        overload_policy=configs.mq_client_overload_policy,
+        db_provider=configs.mq_client_db_provider,
+        db_host=configs.mq_client_db_host,
+        db_ttl=configs.mq_client_db_ttl,
+        reply_routing=configs.mq_client_reply_routing,
+        reply_id=configs.mq_client_reply_id,
+        reply_partition=configs.mq_client_reply_partition,
     )
 
+def get_graph(configs: Configs, mq_client: MQClient) -> CompiledGraph:
+    with open(configs.adapter_config_path) as f:
+        members = json.load(f)
+
     llm = init_mq_language_model(
         mq_client=mq_client,
         topic=configs.mq_client_llm_topic,
         consume_topic=configs.mq_client_llm_consume_topic,
+        cache=init_response_cache(
+            max_size=configs.llm_cache_max_size,
+            ttl_seconds=configs.llm_cache_ttl_seconds,
+        ),
     )
 
     supervisor = create_supervisor(members, llm, configs.default_adapter_name)
+    if configs.router_embedding_enabled:
+        embeddings = init_mq_embeddings(
+            mq_client=mq_client,
+            topic=configs.mq_client_vector_topic,
+            consume_topic=configs.mq_client_vector_consume_topic,
+            encoding=configs.mq_client_vector_encoding,
+        )
+        router = EmbeddingRouter(
+            members=members,
+            embeddings=embeddings,
+            threshold=configs.router_embedding_threshold,
+            margin=configs.router_embedding_margin,
+        )
+        supervisor = create_fast_supervisor(router, supervisor, configs.router_fanout_top_k)
 
     adapters = {}
     for member in members:
         adapters[member['name']] = RemoteRunnable(f"http://{member['host']}/api/v1/chain/{member['adapter']}")
-    graph = create_routing_graph(adapters, supervisor)
+    fanout_enabled = configs.router_embedding_enabled and configs.router_fanout_top_k > 1
+    graph = create_routing_graph(adapters, supervisor, configs.router_fanout_deadline if fanout_enabled else 0)
     return graph
\ No newline at end of file
@@ -1,11 +1,13 @@
 import uuid
+from contextlib import asynccontextmanager
 
 import chainlit as cl
+from chainlit.server import app
 from langchain.schema import AIMessage, HumanMessage
 from langchain.schema.runnable.config import RunnableConfig
 
 from client.config import Configs
-from client.constructor import get_graph
+from client.constructor import get_graph, get_mq_client
 from common.constant.domain import APP_NLU as NLU
 from common.decorator import trace
 from common.log import Logger, configure_logging, correlation_id
@@ -22,7 +24,22 @@ configure_tracing(
 
 logger = Logger.get_logger(NLU)
 
-graph = get_graph(configs)
+mq_client = get_mq_client(configs)
+graph = get_graph(configs, mq_client)
+
+# Chainlit runs its own lifespan without shutdown hooks and exits the process at its end, close the client inside it
+chainlit_lifespan = app.router.lifespan_context
+
+@asynccontextmanager
+async def lifespan(app):
+    async with chainlit_lifespan(app):
+        try:
+            yield
+        finally:
+            # Deliver the requests still in the producer queue before exit
+            mq_client.close()
+
+app.router.lifespan_context = lifespan
 
 @cl.on_chat_start
 @trace
@@ -54,16 +71,23 @@ async def on_message(message: cl.Message):
         for h in history
     ]
     context.append(HumanMessage(content=message.content))
-    res = await runnable.ainvoke({'messages': context}, config=RunnableConfig(callbacks=[
-        cl.LangchainCallbackHandler(
-            to_ignore=["ChannelRead", "RunnableLambda", "ChannelWrite", "__start__", "_execute"]
-            # can add more into the to_ignore: "agent:edges", "call_model"
-            # to_keep=
-    )]))
+    # Adapter answers are rendered token by token as they arrive
+    answer = cl.Message(content="")
+    res = await runnable.ainvoke({'messages': context}, config=RunnableConfig(
+        callbacks=[
+            cl.LangchainCallbackHandler(
+                to_ignore=["ChannelRead", "RunnableLambda", "ChannelWrite", "__start__", "_execute"]
+                # can add more into the to_ignore: "agent:edges", "call_model"
+                # to_keep=
+        )],
+        configurable={"stream_handler": answer.stream_token},
+    ))
     logger.info({
         "message": "assistant respond with a message",
         "output": res["messages"][-1].content,
     })
     history.append({"role": "user", "content": message.content})
     history.append({"role": "assistant", "content": res["messages"][-1].content})
-    await cl.Message(content=res["messages"][-1].content).send()
+    # Adapter and fallback answers are both streamed, setting the final content keeps the message equal to the history
+    answer.content = res["messages"][-1].content
+    await answer.send()
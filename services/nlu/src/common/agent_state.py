@@ -1,5 +1,5 @@
 import operator
-from typing import Annotated, Sequence, TypedDict
+from typing import Annotated, List, Sequence, TypedDict
 
 from langchain_core.messages import BaseMessage
 
@@ -7,3 +7,5 @@ from langchain_core.messages import BaseMessage
 class AgentState(TypedDict):
     messages: Annotated[Sequence[BaseMessage], operator.add]
     next: str
+    # Adapters the fan-out node asks in parallel, best ranked first
+    candidates: List[str]
@@ -1,5 +1,6 @@
 APP_NLU = "app.nlu"
 
 DOMAIN_LLM = "service.llm.client"
+DOMAIN_VECTOR = "service.vector.client"
 
 INFRA_MQ_CLIENT = "infra.mq.client"
\ No newline at end of file
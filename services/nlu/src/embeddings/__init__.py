@@ -0,0 +1 @@
+from embeddings.mq_embeddings import MQEmbeddings
\ No newline at end of file
@@ -1,15 +1,17 @@
 import asyncio
 import logging
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
-from langchain_core.callbacks.manager import CallbackManagerForLLMRun
+from langchain_core.callbacks.manager import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
 from langchain_core.language_models.llms import LLM
-from mq_client import MQClient
+from langchain_core.outputs import GenerationChunk
+from mq_client import MQClient, StreamInterruptedError
 
 from common.constant.domain import DOMAIN_LLM as DOMAIN
 from common.decorator import trace
 from common.log import Logger
+from language_models.response_cache import ResponseCache
 
 DEFAULT_FALLBACK_MESSAGE = """ขออภัย, ฉันไม่พบข้อมูลที่ต้องการ กรุณาลองให้ข้อมูลเพิ่มเติมหรือถามคำถามใหม่ ฉันยินดีที่จะช่วยเหลือคุณเสมอ"""
 class MQLanguageModel(LLM):
@@ -20,6 +22,7 @@ class MQLanguageModel(LLM):
     logger: logging.Logger = Logger.get_logger(DOMAIN)
     fallback_message: str = DEFAULT_FALLBACK_MESSAGE
     service: str = "mq_llm"
+    cache: Optional[ResponseCache] = None
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -43,6 +46,12 @@ class MQLanguageModel(LLM):
             "service": self.service,
             "prompt": prompt
         })
+        vector = None
+        if self.cache is not None:
+            cached, vector = self.cache.lookup(prompt, self._cache_params(stop))
+            if cached is not None:
+                self._log_cache_hit("[sync] _call")
+                return cached
         payload = {
             "text": prompt
         }
@@ -58,7 +67,9 @@ class MQLanguageModel(LLM):
         
         if result is None:
             return self.fallback_message
-        
+
+        if self.cache is not None:
+            self.cache.set(prompt, self._cache_params(stop), result, vector)
         return result
 
     @trace
@@ -74,6 +85,12 @@ class MQLanguageModel(LLM):
             "service": self.service,
             "prompt": prompt
         })
+        vector = None
+        if self.cache is not None:
+            cached, vector = await self.cache.alookup(prompt, self._cache_params(stop))
+            if cached is not None:
+                self._log_cache_hit("[async] _acall")
+                return cached
         payload = {
             "text": prompt
         }
@@ -89,9 +106,93 @@ class MQLanguageModel(LLM):
 
         if result is None:
             return self.fallback_message
-        
+
+        if self.cache is not None:
+            await self.cache.aset(prompt, self._cache_params(stop), result, vector)
         return result
     
+    async def _astream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[GenerationChunk]:
+        self.logger.info({
+            "message": "[async] _astream called",
+            "service": self.service,
+            "prompt": prompt
+        })
+        if not self.mq.can_stream:
+            # Stateless MQ clients can't receive chunks, the whole answer comes as one chunk
+            text = await self._acall(prompt, stop=stop, **kwargs)
+            chunk = GenerationChunk(text=text)
+            if run_manager:
+                await run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
+            return
+        vector = None
+        if self.cache is not None:
+            cached, vector = await self.cache.alookup(prompt, self._cache_params(stop))
+            if cached is not None:
+                self._log_cache_hit("[async] _astream")
+                chunk = GenerationChunk(text=cached)
+                if run_manager:
+                    await run_manager.on_llm_new_token(cached, chunk=chunk)
+                yield chunk
+                return
+        payload = {
+            "text": prompt,
+            "stream": True,
+        }
+        start_time = time.perf_counter()
+        first_chunk_time = None
+        texts = []
+        completed = False
+        try:
+            async for message in self.mq.stream_request(self.topic, payload, self.consume_topic):
+                text = message.get("results")
+                if not text:
+                    continue
+                if first_chunk_time is None:
+                    first_chunk_time = time.perf_counter()
+                texts.append(text)
+                chunk = GenerationChunk(text=text)
+                if run_manager:
+                    await run_manager.on_llm_new_token(text, chunk=chunk)
+                yield chunk
+            # stream_request returns only after the chunk marked done
+            completed = True
+        except StreamInterruptedError as e:
+            # Chunks already sent cannot be taken back, the answer ends where the generation stopped
+            self.logger.warning({
+                "message": "[async] _astream interrupted",
+                "service": self.service,
+                "error": str(e),
+            })
+
+        if first_chunk_time is None:
+            yield GenerationChunk(text=self.fallback_message)
+        elif self.cache is not None and completed:
+            # Only a complete answer is cached, a cut-off one would be served again on every hit
+            await self.cache.aset(prompt, self._cache_params(stop), "".join(texts), vector)
+        self.logger.info({
+            "message": "[async] _astream done",
+            "service": self.service,
+            "first_chunk_time": f"{(first_chunk_time or time.perf_counter()) - start_time:.2f}s",
+            "process_time": f"{time.perf_counter() - start_time:.2f}s",
+        })
+
+    def _cache_params(self, stop: Optional[List[str]]) -> Dict[str, Any]:
+        return {"topic": self.topic, "stop": stop, **self._identifying_params}
+
+    def _log_cache_hit(self, caller: str):
+        self.logger.info({
+            "message": f"{caller} got cached result",
+            "service": self.service,
+            **self.cache.stats(),
+        })
+
     @property
     def _identifying_params(self) -> Dict[str, Any]:
         """Return a dictionary of identifying parameters."""
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# Prefix LangChain puts in front of human turns when a chat prompt is flattened for an LLM
+HUMAN_PREFIX = "Human:"
+
+
+@dataclass
+class _Entry:
+    response: str
+    expires_at: float
+    context_key: Optional[str] = None
+
+
+class ResponseCache:
+    """
+    LRU/TTL cache of language model responses.
+    Exact lookups are keyed on the normalized prompt plus the model params. With embeddings, a miss falls back
+    to a semantic lookup: the prompt is split at its last human turn, entries must share everything before it
+    and the embedding of the question must reach similarity_threshold.
+    """
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl_seconds: float = 3600,
+        embeddings: Optional[Embeddings] = None,
+        similarity_threshold: float = 0.95,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+
+        self.entries: OrderedDict[str, _Entry] = OrderedDict()
+        # context key -> {entry key: normalized question vector}
+        self.vectors: Dict[str, Dict[str, np.ndarray]] = {}
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(prompt: str) -> str:
+        return " ".join(unicodedata.normalize("NFKC", prompt).split())
+
+    @staticmethod
+    def _hash(*parts: str) -> str:
+        return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+    def _keys(self, prompt: str, params: Dict[str, Any]) -> Tuple[str, Optional[str], Optional[str]]:
+        """Return the exact key, the context key and the question used for semantic lookups."""
+        prompt = self.normalize(prompt)
+        params = json.dumps(params, sort_keys=True, default=str)
+        key = self._hash(params, prompt)
+
+        context, separator, question = prompt.rpartition(HUMAN_PREFIX)
+        if not separator or not question.strip():
+            return key, None, None
+        return key, self._hash(params, context), question.strip()
+
+    def _vector(self, vector: List[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def _get_exact(self, key: str) -> Optional[str]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at < time.monotonic():
+            self._remove(key)
+            return None
+        self.entries.move_to_end(key)
+        return entry.response
+
+    def _get_semantic(self, context_key: str, vector: np.ndarray) -> Optional[str]:
+        candidates = self.vectors.get(context_key)
+        if not candidates:
+            return None
+        keys = list(candidates.keys())
+        similarities = np.stack([candidates[key] for key in keys]) @ vector
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            return None
+        return self._get_exact(keys[best])
+
+    def _remove(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is None or entry.context_key is None:
+            return
+        candidates = self.vectors.get(entry.context_key, {})
+        candidates.pop(key, None)
+        if not candidates:
+            self.vectors.pop(entry.context_key, None)
+
+    def _record(self, response: Optional[str], semantic: bool = False) -> Optional[str]:
+        if response is None:
+            self.misses += 1
+        elif semantic:
+            self.semantic_hits += 1
+        else:
+            self.hits += 1
+        return response
+
+    def lookup(self, prompt: str, params: Dict[str, Any]) -> Tuple[Optional[str], Optional[List[float]]]:
+        """Return the cached response, and the question embedding so a miss can be stored without embedding twice."""
+        key, context_key, question = self._keys(prompt, params)
+        with self.lock:
+            response = self._get_exact(key)
+            if response is not None or self.embeddings is None or question is None or context_key not in self.vectors:
+                return self._record(response), None
+
+        vector = self.embeddings.embed_query(question)
+        with self.lock:
+            return self._record(self._get_semantic(context_key, self._vector(vector)), semantic=True), vector
+
+    async def alookup(self, prompt: str, params: Dict[str, Any]) -> Tuple[Optional[str], Optional[List[float]]]:
+        key, context_key, question = self._keys(prompt, params)
+        with self.lock:
+            response = self._get_exact(key)
+            if response is not None or self.embeddings is None or question is None or context_key not in self.vectors:
+                return self._record(response), None
+
+        vector = await self.embeddings.aembed_query(question)
+        with self.lock:
+            return self._record(self._get_semantic(context_key, self._vector(vector)), semantic=True), vector
+
+    def set(self, prompt: str, params: Dict[str, Any], response: str, vector: Optional[List[float]] = None):
+        key, context_key, question = self._keys(prompt, params)
+        if self.embeddings is not None and question is not None and vector is None:
+            vector = self.embeddings.embed_query(question)
+        self._set(key, context_key, response, vector)
+
+    async def aset(self, prompt: str, params: Dict[str, Any], response: str, vector: Optional[List[float]] = None):
+        key, context_key, question = self._keys(prompt, params)
+        if self.embeddings is not None and question is not None and vector is None:
+            vector = await self.embeddings.aembed_query(question)
+        self._set(key, context_key, response, vector)
+
+    def _set(self, key: str, context_key: Optional[str], response: str, vector: Optional[List[float]]):
+        with self.lock:
+            self._remove(key)
+            semantic = vector is not None and context_key is not None
+            self.entries[key] = _Entry(
+                response=response,
+                expires_at=time.monotonic() + self.ttl_seconds,
+                context_key=context_key if semantic else None,
+            )
+            if semantic:
+                self.vectors.setdefault(context_key, {})[key] = self._vector(vector)
+            while len(self.entries) > self.max_size:
+                self._remove(next(iter(self.entries)))
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.semantic_hits + self.misses
+        return {
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.semantic_hits) / lookups, 4) if lookups else 0.0,
+            "size": len(self.entries),
+        }
@@ -1,2 +1,3 @@
 from .adapter_selecter import create_supervisor
+from .embedding_router import EmbeddingRouter, create_fast_supervisor
 from .graph import create_routing_graph
\ No newline at end of file
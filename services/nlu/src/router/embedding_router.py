@@ -0,0 +1,142 @@
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables import Runnable, RunnableLambda
+
+from common.constant.domain import APP_NLU as NLU
+from common.log import Logger
+from .graph import FANOUT_NODE
+
+logger = Logger.get_logger(NLU)
+
+
+class EmbeddingRouter:
+    """
+    Route a user turn to the member whose role or example utterances are closest in embedding space.
+    A member scores the best cosine similarity over its utterances, the route is only taken when the
+    best score reaches threshold and beats the runner-up member by margin.
+    """
+    def __init__(self, members: List[Dict[str, Any]], embeddings: Embeddings, threshold: float = 0.6, margin: float = 0.05):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.margin = margin
+
+        self.labels: List[str] = []
+        self.utterances: List[str] = []
+        for member in members:
+            for utterance in [member["role"], *member.get("examples", [])]:
+                self.labels.append(member["name"])
+                self.utterances.append(utterance)
+        self.names = list(dict.fromkeys(self.labels))
+        # Utterances are embedded on the first request, the MQ client is not consuming yet at construction
+        self.matrix: Optional[np.ndarray] = None
+
+    @staticmethod
+    def _normalize(vectors: List[List[float]]) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12)
+
+    def score(self, vector: List[float]) -> List[Tuple[str, float]]:
+        """Return (member name, score) pairs, best first."""
+        similarities = self.matrix @ self._normalize(vector)
+        scores = {name: -1.0 for name in self.names}
+        for label, similarity in zip(self.labels, similarities.tolist()):
+            scores[label] = max(scores[label], similarity)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+    def decide(self, scores: List[Tuple[str, float]]) -> Tuple[Optional[str], float]:
+        """Return the confident member, or None with the best score when the supervisor should decide."""
+        name, best = scores[0]
+        runner_up = scores[1][1] if len(scores) > 1 else -1.0
+        if best < self.threshold or best - runner_up < self.margin:
+            return None, best
+        return name, best
+
+    def select(self, vector: List[float]) -> Tuple[Optional[str], float]:
+        return self.decide(self.score(vector))
+
+    def rank(self, text: str) -> List[Tuple[str, float]]:
+        if self.matrix is None:
+            self.matrix = self._normalize(self.embeddings.embed_documents(self.utterances))
+        return self.score(self.embeddings.embed_query(text))
+
+    async def arank(self, text: str) -> List[Tuple[str, float]]:
+        if self.matrix is None:
+            self.matrix = self._normalize(await self.embeddings.aembed_documents(self.utterances))
+        return self.score(await self.embeddings.aembed_query(text))
+
+    def route(self, text: str) -> Tuple[Optional[str], float]:
+        return self.decide(self.rank(text))
+
+    async def aroute(self, text: str) -> Tuple[Optional[str], float]:
+        return self.decide(await self.arank(text))
+
+
+def _log_route(name: Optional[str], score: float, start_time: float, candidates: Optional[List[str]] = None):
+    if name:
+        message = "fast router selected adapter"
+    elif candidates:
+        message = "fast router fan out to candidates"
+    else:
+        message = "fast router fallback to supervisor"
+    logger.info({
+        "message": message,
+        "next": name,
+        "candidates": candidates,
+        "score": round(score, 4),
+        "process_time": f"{time.perf_counter() - start_time:.2f}s",
+    })
+
+
+def _decide(router: EmbeddingRouter, scores: List[Tuple[str, float]], fanout_top_k: int, start_time: float) -> Optional[Dict[str, Any]]:
+    """Return the next step when the router can decide without the supervisor, else None."""
+    if not scores:
+        _log_route(None, 0.0, start_time)
+        return None
+    name, score = router.decide(scores)
+    if name is not None:
+        _log_route(name, score, start_time)
+        return {"next": name}
+    if fanout_top_k > 1:
+        candidates = [candidate for candidate, _ in scores[:fanout_top_k]]
+        _log_route(None, score, start_time, candidates)
+        return {"next": FANOUT_NODE, "candidates": candidates}
+    _log_route(None, score, start_time)
+    return None
+
+
+def create_fast_supervisor(router: EmbeddingRouter, supervisor: Runnable, fanout_top_k: int = 0) -> Runnable:
+    """
+    Wrap the LLM supervisor so it is only called when the embedding router is not confident.
+    With fanout_top_k of 2 or more, an unsure turn goes to the fan-out node with the top k members
+    instead, the graph must be created with a fan-out deadline.
+    """
+    def fast_supervisor(state, config=None):
+        start_time = time.perf_counter()
+        try:
+            scores = router.rank(state["messages"][-1].content)
+        except Exception as e:
+            # The vector service is an optimization here, the supervisor can always decide
+            logger.error({"message": "fast router failed", "error": str(e)})
+            scores = []
+        result = _decide(router, scores, fanout_top_k, start_time)
+        if result is None:
+            return supervisor.invoke(state, config)
+        return result
+
+    async def afast_supervisor(state, config=None):
+        start_time = time.perf_counter()
+        try:
+            scores = await router.arank(state["messages"][-1].content)
+        except Exception as e:
+            # The vector service is an optimization here, the supervisor can always decide
+            logger.error({"message": "fast router failed", "error": str(e)})
+            scores = []
+        result = _decide(router, scores, fanout_top_k, start_time)
+        if result is None:
+            return await supervisor.ainvoke(state, config)
+        return result
+
+    return RunnableLambda(fast_supervisor, afunc=afast_supervisor, name="fast_supervisor")
@@ -1,26 +1,43 @@
+import asyncio
 import functools
+import time
 from asyncio.exceptions import TimeoutError as AsyncioTimeoutError
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
 
 from httpx import ConnectError, ConnectTimeout
 from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langgraph.graph import StateGraph
 
 from common import AgentState
 from common.constant.domain import APP_NLU as NLU
 from common.decorator import retry, trace
 from common.log import Logger
+from language_models.mq_llm import DEFAULT_FALLBACK_MESSAGE as LLM_FALLBACK_MESSAGE
 
 DEFAULT_FALLBACK_MESSAGE = """ขออภัย ขณะนี้ระบบมีปัญหา ทำให้ฉันไม่สามารถตอบคำถามนี้ได้ ขออภัยในความไม่สะดวก"""
 
+# Node that asks every adapter in state["candidates"] at once, the supervisor routes to it when unsure
+FANOUT_NODE = "fanout"
+# Adapter answers that mean the adapter could not help, a fan-out branch answering one of them loses
+NO_ANSWER_MESSAGES = (DEFAULT_FALLBACK_MESSAGE, LLM_FALLBACK_MESSAGE)
+
+# Adapter calls failing with one of these exceptions are retried with a growing delay
+AGENT_MAX_RETRIES = 3
+AGENT_RETRY_DELAY = 1
+AGENT_RETRY_BACKOFF = 2
+AGENT_RETRY_EXCEPTIONS = (ConnectError, ConnectTimeout, AsyncioTimeoutError)
+
 logger = Logger.get_logger(NLU)
 
 
 @retry(
-    max_retries=3,
-    delay=1,
-    backoff=2,
+    max_retries=AGENT_MAX_RETRIES,
+    delay=AGENT_RETRY_DELAY,
+    backoff=AGENT_RETRY_BACKOFF,
     logger=logger,
-    exceptions=(ConnectError, ConnectTimeout, AsyncioTimeoutError),
+    exceptions=AGENT_RETRY_EXCEPTIONS,
     fallback_response={"messages": [HumanMessage(content=DEFAULT_FALLBACK_MESSAGE)]}
 )
 @trace
@@ -33,14 +50,175 @@ def agent_node(state, agent, name):
     result = agent.invoke(state)
     return {"messages": [HumanMessage(content=result, name=name)]}
 
-def create_routing_graph(adapters, supervisor):
+@trace
+async def aagent_node(state, agent, name, config: RunnableConfig):
+    """
+    Stream the adapter answer, chunks go to the "stream_handler" coroutine of the run configurable.
+    The stream is retried only until its first chunk is sent, after that the answer ends where the stream failed.
+    When every attempt fails, the fallback message is streamed as the answer.
+    """
+    logger.info({
+        "message": "agent node stream state",
+        "agent_name": name,
+        "state": state,
+    })
+    stream_handler = config.get("configurable", {}).get("stream_handler")
+    content = ""
+    delay = AGENT_RETRY_DELAY
+    for attempt in range(1, AGENT_MAX_RETRIES + 1):
+        try:
+            async for chunk in agent.astream(state):
+                content += chunk
+                if stream_handler is not None:
+                    await stream_handler(chunk)
+            return {"messages": [HumanMessage(content=content, name=name)]}
+        except AGENT_RETRY_EXCEPTIONS as e:
+            if content:
+                # Chunks already sent cannot be taken back, a retry would send them twice
+                logger.error({
+                    "message": "Stream interrupted after the first chunk",
+                    "agent_name": name,
+                    "error": str(e),
+                })
+                return {"messages": [HumanMessage(content=content, name=name)]}
+            if attempt == AGENT_MAX_RETRIES:
+                logger.error({
+                    "message": "Retrying attempt exceeded",
+                    "agent_name": name,
+                    "error": str(e),
+                })
+                break
+            logger.warning({
+                "message": f"Error while processing, retrying attempt {attempt+1}/{AGENT_MAX_RETRIES} in {delay} seconds",
+                "agent_name": name,
+                "error": str(e),
+            })
+            await asyncio.sleep(delay)
+            delay *= AGENT_RETRY_BACKOFF
+
+    if stream_handler is not None:
+        await stream_handler(DEFAULT_FALLBACK_MESSAGE)
+    return {"messages": [HumanMessage(content=DEFAULT_FALLBACK_MESSAGE)]}
+
+
+def _select_branch(candidates: List[str], answers: Dict[str, Optional[str]], final: bool = False) -> Optional[str]:
+    """
+    Return the best ranked candidate with a usable answer. Until final, None is returned while a better
+    ranked branch is still running, so a fast low ranked answer does not beat the likely adapter.
+    """
+    for name in candidates:
+        if name not in answers:
+            if final:
+                continue
+            return None
+        if answers[name] is not None:
+            return name
+    return None
+
+
+def _branch_answer(result, error: Optional[BaseException]) -> Optional[str]:
+    if error is not None or not isinstance(result, str) or not result.strip():
+        return None
+    return None if result.strip() in NO_ANSWER_MESSAGES else result
+
+
+def _fanout_result(candidates: List[str], answers: Dict[str, Optional[str]], start_time: float):
+    name = _select_branch(candidates, answers, final=True)
+    logger.info({
+        "message": "fanout node selected answer",
+        "candidates": candidates,
+        "answered": [candidate for candidate in candidates if answers.get(candidate) is not None],
+        "cancelled": [candidate for candidate in candidates if candidate not in answers],
+        "selected": name,
+        "process_time": f"{time.perf_counter() - start_time:.2f}s",
+    })
+    if name is None:
+        return {"messages": [HumanMessage(content=DEFAULT_FALLBACK_MESSAGE)]}
+    return {"messages": [HumanMessage(content=answers[name], name=name)]}
+
+
+@trace
+def fanout_node(state, adapters, deadline: float):
+    candidates = [name for name in state.get("candidates") or [] if name in adapters]
+    answers: Dict[str, Optional[str]] = {}
+    start_time = time.perf_counter()
+    if not candidates:
+        return _fanout_result(candidates, answers, start_time)
+
+    executor = ThreadPoolExecutor(max_workers=len(candidates), thread_name_prefix="fanout")
+    futures = {executor.submit(adapters[name].invoke, state): name for name in candidates}
+    pending = set(futures)
+    try:
+        while pending:
+            remaining = deadline - (time.perf_counter() - start_time)
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                answers[futures[future]] = _branch_answer(None if error else future.result(), error)
+            if _select_branch(candidates, answers) is not None:
+                break
+    finally:
+        # Threads can't be interrupted, slow branches are abandoned and their results ignored
+        executor.shutdown(wait=False, cancel_futures=True)
+    return _fanout_result(candidates, answers, start_time)
+
+
+@trace
+async def afanout_node(state, adapters, deadline: float, config: RunnableConfig):
+    """
+    Ask every candidate adapter in parallel. The best ranked usable answer wins as soon as no better ranked
+    branch is still running, the other branches are cancelled, and nothing is awaited past the deadline.
+    """
+    candidates = [name for name in state.get("candidates") or [] if name in adapters]
+    answers: Dict[str, Optional[str]] = {}
+    start_time = time.perf_counter()
+    tasks = {asyncio.ensure_future(adapters[name].ainvoke(state)): name for name in candidates}
+    pending = set(tasks)
+    try:
+        while pending:
+            remaining = deadline - (time.perf_counter() - start_time)
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                error = task.exception()
+                answers[tasks[task]] = _branch_answer(None if error else task.result(), error)
+            if _select_branch(candidates, answers) is not None:
+                break
+    finally:
+        for task in pending:
+            task.cancel()
+
+    result = _fanout_result(candidates, answers, start_time)
+    # Branches are not streamed, only the selected answer is sent to the chat
+    stream_handler = config.get("configurable", {}).get("stream_handler")
+    if stream_handler is not None and result["messages"][-1].name is not None:
+        await stream_handler(result["messages"][-1].content)
+    return result
+
+
+def create_routing_graph(adapters, supervisor, fanout_deadline: float = 0):
+    """fanout_deadline above 0 adds the fan-out node, reached when the supervisor answers FANOUT_NODE with candidates."""
     workflow = StateGraph(AgentState)
     conditional_map = {}
     for name in adapters:
-        node = functools.partial(agent_node, agent=adapters[name], name=name)
+        node = RunnableLambda(
+            functools.partial(agent_node, agent=adapters[name], name=name),
+            afunc=functools.partial(aagent_node, agent=adapters[name], name=name),
+        )
         workflow.add_node(name, node)
         workflow.add_edge(name, "__end__")
         conditional_map[name] = name
+    if fanout_deadline > 0:
+        node = RunnableLambda(
+            functools.partial(fanout_node, adapters=adapters, deadline=fanout_deadline),
+            afunc=functools.partial(afanout_node, adapters=adapters, deadline=fanout_deadline),
+        )
+        workflow.add_node(FANOUT_NODE, node)
+        workflow.add_edge(FANOUT_NODE, "__end__")
+        conditional_map[FANOUT_NODE] = FANOUT_NODE
     workflow.add_node("supervisor", supervisor)
     workflow.add_conditional_edges("supervisor", lambda x: x["next"], conditional_map)
     workflow.set_entry_point("supervisor")
@@ -30,6 +30,27 @@ def test_configs_defaults():
     assert config.mq_client_consumer_group_id == "nlu-group-service"
     assert config.mq_client_llm_topic == "llm-request"
     assert config.mq_client_llm_consume_topic == "llm-response"
+    assert config.mq_client_dispatch_mode == "event"
+    assert config.mq_client_max_concurrency == 0
+    assert config.mq_client_topic_concurrency == {}
+    assert config.mq_client_max_pending == 0
+    assert config.mq_client_overload_policy == "queue"
+    assert config.mq_client_db_provider == "local"
+    assert config.mq_client_db_host == ""
+    assert config.mq_client_db_ttl == 60.0
+    assert config.mq_client_reply_routing == "group"
+    assert config.mq_client_reply_id == ""
+    assert config.mq_client_reply_partition == 0
+    assert config.llm_cache_max_size == 1024
+    assert config.llm_cache_ttl_seconds == 3600
+    assert config.mq_client_vector_topic == "vector-request"
+    assert config.mq_client_vector_consume_topic == "vector-response"
+    assert config.mq_client_vector_encoding == "float32"
+    assert config.router_embedding_enabled is False
+    assert config.router_embedding_threshold == 0.6
+    assert config.router_embedding_margin == 0.05
+    assert config.router_fanout_top_k == 0
+    assert config.router_fanout_deadline == 20
     assert config.adapter_config_path == "/path/to/config"
     assert config.default_adapter_name == "General Handler"
 
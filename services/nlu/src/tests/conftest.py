@@ -2,6 +2,7 @@ import pytest
 from langchain_core.runnables import Runnable
 from mq_client import MQClient
 
+from embeddings.mq_embeddings import MQEmbeddings
 from language_models.mq_llm import MQLanguageModel
 
 
@@ -9,6 +10,10 @@ from language_models.mq_llm import MQLanguageModel
 def mock_mq_client(mocker):
     return mocker.Mock(spec=MQClient)
 
+@pytest.fixture
+def mock_mq_embeddings(mocker):
+    return mocker.Mock(spec=MQEmbeddings)
+
 @pytest.fixture
 def mock_mq_llm(mocker):
     return mocker.Mock(spec=MQLanguageModel)
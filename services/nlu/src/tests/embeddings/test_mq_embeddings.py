@@ -0,0 +1,118 @@
+import asyncio
+import base64
+import threading
+
+import numpy as np
+import pytest
+
+from embeddings.mq_embeddings import MQEmbeddings
+
+
+@pytest.mark.mq_embeddings
+def test_start_thread():
+    loop = asyncio.get_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+@pytest.mark.mq_embeddings
+def test_embed_documents(mock_mq_client):
+    embeddings = MQEmbeddings(mq=mock_mq_client)
+    
+    texts = [
+        "how much protein should a female eat",
+    ]
+    
+    loop = asyncio.get_event_loop()
+    mock_mq_client.event_loop = loop
+    mock_mq_client.send_request.return_value = {"results": [[0.1, 0.2, 0.3]]}
+    results = embeddings.embed_documents(texts=texts)
+
+    assert len(results) == 1
+    assert results == [[0.1, 0.2, 0.3]]
+
+    mock_mq_client.send_request.assert_called_once_with(embeddings.topic, {"texts": texts, "encoding": embeddings.encoding}, embeddings.consume_topic)
+
+@pytest.mark.mq_embeddings
+def test_embed_query(mock_mq_client):
+    embeddings = MQEmbeddings(mq=mock_mq_client)
+    
+    text = "how much protein should a female eat"
+    
+    loop = asyncio.get_event_loop()
+    mock_mq_client.event_loop = loop
+    mock_mq_client.send_request.return_value = {"results": [[0.1, 0.2, 0.3]]}
+    result = embeddings.embed_query(text=text)
+
+    assert result == [0.1, 0.2, 0.3]
+
+    mock_mq_client.send_request.assert_called_once_with(embeddings.topic, {"texts": [text], "encoding": embeddings.encoding}, embeddings.consume_topic)
+
+
+@pytest.mark.asyncio
+@pytest.mark.mq_embeddings
+async def test_aembed_documents(mock_mq_client):
+    embeddings = MQEmbeddings(mq=mock_mq_client)
+    
+    texts = [
+        "how much protein should a female eat",
+    ]
+    
+    mock_mq_client.send_request.return_value = {"results": [[0.1, 0.2, 0.3]]}
+    results = await embeddings.aembed_documents(texts=texts)
+
+    assert len(results) == 1
+    assert results == [[0.1, 0.2, 0.3]]
+
+    mock_mq_client.send_request.assert_called_once_with(embeddings.topic, {"texts": texts, "encoding": embeddings.encoding}, embeddings.consume_topic)
+
+
+@pytest.mark.asyncio
+@pytest.mark.mq_embeddings
+async def test_aembed_query(mock_mq_client):
+    embeddings = MQEmbeddings(mq=mock_mq_client)
+    
+    text = "how much protein should a female eat"
+    
+    loop = asyncio.get_event_loop()
+    mock_mq_client.event_loop = loop
+    mock_mq_client.send_request.return_value = {"results": [[0.1, 0.2, 0.3]]}
+    result = await embeddings.aembed_query(text=text)
+
+    assert result == [0.1, 0.2, 0.3]
+
+    mock_mq_client.send_request.assert_called_once_with(embeddings.topic, {"texts": [text], "encoding": embeddings.encoding}, embeddings.consume_topic)
+
+
+@pytest.mark.asyncio
+@pytest.mark.mq_embeddings
+async def test_aembed_documents_binary_encoding(mock_mq_client):
+    embeddings = MQEmbeddings(mq=mock_mq_client, encoding="float16")
+    
+    texts = [
+        "how much protein should a female eat",
+        "how much protein should a male eat",
+    ]
+    vectors = [[0.5, 0.25, -1.0], [0.125, 2.0, 0.0]]
+    
+    mock_mq_client.send_request.return_value = {
+        "encoding": "float16",
+        "data": base64.b64encode(np.asarray(vectors, dtype="<f2").tobytes()).decode("ascii"),
+        "shape": [2, 3],
+    }
+    results = await embeddings.aembed_documents(texts=texts)
+
+    assert results == vectors
+    assert all(isinstance(value, float) for value in results[0])
+
+    mock_mq_client.send_request.assert_called_once_with(embeddings.topic, {"texts": texts, "encoding": "float16"}, embeddings.consume_topic)
+
+
+@pytest.mark.asyncio
+@pytest.mark.mq_embeddings
+async def test_aembed_documents_fallback_json_results(mock_mq_client):
+    embeddings = MQEmbeddings(mq=mock_mq_client, encoding="float32")
+    
+    mock_mq_client.send_request.return_value = {"results": [[0.1, 0.2, 0.3]]}
+    results = await embeddings.aembed_documents(texts=["how much protein should a female eat"])
+
+    assert results == [[0.1, 0.2, 0.3]]
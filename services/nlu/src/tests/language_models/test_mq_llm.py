@@ -2,8 +2,11 @@ import asyncio
 import threading
 
 import pytest
+from mq.common.exception import Error, ErrorCode
+from mq_client import StreamInterruptedError
 
 from language_models.mq_llm import MQLanguageModel
+from language_models.response_cache import ResponseCache
 
 
 @pytest.mark.mq_llm
@@ -89,3 +92,128 @@ async def test__acall_got_none_result(mock_mq_client):
 
     assert isinstance(results, str)
     assert results == "test fallback"
+
+
+def mock_stream(messages, error=None):
+    async def stream_request(topic, payload, destination):
+        for message in messages:
+            yield message
+        if error is not None:
+            raise error
+    return stream_request
+
+
+@pytest.mark.asyncio
+@pytest.mark.mq_llm
+async def test__astream(mock_mq_client):
+    llm = MQLanguageModel(mq=mock_mq_client)
+    prompt = "You are a helpful assistant. Answer all questions to the best of your ability.\\nHuman: สวัสดี"
+
+    mock_mq_client.stream_request.side_effect = mock_stream([
+        {"results": "สวัสดีค่ะ ", "seq": 0, "done": False},
+        {"results": "ฉันชื่อจินตนา", "seq": 1, "done": False},
+        {"results": "", "seq": 2, "done": True},
+    ])
+    chunks = [chunk async for chunk in llm.astream(prompt)]
+
+    assert chunks == ["สวัสดีค่ะ ", "ฉันชื่อจินตนา"]
+    mock_mq_client.stream_request.assert_called_once_with(llm.topic, {"text": prompt, "stream": True}, llm.consume_topic)
+
+
+@pytest.mark.asyncio
+@pytest.mark.mq_llm
+async def test__astream_got_empty_result(mock_mq_client):
+    llm = MQLanguageModel(mq=mock_mq_client, fallback_message="test fallback")
+
+    mock_mq_client.stream_request.side_effect = mock_stream([{"results": "", "seq": 0, "done": True}])
+    chunks = [chunk async for chunk in llm.astream("prompt")]
+
+    assert chunks == ["test fallback"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.mq_llm
+async def test__astream_interrupted(mock_mq_client):
+    llm = MQLanguageModel(mq=mock_mq_client, fallback_message="test fallback")
+    error = StreamInterruptedError(Error(code=ErrorCode.STREAM_INTERRUPTED, detail="connection reset"))
+
+    mock_mq_client.stream_request.side_effect = mock_stream([{"results": "สวัสดีค่ะ ", "seq": 0, "done": False}], error)
+    assert [chunk async for chunk in llm.astream("prompt")] == ["สวัสดีค่ะ "]
+
+    # Nothing was generated before the interruption
+    mock_mq_client.stream_request.side_effect = mock_stream([], error)
+    assert [chunk async for chunk in llm.astream("prompt")] == ["test fallback"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.mq_llm
+async def test__acall_with_cache(mock_mq_client):
+    llm = MQLanguageModel(mq=mock_mq_client, cache=ResponseCache())
+    prompt = "You are a helpful assistant. Answer all questions to the best of your ability.\\nHuman: สวัสดี"
+
+    mock_mq_client.send_request.return_value = {"results": "สวัสดีค่ะ"}
+    assert await llm._acall(prompt=prompt) == "สวัสดีค่ะ"
+    assert await llm._acall(prompt=prompt) == "สวัสดีค่ะ"
+
+    mock_mq_client.send_request.assert_called_once()
+    assert llm.cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.mq_llm
+async def test__acall_with_cache_skip_none_result(mock_mq_client):
+    llm = MQLanguageModel(mq=mock_mq_client, cache=ResponseCache(), fallback_message="test fallback")
+
+    mock_mq_client.send_request.return_value = {"results": None}
+    assert await llm._acall(prompt="prompt") == "test fallback"
+    assert await llm._acall(prompt="prompt") == "test fallback"
+
+    assert mock_mq_client.send_request.call_count == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.mq_llm
+async def test__astream_with_cache(mock_mq_client):
+    llm = MQLanguageModel(mq=mock_mq_client, cache=ResponseCache())
+
+    mock_mq_client.stream_request.side_effect = mock_stream([
+        {"results": "สวัสดีค่ะ ", "seq": 0, "done": False},
+        {"results": "ฉันชื่อจินตนา", "seq": 1, "done": False},
+        {"results": "", "seq": 2, "done": True},
+    ])
+    assert [chunk async for chunk in llm.astream("prompt")] == ["สวัสดีค่ะ ", "ฉันชื่อจินตนา"]
+    assert [chunk async for chunk in llm.astream("prompt")] == ["สวัสดีค่ะ ฉันชื่อจินตนา"]
+
+    mock_mq_client.stream_request.assert_called_once()
+
+
+@pytest.mark.asyncio
+@pytest.mark.mq_llm
+async def test__astream_with_cache_skip_interrupted_stream(mock_mq_client):
+    llm = MQLanguageModel(mq=mock_mq_client, cache=ResponseCache())
+    error = StreamInterruptedError(Error(code=ErrorCode.STREAM_INTERRUPTED, detail="connection reset"))
+
+    mock_mq_client.stream_request.side_effect = mock_stream([{"results": "สวัสดีค่ะ ", "seq": 0, "done": False}], error)
+    assert [chunk async for chunk in llm.astream("prompt")] == ["สวัสดีค่ะ "]
+
+    mock_mq_client.stream_request.side_effect = mock_stream([
+        {"results": "สวัสดีค่ะ ", "seq": 0, "done": False},
+        {"results": "ฉันชื่อจินตนา", "seq": 1, "done": False},
+        {"results": "", "seq": 2, "done": True},
+    ])
+    assert [chunk async for chunk in llm.astream("prompt")] == ["สวัสดีค่ะ ", "ฉันชื่อจินตนา"]
+    assert mock_mq_client.stream_request.call_count == 2
+    assert llm.cache.stats()["hits"] == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.mq_llm
+async def test__astream_with_stateless_mq_client(mock_mq_client):
+    llm = MQLanguageModel(mq=mock_mq_client)
+    mock_mq_client.can_stream = False
+    mock_mq_client.send_request.return_value = {"results": "สวัสดีค่ะ ฉันชื่อจินตนา"}
+
+    chunks = [chunk async for chunk in llm.astream("prompt")]
+
+    assert chunks == ["สวัสดีค่ะ ฉันชื่อจินตนา"]
+    mock_mq_client.stream_request.assert_not_called()
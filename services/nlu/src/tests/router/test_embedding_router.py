@@ -0,0 +1,107 @@
+import pytest
+from langchain_core.messages import HumanMessage
+
+from router.embedding_router import EmbeddingRouter, create_fast_supervisor
+
+MEMBERS = [
+    {"name": "Account Expert", "role": "Answer the question about accounts", "examples": ["FCD คืออะไร"]},
+    {"name": "General Handler", "role": "Answer any questions about others"},
+]
+
+VECTORS = {
+    "Answer the question about accounts": [1.0, 0.0, 0.0],
+    "FCD คืออะไร": [0.0, 1.0, 0.0],
+    "Answer any questions about others": [0.0, 0.0, 1.0],
+    "FCD ย่อมาจากอะไร": [0.1, 0.9, 0.0],
+    "สวัสดี": [0.0, 0.1, 0.9],
+    "ก็ได้": [0.5, 0.0, 0.5],
+}
+
+
+@pytest.fixture
+def router(mock_mq_embeddings):
+    mock_mq_embeddings.embed_documents.side_effect = lambda texts: [VECTORS[text] for text in texts]
+    mock_mq_embeddings.embed_query.side_effect = lambda text: VECTORS[text]
+
+    async def aembed_documents(texts):
+        return [VECTORS[text] for text in texts]
+
+    async def aembed_query(text):
+        return VECTORS[text]
+    mock_mq_embeddings.aembed_documents.side_effect = aembed_documents
+    mock_mq_embeddings.aembed_query.side_effect = aembed_query
+    return EmbeddingRouter(MEMBERS, mock_mq_embeddings, threshold=0.6, margin=0.05)
+
+
+@pytest.mark.router
+def test_embedding_router_score_best_utterance(router):
+    name, score = router.route("FCD ย่อมาจากอะไร")
+
+    assert name == "Account Expert"
+    assert score == pytest.approx(0.9 / (0.1 ** 2 + 0.9 ** 2) ** 0.5)
+    # Role and examples are embedded once, only the query is embedded afterwards
+    router.route("สวัสดี")
+    router.embeddings.embed_documents.assert_called_once_with([
+        "Answer the question about accounts",
+        "FCD คืออะไร",
+        "Answer any questions about others",
+    ])
+
+
+@pytest.mark.router
+def test_embedding_router_not_confident(router):
+    # Ambiguous between both members, the lead is below margin
+    assert router.route("ก็ได้")[0] is None
+
+    router.threshold = 0.999
+    assert router.route("FCD ย่อมาจากอะไร")[0] is None
+
+
+@pytest.mark.router
+def test_fast_supervisor_skip_llm_supervisor(router, mock_agent):
+    supervisor = create_fast_supervisor(router, mock_agent)
+
+    result = supervisor.invoke({"messages": [HumanMessage(content="สวัสดี")]})
+
+    assert result == {"next": "General Handler"}
+    mock_agent.invoke.assert_not_called()
+
+
+@pytest.mark.asyncio
+@pytest.mark.router
+async def test_fast_supervisor_fallback_to_llm_supervisor(router, mock_agent):
+    supervisor = create_fast_supervisor(router, mock_agent)
+    state = {"messages": [HumanMessage(content="ก็ได้")]}
+
+    async def ainvoke(state, config=None):
+        return {"next": "Account Expert"}
+    mock_agent.ainvoke.side_effect = ainvoke
+
+    assert await supervisor.ainvoke(state) == {"next": "Account Expert"}
+    assert mock_agent.ainvoke.call_args.args[0] == state
+
+
+@pytest.mark.asyncio
+@pytest.mark.router
+async def test_fast_supervisor_fallback_on_embedding_error(router, mock_agent):
+    supervisor = create_fast_supervisor(router, mock_agent)
+    router.embeddings.aembed_documents.side_effect = TimeoutError("vector service timeout")
+
+    async def ainvoke(state, config=None):
+        return {"next": "General Handler"}
+    mock_agent.ainvoke.side_effect = ainvoke
+
+    assert await supervisor.ainvoke({"messages": [HumanMessage(content="สวัสดี")]}) == {"next": "General Handler"}
+
+
+@pytest.mark.router
+def test_fast_supervisor_fan_out_when_not_confident(router, mock_agent):
+    supervisor = create_fast_supervisor(router, mock_agent, fanout_top_k=2)
+
+    result = supervisor.invoke({"messages": [HumanMessage(content="ก็ได้")]})
+
+    assert result["next"] == "fanout"
+    assert sorted(result["candidates"]) == ["Account Expert", "General Handler"]
+    mock_agent.invoke.assert_not_called()
+    # A confident route still goes to a single adapter
+    assert supervisor.invoke({"messages": [HumanMessage(content="สวัสดี")]}) == {"next": "General Handler"}
@@ -1,9 +1,23 @@
+import asyncio
+import time
+
 import pytest
+from httpx import ConnectError
 from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import Runnable
 
 from common.agent_state import AgentState
+from router import graph as graph_module
 from router.adapter_selecter import get_agent
-from router.graph import agent_node
+from router.graph import (
+    DEFAULT_FALLBACK_MESSAGE,
+    FANOUT_NODE,
+    aagent_node,
+    afanout_node,
+    agent_node,
+    create_routing_graph,
+    fanout_node,
+)
 
 
 @pytest.mark.router
@@ -61,3 +75,207 @@ def test_agent_node(mock_agent):
     assert isinstance(result["messages"], list)
     assert result == {"messages": [HumanMessage(content="FCD ย่อมาจาก เงินฝากสกุลเงินต่างประเทศ", name=name)]}
 
+
+
+async def mock_astream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.mark.asyncio
+@pytest.mark.router
+async def test_aagent_node_stream(mock_agent):
+    name = "Account Expert"
+    state = AgentState(messages=[HumanMessage(content="FCD คืออะไร")], next=name)
+    mock_agent.astream.return_value = mock_astream("FCD ย่อมาจาก ", "เงินฝากสกุลเงินต่างประเทศ")
+    streamed = []
+
+    async def stream_handler(chunk):
+        streamed.append(chunk)
+
+    result = await aagent_node(state, mock_agent, name, config={"configurable": {"stream_handler": stream_handler}})
+
+    assert streamed == ["FCD ย่อมาจาก ", "เงินฝากสกุลเงินต่างประเทศ"]
+    assert result == {"messages": [HumanMessage(content="FCD ย่อมาจาก เงินฝากสกุลเงินต่างประเทศ", name=name)]}
+
+
+async def mock_failed_astream(*chunks):
+    for chunk in chunks:
+        yield chunk
+    raise ConnectError("connection refused")
+
+
+@pytest.mark.asyncio
+@pytest.mark.router
+async def test_aagent_node_stream_retry_before_first_chunk(mock_agent, monkeypatch):
+    monkeypatch.setattr(graph_module, "AGENT_RETRY_DELAY", 0)
+    name = "Account Expert"
+    state = AgentState(messages=[HumanMessage(content="FCD คืออะไร")], next=name)
+    streamed = []
+
+    async def stream_handler(chunk):
+        streamed.append(chunk)
+
+    # Failed before the first chunk, retried
+    mock_agent.astream.side_effect = [mock_failed_astream(), mock_astream("FCD ย่อมาจาก ", "เงินฝากสกุลเงินต่างประเทศ")]
+    result = await aagent_node(state, mock_agent, name, config={"configurable": {"stream_handler": stream_handler}})
+
+    assert mock_agent.astream.call_count == 2
+    assert streamed == ["FCD ย่อมาจาก ", "เงินฝากสกุลเงินต่างประเทศ"]
+    assert result == {"messages": [HumanMessage(content="FCD ย่อมาจาก เงินฝากสกุลเงินต่างประเทศ", name=name)]}
+
+    # Failed after the first chunk, the sent chunks are not streamed again
+    streamed.clear()
+    mock_agent.astream.reset_mock()
+    mock_agent.astream.side_effect = [mock_failed_astream("FCD ย่อมาจาก ")]
+    result = await aagent_node(state, mock_agent, name, config={"configurable": {"stream_handler": stream_handler}})
+
+    mock_agent.astream.assert_called_once()
+    assert streamed == ["FCD ย่อมาจาก "]
+    assert result == {"messages": [HumanMessage(content="FCD ย่อมาจาก ", name=name)]}
+
+
+@pytest.mark.asyncio
+@pytest.mark.router
+async def test_aagent_node_stream_fallback(mock_agent, monkeypatch):
+    monkeypatch.setattr(graph_module, "AGENT_RETRY_DELAY", 0)
+    state = AgentState(messages=[HumanMessage(content="FCD คืออะไร")], next="Account Expert")
+    mock_agent.astream.side_effect = lambda state: mock_failed_astream()
+    streamed = []
+
+    async def stream_handler(chunk):
+        streamed.append(chunk)
+
+    result = await aagent_node(state, mock_agent, "Account Expert", config={"configurable": {"stream_handler": stream_handler}})
+
+    assert mock_agent.astream.call_count == graph_module.AGENT_MAX_RETRIES
+    assert streamed == [DEFAULT_FALLBACK_MESSAGE]
+    assert result == {"messages": [HumanMessage(content=DEFAULT_FALLBACK_MESSAGE)]}
+
+
+@pytest.mark.asyncio
+@pytest.mark.router
+async def test_routing_graph_stream_adapter_answer(mocker):
+    agent = mocker.Mock(spec=Runnable)
+    agent.astream.return_value = mock_astream("FCD ย่อมาจาก ", "เงินฝากสกุลเงินต่างประเทศ")
+    graph = create_routing_graph({"Account Expert": agent}, lambda state: {"next": "Account Expert"})
+    streamed = []
+
+    async def stream_handler(chunk):
+        streamed.append(chunk)
+
+    result = await graph.ainvoke(
+        {"messages": [HumanMessage(content="FCD คืออะไร")]},
+        config={"configurable": {"stream_handler": stream_handler}},
+    )
+
+    assert streamed == ["FCD ย่อมาจาก ", "เงินฝากสกุลเงินต่างประเทศ"]
+    assert result["messages"][-1].content == "FCD ย่อมาจาก เงินฝากสกุลเงินต่างประเทศ"
+    agent.invoke.assert_not_called()
+
+
+def mock_adapter(mocker, answer, delay=0.0):
+    adapter = mocker.Mock(spec=Runnable)
+
+    async def ainvoke(state):
+        await asyncio.sleep(delay)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    def invoke(state):
+        time.sleep(delay)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+    adapter.ainvoke.side_effect = ainvoke
+    adapter.invoke.side_effect = invoke
+    return adapter
+
+
+@pytest.mark.asyncio
+@pytest.mark.router
+async def test_afanout_node_run_branches_in_parallel(mocker):
+    adapters = {
+        "Account Expert": mock_adapter(mocker, "FCD ย่อมาจาก เงินฝากสกุลเงินต่างประเทศ", delay=0.2),
+        "General Handler": mock_adapter(mocker, "สวัสดีค่ะ", delay=0.2),
+    }
+    state = {"messages": [HumanMessage(content="FCD คืออะไร")], "candidates": ["Account Expert", "General Handler"]}
+
+    start_time = time.perf_counter()
+    result = await afanout_node(state, adapters, deadline=5, config={})
+
+    # Both branches were waited together, not one after another
+    assert time.perf_counter() - start_time < 0.35
+    assert result == {"messages": [HumanMessage(content="FCD ย่อมาจาก เงินฝากสกุลเงินต่างประเทศ", name="Account Expert")]}
+
+
+@pytest.mark.asyncio
+@pytest.mark.router
+async def test_afanout_node_cancel_branches_past_deadline(mocker):
+    slow = mock_adapter(mocker, "FCD ย่อมาจาก เงินฝากสกุลเงินต่างประเทศ", delay=5)
+    adapters = {"Account Expert": slow, "General Handler": mock_adapter(mocker, "สวัสดีค่ะ", delay=0.05)}
+    state = {"messages": [HumanMessage(content="FCD คืออะไร")], "candidates": ["Account Expert", "General Handler"]}
+
+    start_time = time.perf_counter()
+    result = await afanout_node(state, adapters, deadline=0.3, config={})
+
+    assert time.perf_counter() - start_time < 1
+    assert result == {"messages": [HumanMessage(content="สวัสดีค่ะ", name="General Handler")]}
+    # The slow branch was cancelled, not left running in the background
+    await asyncio.sleep(0)
+    assert [task for task in asyncio.all_tasks() if task is not asyncio.current_task()] == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.router
+async def test_afanout_node_skip_branches_without_answer(mocker):
+    adapters = {
+        "Account Expert": mock_adapter(mocker, DEFAULT_FALLBACK_MESSAGE),
+        "Loan Expert": mock_adapter(mocker, TimeoutError("adapter timeout")),
+        "General Handler": mock_adapter(mocker, "สวัสดีค่ะ", delay=0.05),
+    }
+    state = {"messages": [HumanMessage(content="สวัสดี")], "candidates": list(adapters)}
+    streamed = []
+
+    async def stream_handler(chunk):
+        streamed.append(chunk)
+
+    result = await afanout_node(state, adapters, deadline=5, config={"configurable": {"stream_handler": stream_handler}})
+
+    assert result == {"messages": [HumanMessage(content="สวัสดีค่ะ", name="General Handler")]}
+    assert streamed == ["สวัสดีค่ะ"]
+
+    adapters["General Handler"] = mock_adapter(mocker, ValueError("bad response"))
+    result = await afanout_node(state, adapters, deadline=5, config={})
+    assert result == {"messages": [HumanMessage(content=DEFAULT_FALLBACK_MESSAGE)]}
+
+
+@pytest.mark.router
+def test_fanout_node_prefer_better_ranked_branch(mocker):
+    adapters = {
+        "Account Expert": mock_adapter(mocker, "FCD ย่อมาจาก เงินฝากสกุลเงินต่างประเทศ", delay=0.1),
+        "General Handler": mock_adapter(mocker, "สวัสดีค่ะ"),
+    }
+    state = {"messages": [HumanMessage(content="FCD คืออะไร")], "candidates": ["Account Expert", "General Handler"]}
+
+    result = fanout_node(state, adapters, deadline=5)
+
+    assert result == {"messages": [HumanMessage(content="FCD ย่อมาจาก เงินฝากสกุลเงินต่างประเทศ", name="Account Expert")]}
+
+
+@pytest.mark.asyncio
+@pytest.mark.router
+async def test_routing_graph_fan_out(mocker):
+    adapters = {
+        "Account Expert": mock_adapter(mocker, "FCD ย่อมาจาก เงินฝากสกุลเงินต่างประเทศ"),
+        "General Handler": mock_adapter(mocker, "สวัสดีค่ะ"),
+    }
+    supervisor = lambda state: {"next": FANOUT_NODE, "candidates": ["General Handler", "Account Expert"]}
+    graph = create_routing_graph(adapters, supervisor, fanout_deadline=5)
+
+    result = await graph.ainvoke({"messages": [HumanMessage(content="สวัสดี")]})
+
+    assert result["messages"][-1] == HumanMessage(content="สวัสดีค่ะ", name="General Handler")
+    adapters["Account Expert"].ainvoke.assert_called_once()
+    adapters["General Handler"].astream.assert_not_called()
@@ -0,0 +1,65 @@
+"""
+Accuracy and throughput of the onnx vector backend (fp32 and int8) against the torch backend.
+
+Example:
+    python scripts/benchmark/vector_backend.py --model intfloat/multilingual-e5-small \
+        --dataset ../../data/web_account/data/all_data.jsonl
+
+Accuracy is the cosine similarity of each text's vector with the torch vector of the same text.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "src"))
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from internal.infra.ml import OnnxVectorModel, VectorModel  # noqa: E402
+from vector_batching import read_texts  # noqa: E402
+
+
+def cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="intfloat/multilingual-e5-small", help="sentence transformer path")
+    parser.add_argument("--dataset", default="../../data/web_account/data/all_data.jsonl", help="jsonl dataset")
+    parser.add_argument("--onnx-path", default="resources/onnx", help="VECTOR_ONNX_PATH")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per backend, best is reported")
+    args = parser.parse_args()
+
+    texts = read_texts(args.dataset)
+    common = dict(model_path=args.model, model_batch_size=32, model_max_characters=8192)
+    backends = {
+        "torch": VectorModel(**common),
+        "onnx": OnnxVectorModel(**common, onnx_path=args.onnx_path),
+        "onnx-int8": OnnxVectorModel(**common, onnx_path=args.onnx_path, onnx_quantize=True),
+    }
+
+    print(f"texts={len(texts)}")
+    print(f"{'backend':<12}{'seconds':>10}{'texts/s':>10}{'speedup':>10}{'cos min':>10}{'cos mean':>10}")
+    reference, baseline = None, None
+    for name, model in backends.items():
+        vectors = np.asarray(model.process(texts))
+        elapsed = float("inf")
+        for _ in range(args.repeat):
+            start_time = time.perf_counter()
+            model.process(texts)
+            elapsed = min(elapsed, time.perf_counter() - start_time)
+
+        if reference is None:
+            reference, baseline = vectors, elapsed
+        similarity = cosine(vectors, reference)
+        print(
+            f"{name:<12}{elapsed:>10.2f}{len(texts) / elapsed:>10.1f}{baseline / elapsed:>10.2f}"
+            f"{similarity.min():>10.4f}{similarity.mean():>10.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
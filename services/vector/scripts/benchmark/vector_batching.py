@@ -0,0 +1,101 @@
+"""
+Benchmark for VectorModel batching, compares arrival-order fixed batches with length-bucketed token-budget batches.
+
+Example:
+    python scripts/benchmark/vector_batching.py --model intfloat/multilingual-e5-small \
+        --dataset ../../data/web_account/data/all_data.jsonl
+
+Texts are built the same way data-prep indexes a dataset (one text per field line plus one text per document),
+then shuffled so short and long texts arrive mixed.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "src"))
+
+from internal.infra.ml import VectorModel  # noqa: E402
+
+
+def read_texts(path: str) -> List[str]:
+    texts = []
+    with open(path) as f:
+        for line in f:
+            doc = json.loads(line)
+            text = ""
+            for field, values in doc.items():
+                if field == "doc_id":
+                    continue
+                values = values if isinstance(values, list) else [values]
+                texts.extend(values)
+                text += field.upper() + ": " + ", ".join(values) + " -- "
+            texts.append(text)
+    return texts
+
+
+def process_fixed(model: VectorModel, texts: List[str]) -> List[List[float]]:
+    # Previous behaviour: arrival-order chunks of model_batch_size
+    vectors = []
+    for i in range(0, len(texts), model.model_batch_size):
+        chunk = [text[:model.model_max_characters] for text in texts[i:i+model.model_batch_size]]
+        vectors.extend(model.model.encode(chunk, batch_size=len(chunk)))
+    return vectors
+
+
+def padded_tokens(model: VectorModel, texts: List[str], batches: List[List[int]]) -> int:
+    lengths = model._token_lengths(texts)
+    return sum(len(batch) * max(lengths[i] for i in batch) for batch in batches)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="intfloat/multilingual-e5-small", help="sentence transformer path")
+    parser.add_argument("--dataset", default="../../data/web_account/data/all_data.jsonl", help="jsonl dataset")
+    parser.add_argument("--batch-size", type=int, default=32, help="VECTOR_BATCH_SIZE")
+    parser.add_argument("--max-tokens", type=int, default=512, help="VECTOR_MAX_TOKENS")
+    parser.add_argument("--token-budget", type=int, default=8192, help="VECTOR_TOKEN_BUDGET")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per strategy, best is reported")
+    args = parser.parse_args()
+
+    texts = read_texts(args.dataset)
+    random.Random(0).shuffle(texts)
+
+    model = VectorModel(
+        model_path=args.model,
+        model_batch_size=args.batch_size,
+        model_max_characters=8192,
+        model_max_tokens=args.max_tokens,
+        model_token_budget=args.token_budget,
+    )
+    fixed_batches = [list(range(i, min(i + args.batch_size, len(texts)))) for i in range(0, len(texts), args.batch_size)]
+    bucketed_batches = model._make_batches(texts)
+    real_tokens = sum(model._token_lengths(texts))
+
+    strategies = {
+        "fixed": (lambda: process_fixed(model, texts), fixed_batches),
+        "bucketed": (lambda: model._process(texts), bucketed_batches),
+    }
+
+    print(f"texts={len(texts)} tokens={real_tokens} batch_size={args.batch_size} token_budget={args.token_budget}")
+    print(f"{'strategy':<12}{'batches':>10}{'padded tokens':>16}{'padding %':>12}{'seconds':>10}{'texts/s':>10}")
+    for name, (process, batches) in strategies.items():
+        process()
+        elapsed = float("inf")
+        for _ in range(args.repeat):
+            start_time = time.perf_counter()
+            process()
+            elapsed = min(elapsed, time.perf_counter() - start_time)
+        padded = padded_tokens(model, texts, batches)
+        print(
+            f"{name:<12}{len(batches):>10}{padded:>16}"
+            f"{(padded - real_tokens) / padded * 100:>11.1f}%"
+            f"{elapsed:>10.2f}{len(texts) / elapsed:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Micro-benchmark for vector-response payload encodings, reports bytes on the wire and encode/decode time.
+
+Example:
+    python scripts/benchmark/vector_encoding.py --texts 32 --dim 1024 --repeat 200
+
+Encode covers what the vector service publishes, decode covers what the adapter does before handing lists to LangChain.
+"""
+import argparse
+import base64
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "src"))
+
+from common.util import decode_vectors, encode_vectors  # noqa: E402
+
+
+def measure(fn: Callable[[], object], repeat: int) -> float:
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start_time) / repeat * 1000
+
+
+def json_payload(vectors: List[List[float]], **kwargs) -> bytes:
+    return json.dumps({"results": vectors}, **kwargs).encode("utf-8")
+
+
+def binary_payload(vectors: List[List[float]], encoding: str) -> bytes:
+    data, shape = encode_vectors(vectors, encoding)
+    return json.dumps({"encoding": encoding, "data": data, "shape": shape}, separators=(",", ":")).encode("utf-8")
+
+
+def decode_binary_payload(payload: bytes) -> List[List[float]]:
+    message = json.loads(payload)
+    return decode_vectors(message["data"], message["shape"], message["encoding"]).astype(np.float32, copy=False).tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=32, help="vectors per response")
+    parser.add_argument("--dim", type=int, default=1024, help="vector dimension")
+    parser.add_argument("--repeat", type=int, default=200, help="iterations per measurement")
+    args = parser.parse_args()
+
+    # Normalized float32 embeddings, same as the model output
+    vectors = np.random.default_rng(0).standard_normal((args.texts, args.dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors.tolist()
+
+    cases = {
+        "json (compact)": (
+            lambda: json_payload(vectors, separators=(",", ":")),
+            lambda payload: json.loads(payload)["results"],
+        ),
+        "float32": (lambda: binary_payload(vectors, "float32"), decode_binary_payload),
+        "float16": (lambda: binary_payload(vectors, "float16"), decode_binary_payload),
+    }
+
+    print(f"texts={args.texts} dim={args.dim} repeat={args.repeat}")
+    print(f"{'encoding':<16}{'bytes':>12}{'encode ms':>12}{'decode ms':>12}{'max abs err':>14}")
+    for name, (encode, decode) in cases.items():
+        payload = encode()
+        error = np.max(np.abs(np.asarray(decode(payload)) - np.asarray(vectors)))
+        print(
+            f"{name:<16}{len(payload):>12}"
+            f"{measure(encode, args.repeat):>12.3f}"
+            f"{measure(lambda: decode(payload), args.repeat):>12.3f}"
+            f"{error:>14.2e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
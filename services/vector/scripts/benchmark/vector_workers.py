@@ -0,0 +1,60 @@
+"""
+Scaling benchmark for VECTOR_WORKERS, encodes the same texts with 1 to N model worker processes.
+
+Example:
+    python scripts/benchmark/vector_workers.py --model intfloat/multilingual-e5-small --max-workers 8
+
+Texts come from an indexing dataset repeated --repeat times, like a bulk data-prep request.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "src"))
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from internal.infra.ml import VectorModel, VectorModelPool  # noqa: E402
+from vector_batching import read_texts  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="intfloat/multilingual-e5-small", help="sentence transformer path")
+    parser.add_argument("--dataset", default="../../data/web_account/data/all_data.jsonl", help="jsonl dataset")
+    parser.add_argument("--repeat", type=int, default=4, help="times the dataset is repeated")
+    parser.add_argument("--max-workers", type=int, default=4, help="largest VECTOR_WORKERS to try")
+    parser.add_argument("--batch-size", type=int, default=32, help="VECTOR_BATCH_SIZE")
+    args = parser.parse_args()
+
+    texts = read_texts(args.dataset) * args.repeat
+
+    # Loaded once, every pool forks from this process
+    model = VectorModel(
+        model_path=args.model,
+        model_batch_size=args.batch_size,
+        model_max_characters=8192,
+    )
+
+    print(f"texts={len(texts)}")
+    print(f"{'workers':>8}{'seconds':>10}{'texts/s':>10}{'speedup':>10}")
+    baseline, reference = None, None
+    for workers in range(1, args.max_workers + 1):
+        pool = VectorModelPool(vector_model=model, workers=workers)
+        pool.process(texts[:workers * 8])
+
+        start_time = time.perf_counter()
+        vectors = np.asarray(pool.process(texts))
+        elapsed = time.perf_counter() - start_time
+        pool.close()
+
+        if reference is None:
+            baseline, reference = elapsed, vectors
+        assert np.allclose(vectors, reference, atol=1e-4), "worker results differ from 1 worker"
+        print(f"{workers:>8}{elapsed:>10.2f}{len(texts) / elapsed:>10.1f}{baseline / elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -25,11 +25,27 @@ class Configs(BaseSettings):
     mq_consumer_offset_reset: Optional[str] = "earliest"
     mq_consumer_max_batch_size: Optional[int] = 20
     mq_consumer_consume_timeout: Optional[float] = 1
+    mq_consumer_batch_wait_ms: Optional[float] = 10
+    mq_consumer_batch_max_texts: Optional[int] = 128
     mq_consumer_topic: Optional[str] = "vector-request"
     mq_producer_topic: Optional[str] = "vector-response"
+    mq_producer_linger_ms: Optional[int] = 5
+    mq_producer_batch_size: Optional[int] = 10000
+    mq_producer_max_in_flight: Optional[int] = 1000
     mq_error_topic: Optional[str] = "error-queue"
+    mq_pipeline_queue_size: Optional[int] = 4
+    mq_pipeline_commit_interval: Optional[float] = 1.0
 
     # Vector Model Configuration
     vector_model_path: str
+    vector_backend: Optional[Literal["torch", "onnx"]] = "torch"
+    vector_onnx_path: Optional[str] = "resources/onnx"
+    vector_onnx_quantize: Optional[bool] = False
     vector_batch_size: Optional[int] = 32
-    vector_max_characters: Optional[int] = 500
+    vector_max_characters: Optional[int] = 8192
+    vector_max_tokens: Optional[int] = 512
+    vector_token_budget: Optional[int] = 8192
+    vector_workers: Optional[int] = 1
+    vector_worker_threads: Optional[int] = 0
+    vector_cache_max_size: Optional[int] = 10000
+    vector_cache_ttl_seconds: Optional[float] = 3600
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Optional
 
 from client.config import Configs
 from common.data_mapper import IDataMapper
@@ -7,16 +8,19 @@ from common.log import Logger
 from internal.app.data_mapper import MQRequestDataMapper, MQResponseDataMapper
 from internal.app.external_service import IConsumerService, IProducerService
 from internal.app.service import IVectorApplicationService, VectorApplicationService
+from internal.domain.cache import IVectorCache
 from internal.domain.entity import VectorRequest, VectorResponse
 from internal.domain.ml import IVectorModel
 from internal.domain.service import IVectorService, VectorService
 from internal.infra.external_service import ConsumerService, ProducerService
-from internal.infra.ml import VectorModel
+from internal.infra.cache import LRUVectorCache
+from internal.infra.ml import CachedVectorModel, OnnxVectorModel, VectorModel, VectorModelPool
 
 
 @dataclass
 class DependencyService:
     producer_service: IProducerService
+    error_producer_service: IProducerService
     consumer_service: IConsumerService
     vector_service: IVectorService
     vector_app_service: IVectorApplicationService
@@ -30,6 +34,9 @@ def init_producer_service(
         mq_bootstrap_server=configs.mq_bootstrap_server,
         mq_log_level=configs.log_level_mq,
         mq_system_consumed_topic=configs.mq_consumer_topic,
+        mq_linger_ms=configs.mq_producer_linger_ms,
+        mq_batch_size=configs.mq_producer_batch_size,
+        mq_max_in_flight=configs.mq_producer_max_in_flight,
     )
 
 
@@ -41,6 +48,9 @@ def init_error_producer_service(
         mq_bootstrap_server=configs.mq_bootstrap_server,
         mq_log_level=configs.log_level_mq,
         mq_system_consumed_topic=configs.mq_consumer_topic,
+        mq_linger_ms=configs.mq_producer_linger_ms,
+        mq_batch_size=configs.mq_producer_batch_size,
+        mq_max_in_flight=configs.mq_producer_max_in_flight,
     )
 
 
@@ -56,6 +66,8 @@ def init_consumer_service(
         mq_max_batch_size=configs.mq_consumer_max_batch_size,
         mq_consume_timeout=configs.mq_consumer_consume_timeout,
         mq_log_level=configs.log_level_mq,
+        mq_batch_wait_ms=configs.mq_consumer_batch_wait_ms,
+        mq_batch_max_texts=configs.mq_consumer_batch_max_texts,
     )
 
 
@@ -92,11 +104,63 @@ def init_vector_service(
     )
 
 
-def init_vector_model(model_path: str, batch_size: int, max_characters: int) -> IVectorModel:
-    return VectorModel(
-        model_path=model_path,
-        model_batch_size=batch_size,
-        model_max_characters=max_characters,
+def init_vector_model(
+    model_path: str,
+    batch_size: int,
+    max_characters: int,
+    max_tokens: int,
+    token_budget: int,
+    backend: str = "torch",
+    onnx_path: str = "resources/onnx",
+    onnx_quantize: bool = False,
+) -> IVectorModel:
+    match backend:
+        case "torch":
+            return VectorModel(
+                model_path=model_path,
+                model_batch_size=batch_size,
+                model_max_characters=max_characters,
+                model_max_tokens=max_tokens,
+                model_token_budget=token_budget,
+            )
+        case "onnx":
+            return OnnxVectorModel(
+                model_path=model_path,
+                model_batch_size=batch_size,
+                model_max_characters=max_characters,
+                model_max_tokens=max_tokens,
+                model_token_budget=token_budget,
+                onnx_path=onnx_path,
+                onnx_quantize=onnx_quantize,
+            )
+        case _:
+            raise ValueError("Vector backend must be either 'torch' or 'onnx'.")
+
+
+def init_vector_model_pool(vector_model: IVectorModel, workers: int, worker_threads: int) -> IVectorModel:
+    if workers <= 1:
+        return vector_model
+    return VectorModelPool(
+        vector_model=vector_model,
+        workers=workers,
+        worker_threads=worker_threads,
+    )
+
+
+def init_cached_vector_model(
+    vector_model: IVectorModel,
+    namespace: str,
+    cache_max_size: int,
+    cache_ttl_seconds: float,
+    shared_cache: Optional[IVectorCache] = None,
+) -> IVectorModel:
+    if cache_max_size <= 0 and shared_cache is None:
+        return vector_model
+    return CachedVectorModel(
+        vector_model=vector_model,
+        cache=LRUVectorCache(max_size=cache_max_size, ttl_seconds=cache_ttl_seconds),
+        shared_cache=shared_cache,
+        namespace=namespace,
     )
 
 
@@ -117,6 +181,23 @@ def init_services(configs: Configs) -> DependencyService:
         model_path=configs.vector_model_path,
         batch_size=configs.vector_batch_size,
         max_characters=configs.vector_max_characters,
+        max_tokens=configs.vector_max_tokens,
+        token_budget=configs.vector_token_budget,
+        backend=configs.vector_backend,
+        onnx_path=configs.vector_onnx_path,
+        onnx_quantize=configs.vector_onnx_quantize,
+    )
+    vector_model = init_vector_model_pool(
+        vector_model=vector_model,
+        workers=configs.vector_workers,
+        worker_threads=configs.vector_worker_threads,
+    )
+    vector_model = init_cached_vector_model(
+        vector_model=vector_model,
+        namespace=f"{configs.vector_model_path}:{configs.vector_max_characters}:{configs.vector_max_tokens}:"
+                  f"{configs.vector_backend}:{configs.vector_onnx_quantize}",
+        cache_max_size=configs.vector_cache_max_size,
+        cache_ttl_seconds=configs.vector_cache_ttl_seconds,
     )
     vector_service = init_vector_service(
         vector_model=vector_model,
@@ -135,6 +216,7 @@ def init_services(configs: Configs) -> DependencyService:
 
     return DependencyService(
         producer_service=producer_service,
+        error_producer_service=error_producer_service,
         consumer_service=consumer_service,
         vector_service=vector_service,
         vector_app_service=vector_app_service,
@@ -0,0 +1,197 @@
+import queue
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Protocol, Tuple
+
+from common.log import Logger
+from internal.app.external_service import IConsumerService, IProducerService
+
+
+class IPipelineApplicationService(Protocol):
+    """The part of the vector and LLM application services the pipeline drives."""
+    def process_queue(self, payloads: List[Any]) -> List[Any]: ...
+
+    def publish_queue(self, mq_messages: List[Any]): ...
+
+
+class MQPipeline:
+    """
+    Runs consume/decode, inference and publish/commit as separate stages connected by bounded queues,
+    so the model keeps working while the next batch is fetched and the previous one is delivered.
+    Offsets are committed only after the messages of a batch have been published and flushed, at most every
+    commit_interval seconds once commit_count batches are waiting, so the producers are not flushed per batch.
+    A batch that fails to publish is retried publish_retries times before the pipeline stops, and a failed
+    delivery stops it too, both without committing so the messages are consumed again on restart.
+    With several inference workers, batches may finish out of order but are still published in fetch order.
+
+    The same file is used by the vector and LLM services, keep both copies identical.
+    """
+    def __init__(
+        self,
+        consumer_service: IConsumerService,
+        app_service: IPipelineApplicationService,
+        producer_services: List[IProducerService],
+        commit_count: int = 1,
+        commit_interval: float = 1.0,
+        queue_size: int = 4,
+        stage_timeout: float = 0.1,
+        infer_workers: int = 1,
+        publish_retries: int = 3,
+        publish_retry_delay: float = 1.0,
+        domain: str = "server",
+    ):
+        self.logger = Logger.get_logger(domain)
+        self.consumer_service = consumer_service
+        self.app_service = app_service
+        self.producer_services = producer_services
+        self.commit_count = commit_count
+        self.commit_interval = commit_interval
+        self.stage_timeout = stage_timeout
+        self.infer_workers = infer_workers
+        self.publish_retries = publish_retries
+        self.publish_retry_delay = publish_retry_delay
+
+        self.infer_queue = queue.Queue(maxsize=queue_size)
+        self.publish_queue = queue.Queue(maxsize=queue_size)
+        self.stop_event = threading.Event()
+        self.threads: List[threading.Thread] = []
+
+        # Published messages waiting for the next offset commit
+        self.published_messages: List[Any] = []
+        self.published_batch_count = 0
+        self.uncommitted_batch_count = 0
+        self.committed_at = time.monotonic()
+        # Set once a batch is lost, no offset is committed after it
+        self.halted = False
+
+        # Batches are numbered on fetch, finished ones wait here until every earlier batch is published
+        self.fetched_batch_count = 0
+        self.finished_batches: Dict[int, Tuple[List[Any], List[Any]]] = {}
+
+    def _put(self, stage_queue: queue.Queue, item: Any) -> bool:
+        # Blocks while the next stage is busy, gives up once the pipeline is stopping
+        while not self.stop_event.is_set():
+            try:
+                stage_queue.put(item, timeout=self.stage_timeout)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, stage_queue: queue.Queue) -> Any | None:
+        while not self.stop_event.is_set():
+            try:
+                return stage_queue.get(timeout=self.stage_timeout)
+            except queue.Empty:
+                continue
+        return None
+
+    def _run_stage(self, name: str, step: Callable[[], None]):
+        try:
+            while not self.stop_event.is_set():
+                step()
+        except Exception as e:
+            self.logger.error(f"Pipeline Stage Failed: {name}, {e}, {traceback.format_exc()}")
+        finally:
+            self.stop_event.set()
+
+    def _fetch(self):
+        messages = self.consumer_service.consume()
+        if not messages:
+            return
+        payloads = self.consumer_service.decode(messages)
+        if self._put(self.infer_queue, (self.fetched_batch_count, messages, payloads)):
+            self.fetched_batch_count += 1
+
+    @Logger.register_correlation_id_mq
+    def _infer(self):
+        item = self._get(self.infer_queue)
+        if item is None:
+            return
+        batch_number, messages, payloads = item
+
+        mq_messages = []
+        if payloads is not None:
+            try:
+                mq_messages = self.app_service.process_queue(payloads)
+            except Exception as e:
+                self.logger.error(f"Failed to Handle Message: {e}, {traceback.format_exc()}")
+        self._put(self.publish_queue, (batch_number, messages, mq_messages))
+
+    def _halt(self, reason: str):
+        self.logger.error(f"{reason}, Stopping Pipeline Without Committing")
+        self.halted = True
+        self.stop_event.set()
+
+    def _commit(self, asynchronous=True):
+        self.committed_at = time.monotonic()
+        self.uncommitted_batch_count = 0
+        if self.halted or not self.published_messages:
+            return
+        # Wait for delivery so the committed offsets never run ahead of the responses
+        undelivered_count = sum(producer_service.flush() for producer_service in self.producer_services)
+        if undelivered_count:
+            self._halt(f"{undelivered_count} Message(s) Not Delivered")
+            return
+        self.consumer_service.commit_messages(self.published_messages, asynchronous=asynchronous)
+        self.published_messages = []
+
+    @Logger.register_correlation_id_mq
+    def _publish(self):
+        # A single wait, so waiting batches are also committed while no new batch arrives
+        try:
+            batch_number, messages, mq_messages = self.publish_queue.get(timeout=self.stage_timeout)
+            self.finished_batches[batch_number] = (messages, mq_messages)
+        except queue.Empty:
+            pass
+
+        while self.published_batch_count in self.finished_batches:
+            messages, mq_messages = self.finished_batches.pop(self.published_batch_count)
+            if not self._publish_batch(mq_messages):
+                return
+            self.published_messages.extend(messages)
+            self.published_batch_count += 1
+            self.uncommitted_batch_count += 1
+
+        if (
+            self.uncommitted_batch_count >= self.commit_count
+            and time.monotonic() - self.committed_at >= self.commit_interval
+        ):
+            self._commit(asynchronous=True)
+
+    def _publish_batch(self, mq_messages: List[Any]) -> bool:
+        for attempt in range(self.publish_retries + 1):
+            try:
+                self.app_service.publish_queue(mq_messages)
+                return True
+            except Exception as e:
+                self.logger.error(f"Failed to Publish Message (attempt {attempt + 1}): {e}, {traceback.format_exc()}")
+            # Later batches wait, their offsets cannot be committed before this one
+            if attempt < self.publish_retries and self.stop_event.wait(self.publish_retry_delay):
+                # Stopping, the batch and the later ones are left uncommitted
+                return False
+        self._halt(f"Failed to Publish Batch After {self.publish_retries} Retries")
+        return False
+
+    def start(self):
+        self.threads = [
+            threading.Thread(target=self._run_stage, args=("fetch", self._fetch), name="pipeline-fetch", daemon=True),
+            threading.Thread(target=self._run_stage, args=("publish", self._publish), name="pipeline-publish", daemon=True),
+        ]
+        # Extra inference workers keep a continuous batching model fed while other batches decode
+        self.threads.extend(
+            threading.Thread(target=self._run_stage, args=("infer", self._infer), name=f"pipeline-infer-{i}", daemon=True)
+            for i in range(1, self.infer_workers)
+        )
+        for thread in self.threads:
+            thread.start()
+
+        # Inference stays on the calling thread
+        self._run_stage("infer", self._infer)
+
+    def stop(self):
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join()
+        self._commit(asynchronous=False)
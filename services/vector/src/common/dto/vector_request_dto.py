@@ -1,5 +1,9 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
+
+from common.util import VectorEncoding
+
 
 class VectorRequestDTO(BaseModel):
     texts: List[str]
+    encoding: Optional[VectorEncoding] = "json"
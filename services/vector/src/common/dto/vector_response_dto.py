@@ -1,6 +1,12 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
+
+from common.util import VectorEncoding
 
 
 class VectorResponseDTO(BaseModel):
-    results: List[List[float]] | None
+    results: List[List[float]] | None = None
+    encoding: Optional[VectorEncoding] = "json"
+    # Base64 of the little-endian results buffer when encoding is not json
+    data: Optional[str] = None
+    shape: Optional[List[int]] = None
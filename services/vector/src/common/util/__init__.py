@@ -0,0 +1,2 @@
+from .histogram import Histogram
+from .vector_encoding import JSON_ENCODING, VectorEncoding, decode_vectors, encode_vectors
@@ -0,0 +1,24 @@
+import threading
+from bisect import bisect_left
+from typing import Dict, List
+
+
+class Histogram:
+    """Counts observations into upper-bounded buckets, the last bucket catches everything above."""
+    def __init__(self, buckets: List[float]):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            labels = [f"<={bucket:g}" for bucket in self.buckets] + [f">{self.buckets[-1]:g}"]
+            return dict(zip(labels, self.counts))
@@ -0,0 +1,19 @@
+import base64
+from typing import List, Literal, Tuple
+
+import numpy as np
+
+VectorEncoding = Literal["json", "float32", "float16"]
+
+JSON_ENCODING = "json"
+
+
+def encode_vectors(vectors: List[List[float]], encoding: VectorEncoding) -> Tuple[str, List[int]]:
+    # Little-endian buffer so the receiver can decode without knowing the sender platform
+    array = np.asarray(vectors, dtype=np.dtype(encoding).newbyteorder("<"))
+    return base64.b64encode(array.tobytes()).decode("ascii"), list(array.shape)
+
+
+def decode_vectors(data: str, shape: List[int], encoding: VectorEncoding) -> np.ndarray:
+    buffer = base64.b64decode(data)
+    return np.frombuffer(buffer, dtype=np.dtype(encoding).newbyteorder("<")).reshape(shape)
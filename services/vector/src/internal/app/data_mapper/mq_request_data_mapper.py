@@ -10,10 +10,11 @@ class MQRequestDataMapper(IDataMapper[VectorRequest, ConsumedMessageDTO[VectorRe
             id=dal_entity.id,
             texts=vector_payload.texts,
             destination=dal_entity.destination,
+            encoding=vector_payload.encoding,
         )
 
     def to_dal_entity(self, domain_entity: VectorRequest) -> ConsumedMessageDTO[VectorRequestDTO]:
-        dto = VectorRequestDTO(texts=domain_entity.texts)
+        dto = VectorRequestDTO(texts=domain_entity.texts, encoding=domain_entity.encoding)
         return ConsumedMessageDTO[VectorRequestDTO](
             id=domain_entity.id,
             message=dto,
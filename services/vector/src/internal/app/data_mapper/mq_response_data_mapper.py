@@ -1,20 +1,28 @@
 from common.data_mapper import IDataMapper
 from common.dto import PublishedMessageDTO, VectorResponseDTO
+from common.util import JSON_ENCODING, decode_vectors, encode_vectors
 from internal.domain.entity import VectorResponse
 
 
 class MQResponseDataMapper(IDataMapper[VectorResponse, PublishedMessageDTO[VectorResponseDTO]]):
     def to_domain_entity(self, dal_entity: PublishedMessageDTO[VectorResponseDTO]) -> VectorResponse:
         dto = VectorResponseDTO.model_validate(dal_entity.message)
+        results = dto.results
+        if dto.encoding != JSON_ENCODING and dto.data is not None:
+            results = decode_vectors(dto.data, dto.shape, dto.encoding).tolist()
         return VectorResponse(
             id=dal_entity.id,
-            results=dto.results,
+            results=results,
             destination=dal_entity.destination,
             error=dal_entity.error,
+            encoding=dto.encoding,
         )
 
     def to_dal_entity(self, domain_entity: VectorResponse) -> PublishedMessageDTO[VectorResponseDTO]:
         dto = VectorResponseDTO(results=domain_entity.results)
+        if domain_entity.encoding != JSON_ENCODING and domain_entity.results is not None:
+            data, shape = encode_vectors(domain_entity.results, domain_entity.encoding)
+            dto = VectorResponseDTO(encoding=domain_entity.encoding, data=data, shape=shape)
         return PublishedMessageDTO[VectorResponseDTO](
             id=domain_entity.id,
             message=dto,
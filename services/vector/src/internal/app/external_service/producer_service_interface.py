@@ -7,3 +7,7 @@ class IProducerService(ABC):
     @abstractmethod
     def publish_message(self, payload: PublishedMessageDTO):
         raise NotImplementedError
+
+    @abstractmethod
+    def flush(self, timeout: float = -1) -> int:
+        raise NotImplementedError
@@ -35,14 +35,24 @@ class VectorApplicationService(IVectorApplicationService):
     @trace
     def handle_queue(self, payloads: List[ConsumedMessageDTO]):
         self.logger.info(f"handle_queue (payload:{payloads})")
+        self.publish_queue(self.process_queue(payloads))
 
+    @trace
+    def process_queue(self, payloads: List[ConsumedMessageDTO]) -> List[PublishedMessageDTO]:
         vector_requests = list(
             map(self.mq_request_data_mapper.to_domain_entity, payloads))
         results = self.vector_service.process_messages(vector_requests)
+
+        mq_messages = []
         for result in results:
             mq_message = self.mq_response_data_mapper.to_dal_entity(result)
             mq_message.source = self.service_name
+            mq_messages.append(mq_message)
+        return mq_messages
 
-            if result.error is not None:
+    @trace
+    def publish_queue(self, mq_messages: List[PublishedMessageDTO]):
+        for mq_message in mq_messages:
+            if mq_message.error is not None:
                 self.error_producer_service.publish_message(mq_message)
             self.producer_service.publish_message(mq_message)
@@ -0,0 +1 @@
+from .vector_cache_interface import IVectorCache
\ No newline at end of file
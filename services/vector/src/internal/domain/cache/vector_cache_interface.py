@@ -0,0 +1,16 @@
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+
+class IVectorCache(ABC):
+    @abstractmethod
+    def get_many(self, keys: List[str]) -> List[Optional[List[float]]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def set_many(self, items: Dict[str, List[float]]):
+        raise NotImplementedError
+
+    @abstractmethod
+    def size(self) -> int:
+        raise NotImplementedError
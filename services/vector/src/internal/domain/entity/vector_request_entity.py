@@ -1,11 +1,14 @@
 from typing import List, Optional
 from pydantic import BaseModel
 
+from common.util import VectorEncoding
+
 
 class VectorRequest(BaseModel):
     id: str
     texts: List[str]
     destination: Optional[str] = None
+    encoding: Optional[VectorEncoding] = "json"
 
     def to_request(self) -> List[str]:
         return self.texts
@@ -2,6 +2,7 @@ from typing import List, Optional
 from pydantic import BaseModel
 
 from common.exception import Error
+from common.util import VectorEncoding
 
 
 class VectorResponse(BaseModel):
@@ -9,3 +10,4 @@ class VectorResponse(BaseModel):
     results: Optional[List[List[float]]] = None
     destination: Optional[str] = None
     error: Optional[Error] = None
+    encoding: Optional[VectorEncoding] = "json"
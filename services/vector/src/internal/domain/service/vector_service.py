@@ -24,6 +24,7 @@ class VectorService(IVectorService):
             id=payload.id,
             results=None,
             destination=payload.destination,
+            encoding=payload.encoding,
         )
         if len(payload.texts) > self._max_batch_size:
             response.error = Error(
@@ -59,7 +60,7 @@ class VectorService(IVectorService):
                 batch, metadata = [], []
 
             batch.extend(payload.to_request())
-            metadata.append((payload.id, payload_size, payload.destination))
+            metadata.append((payload.id, payload_size, payload.destination, payload.encoding))
 
         if len(batch) > 0:
             batches.append((batch, metadata))
@@ -68,11 +69,12 @@ class VectorService(IVectorService):
             results = self.vector_model.process(batch)
 
             i = 0
-            for payload_id, size, destination in metadata:
+            for payload_id, size, destination, encoding in metadata:
                 result = results[i:i+size]
                 yield VectorResponse(
                     id=payload_id,
                     results=result,
                     destination=destination,
+                    encoding=encoding,
                 )
                 i += size
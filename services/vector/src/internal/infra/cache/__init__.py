@@ -0,0 +1 @@
+from .lru_vector_cache import LRUVectorCache
\ No newline at end of file
@@ -0,0 +1,47 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from internal.domain.cache import IVectorCache
+
+
+class LRUVectorCache(IVectorCache):
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._items: OrderedDict[str, Tuple[float, List[float]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> List[Optional[List[float]]]:
+        now = time.monotonic()
+        vectors = []
+        with self._lock:
+            for key in keys:
+                item = self._items.get(key)
+                if item is None:
+                    vectors.append(None)
+                    continue
+                expire_at, vector = item
+                if expire_at <= now:
+                    del self._items[key]
+                    vectors.append(None)
+                    continue
+                self._items.move_to_end(key)
+                vectors.append(vector)
+        return vectors
+
+    def set_many(self, items: Dict[str, List[float]]):
+        if self.max_size <= 0:
+            return
+        expire_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for key, vector in items.items():
+                self._items[key] = (expire_at, vector)
+                self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._items)
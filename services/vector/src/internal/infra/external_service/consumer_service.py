@@ -1,14 +1,16 @@
+import time
 import traceback
-from typing import Any, List
+from typing import Any, List, Optional
 
 import pydantic_core
-from confluent_kafka import Consumer, KafkaError
+from confluent_kafka import Consumer, KafkaError, TopicPartition
 
 from common.constant.domain import INFRA_CONSUMER as DOMAIN
 from common.constant.domain import KAFKA_CONSUMER
 from common.decorator import trace
 from common.dto import ConsumedMessageDTO
 from common.log import Logger, LogLevel
+from common.util import Histogram
 from internal.app.external_service import IConsumerService
 from internal.app.service import IVectorApplicationService
 
@@ -22,7 +24,10 @@ class ConsumerService(IConsumerService):
         mq_offset_reset: str,
         mq_consume_timeout: int,
         mq_max_batch_size: int,
-        mq_log_level: LogLevel
+        mq_log_level: LogLevel,
+        mq_batch_wait_ms: float = 0,
+        mq_batch_max_texts: int = 128,
+        mq_batch_report_interval: int = 100,
     ):
         self.logger = Logger.get_logger(DOMAIN)
         self.kafka_logger = Logger.get_logger(KAFKA_CONSUMER, mq_log_level)
@@ -30,6 +35,12 @@ class ConsumerService(IConsumerService):
         self.vector_app_service = vector_app_service
         self.mq_max_batch_size = mq_max_batch_size
         self.mq_consume_timeout = mq_consume_timeout
+        # Micro-batching window, 0 processes each consume result right away
+        self.mq_batch_wait_ms = mq_batch_wait_ms
+        self.mq_batch_max_texts = mq_batch_max_texts
+        self.mq_batch_report_interval = mq_batch_report_interval
+        self.batch_messages_histogram = Histogram([1, 2, 4, 8, 16, 32, 64])
+        self.batch_texts_histogram = Histogram([1, 2, 4, 8, 16, 32, 64, 128])
         self.consumer = Consumer(
             {
                 'group.id': mq_group_id,
@@ -38,6 +49,9 @@ class ConsumerService(IConsumerService):
             },
             logger=self.kafka_logger,
         )
+        # Payloads parsed by consume while sizing the batch, reused by decode for the same batch
+        self.consumed_messages: Optional[List[Any]] = None
+        self.consumed_payloads: List[ConsumedMessageDTO | pydantic_core.ValidationError | None] = []
 
     def subscribe(self, topics: List[str]):
         self.consumer.subscribe(topics)
@@ -48,37 +62,109 @@ class ConsumerService(IConsumerService):
     def commit(self, asynchronous=True):
         self.consumer.commit(asynchronous=asynchronous)
 
+    def commit_messages(self, messages: List[Any], asynchronous=True):
+        # Commit the next offset of each partition, only up to the given messages
+        offsets = {}
+        for message in messages:
+            if message.error():
+                continue
+            key = (message.topic(), message.partition())
+            offsets[key] = max(offsets.get(key, -1), message.offset() + 1)
+        if not offsets:
+            return
+        self.consumer.commit(
+            offsets=[TopicPartition(topic, partition, offset) for (topic, partition), offset in offsets.items()],
+            asynchronous=asynchronous,
+        )
+
+    def _parse(self, message: Any) -> ConsumedMessageDTO | pydantic_core.ValidationError | None:
+        if message.error():
+            return None
+        try:
+            return ConsumedMessageDTO.model_validate_json(message.value().decode('utf-8'))
+        except pydantic_core.ValidationError as e:
+            return e
+
+    @staticmethod
+    def _count_texts(payload: ConsumedMessageDTO | pydantic_core.ValidationError | None) -> int:
+        if not isinstance(payload, ConsumedMessageDTO) or not isinstance(payload.message, dict):
+            return 0
+        texts = payload.message.get("texts")
+        return len(texts) if isinstance(texts, list) else 0
+
+    def _observe_batch(self, messages: List[Any], text_count: int):
+        self.batch_messages_histogram.observe(len(messages))
+        self.batch_texts_histogram.observe(text_count)
+        if self.batch_messages_histogram.count % self.mq_batch_report_interval == 0:
+            self.logger.info(
+                f"Batch Size Histogram (messages:{self.batch_messages_histogram.snapshot()}, "
+                f"texts:{self.batch_texts_histogram.snapshot()})"
+            )
+
     def consume(self) -> List[Any] | None:
-        return self.consumer.consume(
+        messages = self.consumer.consume(
             self.mq_max_batch_size,
             self.mq_consume_timeout,
         )
+        if not messages:
+            return messages
+
+        messages = list(messages)
+        payloads = [self._parse(message) for message in messages]
+        text_count = sum(map(self._count_texts, payloads))
+
+        # Hold the batch open so requests arriving close together share one model call
+        deadline = time.monotonic() + self.mq_batch_wait_ms / 1000
+        while len(messages) < self.mq_max_batch_size and text_count < self.mq_batch_max_texts:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            message = self.consumer.poll(remaining)
+            if message is None:
+                break
+            messages.append(message)
+            payloads.append(self._parse(message))
+            text_count += self._count_texts(payloads[-1])
+
+        self._observe_batch(messages, text_count)
+        self.consumed_messages, self.consumed_payloads = messages, payloads
+        return messages
+
+    def decode(self, messages: List[Any]) -> List[ConsumedMessageDTO] | None:
+        # The batch returned by the last consume was parsed already
+        parsed = self.consumed_payloads if messages is self.consumed_messages else None
+        self.consumed_messages, self.consumed_payloads = None, []
+
+        # A bad message is skipped alone, the requests coalesced with it are still answered
+        payloads: List[ConsumedMessageDTO] = []
+        for i, message in enumerate(messages):
+            if message.error():
+                if message.error().code() == KafkaError._PARTITION_EOF:
+                    message.stderr.write('%% %s [%d] reached end at offset %d\n' %
+                                         (message.topic(), message.partition(), message.offset()))
+                elif message.error():
+                    error = message.error()
+                    self.logger.error(f"Consumer Error: {error}")
+                continue
+
+            consumed = parsed[i] if parsed is not None else self._parse(message)
+            if isinstance(consumed, pydantic_core.ValidationError):
+                self.logger.error(f"Error Decoding JSON: {consumed}")
+                continue
+            payloads.append(consumed)
+
+        return payloads or None
 
     @Logger.register_correlation_id_mq
     @trace
     def process(self, messages: List[Any]) -> bool:
         try:
-            payloads: List[ConsumedMessageDTO] = []
-            for message in messages:
-                if message.error():
-                    if message.error().code() == KafkaError._PARTITION_EOF:
-                        message.stderr.write('%% %s [%d] reached end at offset %d\n' %
-                                             (message.topic(), message.partition(), message.offset()))
-                    elif message.error():
-                        error = message.error()
-                        self.logger.error(f"Consumer Error: {error}")
-                    return False
-
-                decoded = message.value().decode('utf-8')
-                consumed = ConsumedMessageDTO.model_validate_json(decoded)
-                payloads.append(consumed)
+            payloads = self.decode(messages)
+            if payloads is None:
+                return False
 
             self.vector_app_service.handle_queue(payloads)
 
-        except pydantic_core.ValidationError as e:
-            self.logger.error(f"Error Decoding JSON: {e}")
-            return False
-
         except Exception as e:
             trace = traceback.format_exc()
             self.logger.error(f"Failed to Handle Message: {e}, {trace}")
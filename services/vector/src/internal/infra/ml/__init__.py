@@ -1 +1,4 @@
-from .vector_model import VectorModel
\ No newline at end of file
+from .cached_vector_model import CachedVectorModel
+from .onnx_vector_model import OnnxVectorModel
+from .vector_model import VectorModel
+from .vector_model_pool import VectorModelPool
\ No newline at end of file
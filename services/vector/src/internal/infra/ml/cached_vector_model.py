@@ -0,0 +1,89 @@
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+from common.constant.domain import INFRA_VECTOR as DOMAIN
+from common.decorator import trace
+from common.log import Logger
+from internal.domain.cache import IVectorCache
+from internal.domain.ml import IVectorModel
+
+
+class CachedVectorModel(IVectorModel):
+    """
+    Content-addressed cache in front of a vector model. Lookups go to the local cache first, then the
+    optional shared cache, and only the remaining unique texts are sent to the wrapped model.
+    """
+    def __init__(
+        self,
+        vector_model: IVectorModel,
+        cache: IVectorCache,
+        shared_cache: Optional[IVectorCache] = None,
+        namespace: str = "",
+    ):
+        self.logger = Logger.get_logger(DOMAIN)
+        self.vector_model = vector_model
+        self.cache = cache
+        self.shared_cache = shared_cache
+        # Keys are scoped by model so a shared cache can serve several models
+        self.namespace = namespace
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\0{text}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {
+            key: vector
+            for key, vector in zip(keys, self.cache.get_many(keys))
+            if vector is not None
+        }
+        missing_keys = [key for key in keys if key not in found]
+        if self.shared_cache is not None and len(missing_keys) > 0:
+            try:
+                shared_vectors = self.shared_cache.get_many(missing_keys)
+            except Exception as e:
+                self.logger.warning(f"Shared Cache Lookup Failed: {e}")
+                shared_vectors = [None] * len(missing_keys)
+            shared_found = {
+                key: vector
+                for key, vector in zip(missing_keys, shared_vectors)
+                if vector is not None
+            }
+            if len(shared_found) > 0:
+                self.cache.set_many(shared_found)
+            found.update(shared_found)
+        return found
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": self.cache.size(),
+        }
+
+    @trace
+    def process(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(text) for text in texts]
+        unique_keys = list(dict.fromkeys(keys))
+        vectors = self._lookup(unique_keys)
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        if len(missing) > 0:
+            encoded = dict(zip(missing.keys(), self.vector_model.process(list(missing.values()))))
+            self.cache.set_many(encoded)
+            if self.shared_cache is not None:
+                try:
+                    self.shared_cache.set_many(encoded)
+                except Exception as e:
+                    self.logger.warning(f"Shared Cache Store Failed: {e}")
+            vectors.update(encoded)
+
+        with self._lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        self.logger.info(f"process (hits:{len(texts) - len(missing)}, misses:{len(missing)}, stats:{self.stats()})")
+        return [vectors[key] for key in keys]
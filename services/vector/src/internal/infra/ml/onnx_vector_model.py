@@ -0,0 +1,128 @@
+import json
+import os
+from typing import List
+
+import numpy as np
+import onnxruntime
+import torch
+from huggingface_hub import snapshot_download
+from onnxruntime.quantization import QuantType, quantize_dynamic
+from sentence_transformers.models import Pooling
+from transformers import AutoModel, AutoTokenizer
+
+from internal.infra.ml.vector_model import VectorModel
+
+
+class _TransformerOutput(torch.nn.Module):
+    """Exposes only the last hidden state so the exported graph has a single output."""
+    def __init__(self, auto_model: torch.nn.Module):
+        super().__init__()
+        self.auto_model = auto_model
+
+    def forward(self, input_ids, attention_mask, token_type_ids=None):
+        if token_type_ids is None:
+            return self.auto_model(input_ids=input_ids, attention_mask=attention_mask)[0]
+        return self.auto_model(input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids)[0]
+
+
+class OnnxVectorModel(VectorModel):
+    """
+    Runs the transformer of a SentenceTransformer model with ONNX Runtime on CPU, optionally int8
+    dynamically quantized. Batching and truncation are shared with VectorModel, pooling and
+    normalization follow the modules of the original model.
+    Only the tokenizer and the session are kept, the torch model is loaded to export it when no export exists.
+    """
+    def __init__(
+        self,
+        model_path: str,
+        model_batch_size: int,
+        model_max_characters: int,
+        model_max_tokens: int = 512,
+        model_token_budget: int = 8192,
+        onnx_path: str = "resources/onnx",
+        onnx_quantize: bool = False,
+        onnx_threads: int = 0,
+    ):
+        self.onnx_path = onnx_path
+        self.onnx_quantize = onnx_quantize
+        self.onnx_threads = onnx_threads
+        super().__init__(
+            model_path=model_path,
+            model_batch_size=model_batch_size,
+            model_max_characters=model_max_characters,
+            model_max_tokens=model_max_tokens,
+            model_token_budget=model_token_budget,
+        )
+
+    def _load_model(self, model_path: str):
+        model_dir = model_path if os.path.isdir(model_path) else snapshot_download(model_path)
+        with open(os.path.join(model_dir, "modules.json")) as f:
+            modules = {module["type"].rsplit(".", 1)[-1]: module["path"] for module in json.load(f)}
+        transformer_dir = os.path.join(model_dir, modules["Transformer"])
+
+        self.tokenizer = AutoTokenizer.from_pretrained(transformer_dir)
+        self.pooling_mode = Pooling.load(os.path.join(model_dir, modules["Pooling"])).get_pooling_mode_str()
+        self.normalize = "Normalize" in modules
+        if self.pooling_mode not in ("mean", "cls"):
+            raise ValueError(f"onnx backend supports mean or cls pooling, got '{self.pooling_mode}'")
+
+        # One export per model and pooling, re-used across restarts, quantized next to it
+        model_name = model_path.strip("/").replace("/", "--")
+        model_file = os.path.join(self.onnx_path, f"{model_name}--{self.pooling_mode}", "model.onnx")
+        if not os.path.exists(model_file):
+            self._export(transformer_dir, model_file)
+        if self.onnx_quantize:
+            model_file = self._quantize(model_file)
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = self.onnx_threads
+        self.session = onnxruntime.InferenceSession(model_file, options, providers=["CPUExecutionProvider"])
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+        self.logger.info(f"init onnx vector model (file:{model_file}, pooling:{self.pooling_mode})")
+
+    def _export(self, transformer_dir: str, model_file: str):
+        os.makedirs(os.path.dirname(model_file), exist_ok=True)
+
+        auto_model = AutoModel.from_pretrained(transformer_dir).eval()
+        sample = self.tokenizer(["query: sample"], return_tensors="pt")
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+        with torch.no_grad():
+            torch.onnx.export(
+                _TransformerOutput(auto_model),
+                tuple(sample[name] for name in input_names),
+                model_file,
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14,
+            )
+
+    def _quantize(self, model_file: str) -> str:
+        quantized_file = model_file.replace(".onnx", ".int8.onnx")
+        if not os.path.exists(quantized_file):
+            quantize_dynamic(model_file, quantized_file, weight_type=QuantType.QInt8)
+        return quantized_file
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        features = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.model_max_tokens,
+            return_tensors="np",
+        )
+        inputs = {name: features[name].astype(np.int64) for name in self.input_names}
+        hidden_state = self.session.run(None, inputs)[0]
+
+        if self.pooling_mode == "cls":
+            vectors = hidden_state[:, 0]
+        else:
+            mask = features["attention_mask"][..., None].astype(hidden_state.dtype)
+            vectors = (hidden_state * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if self.normalize:
+            vectors = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return list(vectors)
@@ -15,6 +15,8 @@ class VectorModel(IVectorModel):
         model_path: str,
         model_batch_size: int,
         model_max_characters: int,
+        model_max_tokens: int = 512,
+        model_token_budget: int = 8192,
     ):
         self.logger = Logger.get_logger(DOMAIN)
 
@@ -22,17 +24,59 @@ class VectorModel(IVectorModel):
         disable_default_handler()
         add_handler(Logger.get_handler())
 
-        self.model = SentenceTransformer(model_path)
         self.model_batch_size = model_batch_size
         self.model_max_characters = model_max_characters
+        self.model_max_tokens = model_max_tokens
+        # Maximum padded tokens (batch size x longest text) per forward pass
+        self.model_token_budget = model_token_budget
+
+        self._load_model(model_path)
+
+    def _load_model(self, model_path: str):
+        self.model = SentenceTransformer(model_path)
+        self.tokenizer = self.model.tokenizer
+        # Truncate at the tokenizer instead of cutting characters
+        self.model.max_seq_length = self.model_max_tokens
+
+    def _token_lengths(self, texts: List[str]) -> List[int]:
+        tokens = self.tokenizer(
+            texts,
+            add_special_tokens=True,
+            truncation=True,
+            max_length=self.model_max_tokens,
+        )
+        return [len(input_ids) for input_ids in tokens["input_ids"]]
+
+    def _make_batches(self, texts: List[str]) -> List[List[int]]:
+        """Group text indices longest first so each batch pads to a similar length within the token budget."""
+        lengths = self._token_lengths(texts)
+        order = sorted(range(len(texts)), key=lambda i: lengths[i], reverse=True)
+
+        batches, batch = [], []
+        for i in order:
+            # The first text of a batch is the longest, so it sets the padded length
+            padded_tokens = (len(batch) + 1) * (lengths[batch[0]] if batch else lengths[i])
+            if batch and (len(batch) >= self.model_batch_size or padded_tokens > self.model_token_budget):
+                batches.append(batch)
+                batch = []
+            batch.append(i)
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        return self.model.encode(texts, batch_size=len(texts))
 
     @trace
     def _process(self, texts: List[str]) -> List[List[float]]:
-        vectors = []
-        for i in range(0, len(texts), self.model_batch_size):
-            vector = self.model.encode(
-                [text[:self.model_max_characters] for text in texts[i:i+self.model_batch_size]])
-            vectors.extend(vector)
+        # Character cut only bounds tokenizer work on very long inputs
+        texts = [text[:self.model_max_characters] for text in texts]
+
+        vectors = [None] * len(texts)
+        for batch in self._make_batches(texts):
+            batch_vectors = self._encode([texts[i] for i in batch])
+            for i, vector in zip(batch, batch_vectors):
+                vectors[i] = vector
         return vectors
 
     @trace
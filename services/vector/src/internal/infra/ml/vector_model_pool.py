@@ -0,0 +1,93 @@
+import math
+import multiprocessing
+import os
+import queue
+from typing import List, Optional
+
+import numpy as np
+import torch
+
+from common.constant.domain import INFRA_VECTOR as DOMAIN
+from common.decorator import trace
+from common.log import Logger
+from internal.domain.ml import IVectorModel
+
+# Set in the parent right before forking, workers inherit it copy-on-write
+_worker_model: Optional[IVectorModel] = None
+
+
+# Seconds a starting worker waits for its slice of cores
+CORE_SLICE_TIMEOUT = 1.0
+
+
+def _init_worker(core_slices, threads: int, unpinned_threads: int):
+    try:
+        cores = core_slices.get(timeout=CORE_SLICE_TIMEOUT)
+    except queue.Empty:
+        # Every slice is taken, a worker started later to replace another one runs unpinned
+        torch.set_num_threads(threads or unpinned_threads)
+        return
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    torch.set_num_threads(threads or len(cores))
+
+
+def _encode(texts: List[str]) -> np.ndarray:
+    return np.asarray(_worker_model.process(texts), dtype=np.float32)
+
+
+class VectorModelPool(IVectorModel):
+    """
+    Fans batches out to forked worker processes, each pinned to its own slice of cores.
+    The model is loaded once in the parent and shared with the workers through copy-on-write,
+    so it must not run inference in the parent before the pool is created.
+    """
+    def __init__(
+        self,
+        vector_model: IVectorModel,
+        workers: int,
+        worker_threads: int = 0,
+        min_shard_size: int = 8,
+    ):
+        global _worker_model
+
+        self.logger = Logger.get_logger(DOMAIN)
+        self.workers = workers
+        self.min_shard_size = min_shard_size
+
+        cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count()))
+        context = multiprocessing.get_context("fork")
+        core_slices = context.Queue()
+        for core_slice in self._split_cores(cores, workers):
+            core_slices.put(core_slice)
+
+        _worker_model = vector_model
+        self.pool = context.Pool(
+            processes=workers,
+            initializer=_init_worker,
+            initargs=(core_slices, worker_threads, max(1, len(cores) // workers)),
+        )
+        self.logger.info(f"init vector model pool (workers:{workers}, cores:{len(cores)})")
+
+    @staticmethod
+    def _split_cores(cores: List[int], workers: int) -> List[List[int]]:
+        if len(cores) < workers:
+            # Fewer cores than workers, workers share cores round-robin
+            return [[cores[i % len(cores)]] for i in range(workers)]
+        return [cores[i * len(cores) // workers:(i + 1) * len(cores) // workers] for i in range(workers)]
+
+    def _make_shards(self, texts: List[str]) -> List[List[str]]:
+        shard_size = max(self.min_shard_size, math.ceil(len(texts) / self.workers))
+        return [texts[i:i+shard_size] for i in range(0, len(texts), shard_size)]
+
+    @trace
+    def process(self, texts: List[str]) -> List[List[float]]:
+        if len(texts) == 0:
+            return []
+        # Pool.map keeps shard order, so the concatenated vectors follow the request order
+        vectors = self.pool.map(_encode, self._make_shards(texts))
+        return list(np.concatenate(vectors))
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
@@ -13,12 +13,28 @@ def clear_system_env(monkeypatch):
         "MQ_CONSUMER_OFFSET_RESET",
         "MQ_CONSUMER_MAX_BATCH_SIZE",
         "MQ_CONSUMER_CONSUME_TIMEOUT",
+        "MQ_CONSUMER_BATCH_WAIT_MS",
+        "MQ_CONSUMER_BATCH_MAX_TEXTS",
         "MQ_CONSUMER_TOPIC",
         "MQ_PRODUCER_TOPIC",
+        "MQ_PRODUCER_LINGER_MS",
+        "MQ_PRODUCER_BATCH_SIZE",
+        "MQ_PRODUCER_MAX_IN_FLIGHT",
         "MQ_ERROR_TOPIC",
+        "MQ_PIPELINE_QUEUE_SIZE",
+        "MQ_PIPELINE_COMMIT_INTERVAL",
         "VECTOR_MODEL_PATH",
+        "VECTOR_BACKEND",
+        "VECTOR_ONNX_PATH",
+        "VECTOR_ONNX_QUANTIZE",
         "VECTOR_BATCH_SIZE",
         "VECTOR_MAX_CHARACTERS",
+        "VECTOR_MAX_TOKENS",
+        "VECTOR_TOKEN_BUDGET",
+        "VECTOR_WORKERS",
+        "VECTOR_WORKER_THREADS",
+        "VECTOR_CACHE_MAX_SIZE",
+        "VECTOR_CACHE_TTL_SECONDS",
     ]
     for env in envs:
         monkeypatch.delenv(env, raising=False)
@@ -37,12 +53,28 @@ def test_configs_defaults():
     assert config.mq_consumer_offset_reset == "earliest"
     assert config.mq_consumer_max_batch_size == 20
     assert config.mq_consumer_consume_timeout == 1
+    assert config.mq_consumer_batch_wait_ms == 10
+    assert config.mq_consumer_batch_max_texts == 128
     assert config.mq_consumer_topic == "vector-request"
     assert config.mq_producer_topic == "vector-response"
+    assert config.mq_producer_linger_ms == 5
+    assert config.mq_producer_batch_size == 10000
+    assert config.mq_producer_max_in_flight == 1000
     assert config.mq_error_topic == "error-queue"
+    assert config.mq_pipeline_queue_size == 4
+    assert config.mq_pipeline_commit_interval == 1.0
     assert config.vector_model_path == "/path/to/model"
     assert config.vector_batch_size == 32
-    assert config.vector_max_characters == 500
+    assert config.vector_backend == "torch"
+    assert config.vector_onnx_path == "resources/onnx"
+    assert config.vector_onnx_quantize is False
+    assert config.vector_max_characters == 8192
+    assert config.vector_max_tokens == 512
+    assert config.vector_token_budget == 8192
+    assert config.vector_workers == 1
+    assert config.vector_worker_threads == 0
+    assert config.vector_cache_max_size == 10000
+    assert config.vector_cache_ttl_seconds == 3600
 
 
 @pytest.mark.configs
@@ -0,0 +1,14 @@
+import pytest
+
+from common.util import Histogram
+
+
+@pytest.mark.histogram
+def test_histogram_observe():
+    histogram = Histogram([1, 4, 16])
+    for value in [1, 2, 4, 5, 100]:
+        histogram.observe(value)
+
+    assert histogram.snapshot() == {"<=1": 1, "<=4": 2, "<=16": 1, ">16": 1}
+    assert histogram.count == 5
+    assert histogram.sum == 112
@@ -0,0 +1,34 @@
+import base64
+
+import numpy as np
+import pytest
+
+from common.util import decode_vectors, encode_vectors
+
+
+@pytest.mark.vector_encoding
+def test_encode_vectors_float32():
+    vectors = [[0.5, 0.25, -1.0], [0.125, 2.0, 0.0]]
+
+    data, shape = encode_vectors(vectors, "float32")
+
+    assert shape == [2, 3]
+    assert base64.b64decode(data) == np.asarray(vectors, dtype="<f4").tobytes()
+
+@pytest.mark.vector_encoding
+def test_decode_vectors_round_trip():
+    vectors = [[0.5, 0.25, -1.0], [0.125, 2.0, 0.0]]
+
+    for encoding in ["float32", "float16"]:
+        data, shape = encode_vectors(vectors, encoding)
+        decoded = decode_vectors(data, shape, encoding)
+
+        assert decoded.shape == (2, 3)
+        assert decoded.tolist() == vectors
+
+@pytest.mark.vector_encoding
+def test_encode_vectors_empty():
+    data, shape = encode_vectors([], "float32")
+
+    assert shape == [0]
+    assert decode_vectors(data, shape, "float32").tolist() == []
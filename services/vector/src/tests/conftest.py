@@ -3,6 +3,7 @@ from confluent_kafka import Consumer, Message, Producer
 from sentence_transformers import SentenceTransformer
 
 from internal.app.service import VectorApplicationService
+from internal.domain.cache import IVectorCache
 from internal.domain.service import VectorService
 from internal.infra.external_service import ConsumerService, ProducerService
 from internal.infra.ml.vector_model import VectorModel
@@ -46,4 +47,8 @@ def mock_vector_service(mocker):
 
 @pytest.fixture
 def mock_vector_app_service(mocker):
-    return mocker.Mock(spec=VectorApplicationService)
\ No newline at end of file
+    return mocker.Mock(spec=VectorApplicationService)
+
+@pytest.fixture
+def mock_shared_vector_cache(mocker):
+    return mocker.Mock(spec=IVectorCache)
\ No newline at end of file
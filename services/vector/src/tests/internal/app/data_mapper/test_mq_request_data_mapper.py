@@ -42,4 +42,21 @@ def test_datamapper_mapping_to_dal_entity():
     dto = mapper.to_dal_entity(entity)
 
     assert dto.id == id
-    assert dto.message.texts == texts
\ No newline at end of file
+    assert dto.message.texts == texts
+
+@pytest.mark.vector_request_datamapper
+def test_datamapper_mapping_encoding():
+    id, message = "message-id", {"texts": ["query: hello"], "encoding": "float16"}
+
+    mapper = MQRequestDataMapper()
+    entity = mapper.to_domain_entity(ConsumedMessageDTO(id=id, message=message))
+
+    assert entity.encoding == "float16"
+    assert mapper.to_dal_entity(entity).message.encoding == "float16"
+
+@pytest.mark.vector_request_datamapper
+def test_datamapper_mapping_default_encoding():
+    mapper = MQRequestDataMapper()
+    entity = mapper.to_domain_entity(ConsumedMessageDTO(id="message-id", message={"texts": ["query: hello"]}))
+
+    assert entity.encoding == "json"
@@ -34,4 +34,35 @@ def test_datamapper_mapping_to_dal_entity():
 
     assert dto.id == id
     assert dto.message.results == results
-    assert dto.error is None
\ No newline at end of file
+    assert dto.error is None
+
+@pytest.mark.vector_response_datamapper
+def test_datamapper_mapping_to_dal_entity_with_binary_encoding():
+    id, results = "message-id", [[0.5, 0.25, -1.0], [0.125, 2.0, 0.0]]
+
+    mapper = MQResponseDataMapper()
+    entity = VectorResponse(
+        id=id,
+        results=results,
+        encoding="float32",
+    )
+    dto = mapper.to_dal_entity(entity)
+
+    assert dto.message.results is None
+    assert dto.message.encoding == "float32"
+    assert dto.message.shape == [2, 3]
+    assert dto.message.data is not None
+
+@pytest.mark.vector_response_datamapper
+def test_datamapper_mapping_binary_encoding_round_trip():
+    id, results = "message-id", [[0.5, 0.25, -1.0], [0.125, 2.0, 0.0]]
+
+    mapper = MQResponseDataMapper()
+    for encoding in ["float32", "float16"]:
+        entity = VectorResponse(id=id, results=results, encoding=encoding)
+        dto = mapper.to_dal_entity(entity)
+
+        decoded = mapper.to_domain_entity(PublishedMessageDTO(id=id, message=dto.message.model_dump()))
+
+        assert decoded.encoding == encoding
+        assert decoded.results == results
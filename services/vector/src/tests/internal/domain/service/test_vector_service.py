@@ -88,4 +88,17 @@ def test_vector_serivce_process_multiple_requests(mock_vector_model_inference):
     assert responses[0].error.code == ErrorCode.REQUEST_SIZE_EXCEED
     assert len(responses[1].results) == len(requests[1].texts)
     assert len(responses[2].results) == len(requests[2].texts)
-    assert len(responses[3].results) == len(requests[3].texts)
\ No newline at end of file
+    assert len(responses[3].results) == len(requests[3].texts)
+@pytest.mark.vector_service
+def test_vector_serivce_process_requests_keep_encoding(mock_vector_model_inference):  
+    vector_service = VectorService(vector_model=mock_vector_model_inference)
+    requests = [
+        VectorRequest(id="test_1", texts=["how much protein should a female eat"], encoding="float16"),
+        VectorRequest(id="test_2", texts=["how much protein should a female eat"]),
+    ]
+
+    mock_vector_model_inference.process.side_effect = [[[0.1, 0.2, 0.3]] * 2]
+    responses = list(vector_service.process_messages(requests))
+
+    assert responses[0].encoding == "float16"
+    assert responses[1].encoding == "json"
@@ -0,0 +1,42 @@
+import pytest
+
+from internal.infra.cache import LRUVectorCache
+
+
+@pytest.mark.vector_cache
+def test_lru_vector_cache_get_set():
+    cache = LRUVectorCache(max_size=10, ttl_seconds=60)
+    cache.set_many({"a": [0.1, 0.2], "b": [0.3, 0.4]})
+
+    assert cache.get_many(["a", "c", "b"]) == [[0.1, 0.2], None, [0.3, 0.4]]
+    assert cache.size() == 2
+
+@pytest.mark.vector_cache
+def test_lru_vector_cache_evict_least_recently_used():
+    cache = LRUVectorCache(max_size=2, ttl_seconds=60)
+    cache.set_many({"a": [0.1], "b": [0.2]})
+    cache.get_many(["a"])
+    cache.set_many({"c": [0.3]})
+
+    assert cache.get_many(["a", "b", "c"]) == [[0.1], None, [0.3]]
+    assert cache.size() == 2
+
+@pytest.mark.vector_cache
+def test_lru_vector_cache_expire(mocker):
+    mock_time = mocker.patch("internal.infra.cache.lru_vector_cache.time.monotonic", return_value=100)
+    cache = LRUVectorCache(max_size=10, ttl_seconds=60)
+    cache.set_many({"a": [0.1]})
+
+    mock_time.return_value = 159
+    assert cache.get_many(["a"]) == [[0.1]]
+
+    mock_time.return_value = 160
+    assert cache.get_many(["a"]) == [None]
+    assert cache.size() == 0
+
+@pytest.mark.vector_cache
+def test_lru_vector_cache_disabled():
+    cache = LRUVectorCache(max_size=0, ttl_seconds=60)
+    cache.set_many({"a": [0.1]})
+
+    assert cache.get_many(["a"]) == [None]
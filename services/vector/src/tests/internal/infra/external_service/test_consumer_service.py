@@ -151,3 +151,129 @@ def test_consumer_service_commit_to_be_called(consumer_service, mock_consumer):
     for asynchronous in [True, False]:
         consumer_service.commit(asynchronous=asynchronous)
         mock_consumer.commit.assert_called_with(asynchronous=asynchronous)
+
+
+def create_kafka_message(mocker, texts):
+    message = mocker.Mock()
+    message.error.return_value = None
+    message.value.return_value = json.dumps({"id": "test", "message": {"texts": texts}}).encode('utf-8')
+    return message
+
+
+@pytest.mark.consumer_service
+def test_consumer_service_consume_coalesce_within_window(consumer_service, mocker):
+    consumer_service.mq_batch_wait_ms = 1000
+    first, second = create_kafka_message(mocker, ["a"]), create_kafka_message(mocker, ["b"])
+    consumer_service.consumer.consume.return_value = [first]
+    consumer_service.consumer.poll.side_effect = [second, None]
+
+    messages = consumer_service.consume()
+
+    assert messages == [first, second]
+    assert consumer_service.consumer.poll.call_count == 2
+    assert consumer_service.batch_messages_histogram.snapshot()["<=2"] == 1
+    assert consumer_service.batch_texts_histogram.snapshot()["<=2"] == 1
+
+
+@pytest.mark.consumer_service
+def test_consumer_service_consume_stop_at_max_texts(consumer_service, mocker):
+    consumer_service.mq_batch_wait_ms = 1000
+    consumer_service.mq_batch_max_texts = 3
+    first, second = create_kafka_message(mocker, ["a", "b"]), create_kafka_message(mocker, ["c", "d"])
+    consumer_service.consumer.consume.return_value = [first]
+    consumer_service.consumer.poll.side_effect = [second, create_kafka_message(mocker, ["e"])]
+
+    messages = consumer_service.consume()
+
+    assert messages == [first, second]
+    consumer_service.consumer.poll.assert_called_once()
+
+
+@pytest.mark.consumer_service
+def test_consumer_service_consume_stop_at_max_batch_size(consumer_service, mocker):
+    consumer_service.mq_batch_wait_ms = 1000
+    consumer_service.consumer.consume.return_value = [create_kafka_message(mocker, ["a"])] * consume_max_batch_size
+
+    messages = consumer_service.consume()
+
+    assert len(messages) == consume_max_batch_size
+    consumer_service.consumer.poll.assert_not_called()
+
+
+@pytest.mark.consumer_service
+def test_consumer_service_consume_window_disabled(consumer_service, mocker):
+    consumer_service.consumer.consume.return_value = [create_kafka_message(mocker, ["a"])]
+
+    messages = consumer_service.consume()
+
+    assert len(messages) == 1
+    consumer_service.consumer.poll.assert_not_called()
+
+
+@pytest.mark.consumer_service
+def test_consumer_service_commit_messages(consumer_service, mock_consumer, mocker):
+    messages = []
+    for partition, offset in [(0, 5), (0, 7), (1, 3)]:
+        message = mocker.Mock()
+        message.error.return_value = None
+        message.topic.return_value = "vector-request"
+        message.partition.return_value = partition
+        message.offset.return_value = offset
+        messages.append(message)
+
+    consumer_service.commit_messages(messages, asynchronous=False)
+
+    offsets = mock_consumer.commit.call_args.kwargs["offsets"]
+    assert {(o.topic, o.partition, o.offset) for o in offsets} == {("vector-request", 0, 8), ("vector-request", 1, 4)}
+    assert mock_consumer.commit.call_args.kwargs["asynchronous"] is False
+
+
+@pytest.mark.consumer_service
+def test_consumer_service_commit_messages_empty(consumer_service, mock_consumer):
+    consumer_service.commit_messages([])
+    mock_consumer.commit.assert_not_called()
+
+
+@pytest.mark.consumer_service
+def test_consumer_service_decode_invalid_payload(consumer_service, mock_kafka_message):
+    mock_kafka_message.error.return_value = None
+    mock_kafka_message.value.return_value = json.dumps("Invalid Payload").encode('utf-8')
+
+    assert consumer_service.decode([mock_kafka_message]) is None
+
+
+@pytest.mark.consumer_service
+def test_consumer_service_decode_skip_invalid_message_in_batch(consumer_service, mocker):
+    consumer_service.mq_batch_wait_ms = 1000
+    invalid, kafka_error = mocker.Mock(), mocker.Mock()
+    invalid.error.return_value = None
+    invalid.value.return_value = json.dumps("Invalid Payload").encode('utf-8')
+    kafka_error.error.return_value = KafkaError(error=KafkaError._FAIL)
+    first, second = create_kafka_message(mocker, ["a"]), create_kafka_message(mocker, ["b"])
+    consumer_service.consumer.consume.return_value = [first, invalid]
+    consumer_service.consumer.poll.side_effect = [kafka_error, second, None]
+
+    messages = consumer_service.consume()
+    payloads = consumer_service.decode(messages)
+
+    # The requests coalesced with the bad messages are still processed
+    assert [payload.message["texts"] for payload in payloads] == [["a"], ["b"]]
+    assert consumer_service.decode([invalid, kafka_error]) is None
+
+
+@pytest.mark.consumer_service
+def test_consumer_service_decode_reuse_consumed_payloads(consumer_service, mocker):
+    consumer_service.mq_batch_wait_ms = 1000
+    first, second = create_kafka_message(mocker, ["a", "b"]), create_kafka_message(mocker, ["c"])
+    consumer_service.consumer.consume.return_value = [first]
+    consumer_service.consumer.poll.side_effect = [second, None]
+
+    messages = consumer_service.consume()
+    payloads = consumer_service.decode(messages)
+
+    assert [payload.message["texts"] for payload in payloads] == [["a", "b"], ["c"]]
+    assert consumer_service.batch_texts_histogram.snapshot()["<=4"] == 1
+    # Each message is parsed once, while sizing the batch
+    assert first.value.call_count == 1 and second.value.call_count == 1
+    # Other messages are parsed on decode
+    assert consumer_service.decode([first])[0].message["texts"] == ["a", "b"]
@@ -0,0 +1,85 @@
+import pytest
+
+from internal.infra.cache import LRUVectorCache
+from internal.infra.ml import CachedVectorModel
+
+
+@pytest.mark.cached_vector_model
+def test_cached_vector_model_encode_only_misses(mock_vector_model_inference):
+    model = CachedVectorModel(
+        vector_model=mock_vector_model_inference,
+        cache=LRUVectorCache(max_size=10, ttl_seconds=60),
+    )
+    mock_vector_model_inference.process.side_effect = [
+        [[0.1], [0.2]],
+        [[0.3]],
+    ]
+
+    assert model.process(["a", "b"]) == [[0.1], [0.2]]
+    assert model.process(["b", "c", "a"]) == [[0.2], [0.3], [0.1]]
+
+    mock_vector_model_inference.process.assert_any_call(["a", "b"])
+    mock_vector_model_inference.process.assert_called_with(["c"])
+    assert model.stats() == {"hits": 2, "misses": 3, "size": 3}
+
+@pytest.mark.cached_vector_model
+def test_cached_vector_model_all_hits(mock_vector_model_inference):
+    model = CachedVectorModel(
+        vector_model=mock_vector_model_inference,
+        cache=LRUVectorCache(max_size=10, ttl_seconds=60),
+    )
+    mock_vector_model_inference.process.return_value = [[0.1]]
+
+    model.process(["a"])
+    assert model.process(["a", "a"]) == [[0.1], [0.1]]
+
+    mock_vector_model_inference.process.assert_called_once_with(["a"])
+    assert model.stats() == {"hits": 2, "misses": 1, "size": 1}
+
+@pytest.mark.cached_vector_model
+def test_cached_vector_model_encode_duplicate_once(mock_vector_model_inference):
+    model = CachedVectorModel(
+        vector_model=mock_vector_model_inference,
+        cache=LRUVectorCache(max_size=10, ttl_seconds=60),
+    )
+    mock_vector_model_inference.process.return_value = [[0.1], [0.2]]
+
+    assert model.process(["a", "b", "a"]) == [[0.1], [0.2], [0.1]]
+    mock_vector_model_inference.process.assert_called_once_with(["a", "b"])
+
+@pytest.mark.cached_vector_model
+def test_cached_vector_model_shared_cache(mock_vector_model_inference, mock_shared_vector_cache):
+    model = CachedVectorModel(
+        vector_model=mock_vector_model_inference,
+        cache=LRUVectorCache(max_size=10, ttl_seconds=60),
+        shared_cache=mock_shared_vector_cache,
+    )
+    mock_shared_vector_cache.get_many.return_value = [[0.1], None]
+    mock_vector_model_inference.process.return_value = [[0.2]]
+
+    assert model.process(["a", "b"]) == [[0.1], [0.2]]
+
+    mock_vector_model_inference.process.assert_called_once_with(["b"])
+    mock_shared_vector_cache.set_many.assert_called_once_with({model._key("b"): [0.2]})
+    assert model.cache.size() == 2
+
+@pytest.mark.cached_vector_model
+def test_cached_vector_model_shared_cache_failure(mock_vector_model_inference, mock_shared_vector_cache):
+    model = CachedVectorModel(
+        vector_model=mock_vector_model_inference,
+        cache=LRUVectorCache(max_size=10, ttl_seconds=60),
+        shared_cache=mock_shared_vector_cache,
+    )
+    mock_shared_vector_cache.get_many.side_effect = ConnectionError("unavailable")
+    mock_shared_vector_cache.set_many.side_effect = ConnectionError("unavailable")
+    mock_vector_model_inference.process.return_value = [[0.1]]
+
+    assert model.process(["a"]) == [[0.1]]
+
+@pytest.mark.cached_vector_model
+def test_cached_vector_model_key_namespace(mock_vector_model_inference):
+    cache = LRUVectorCache(max_size=10, ttl_seconds=60)
+    model_a = CachedVectorModel(vector_model=mock_vector_model_inference, cache=cache, namespace="model-a")
+    model_b = CachedVectorModel(vector_model=mock_vector_model_inference, cache=cache, namespace="model-b")
+
+    assert model_a._key("a") != model_b._key("a")
@@ -0,0 +1,105 @@
+import os
+
+import numpy as np
+import pytest
+from sentence_transformers import SentenceTransformer, models
+from transformers import BertConfig, BertModel, BertTokenizerFast
+
+from internal.infra.ml import OnnxVectorModel, VectorModel
+
+
+@pytest.fixture
+def onnx_vector_model(mocker, mock_vector_model):
+    # Skip export and session creation, only the pooling is under test
+    model = OnnxVectorModel.__new__(OnnxVectorModel)
+    model.tokenizer = mock_vector_model.tokenizer
+    model.model_max_tokens = 512
+    model.input_names = ["input_ids", "attention_mask"]
+    model.session = mocker.Mock()
+    model.normalize = False
+
+    mock_vector_model.tokenizer.return_value = {
+        "input_ids": np.array([[1, 2, 3], [1, 2, 0]]),
+        "attention_mask": np.array([[1, 1, 1], [1, 1, 0]]),
+    }
+    model.session.run.return_value = [np.array([
+        [[1.0, 0.0], [3.0, 0.0], [5.0, 0.0]],
+        [[0.0, 2.0], [0.0, 4.0], [9.0, 9.0]],
+    ], dtype=np.float32)]
+    return model
+
+
+@pytest.mark.onnx_vector_model
+def test_onnx_vector_model_mean_pooling(onnx_vector_model):
+    onnx_vector_model.pooling_mode = "mean"
+
+    vectors = onnx_vector_model._encode(["a b c", "a b"])
+
+    # Padding tokens are excluded from the mean
+    np.testing.assert_allclose(vectors, [[3.0, 0.0], [0.0, 3.0]])
+    inputs = onnx_vector_model.session.run.call_args.args[1]
+    assert set(inputs) == {"input_ids", "attention_mask"}
+    assert inputs["input_ids"].dtype == np.int64
+
+
+@pytest.mark.onnx_vector_model
+def test_onnx_vector_model_cls_pooling_normalize(onnx_vector_model):
+    onnx_vector_model.pooling_mode = "cls"
+    onnx_vector_model.normalize = True
+
+    vectors = onnx_vector_model._encode(["a b c", "a b"])
+
+    np.testing.assert_allclose(vectors, [[1.0, 0.0], [0.0, 1.0]])
+
+
+@pytest.mark.onnx_vector_model
+def test_onnx_vector_model_truncate_by_tokenizer(onnx_vector_model):
+    onnx_vector_model.pooling_mode = "mean"
+    onnx_vector_model.model_max_tokens = 128
+
+    onnx_vector_model._encode(["a b c", "a b"])
+
+    kwargs = onnx_vector_model.tokenizer.call_args.kwargs
+    assert kwargs["truncation"] is True
+    assert kwargs["max_length"] == 128
+
+
+@pytest.fixture
+def tiny_model_path(tmp_path):
+    # A randomly initialized one-layer BERT saved as a SentenceTransformer model
+    words = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "query", "passage", ":", "how", "much", "protein", "eat"]
+    (tmp_path / "vocab.txt").write_text("\n".join(words))
+    transformer_path = str(tmp_path / "transformer")
+    config = BertConfig(
+        vocab_size=len(words), hidden_size=8, num_hidden_layers=1, num_attention_heads=2,
+        intermediate_size=16, max_position_embeddings=64,
+    )
+    BertModel(config).save_pretrained(transformer_path)
+    BertTokenizerFast(str(tmp_path / "vocab.txt")).save_pretrained(transformer_path)
+
+    model_path = str(tmp_path / "model")
+    SentenceTransformer(modules=[
+        models.Transformer(transformer_path, max_seq_length=32),
+        models.Pooling(8, "mean"),
+        models.Normalize(),
+    ]).save(model_path)
+    return model_path
+
+
+@pytest.mark.onnx_vector_model
+def test_onnx_vector_model_export_parity(tiny_model_path, tmp_path):
+    texts = ["query: how much protein", "passage: eat protein", "query: how much how much protein eat"]
+    kwargs = {"model_path": tiny_model_path, "model_batch_size": 2, "model_max_characters": 500, "model_max_tokens": 32}
+    torch_model = VectorModel(**kwargs)
+    onnx_model = OnnxVectorModel(**kwargs, onnx_path=str(tmp_path / "onnx"))
+
+    assert not hasattr(onnx_model, "model")
+    assert onnx_model.pooling_mode == "mean" and onnx_model.normalize
+    np.testing.assert_allclose(onnx_model.process(texts), torch_model.process(texts), atol=1e-5)
+
+    # The export is keyed by the model and its pooling, the quantized model is exported next to it
+    model_name = tiny_model_path.strip("/").replace("/", "--")
+    export_dir = tmp_path / "onnx" / f"{model_name}--mean"
+    assert os.path.exists(export_dir / "model.onnx")
+    OnnxVectorModel(**kwargs, onnx_path=str(tmp_path / "onnx"), onnx_quantize=True)
+    assert sorted(os.listdir(export_dir)) == ["model.int8.onnx", "model.onnx"]
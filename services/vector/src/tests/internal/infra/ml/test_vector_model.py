@@ -3,14 +3,26 @@ import pytest
 from internal.infra.ml import VectorModel
 
 
+@pytest.fixture
+def mock_sentence_transformer(mocker, mock_vector_model):
+    mocker.patch("internal.infra.ml.vector_model.SentenceTransformer", return_value=mock_vector_model)
+    # One token per word keeps token lengths predictable
+    mock_vector_model.tokenizer.side_effect = lambda texts, **kwargs: {
+        "input_ids": [[0] * min(len(text.split()), kwargs["max_length"]) for text in texts]
+    }
+    mock_vector_model.encode.side_effect = lambda texts, **kwargs: [[float(len(text.split()))] for text in texts]
+    return mock_vector_model
+
+
 @pytest.mark.vector_model
-def test_vector_model_process_one_batch_size(mock_vector_model):
+def test_vector_model_process_one_batch_size(mocker, mock_vector_model):
+    mocker.patch("internal.infra.ml.vector_model.SentenceTransformer", return_value=mock_vector_model)
     model = VectorModel(model_path="", model_batch_size=32,
                         model_max_characters=500)
-    model.model = mock_vector_model
     texts = [
         "how much protein should a female eat",
     ]
+    mock_vector_model.tokenizer.return_value = {"input_ids": [[0] * 9]}
     mock_vector_model.encode.return_value = [[0.1, 0.2, 0.3]]
     results = model.process(texts)
     assert len(results) == 1
@@ -19,10 +31,10 @@ def test_vector_model_process_one_batch_size(mock_vector_model):
 
 
 @pytest.mark.vector_model
-def test_vector_model_process_multiple_batch_size(mock_vector_model):
+def test_vector_model_process_multiple_batch_size(mocker, mock_vector_model):
+    mocker.patch("internal.infra.ml.vector_model.SentenceTransformer", return_value=mock_vector_model)
     model = VectorModel(model_path="", model_batch_size=32,
                         model_max_characters=500)
-    model.model = mock_vector_model
 
     total = model.model_batch_size * 4 + 5
     texts = [
@@ -35,9 +47,50 @@ def test_vector_model_process_multiple_batch_size(mock_vector_model):
         [model.model_batch_size] * (total // model.model_batch_size) +
         [total % model.model_batch_size]
     ]
+    mock_vector_model.tokenizer.return_value = {"input_ids": [[0] * 9] * total}
     mock_vector_model.encode.side_effect = mock_responses
     results = model.process(texts)
     assert len(results) == total
     assert mock_vector_model.encode.call_count == 5
-    mock_vector_model.encode.assert_any_call(texts[:model.model_batch_size])
-    mock_vector_model.encode.assert_any_call(texts[:5])
+    mock_vector_model.encode.assert_any_call(texts[:model.model_batch_size], batch_size=model.model_batch_size)
+    mock_vector_model.encode.assert_any_call(texts[:5], batch_size=5)
+
+
+@pytest.mark.vector_model
+def test_vector_model_truncate_by_tokenizer(mock_sentence_transformer):
+    model = VectorModel(model_path="", model_batch_size=32,
+                        model_max_characters=500, model_max_tokens=128)
+
+    assert mock_sentence_transformer.max_seq_length == 128
+    model.process(["how much protein should a female eat"])
+    assert mock_sentence_transformer.tokenizer.call_args.kwargs["max_length"] == 128
+    assert mock_sentence_transformer.tokenizer.call_args.kwargs["truncation"] is True
+
+
+@pytest.mark.vector_model
+def test_vector_model_bucket_by_token_length(mock_sentence_transformer):
+    model = VectorModel(model_path="", model_batch_size=32,
+                        model_max_characters=500, model_token_budget=8)
+    short_text, long_text = "protein", "how much protein should a female eat"
+    texts = [short_text, long_text, short_text, long_text, short_text]
+
+    results = model.process(texts)
+
+    # Results keep request order while batches are formed longest first
+    assert results == [[1.0], [7.0], [1.0], [7.0], [1.0]]
+    batches = [call.args[0] for call in mock_sentence_transformer.encode.call_args_list]
+    assert batches == [[long_text], [long_text], [short_text] * 3]
+
+
+@pytest.mark.vector_model
+def test_vector_model_batch_within_token_budget(mock_sentence_transformer):
+    model = VectorModel(model_path="", model_batch_size=4,
+                        model_max_characters=500, model_token_budget=20)
+    texts = ["a b c d e"] * 3 + ["a b"] * 6
+
+    model.process(texts)
+
+    for call in mock_sentence_transformer.encode.call_args_list:
+        batch = call.args[0]
+        assert len(batch) <= model.model_batch_size
+        assert len(batch) * max(len(text.split()) for text in batch) <= model.model_token_budget
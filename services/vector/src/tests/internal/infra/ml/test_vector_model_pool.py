@@ -0,0 +1,59 @@
+import queue
+from typing import List
+
+import pytest
+
+from internal.domain.ml import IVectorModel
+from internal.infra.ml import VectorModelPool
+from internal.infra.ml import vector_model_pool as vector_model_pool_module
+
+
+class LengthVectorModel(IVectorModel):
+    def process(self, texts: List[str]) -> List[List[float]]:
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+@pytest.fixture
+def vector_model_pool():
+    pool = VectorModelPool(vector_model=LengthVectorModel(), workers=2, min_shard_size=2)
+    yield pool
+    pool.close()
+
+
+@pytest.mark.vector_model_pool
+def test_vector_model_pool_process_in_order(vector_model_pool):
+    texts = ["a" * i for i in range(1, 12)]
+
+    results = vector_model_pool.process(texts)
+
+    assert [list(result) for result in results] == [[float(i), 1.0] for i in range(1, 12)]
+
+
+@pytest.mark.vector_model_pool
+def test_vector_model_pool_process_empty(vector_model_pool):
+    assert vector_model_pool.process([]) == []
+
+
+@pytest.mark.vector_model_pool
+def test_vector_model_pool_make_shards(vector_model_pool):
+    assert vector_model_pool._make_shards(["a"] * 3) == [["a", "a"], ["a"]]
+    assert [len(shard) for shard in vector_model_pool._make_shards(["a"] * 9)] == [5, 4]
+
+
+@pytest.mark.vector_model_pool
+def test_vector_model_pool_split_cores():
+    assert VectorModelPool._split_cores([0, 1, 2, 3, 4], 2) == [[0, 1], [2, 3, 4]]
+    assert VectorModelPool._split_cores([0], 2) == [[0], [0]]
+
+
+@pytest.mark.vector_model_pool
+def test_vector_model_pool_init_worker_without_core_slice(mocker):
+    mocker.patch.object(vector_model_pool_module, "CORE_SLICE_TIMEOUT", 0.01)
+    set_num_threads = mocker.patch.object(vector_model_pool_module.torch, "set_num_threads")
+    set_affinity = mocker.patch.object(vector_model_pool_module.os, "sched_setaffinity", create=True)
+
+    vector_model_pool_module._init_worker(queue.Queue(), 0, 3)
+
+    set_affinity.assert_not_called()
+    set_num_threads.assert_called_once_with(3)
+